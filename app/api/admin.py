@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+import os
+
+from ..services.metrics import endpoint_report, slow_query_log
+from ..services.profiling import admin_access
+
+router = APIRouter(prefix="/admin", tags=["admin"], include_in_schema=False)
+
+async def require_admin(x_loca_admin_token: Optional[str] = Header(None)):
+    """관리자 토큰 확인 (LOCA_ADMIN_TOKEN이 없으면 관리 엔드포인트가 없는 것처럼 404)"""
+    if not admin_access.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not admin_access.check(x_loca_admin_token):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
+
+@router.get("/slow", dependencies=[Depends(require_admin)], response_class=ORJSONResponse)
+async def slow_report(
+    limit: int = Query(20, ge=1, le=100),
+    sort: str = Query("total", pattern="^(total|p99|max)$"),
+):
+    """이 워커의 최근 느린 엔드포인트/요청/SQL 보고서를 반환합니다.
+
+    엔드포인트는 sort 기준(total: 누적 시간, p99, max)으로 상위 limit개, 요청과 SQL 문은 오래 걸린 순서입니다.
+    집계 구간은 LOCA_SLOW_REPORT_WINDOW_S, SQL 기준 시간은 LOCA_SLOW_QUERY_MS이며 0이면 해당 항목이 비어 있습니다.
+    """
+    window = endpoint_report.window_seconds
+    endpoints, slowest = endpoint_report.report(limit, sort) if window else ([], [])
+    threshold = slow_query_log.threshold
+    return ORJSONResponse({
+        "pid": os.getpid(),
+        "window_s": window,
+        "slow_query_ms": threshold * 1000 if threshold is not None else 0,
+        "endpoints": endpoints,
+        "slowest_requests": slowest,
+        "slow_queries": slow_query_log.report(window or None, limit),
+    })
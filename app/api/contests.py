@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import logging
 import os
 import shutil
 from datetime import datetime
@@ -9,8 +11,21 @@ from ..database import get_db
 from ..models import Contest, ContestPhoto, User, ContestStatus
 from ..schemas.contest import ContestCreate, ContestResponse, ContestUpdate
 from ..schemas.contest_photo import ContestPhotoCreate, ContestPhotoResponse
+from ..services.admission import run_upload_task, upload_user_slot
+from ..services.contest_screening import contest_screener
+from ..services import contest_summaries
+from ..services.coordination import coordinator
+from ..services.entity_cache import USERS_CACHE, user_cache
+from ..services.events import contest_topic, event_broker
+from ..services.file_gc import file_reaper
+from ..services.ingest import ImageIngestError, ingest_image
+from ..services.serialization import (
+    CONTEST_PHOTO_COLUMNS, contest_photo_rows_to_dicts, contest_rows_to_dicts, query_contests,
+)
+from ..services.storage import object_store
 
 router = APIRouter(prefix="/contests", tags=["contests"])
+logger = logging.getLogger(__name__)
 
 # 업로드 디렉토리 설정
 UPLOAD_DIR = "uploads"
@@ -49,10 +64,10 @@ def migrate_existing_contest_photos(db: Session):
                         # 데이터베이스 경로 업데이트
                         contest_photo.image_path = new_file_path
                         db.commit()
-                        print(f"공모 사진 마이그레이션 완료: {filename} -> {new_file_path}")
+                        logger.info("공모 사진 마이그레이션 완료: %s -> %s", filename, new_file_path)
                         
     except Exception as e:
-        print(f"공모 사진 마이그레이션 중 오류: {e}")
+        logger.error("공모 사진 마이그레이션 중 오류: %s", e)
         db.rollback()
 
 @router.post("/", response_model=ContestResponse)
@@ -64,7 +79,7 @@ async def create_contest(
     """공모를 생성합니다."""
     
     # 유저 존재 확인
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_cache.get(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다.")
     
@@ -84,6 +99,8 @@ async def create_contest(
     )
     
     db.add(contest)
+    db.flush()
+    contest_summaries.create_summary(db, contest.id)
     db.commit()
     db.refresh(contest)
     
@@ -92,7 +109,7 @@ async def create_contest(
         photo_count=0
     )
 
-@router.get("/", response_model=List[ContestResponse])
+@router.get("/", response_model=List[ContestResponse], response_class=ORJSONResponse)
 async def get_contests(
     status: Optional[str] = None,
     user_id: Optional[int] = None,
@@ -100,8 +117,8 @@ async def get_contests(
     offset: int = 0,
     db: Session = Depends(get_db)
 ):
-    """공모 목록을 조회합니다."""
-    query = db.query(Contest)
+    """공모 목록을 조회합니다. (참여 사진/참여자 수, 마지막 참여 시각, 미리보기/선정 사진 썸네일 포함)"""
+    query = query_contests(db)
     
     if status:
         query = query.filter(Contest.status == ContestStatus(status))
@@ -109,19 +126,11 @@ async def get_contests(
     if user_id:
         query = query.filter(Contest.user_id == user_id)
     
-    contests = query.order_by(Contest.created_at.desc()).offset(offset).limit(limit).all()
+    rows = query.order_by(Contest.created_at.desc()).offset(offset).limit(limit).all()
     
-    result = []
-    for contest in contests:
-        photo_count = db.query(ContestPhoto).filter(ContestPhoto.contest_id == contest.id).count()
-        result.append(ContestResponse(
-            **contest.__dict__,
-            photo_count=photo_count
-        ))
-    
-    return result
+    return ORJSONResponse(contest_rows_to_dicts(db, rows))
 
-@router.get("/applied", response_model=List[ContestResponse])
+@router.get("/applied", response_model=List[ContestResponse], response_class=ORJSONResponse)
 async def get_applied_contests(
     user_id: int,
     limit: int = 20,
@@ -130,40 +139,27 @@ async def get_applied_contests(
 ):
     """특정 유저가 사진을 제출하여 지원한 공모 목록을 조회합니다."""
     # 유저 존재 확인
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_cache.get(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다.")
 
     # 해당 유저가 제출한 사진들의 공모 ID 목록 (중복 제거)
     subquery = db.query(ContestPhoto.contest_id).filter(ContestPhoto.user_id == user_id).distinct().subquery()
 
-    contests = db.query(Contest).filter(Contest.id.in_(subquery)).order_by(Contest.created_at.desc()).offset(offset).limit(limit).all()
-
-    result: List[ContestResponse] = []
-    for contest in contests:
-        photo_count = db.query(ContestPhoto).filter(ContestPhoto.contest_id == contest.id).count()
-        result.append(ContestResponse(
-            **contest.__dict__,
-            photo_count=photo_count
-        ))
+    rows = query_contests(db).filter(Contest.id.in_(subquery)).order_by(Contest.created_at.desc()).offset(offset).limit(limit).all()
 
-    return result
+    return ORJSONResponse(contest_rows_to_dicts(db, rows))
 
-@router.get("/{contest_id}", response_model=ContestResponse)
+@router.get("/{contest_id}", response_model=ContestResponse, response_class=ORJSONResponse)
 async def get_contest(contest_id: int, db: Session = Depends(get_db)):
     """특정 공모를 조회합니다."""
-    contest = db.query(Contest).filter(Contest.id == contest_id).first()
-    if not contest:
+    row = query_contests(db).filter(Contest.id == contest_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="공모를 찾을 수 없습니다.")
     
-    photo_count = db.query(ContestPhoto).filter(ContestPhoto.contest_id == contest.id).count()
-    
-    return ContestResponse(
-        **contest.__dict__,
-        photo_count=photo_count
-    )
+    return ORJSONResponse(contest_rows_to_dicts(db, [row])[0])
 
-@router.post("/{contest_id}/photos", response_model=ContestPhotoResponse)
+@router.post("/{contest_id}/photos", response_model=ContestPhotoResponse, dependencies=[Depends(upload_user_slot)])
 async def submit_contest_photo(
     contest_id: int,
     file: UploadFile = File(...),
@@ -186,21 +182,21 @@ async def submit_contest_photo(
         raise HTTPException(status_code=400, detail="마감된 공모입니다.")
     
     # 유저 존재 확인
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_cache.get(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다.")
     
-    # 파일 저장
-    contest_upload_dir = get_contest_upload_dir(contest_id)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"photo_{user_id}_{timestamp}_{file.filename}"
-    file_path = os.path.join(contest_upload_dir, filename)
+    file_content = await file.read()
+    if len(file_content) == 0:
+        raise HTTPException(status_code=400, detail="빈 파일입니다.")
     
+    # 한 번만 디코딩해 EXIF 위치를 읽고, 회전 적용과 메타데이터 제거를 한 저장용 바이트를 만듦
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"파일 저장 중 오류: {str(e)}")
+        ingested = await run_upload_task(ingest_image, file_content, file.filename)
+    except ImageIngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if latitude is None and longitude is None and ingested.latitude is not None:
+        latitude, longitude = ingested.latitude, ingested.longitude
     
     # 공모 사진 데이터베이스에 저장
     contest_photo_data = ContestPhotoCreate(
@@ -211,46 +207,61 @@ async def submit_contest_photo(
         description=description
     )
     
-    contest_photo = ContestPhoto(
-        **contest_photo_data.dict(),
-        user_id=user_id,
-        image_path=file_path
-    )
+    # 내용 해시 기반 경로에 파일 저장 후 공모 사진 저장 (참조 수와 공모 카드 집계도 같은 트랜잭션에서 반영)
+    # 저장소 참조 수 UPSERT부터 커밋까지 한 번의 업로드 스레드 작업으로 처리해 쓰기 잠금을 await 너머로 쥐지 않음
+    def save_contest_photo() -> ContestPhoto:
+        file_path = object_store.store(db, ingested.data, ingested.filename, ingested.content_type)
+        contest_photo = ContestPhoto(
+            **contest_photo_data.dict(),
+            user_id=user_id,
+            image_path=file_path
+        )
+        db.add(contest_photo)
+        db.flush()
+        contest_summaries.add_submission(db, contest_photo)
+        db.commit()
+        db.refresh(contest_photo)
+        return contest_photo
     
-    db.add(contest_photo)
-    db.commit()
-    db.refresh(contest_photo)
+    try:
+        contest_photo = await run_upload_task(save_contest_photo)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"파일 저장 중 오류: {str(e)}")
     
-    return ContestPhotoResponse(
+    response = ContestPhotoResponse(
         **contest_photo.__dict__,
         user_nickname=user.nickname
     )
+    # 공모를 구독 중인 클라이언트에 새 참여 사진 알림
+    event_broker.publish(contest_topic(contest_id), "contest.photo_submitted", response.model_dump())
+    # AI 설명과 관련도 평가는 응답 후 백그라운드에서 진행
+    contest_screener.notify()
+    return response
 
-@router.get("/{contest_id}/photos", response_model=List[ContestPhotoResponse])
+@router.get("/{contest_id}/photos", response_model=List[ContestPhotoResponse], response_class=ORJSONResponse)
 async def get_contest_photos(
     contest_id: int,
+    sort: str = Query("relevance", pattern="^(relevance|recent)$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
-    """공모에 제출된 사진들을 조회합니다."""
+    """공모에 제출된 사진들을 조회합니다. (sort=relevance: AI 관련도순, 심사 전 사진은 뒤에 / recent: 제출 최신순)"""
     
     # 공모 존재 확인
-    contest = db.query(Contest).filter(Contest.id == contest_id).first()
+    contest = db.query(Contest.id).filter(Contest.id == contest_id).first()
     if not contest:
         raise HTTPException(status_code=404, detail="공모를 찾을 수 없습니다.")
     
-    contest_photos = db.query(ContestPhoto).filter(
-        ContestPhoto.contest_id == contest_id
-    ).order_by(ContestPhoto.submitted_at.desc()).all()
-    
-    result = []
-    for photo in contest_photos:
-        user = db.query(User).filter(User.id == photo.user_id).first()
-        result.append(ContestPhotoResponse(
-            **photo.__dict__,
-            user_nickname=user.nickname if user else ""
-        ))
+    query = db.query(*CONTEST_PHOTO_COLUMNS).filter(ContestPhoto.contest_id == contest_id)
+    if sort == "relevance":
+        query = query.order_by(ContestPhoto.relevance_score.desc().nulls_last(), ContestPhoto.id.desc())
+    else:
+        query = query.order_by(ContestPhoto.submitted_at.desc())
+    rows = query.offset(offset).limit(limit).all()
     
-    return result
+    return ORJSONResponse(contest_photo_rows_to_dicts(db, rows))
 
 @router.put("/{contest_id}/select")
 async def select_contest_photo(
@@ -297,8 +308,16 @@ async def select_contest_photo(
     if winner:
         winner.points += contest.points  # 우승자 포인트 지급
     
+    contest_summaries.set_winner(db, contest_id, photo_id)
     db.commit()
-    
+    # 모든 워커의 유저 캐시에서 주최자와 우승자의 바뀐 포인트 반영
+    coordinator.invalidate(USERS_CACHE, ids=[contest_owner.id] + ([winner.id] if winner else []))
+    
+    event_broker.publish(contest_topic(contest_id), "contest.completed", {
+        "contest_id": contest_id,
+        "selected_photo_id": photo_id,
+        "completed_at": contest.completed_at,
+    })
     return {"message": "사진이 선택되었고 포인트가 지급되었습니다."}
 
 @router.delete("/{contest_id}")
@@ -324,20 +343,22 @@ async def delete_contest(
     
     # 공모에 제출된 사진들 삭제
     contest_photos = db.query(ContestPhoto).filter(ContestPhoto.contest_id == contest_id).all()
+    released_keys = []
     for photo in contest_photos:
-        # 파일 삭제
-        if os.path.exists(photo.image_path):
-            os.remove(photo.image_path)
+        # 이미지 참조 해제
+        released_key = object_store.release(db, photo.image_path)
+        if released_key:
+            released_keys.append(released_key)
         # 데이터베이스에서 삭제
         db.delete(photo)
     
-    # 공모 디렉토리 삭제
-    contest_dir = get_contest_upload_dir(contest_id)
-    if os.path.exists(contest_dir):
-        shutil.rmtree(contest_dir)
-    
-    # 공모 삭제
+    # 공모 요약과 공모 삭제
+    contest_summaries.remove_summary(db, contest_id)
     db.delete(contest)
     db.commit()
     
+    # 커밋 후에 더 이상 참조되지 않는 파일과 이전 방식의 공모 디렉토리는 백그라운드에서 삭제
+    contest_dir = os.path.join(CONTESTS_DIR, str(contest_id))
+    file_reaper.discard(released_keys, [contest_dir] if os.path.isdir(contest_dir) else [])
+    
     return {"message": "공모가 성공적으로 삭제되었습니다."}
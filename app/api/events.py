@@ -0,0 +1,93 @@
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from typing import List
+import asyncio
+
+import orjson
+
+from ..services.events import (
+    EVENT_MAX_TOPICS, EventStreamResponse, contest_topic, event_broker, keyword_topic, photo_topic,
+)
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# 이벤트가 없을 때 연결 유지를 위해 보내는 주기 (초)
+HEARTBEAT_SECONDS = 15.0
+
+_TOPIC_PREFIXES = ("keyword:", "contest:", "photo:")
+
+def _topics(keyword_id: List[int], contest_id: List[int], photo_id: List[int]) -> List[str]:
+    topics = ([keyword_topic(i) for i in keyword_id] + [contest_topic(i) for i in contest_id]
+              + [photo_topic(i) for i in photo_id])
+    if not topics:
+        raise HTTPException(status_code=400, detail="구독할 keyword_id, contest_id, photo_id 중 하나 이상이 필요합니다.")
+    if len(topics) > EVENT_MAX_TOPICS:
+        raise HTTPException(status_code=400, detail=f"한 연결에서 최대 {EVENT_MAX_TOPICS}개 토픽까지 구독할 수 있습니다.")
+    return topics
+
+@router.get("/stream")
+async def stream_events(
+    keyword_id: List[int] = Query([], description="새 사진을 받을 키워드 ID"),
+    contest_id: List[int] = Query([], description="참여 사진/선정 결과를 받을 공모 ID"),
+    photo_id: List[int] = Query([], description="좋아요 변화를 받을 사진 ID"),
+):
+    """Server-Sent Events로 구독한 토픽의 이벤트를 받습니다.
+
+    이벤트 종류: photo.created, photo.likes(delta), contest.photo_submitted, contest.completed.
+    연결이 이벤트를 따라오지 못하면 resync 이벤트를 보내며, 이때는 목록을 다시 조회해야 합니다.
+    """
+    subscription = event_broker.subscribe(_topics(keyword_id, contest_id, photo_id))
+    return EventStreamResponse(subscription, event_broker, HEARTBEAT_SECONDS, headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # 프록시(nginx) 버퍼링 비활성화
+    })
+
+@router.websocket("/ws")
+async def websocket_events(websocket: WebSocket):
+    """WebSocket으로 이벤트를 받습니다.
+
+    클라이언트는 {"subscribe": ["keyword:1", "photo:3"]}, {"unsubscribe": [...]} 를 보내 토픽을 바꾸고,
+    서버는 {"type": ..., "topic": ..., ...} 형태로 이벤트를 보냅니다.
+    """
+    await websocket.accept()
+    subscription = event_broker.subscribe(())
+
+    async def send(payload: dict):
+        await websocket.send_text(orjson.dumps(payload).decode())
+
+    async def receive_commands():
+        while True:
+            try:
+                message = orjson.loads(await websocket.receive_text())
+            except orjson.JSONDecodeError:
+                message = None
+            if not isinstance(message, dict):
+                await send({"type": "error", "detail": "JSON 객체 형식이 아닙니다."})
+                continue
+            add = {t for t in message.get("subscribe", []) if isinstance(t, str) and t.startswith(_TOPIC_PREFIXES)}
+            remove = {t for t in message.get("unsubscribe", []) if isinstance(t, str)}
+            if len((subscription.topics | add) - remove) > EVENT_MAX_TOPICS:
+                await send({"type": "error", "detail": f"한 연결에서 최대 {EVENT_MAX_TOPICS}개 토픽까지 구독할 수 있습니다."})
+                continue
+            event_broker.update(subscription, add=add, remove=remove)
+            await send({"type": "subscribed", "topics": sorted(subscription.topics)})
+
+    async def send_events():
+        while not subscription.closed:
+            events, lagged = await subscription.next_batch(HEARTBEAT_SECONDS)
+            if lagged:
+                await send({"type": "resync"})
+            for event_type, topic, data in events:
+                await send({"type": event_type, "topic": topic, **data})
+
+    receiver = asyncio.ensure_future(receive_commands())
+    sender = asyncio.ensure_future(send_events())
+    try:
+        done, _ = await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+    finally:
+        receiver.cancel()
+        sender.cancel()
+        event_broker.unsubscribe(subscription)
@@ -0,0 +1,116 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Dict, Optional
+import hashlib
+import mimetypes
+import os
+
+from ..services.archive import access_tracker
+from ..services.image_serving import (
+    BROWSER_UNSUPPORTED_EXTENSIONS, FALLBACK_FORMAT, IMMUTABLE_CACHE_CONTROL, LEGACY_CACHE_CONTROL,
+    TRANSCODABLE_EXTENSIONS, ImageFileResponse, content_etag, file_etag, image_variants,
+    negotiate_format, snap_width,
+)
+from ..services.metrics import metrics
+from ..services.storage import storage, is_content_addressed, is_pack_file, pack_store
+
+router = APIRouter(prefix="/uploads", tags=["files"])
+
+
+def _media_type(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+async def _packed_response(key: str, headers: Dict[str, str], method: str) -> Optional[ImageFileResponse]:
+    """보관 작업이 팩 파일로 옮긴 원본을 팩의 해당 구간으로 서빙합니다. 팩에 없으면 None."""
+    if pack_store is None:
+        return None
+    location = await run_in_threadpool(pack_store.locate, key)
+    if location is None:
+        return None
+    metrics.inc("loca_packed_reads_total")
+    if is_content_addressed(key):
+        # 재압축해 보관한 원본은 바이트가 달라졌으므로 다른 ETag
+        etag = content_etag(key, "archived" if location.recompressed else "orig")
+        return ImageFileResponse(
+            location.path, location.content_type or _media_type(key), etag, IMMUTABLE_CACHE_CONTROL, headers,
+            method, vary="Accept", offset=location.offset, length=location.length, mtime=location.packed_at)
+    base = f"{key}-{location.offset}-{location.length}".encode()
+    etag = '"' + hashlib.md5(base, usedforsecurity=False).hexdigest() + '"'
+    return ImageFileResponse(
+        location.path, location.content_type or _media_type(key), etag, LEGACY_CACHE_CONTROL, headers, method,
+        offset=location.offset, length=location.length, mtime=location.packed_at)
+
+
+@router.api_route("/{key:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def get_uploaded_file(key: str, request: Request, w: Optional[int] = None):
+    """업로드된 이미지를 서빙합니다.
+
+    내용 해시 기반 URL은 immutable 캐시 헤더와 함께 보내고, `w`(가로 크기)와 Accept 헤더
+    (WebP/AVIF)에 맞춘 변형을 만들어 디스크에 캐시합니다. Range/조건부 요청을 지원합니다.
+    보관 작업이 팩 파일로 옮긴 원본은 (키와 같은 형식으로 재압축되어 있으므로) 팩의 해당 구간을 그대로
+    보내며, 원본 크기의 형식 변환본은 캐시하지 않습니다. 가로 크기를 지정한 변형은 팩에서 읽어 만듭니다.
+    """
+    if ".." in key.split("/") or is_pack_file(key):
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+    
+    headers = {name: value for name, value in request.headers.items()}
+    
+    if is_content_addressed(key):
+        # 보관 작업이 오래 조회되지 않은 파일을 고를 수 있도록 조회 시각 기록 (몇 분마다 모아서)
+        access_tracker.touch(key)
+        ext = os.path.splitext(key)[1].lower()
+        path = None
+        fmt = None
+        if ext in TRANSCODABLE_EXTENSIONS:
+            fmt = negotiate_format(request.headers.get("accept"))
+            if fmt is None and ext in BROWSER_UNSUPPORTED_EXTENSIONS:
+                fmt = FALLBACK_FORMAT
+            if fmt is not None and ext == "." + fmt[1]:
+                fmt = None
+            width = snap_width(w)
+            if fmt or width:
+                path = await run_in_threadpool(image_variants.variant_path, key, width, fmt)
+                if path is not None:
+                    variant = f"w{width or 0}-{fmt[1] if fmt else ext.lstrip('.')}"
+                    return ImageFileResponse(
+                        path, fmt[0] if fmt else _media_type(key), content_etag(key, variant),
+                        IMMUTABLE_CACHE_CONTROL, headers, request.method, vary="Accept")
+        path = await run_in_threadpool(image_variants.original_path, key)
+        if path is None:
+            # 팩에 보관된 원본은 키와 같은 형식이므로 그대로 보내고, 브라우저가 표시하지 못하는 형식만 캐시 없이 변환
+            if fmt is not None and ext in BROWSER_UNSUPPORTED_EXTENSIONS:
+                data = await run_in_threadpool(image_variants.transcode_packed, key, fmt)
+                if data is not None:
+                    return Response(data, media_type=fmt[0], headers={
+                        "ETag": content_etag(key, f"archived-{fmt[1]}"),
+                        "Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept"})
+            response = await _packed_response(key, headers, request.method)
+            if response is None:
+                raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+            return response
+        return ImageFileResponse(
+            path, _media_type(key), content_etag(key, "orig"),
+            IMMUTABLE_CACHE_CONTROL, headers, request.method, vary="Accept")
+    
+    # 내용 해시 방식 이전에 저장된 파일
+    try:
+        path = storage.local_path(key)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+    if path is not None:
+        try:
+            stat_result = await run_in_threadpool(os.stat, path)
+        except FileNotFoundError:
+            response = await _packed_response(key, headers, request.method)
+            if response is None:
+                raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+            return response
+        return ImageFileResponse(
+            path, _media_type(key), file_etag(stat_result), LEGACY_CACHE_CONTROL, headers, request.method)
+    
+    if not await run_in_threadpool(storage.exists, key):
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+    return StreamingResponse(storage.iter_chunks(key), media_type=_media_type(key),
+                             headers={"Cache-Control": LEGACY_CACHE_CONTROL})
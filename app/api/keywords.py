@@ -7,6 +7,7 @@ from datetime import datetime
 from ..database import get_db
 from ..models import Keyword
 from ..schemas.keyword import KeywordResponse
+from ..services.entity_cache import keyword_cache
 
 router = APIRouter(prefix="/keywords", tags=["keywords"])
 
@@ -64,7 +65,7 @@ async def get_time_based_keyword(
 @router.get("/{keyword_id}", response_model=KeywordResponse)
 async def get_keyword(keyword_id: int, db: Session = Depends(get_db)):
     """특정 키워드를 조회합니다."""
-    keyword = db.query(Keyword).filter(Keyword.id == keyword_id).first()
+    keyword = keyword_cache.get(db, keyword_id)
     if not keyword:
         raise HTTPException(status_code=404, detail="키워드를 찾을 수 없습니다.")
     
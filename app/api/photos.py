@@ -1,16 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import and_, exists, func, or_
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import logging
 import os
 import shutil
-from datetime import datetime
+from datetime import datetime, timezone
 
-from ..database import get_db
+from ..database import SessionLocal, get_db
 from ..models import Photo, User, Keyword, Like
-from ..schemas.photo import PhotoResponse, PhotoCreate
+from ..schemas.photo import DistrictCount, PhotoClusters, PhotoResponse, PhotoCreate
+from ..services.admission import run_upload_task, upload_user_slot
 from ..services.ai_service import ai_service
+from ..services import clusters
+from ..services.entity_cache import keyword_cache, user_cache
+from ..services.events import event_broker, keyword_topic, photo_topic
+from ..services.file_gc import file_reaper
+from ..services.geocoder import district_geocoder
+from ..services.ingest import ImageIngestError, ingest_image
+from ..services.like_buffer import like_buffer, LikeOutcome
+from ..services.metrics import metrics
+from ..services.recommend import recommend_photo_ids, record_like_changes
+from ..services.serialization import PHOTO_COLUMNS, photo_row, photo_rows_to_dicts
+from ..services.storage import object_store
+from ..services.tags import delete_photo_tags, replace_photo_tags
 
 router = APIRouter(prefix="/photos", tags=["photos"])
+logger = logging.getLogger(__name__)
 
 # 업로드 디렉토리 설정
 UPLOAD_DIR = "uploads"
@@ -49,88 +66,53 @@ def migrate_existing_photos(db: Session):
                         # 데이터베이스 경로 업데이트
                         photo.image_path = new_file_path
                         db.commit()
-                        print(f"파일 마이그레이션 완료: {filename} -> {new_file_path}")
+                        logger.info("파일 마이그레이션 완료: %s -> %s", filename, new_file_path)
                         
     except Exception as e:
-        print(f"파일 마이그레이션 중 오류: {e}")
+        logger.error("파일 마이그레이션 중 오류: %s", e)
         db.rollback()
 
-@router.post("/upload", response_model=PhotoResponse)
-async def upload_photo(
-    file: UploadFile = File(...),
-    user_id: int = Form(...),
-    keyword_id: int = Form(...),
-    location: Optional[str] = Form(None),
-    latitude: Optional[float] = Form(None),
-    longitude: Optional[float] = Form(None),
-    db: Session = Depends(get_db)
-):
-    """사진을 업로드하고 AI 분석을 수행합니다."""
-    
-    print(f"업로드 요청 받음: user_id={user_id}, keyword_id={keyword_id}")
-    print(f"파일 정보: filename={file.filename}, content_type={file.content_type}")
-    print(f"위치 정보: location={location}, lat={latitude}, lng={longitude}")
-    
-    # 유저와 키워드 존재 확인
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        print(f"유저를 찾을 수 없음: user_id={user_id}")
-        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다.")
-    
-    keyword = db.query(Keyword).filter(Keyword.id == keyword_id).first()
-    if not keyword:
-        print(f"키워드를 찾을 수 없음: keyword_id={keyword_id}")
-        raise HTTPException(status_code=404, detail="키워드를 찾을 수 없습니다.")
-    
-    print(f"유저와 키워드 확인 완료: user={user.nickname}, keyword={keyword.keyword}")
-    
-    # 키워드별 디렉토리에 파일 저장
-    keyword_upload_dir = get_keyword_upload_dir(keyword_id)
-    print(f"업로드 디렉토리: {keyword_upload_dir}")
-    print(f"디렉토리 존재 여부: {os.path.exists(keyword_upload_dir)}")
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{user_id}_{timestamp}_{file.filename}"
-    file_path = os.path.join(keyword_upload_dir, filename)
-    print(f"최종 파일 경로: {file_path}")
-    
+def save_analysis(photo_id: int, analysis) -> bool:
+    """새로운 세션으로 AI 분석 결과(설명 + 태그)를 저장합니다. (업로드 전용 스레드에서 호출)"""
+    update_db = SessionLocal()
     try:
-        # 파일 내용을 먼저 읽어서 저장
-        file_content = await file.read()
-        print(f"파일 내용 읽기 완료: {len(file_content)} bytes")
-        
-        # 파일 내용이 비어있는지 확인
-        if len(file_content) == 0:
-            print("오류: 파일 내용이 비어있습니다!")
-            raise HTTPException(status_code=400, detail="빈 파일입니다.")
-        
-        # 파일 저장
-        with open(file_path, "wb") as buffer:
-            buffer.write(file_content)
-        
-        # 파일 저장 확인
-        if os.path.exists(file_path):
-            file_size = os.path.getsize(file_path)
-            print(f"파일 저장 완료: {file_path}, 크기: {file_size} bytes")
-            
-            if file_size == 0:
-                print("경고: 저장된 파일이 비어있습니다!")
-                raise HTTPException(status_code=500, detail="파일 저장에 실패했습니다.")
-            elif file_size != len(file_content):
-                print(f"경고: 저장된 파일 크기가 다릅니다! 읽은 크기: {len(file_content)}, 저장된 크기: {file_size}")
-        else:
-            print(f"오류: 파일이 저장되지 않았습니다: {file_path}")
-            raise HTTPException(status_code=500, detail="파일 저장에 실패했습니다.")
-            
-    except Exception as e:
-        import traceback
-        error_traceback = traceback.format_exc()
-        print(f"파일 저장 중 오류: {e}")
-        print(f"에러 상세 정보: {error_traceback}")
-        raise HTTPException(status_code=500, detail=f"파일 저장 중 오류: {str(e)}")
-    
-    # 사진 데이터베이스에 저장 (데이터베이스 잠금 방지)
+        update_photo = update_db.query(Photo).filter(Photo.id == photo_id).first()
+        if update_photo:
+            update_photo.ai_description = analysis.description
+            update_photo.ai_model = ai_service.model_name
+            update_photo.prompt_version = ai_service.prompt_version
+            update_photo.analyzed_at = datetime.now(timezone.utc)
+            replace_photo_tags(update_db, photo_id, analysis)
+            update_db.commit()
+            return True
+    except Exception:
+        update_db.rollback()
+        logger.exception("AI 분석 결과 업데이트 중 오류: photo_id=%s", photo_id)
+    finally:
+        update_db.close()
+    return False
+
+async def create_uploaded_photo(db: Session, data: bytes, filename: Optional[str], content_type: Optional[str],
+                                user_id: int, keyword_id: int, location: Optional[str] = None,
+                                latitude: Optional[float] = None, longitude: Optional[float] = None) -> dict:
+    """업로드된 파일 내용으로 사진을 만들고 응답용 dict를 반환합니다.
+
+    한 번에 받은 업로드(POST /photos/upload)와 이어 올리기 업로드의 완료(POST /upload-sessions/{id}/complete)가
+    같이 쓰는 경로로, 이미지 처리/저장/클러스터 반영/AI 분석/새 사진 알림을 모두 여기서 합니다.
+    유저와 키워드 존재 확인은 호출한 쪽에서 합니다. db 세션은 AI 분석 전에 반납됩니다.
+    """
+    # 한 번만 디코딩해 EXIF 위치/촬영 시각을 읽고, 회전 적용과 메타데이터 제거를 한 저장용 바이트를 만듦
     try:
+        ingested = await run_upload_task(ingest_image, data, filename)
+    except ImageIngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if latitude is None and longitude is None and ingested.latitude is not None:
+        latitude, longitude = ingested.latitude, ingested.longitude
+    
+    # 내용 해시 기반 경로에 파일 저장 후 사진 데이터베이스에 저장 (참조 수도 같은 트랜잭션에서 반영)
+    def save_photo() -> Photo:
+        file_path = object_store.store(db, ingested.data, ingested.filename, ingested.content_type)
+        
         photo_data = PhotoCreate(
             user_id=user_id,
             keyword_id=keyword_id,
@@ -141,95 +123,99 @@ async def upload_photo(
         
         photo = Photo(
             **photo_data.dict(),
-            image_path=file_path
+            image_path=file_path,
+            district_id=district_geocoder.district_id(latitude, longitude),
+            geo_cell=clusters.geo_cell(latitude, longitude),
+            captured_at=ingested.captured_at
         )
         
         db.add(photo)
+        db.flush()
+        # 지도 클러스터 집계도 같은 트랜잭션에서 반영
+        clusters.add_photo(db, photo.id, latitude, longitude)
         db.commit()
         db.refresh(photo)
-        print(f"데이터베이스 저장 완료: photo_id={photo.id}")
-        
+        # AI 분석을 기다리는 동안 DB 연결을 쥐고 있지 않도록 반납 (로드된 값은 그대로 사용)
+        db.close()
+        return photo
+    
+    try:
+        photo = await run_upload_task(save_photo)
     except Exception as db_error:
         db.rollback()
-        print(f"데이터베이스 저장 중 오류: {db_error}")
-        # 파일도 삭제
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        logger.exception("사진 저장 중 오류")
+        # 저장된 파일은 다른 사진과 공유될 수 있으므로 여기서 지우지 않습니다.
         raise HTTPException(status_code=500, detail=f"데이터베이스 저장 중 오류: {str(db_error)}")
+    logger.debug("사진 저장 완료: %s, 크기: %d bytes", photo.image_path, len(ingested.data))
     
-    # AI 분석 - 파일 경로 사용 (ai-test.py와 동일한 방식)
+    # AI 분석 - 업로드 처리 단계에서 디코딩한 이미지를 그대로 사용 (저장소 종류와 무관)
     try:
-        print(f"AI 분석 시작: {file_path}")
+        analysis = await ai_service.analyze_image(ingested.image)
         
-        # 파일 존재 및 크기 확인
-        if not os.path.exists(file_path):
-            print(f"AI 분석 실패: 파일이 존재하지 않음 - {file_path}")
-            ai_description = "파일을 찾을 수 없어 분석할 수 없습니다."
-        else:
-            file_size = os.path.getsize(file_path)
-            print(f"AI 분석 대상 파일 크기: {file_size} bytes")
-            
-            if file_size == 0:
-                print("AI 분석 실패: 파일이 비어있음")
-                ai_description = "빈 파일로 분석할 수 없습니다."
-            else:
-                # ai-test.py와 동일한 방식: 파일 경로로 AI 분석
-                ai_description = await ai_service.analyze_image_from_path(file_path)
-                print(f"AI 분석 결과: {ai_description}")
-        
-        if ai_description:
-            # 새로운 세션으로 AI 분석 결과 업데이트
-            from ..database import SessionLocal
-            update_db = SessionLocal()
-            try:
-                update_photo = update_db.query(Photo).filter(Photo.id == photo.id).first()
-                if update_photo:
-                    update_photo.ai_description = ai_description
-                    update_db.commit()
-                    # 원래 세션의 객체도 업데이트
-                    photo.ai_description = ai_description
-                    print(f"AI 분석 결과 데이터베이스 업데이트 완료")
-            except Exception as update_error:
-                update_db.rollback()
-                print(f"AI 분석 결과 업데이트 중 오류: {update_error}")
-            finally:
-                update_db.close()
-    except Exception as e:
-        print(f"AI 분석 중 오류: {e}")
-        import traceback
-        print(f"AI 분석 오류 스택 트레이스: {traceback.format_exc()}")
+        if analysis and await run_upload_task(save_analysis, photo.id, analysis):
+            # 원래 세션의 객체도 업데이트
+            photo.ai_description = analysis.description
+    except Exception:
+        logger.exception("AI 분석 중 오류: photo_id=%s", photo.id)
     
-    # 좋아요 수 계산
-    like_count = db.query(Like).filter(Like.photo_id == photo.id).count()
-    
-    # 유저 닉네임 포함 및 image_path를 그대로 유지
-    user = db.query(User).filter(User.id == photo.user_id).first()
-    user_nickname = user.nickname if user else "알 수 없는 사용자"
-
-    image_url = photo.image_path if photo.image_path else None
-
-    photo_dict = photo.__dict__.copy()
-    photo_dict.pop('image_path', None)
+    result = photo_rows_to_dicts(db, [photo_row(photo)])[0]
+    # 해당 키워드를 구독 중인 클라이언트에 새 사진 알림
+    event_broker.publish(keyword_topic(photo.keyword_id), "photo.created", result)
+    return result
 
-    return PhotoResponse(
-        **photo_dict,
-        image_path=image_url,
-        user_nickname=user_nickname,
-        like_count=like_count
-    )
+@router.post("/upload", response_model=PhotoResponse, response_class=ORJSONResponse,
+             dependencies=[Depends(upload_user_slot)])
+async def upload_photo(
+    file: UploadFile = File(...),
+    user_id: int = Form(...),
+    keyword_id: int = Form(...),
+    location: Optional[str] = Form(None),
+    latitude: Optional[float] = Form(None),
+    longitude: Optional[float] = Form(None),
+    db: Session = Depends(get_db)
+):
+    """사진을 업로드하고 AI 분석을 수행합니다.
 
+    업로드 입장 제어(동시 처리 수, 대기열, 유저별 한도)를 통과한 요청만 여기까지 오며,
+    이미지 처리/파일 저장/DB 쓰기는 업로드 전용 스레드에서, AI 호출은 AI 전용 스레드에서 실행해
+    이벤트 루프와 조회 요청이 쓰는 스레드풀을 막지 않습니다.
+    """
+    
+    logger.debug("업로드 요청 받음: user_id=%s, keyword_id=%s, filename=%s, content_type=%s",
+                 user_id, keyword_id, file.filename, file.content_type)
+    
+    # 유저와 키워드 존재 확인 (캐시, 응답의 닉네임도 같은 캐시에서 가져옴)
+    user = user_cache.get(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다.")
+    
+    keyword = keyword_cache.get(db, keyword_id)
+    if not keyword:
+        raise HTTPException(status_code=404, detail="키워드를 찾을 수 없습니다.")
+    
+    # 파일 내용을 먼저 읽어서 저장
+    file_content = await file.read()
+    
+    # 파일 내용이 비어있는지 확인
+    if len(file_content) == 0:
+        raise HTTPException(status_code=400, detail="빈 파일입니다.")
+    
+    result = await create_uploaded_photo(db, file_content, file.filename, file.content_type,
+                                         user_id, keyword_id, location, latitude, longitude)
+    return ORJSONResponse(result)
 
 
-@router.get("/", response_model=List[PhotoResponse])
+@router.get("/", response_model=List[PhotoResponse], response_class=ORJSONResponse)
 async def get_photos(
     keyword_id: Optional[int] = None,
     user_id: Optional[int] = None,
+    district: Optional[str] = None,
     limit: int = 20,
     offset: int = 0,
     db: Session = Depends(get_db)
 ):
-    """사진 목록을 조회합니다."""
-    query = db.query(Photo)
+    """사진 목록을 조회합니다. (district: 행정구역 코드 또는 이름, 예: 30200, 유성구)"""
+    query = db.query(*PHOTO_COLUMNS)
     
     if keyword_id:
         query = query.filter(Photo.keyword_id == keyword_id)
@@ -237,93 +223,137 @@ async def get_photos(
     if user_id:
         query = query.filter(Photo.user_id == user_id)
     
-    photos = query.order_by(Photo.uploaded_at.desc()).offset(offset).limit(limit).all()
+    if district:
+        if not district_geocoder.enabled:
+            raise HTTPException(status_code=503, detail="행정구역 경계 데이터가 설정되지 않았습니다.")
+        found = district_geocoder.resolve(district)
+        if not found:
+            raise HTTPException(status_code=400, detail="알 수 없는 행정구역입니다.")
+        query = query.filter(Photo.district_id == found.id)
     
-    # 각 사진의 좋아요 수 계산 및 유저 정보 포함
-    result = []
-    for photo in photos:
-        like_count = db.query(Like).filter(Like.photo_id == photo.id).count()
-        
-        # 유저 정보 가져오기
-        user = db.query(User).filter(User.id == photo.user_id).first()
-        user_nickname = user.nickname if user else "알 수 없는 사용자"
-        
-        # 이미지 경로를 상대경로로 유지
-        image_url = photo.image_path if photo.image_path else None
-        
-        # photo.__dict__에서 image_path를 제거하고 새로운 image_url 사용
-        photo_dict = photo.__dict__.copy()
-        photo_dict.pop('image_path', None)
-        
-        result.append(PhotoResponse(
-            **photo_dict,
-            image_path=image_url,
-            user_nickname=user_nickname,
-            like_count=like_count
-        ))
+    rows = query.order_by(Photo.uploaded_at.desc()).offset(offset).limit(limit).all()
     
-    return result
+    # 좋아요 수와 유저 닉네임은 목록 전체에 대해 한 번씩만 조회
+    return ORJSONResponse(photo_rows_to_dicts(db, rows))
+
+@router.get("/clusters", response_model=PhotoClusters, response_class=ORJSONResponse)
+async def get_photo_clusters(
+    bbox: str = Query(..., description="화면 영역 west,south,east,north (경도,위도)", examples=["127.25,36.18,127.56,36.50"]),
+    zoom: int = Query(..., ge=0, le=22, description="지도 줌 단계"),
+    limit: int = Query(clusters.MAX_CLUSTER_CELLS, ge=1, le=clusters.MAX_CLUSTER_CELLS, description="최대 클러스터 수"),
+    db: Session = Depends(get_db)
+):
+    """지도 화면 영역의 사진 클러스터(사진 수, 중심점, 대표 사진 썸네일)를 반환합니다. (미리 집계된 줌별 격자)"""
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox는 west,south,east,north 형식이어야 합니다.")
+    if not (-180 <= west <= east <= 180 and -90 <= south <= north <= 90):
+        raise HTTPException(status_code=400, detail="bbox 범위가 올바르지 않습니다.")
+    return ORJSONResponse(clusters.query_clusters(db, west, south, east, north, zoom, limit))
+
+@router.get("/districts", response_model=List[DistrictCount], response_class=ORJSONResponse)
+async def get_district_counts(db: Session = Depends(get_db)):
+    """행정구역별 사진 수를 반환합니다. (좌표가 없거나 대전 밖인 사진은 제외, 경계 데이터가 없으면 빈 목록)"""
+    counts = dict(
+        db.query(Photo.district_id, func.count())
+        .filter(Photo.district_id.isnot(None))
+        .group_by(Photo.district_id)
+        .all()
+    )
+    return ORJSONResponse([
+        {"id": district.id, "name": district.name, "full_name": district.full_name,
+         "photo_count": counts.get(district.id, 0)}
+        for district in district_geocoder.districts()
+    ])
+
+@router.get("/for-you", response_model=List[PhotoResponse], response_class=ORJSONResponse)
+async def get_recommended_photos(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    before_id: Optional[int] = Query(None, description="최신 사진으로 채운 목록의 다음 페이지: 이전 응답의 X-Loca-Next-Before-Id (주면 offset 대신 사용)"),
+    db: Session = Depends(get_db)
+):
+    """유저의 좋아요 기록으로 추천 사진을 반환합니다. (함께 좋아요된 사진 기반, 부족하면 최신 사진으로 채움)
+
+    최신 사진으로 채운 페이지가 가득 차면 X-Loca-Next-Before-Id 헤더로 다음 페이지 위치를 알려 줍니다.
+    """
+    if not user_cache.get(db, user_id):
+        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다.")
+
+    anchor = None
+    if before_id is not None:
+        anchor = db.query(Photo.uploaded_at, Photo.id).filter(Photo.id == before_id).first()
+        if not anchor:
+            raise HTTPException(status_code=404, detail="사진을 찾을 수 없습니다.")
+        ranked, candidates = [], 0  # 추천 후보는 이미 다 보여 줌
+    else:
+        ranked, candidates, _ = recommend_photo_ids(db, user_id, limit, offset)
+    rows = []
+    if ranked:
+        by_id = {row.id: row for row in db.query(*PHOTO_COLUMNS).filter(Photo.id.in_(ranked)).all()}
+        rows = [by_id[photo_id] for photo_id in ranked if photo_id in by_id]
+        metrics.inc("loca_recommendations_total", {"source": "neighbors"})
+
+    headers = None
+    if len(rows) < limit:
+        # 좋아요 기록이 없거나 추천 후보가 모자라면 아직 좋아요하지 않은 최신 사진으로 채움
+        # 좋아요한 사진은 SQL에서 빼므로 오프셋(추천 후보를 다 쓴 뒤부터 적용)과 커서가 보여 줄 사진만 셉니다.
+        query = db.query(*PHOTO_COLUMNS).filter(
+            ~exists().where(Like.user_id == user_id, Like.photo_id == Photo.id)
+        ).order_by(Photo.uploaded_at.desc(), Photo.id.desc())
+        if ranked:
+            query = query.filter(Photo.id.notin_(ranked))
+        if anchor:
+            query = query.filter(or_(Photo.uploaded_at < anchor.uploaded_at,
+                                     and_(Photo.uploaded_at == anchor.uploaded_at, Photo.id < anchor.id)))
+        else:
+            query = query.offset(max(0, offset - candidates))
+        fallback = query.limit(limit - len(rows)).all()
+        rows.extend(fallback)
+        if fallback and len(rows) == limit:
+            headers = {"X-Loca-Next-Before-Id": str(fallback[-1].id)}
+        metrics.inc("loca_recommendations_total", {"source": "fallback"})
+
+    return ORJSONResponse(photo_rows_to_dicts(db, rows), headers=headers)
 
-@router.get("/{photo_id}", response_model=PhotoResponse)
+@router.get("/{photo_id}", response_model=PhotoResponse, response_class=ORJSONResponse)
 async def get_photo(photo_id: int, db: Session = Depends(get_db)):
     """특정 사진을 조회합니다."""
-    photo = db.query(Photo).filter(Photo.id == photo_id).first()
-    if not photo:
+    row = db.query(*PHOTO_COLUMNS).filter(Photo.id == photo_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="사진을 찾을 수 없습니다.")
     
-    like_count = db.query(Like).filter(Like.photo_id == photo.id).count()
-    
-    # 이미지 경로를 상대경로로 유지
-    image_url = photo.image_path if photo.image_path else None
-    
-    # photo.__dict__에서 image_path를 제거하고 새로운 image_url 사용
-    photo_dict = photo.__dict__.copy()
-    photo_dict.pop('image_path', None)
-    
-    return PhotoResponse(
-        **photo_dict,
-        image_path=image_url,
-        like_count=like_count
-    )
+    return ORJSONResponse(photo_rows_to_dicts(db, [row])[0])
 
 @router.post("/{photo_id}/like")
-async def like_photo(photo_id: int, user_id: int, db: Session = Depends(get_db)):
-    """사진에 좋아요를 추가합니다."""
-    # 사진 존재 확인
-    photo = db.query(Photo).filter(Photo.id == photo_id).first()
-    if not photo:
-        raise HTTPException(status_code=404, detail="사진을 찾을 수 없습니다.")
+async def like_photo(photo_id: int, user_id: int):
+    """사진에 좋아요를 추가합니다. (좋아요 버퍼를 통해 일괄 커밋)"""
+    outcome = await like_buffer.like(user_id, photo_id)
     
-    # 이미 좋아요를 눌렀는지 확인
-    existing_like = db.query(Like).filter(
-        Like.photo_id == photo_id,
-        Like.user_id == user_id
-    ).first()
-    
-    if existing_like:
+    if outcome is LikeOutcome.PHOTO_NOT_FOUND:
+        raise HTTPException(status_code=404, detail="사진을 찾을 수 없습니다.")
+    if outcome is LikeOutcome.ALREADY_LIKED:
         raise HTTPException(status_code=400, detail="이미 좋아요를 눌렀습니다.")
+    if outcome is not LikeOutcome.LIKED:
+        raise HTTPException(status_code=500, detail="좋아요 처리 중 오류가 발생했습니다.")
     
-    # 좋아요 추가
-    like = Like(photo_id=photo_id, user_id=user_id)
-    db.add(like)
-    db.commit()
-    
+    # 좋아요 수 변화량 알림 (전달 전에 쌓인 변화량은 구독자별로 합쳐짐)
+    event_broker.publish(photo_topic(photo_id), "photo.likes", {"photo_id": photo_id, "delta": 1})
     return {"message": "좋아요가 추가되었습니다."}
 
 @router.delete("/{photo_id}/like")
-async def unlike_photo(photo_id: int, user_id: int, db: Session = Depends(get_db)):
-    """사진의 좋아요를 취소합니다."""
-    like = db.query(Like).filter(
-        Like.photo_id == photo_id,
-        Like.user_id == user_id
-    ).first()
+async def unlike_photo(photo_id: int, user_id: int):
+    """사진의 좋아요를 취소합니다. (좋아요 버퍼를 통해 일괄 커밋)"""
+    outcome = await like_buffer.unlike(user_id, photo_id)
     
-    if not like:
+    if outcome is LikeOutcome.LIKE_NOT_FOUND:
         raise HTTPException(status_code=404, detail="좋아요를 찾을 수 없습니다.")
+    if outcome is not LikeOutcome.UNLIKED:
+        raise HTTPException(status_code=500, detail="좋아요 취소 중 오류가 발생했습니다.")
     
-    db.delete(like)
-    db.commit()
-    
+    event_broker.publish(photo_topic(photo_id), "photo.likes", {"photo_id": photo_id, "delta": -1})
     return {"message": "좋아요가 취소되었습니다."}
 
 @router.post("/migrate-existing")
@@ -344,24 +374,33 @@ async def delete_photo(photo_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="사진을 찾을 수 없습니다.")
     
     try:
-        # 파일 시스템에서 이미지 파일 삭제
-        if os.path.exists(photo.image_path):
-            os.remove(photo.image_path)
-            print(f"이미지 파일 삭제 완료: {photo.image_path}")
+        # 이미지 참조 해제 (다른 사진이 같은 파일을 쓰고 있으면 파일은 유지)
+        released_key = object_store.release(db, photo.image_path)
+        
+        # 태그 삭제
+        delete_photo_tags(db, photo_id)
         
-        # 좋아요 데이터 삭제
+        # 좋아요 데이터 삭제 (추천 이웃에서도 빠지도록 변경 기록)
         likes = db.query(Like).filter(Like.photo_id == photo_id).all()
         for like in likes:
             db.delete(like)
+        record_like_changes(db, [(like.user_id, like.photo_id) for like in likes])
         
-        # 사진 데이터 삭제
+        # 사진 데이터 삭제 (지도 클러스터 집계도 같은 트랜잭션에서 반영)
+        latitude, longitude = photo.latitude, photo.longitude
         db.delete(photo)
+        db.flush()
+        clusters.remove_photo(db, photo_id, latitude, longitude)
         db.commit()
         
-        print(f"사진 삭제 완료: photo_id={photo_id}")
+        # 커밋 후에 파일 삭제는 백그라운드에서 (실패해도 DB와 어긋나지 않고, 남은 파일은 고아 파일 정리로 회수)
+        if released_key:
+            file_reaper.discard([released_key])
+        
+        logger.debug("사진 삭제 완료: photo_id=%s", photo_id)
         return {"message": "사진이 삭제되었습니다."}
         
     except Exception as e:
         db.rollback()
-        print(f"사진 삭제 중 오류: {e}")
+        logger.exception("사진 삭제 중 오류: photo_id=%s", photo_id)
         raise HTTPException(status_code=500, detail=f"사진 삭제 중 오류가 발생했습니다: {str(e)}")
@@ -1,35 +1,53 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, select
 from typing import List, Optional
 
 from ..database import get_db
-from ..models import Photo, Keyword, User
+from ..models import Photo, Keyword
 from ..schemas.photo import PhotoResponse
+from ..services.serialization import PHOTO_COLUMNS, photo_rows_to_dicts
+from ..services.suggest import suggest_index
+from ..services.tags import facet_counts, tag_conditions
 
 router = APIRouter(prefix="/search", tags=["search"])
 
-@router.get("/photos", response_model=List[PhotoResponse])
+def _filtered_photos(db: Session, q: Optional[str], place_type: Optional[str],
+                     element: List[str], mood: Optional[str]):
+    """검색어와 패싯 조건을 적용한 사진 쿼리를 만듭니다."""
+    # 기본 쿼리 (필요한 컬럼만 조회)
+    query = db.query(*PHOTO_COLUMNS)
+    
+    if q:
+        # 검색 조건: AI 설명, 키워드, 위치정보에 검색어가 포함된 경우
+        search_filter = or_(
+            Photo.ai_description.contains(q),
+            Keyword.keyword.contains(q),
+            Photo.location.contains(q)
+        )
+        query = query.join(Keyword).filter(search_filter)
+    
+    # 패싯 조건: 선택한 태그를 모두 가진 사진 (photo_tags 인덱스 사용)
+    for condition in tag_conditions(place_type, element, mood):
+        query = query.filter(condition)
+    
+    return query
+
+@router.get("/photos", response_model=List[PhotoResponse], response_class=ORJSONResponse)
 async def search_photos(
-    q: str = Query(..., description="검색 키워드"),
+    q: Optional[str] = Query(None, description="검색 키워드"),
+    place_type: Optional[str] = Query(None, description="장소 유형 패싯 (예: 놀이터)"),
+    element: List[str] = Query([], description="주요 요소 패싯 (여러 개면 모두 포함한 사진)"),
+    mood: Optional[str] = Query(None, description="분위기 패싯 (예: 한적한)"),
     sort_by: str = Query("latest", description="정렬 방식: latest, likes"),
     limit: int = Query(20, description="결과 개수"),
     offset: int = Query(0, description="오프셋"),
     db: Session = Depends(get_db)
 ):
-    """AI 설명, 키워드, 위치정보를 기반으로 사진을 검색합니다."""
-    
-    # 기본 쿼리
-    query = db.query(Photo)
-    
-    # 검색 조건: AI 설명, 키워드, 위치정보에 검색어가 포함된 경우
-    search_filter = or_(
-        Photo.ai_description.contains(q),
-        Keyword.keyword.contains(q),
-        Photo.location.contains(q)
-    )
+    """AI 설명, 키워드, 위치정보와 AI 태그 패싯을 기반으로 사진을 검색합니다."""
     
-    query = query.join(Keyword).filter(search_filter)
+    query = _filtered_photos(db, q, place_type, element, mood)
     
     # 정렬
     if sort_by == "likes":
@@ -41,42 +59,54 @@ async def search_photos(
         query = query.order_by(Photo.uploaded_at.desc())
     
     # 페이징
-    photos = query.offset(offset).limit(limit).all()
+    rows = query.offset(offset).limit(limit).all()
     
-    # 각 사진의 좋아요 수 계산 및 유저 정보 포함
-    result = []
-    for photo in photos:
-        from ..models import Like
-        like_count = db.query(Like).filter(Like.photo_id == photo.id).count()
-        
-        # 유저 정보 가져오기
-        user = db.query(User).filter(User.id == photo.user_id).first()
-        user_nickname = user.nickname if user else "알 수 없는 사용자"
-        
-        # 이미지 경로를 상대경로로 유지
-        image_url = photo.image_path if photo.image_path else None
-        
-        # photo.__dict__에서 image_path를 제거하고 새로운 image_url 사용
-        photo_dict = photo.__dict__.copy()
-        photo_dict.pop('image_path', None)
-        
-        result.append(PhotoResponse(
-            **photo_dict,
-            image_path=image_url,
-            user_nickname=user_nickname,
-            like_count=like_count
-        ))
+    # 좋아요 수와 유저 닉네임은 목록 전체에 대해 한 번씩만 조회
+    return ORJSONResponse(photo_rows_to_dicts(db, rows))
+
+@router.get("/photos/facets")
+async def search_photo_facets(
+    q: Optional[str] = Query(None, description="검색 키워드"),
+    place_type: Optional[str] = Query(None, description="장소 유형 패싯"),
+    element: List[str] = Query([], description="주요 요소 패싯"),
+    mood: Optional[str] = Query(None, description="분위기 패싯"),
+    limit: int = Query(20, ge=1, le=100, description="패싯별 최대 값 개수"),
+    db: Session = Depends(get_db)
+):
+    """/search/photos와 같은 조건의 검색 결과에 대한 패싯별 태그 개수를 반환합니다."""
+    filtered = any([q, place_type, element, mood])
+    photo_ids = None
+    if filtered:
+        photo_ids = _filtered_photos(db, q, place_type, element, mood).with_entities(Photo.id).subquery()
+        total = db.query(func.count()).select_from(photo_ids).scalar()
+        photo_ids = select(photo_ids.c.id)
+    else:
+        total = db.query(func.count(Photo.id)).scalar()
     
-    return result
+    return ORJSONResponse({
+        "total": total,
+        "facets": facet_counts(db, photo_ids, limit_per_facet=limit),
+    })
+
+@router.get("/suggest")
+async def suggest(
+    q: str = Query(..., min_length=1, description="입력 중인 검색어 (초성만 입력해도 됨, 예: ㅎㅈ)"),
+    type: List[str] = Query([], description="결과 종류 필터: keyword, category, location"),
+    limit: int = Query(10, ge=1, le=50, description="결과 개수"),
+):
+    """키워드/카테고리/위치 자동완성 결과를 순위대로 반환합니다. (메모리 접두어 색인)"""
+    await suggest_index.ensure_fresh()
+    return ORJSONResponse(suggest_index.suggest(q, limit, type))
 
 @router.get("/keywords", response_model=List[dict])
 async def search_keywords(
     q: str = Query(..., description="검색 키워드"),
+    limit: int = Query(50, ge=1, le=200, description="결과 개수"),
     db: Session = Depends(get_db)
 ):
     """키워드를 검색합니다."""
     keywords = db.query(Keyword).filter(
         Keyword.keyword.contains(q)
-    ).all()
+    ).order_by(Keyword.id).limit(limit).all()
     
     return [{"id": k.id, "keyword": k.keyword, "category": k.category} for k in keywords]
@@ -0,0 +1,147 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy.orm import Session
+from typing import Optional
+import base64
+import binascii
+import logging
+from datetime import datetime, timezone
+
+from ..database import get_db
+from ..models import Photo
+from ..schemas.photo import PhotoResponse
+from ..schemas.upload_session import UploadSessionCreate, UploadSessionResponse
+from ..services.admission import run_upload_task, user_upload_slot
+from ..services.entity_cache import keyword_cache, user_cache
+from ..services.serialization import PHOTO_COLUMNS, photo_rows_to_dicts
+from ..services.upload_sessions import UPLOAD_CHUNK_MIN_BYTES, UploadSession, UploadSessionError, upload_sessions
+from .photos import create_uploaded_photo
+
+# 이어 올리기 업로드 (tus와 같은 방식): 세션 생성 → 조각 전송(PATCH/PUT, Upload-Offset) → 완료
+router = APIRouter(prefix="/upload-sessions", tags=["uploads"])
+logger = logging.getLogger(__name__)
+
+def _http_error(e: UploadSessionError) -> HTTPException:
+    headers = {"Upload-Offset": str(e.offset)} if e.offset is not None else None
+    return HTTPException(status_code=e.status_code, detail=e.detail, headers=headers)
+
+def _session_response(session: UploadSession, status_code: int = 200) -> ORJSONResponse:
+    body = UploadSessionResponse(
+        id=session.id,
+        size=session.size,
+        offset=session.offset,
+        chunk_min_size=UPLOAD_CHUNK_MIN_BYTES,
+        chunk_max_size=upload_sessions.chunk_max_bytes,
+        expires_at=datetime.fromtimestamp(session.expires_at, timezone.utc),
+        photo_id=session.photo_id,
+    )
+    headers = {
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.size),
+        "Location": f"{router.prefix}/{session.id}",
+        "Cache-Control": "no-store",
+    }
+    return ORJSONResponse(body.model_dump(mode="json"), status_code=status_code, headers=headers)
+
+def _chunk_checksum(value: Optional[str]) -> Optional[bytes]:
+    """Upload-Checksum 헤더(`sha256 <base64 digest>`)를 digest로 바꿉니다."""
+    if not value:
+        return None
+    algorithm, _, encoded = value.strip().partition(" ")
+    if algorithm.lower() != "sha256":
+        raise HTTPException(status_code=400, detail="Upload-Checksum은 sha256만 지원합니다.")
+    try:
+        return base64.b64decode(encoded.strip(), validate=True)
+    except binascii.Error:
+        raise HTTPException(status_code=400, detail="Upload-Checksum 형식이 올바르지 않습니다.")
+
+@router.post("/", response_model=UploadSessionResponse, status_code=201, response_class=ORJSONResponse)
+async def create_upload_session(payload: UploadSessionCreate, db: Session = Depends(get_db)):
+    """이어 올리기 업로드 세션을 만듭니다.
+
+    checksum(파일 전체의 sha256)을 보내면 같은 유저/키워드/파일의 진행 중인 세션이 있을 때 그 세션을 200으로 돌려주므로
+    앱이 다시 시작되어 세션 ID를 잃어버려도 응답의 offset부터 이어 보낼 수 있습니다.
+    """
+    if not user_cache.get(db, payload.user_id):
+        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다.")
+    if not keyword_cache.get(db, payload.keyword_id):
+        raise HTTPException(status_code=404, detail="키워드를 찾을 수 없습니다.")
+    try:
+        session, created = await run_upload_task(upload_sessions.create, **payload.model_dump())
+    except UploadSessionError as e:
+        raise _http_error(e)
+    return _session_response(session, 201 if created else 200)
+
+@router.api_route("/{session_id}", methods=["GET", "HEAD"], response_model=UploadSessionResponse,
+                  response_class=ORJSONResponse)
+async def get_upload_session(session_id: str):
+    """세션의 받은 크기(offset)를 반환합니다. 연결이 끊긴 뒤 이어 보낼 위치를 확인할 때 씁니다."""
+    try:
+        session = await run_upload_task(upload_sessions.get, session_id)
+    except UploadSessionError as e:
+        raise _http_error(e)
+    return _session_response(session)
+
+@router.api_route("/{session_id}", methods=["PATCH", "PUT"], status_code=204)
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0),
+    upload_checksum: Optional[str] = Header(None),
+):
+    """Upload-Offset 위치에 조각 하나를 받습니다. 본문은 조각의 바이트 그대로입니다.
+
+    응답(204)의 Upload-Offset이 다음 조각의 위치이며, 위치가 맞지 않으면 409와 함께 받은 크기를 알려 줍니다.
+    응답을 받지 못해 이미 받은 조각을 다시 보내면 sha256으로 같은 조각인지 확인해 다시 쓰지 않습니다.
+    """
+    chunk_checksum = _chunk_checksum(upload_checksum)
+    limit = upload_sessions.chunk_max_bytes
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > limit:
+        raise HTTPException(status_code=413, detail=f"조각이 너무 큽니다. (최대 {limit // (1024 * 1024)}MB)")
+    body = bytearray()
+    async for piece in request.stream():
+        body += piece
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail=f"조각이 너무 큽니다. (최대 {limit // (1024 * 1024)}MB)")
+    try:
+        session = await run_upload_task(upload_sessions.write_chunk, session_id, upload_offset, bytes(body),
+                                        chunk_checksum)
+    except UploadSessionError as e:
+        raise _http_error(e)
+    return Response(status_code=204, headers={"Upload-Offset": str(session.offset),
+                                              "Upload-Length": str(session.size)})
+
+@router.post("/{session_id}/complete", response_model=PhotoResponse, response_class=ORJSONResponse)
+async def complete_upload_session(session_id: str, request: Request, db: Session = Depends(get_db)):
+    """다 받은 파일로 사진을 만듭니다. (POST /photos/upload와 같은 처리 경로, 같은 업로드 입장 제어)
+
+    이미 완료된 세션이면 그때 만든 사진을 다시 돌려줍니다.
+    """
+    try:
+        session = await run_upload_task(upload_sessions.get, session_id)
+    except UploadSessionError as e:
+        raise _http_error(e)
+
+    with user_upload_slot(request, session.user_id):
+        try:
+            with upload_sessions.locked(session_id):
+                session = await run_upload_task(upload_sessions.get, session_id)
+                if session.photo_id is None:
+                    if not user_cache.get(db, session.user_id):
+                        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다.")
+                    if not keyword_cache.get(db, session.keyword_id):
+                        raise HTTPException(status_code=404, detail="키워드를 찾을 수 없습니다.")
+                    data = await run_upload_task(upload_sessions.read, session)
+                    result = await create_uploaded_photo(
+                        db, data, session.filename, session.content_type, session.user_id, session.keyword_id,
+                        session.location, session.latitude, session.longitude)
+                    await run_upload_task(upload_sessions.mark_completed, session, result["id"])
+                    return ORJSONResponse(result)
+        except UploadSessionError as e:
+            raise _http_error(e)
+
+    rows = db.query(*PHOTO_COLUMNS).filter(Photo.id == session.photo_id).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="업로드로 만든 사진이 삭제되었습니다.")
+    return ORJSONResponse(photo_rows_to_dicts(db, rows)[0])
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List
 
 from ..database import get_db
-from ..models import User
+from ..models import Contest, ContestPhoto, Like, Photo, User
 from ..schemas.user import UserResponse, UserUpdate
+from ..services.coordination import coordinator
+from ..services.entity_cache import USERS_CACHE, user_cache
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -25,7 +28,7 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
 @router.get("/{user_id}/points")
 async def get_user_points(user_id: int, db: Session = Depends(get_db)):
     """유저의 포인트를 조회합니다."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_cache.get(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다.")
     
@@ -45,6 +48,8 @@ async def update_user_points(
     user.points = points
     db.commit()
     db.refresh(user)
+    # 모든 워커의 유저 캐시에서 이 유저의 바뀐 포인트 반영
+    coordinator.invalidate(USERS_CACHE, ids=[user_id])
     
     return {"message": f"유저 {user.nickname}의 포인트가 {points}로 업데이트되었습니다.", "user": user}
 
@@ -55,17 +60,19 @@ async def get_user_stats(user_id: int, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다.")
     
-    # 업로드한 사진 수
-    photo_count = db.query(user.photos).count()
+    # 업로드한 사진 수 (ix_photos_user_uploaded)
+    photo_count = db.query(func.count(Photo.id)).filter(Photo.user_id == user_id).scalar()
     
-    # 받은 좋아요 수
-    received_likes = db.query(user.photos).join(user.likes).count()
+    # 받은 좋아요 수 (유저의 사진별로 ix_likes_photo_user 조회)
+    received_likes = db.query(func.count(Like.id)).join(Photo, Like.photo_id == Photo.id).filter(
+        Photo.user_id == user_id).scalar()
     
-    # 생성한 공모 수
-    contest_count = db.query(user.contests).count()
+    # 생성한 공모 수 (ix_contests_user_created)
+    contest_count = db.query(func.count(Contest.id)).filter(Contest.user_id == user_id).scalar()
     
-    # 참여한 공모 수
-    participated_contests = db.query(user.contest_photos).distinct().count()
+    # 참여한 공모 수 (ix_contest_photos_user_contest)
+    participated_contests = db.query(func.count(func.distinct(ContestPhoto.contest_id))).filter(
+        ContestPhoto.user_id == user_id).scalar()
     
     return {
         "user_id": user_id,
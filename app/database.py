@@ -1,9 +1,11 @@
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-# SQLite 데이터베이스 URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///./loca.db"
+# SQLite 데이터베이스 URL (벤치마크/운영 환경에서는 LOCA_DATABASE_URL로 교체)
+SQLALCHEMY_DATABASE_URL = os.getenv("LOCA_DATABASE_URL", "sqlite:///./loca.db")
 
 # SQLite 엔진 생성 (동시성 개선)
 engine = create_engine(
@@ -17,6 +19,15 @@ engine = create_engine(
     pool_recycle=300  # 5분마다 연결 재생성
 )
 
+# SQLite는 WAL 모드로 열어 여러 워커 프로세스가 쓰는 동안에도 읽기가 막히지 않게 합니다.
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 # 세션 팩토리 생성
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
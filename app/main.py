@@ -1,17 +1,45 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
+import logging
 import os
 
+# 로깅 설정 (기본은 WARNING 이상만 출력, LOCA_LOG_LEVEL=DEBUG 등으로 상세 로그 활성화)
+logging.basicConfig(level=os.getenv("LOCA_LOG_LEVEL", "WARNING").upper())
+
 # API 라우터들 import
-from .api import keywords, photos, search, users, contests
-from .database import SessionLocal
+from .api import keywords, photos, search, users, contests, files, events, admin, upload_sessions
+from .database import SessionLocal, engine
+from .services.admission import AdmissionMiddleware
+from .services.archive import ARCHIVE_INTERVAL_SECONDS, access_tracker, run_archive
+from .services.contest_screening import SCREENING_INTERVAL_SECONDS, contest_screener, run_screening
+from .services.coordination import coordinator
+from .services.entity_cache import KEYWORDS_CACHE, USERS_CACHE, keyword_cache, user_cache
+from .services.events import event_broker
+from .services.file_gc import FILE_GC_INTERVAL_SECONDS, file_reaper, run_file_gc
+from .services.like_buffer import like_buffer
+from .services.recommend import REFRESH_INTERVAL_SECONDS, run_refresh
+from .services.suggest import suggest_index
+from .services.upload_sessions import UPLOAD_SESSION_GC_INTERVAL_SECONDS, run_upload_session_gc
+from .services.metrics import metrics, instrument_engine, MetricsMiddleware
+from .services.profiling import ProfilingMiddleware
 
 app = FastAPI(
     title="LOCA Backend",
     description="대전 지역 숨은 명소 발굴을 위한 AI 기반 크라우드 소싱 플랫폼",
     version="1.0.0"
 )
+logger = logging.getLogger(__name__)
+
+# 업로드 입장 제어 (동시 처리 수/대기열/본문 크기 초과 시 429/503/413으로 바로 응답, 조회 요청은 통과)
+app.add_middleware(AdmissionMiddleware)
+
+# 요청 단위 프로파일링 (LOCA_ADMIN_TOKEN이 있을 때 X-Loca-Profile 헤더를 보낸 요청만, SQL 통계를 쓰므로 지표 미들웨어 안쪽)
+app.add_middleware(ProfilingMiddleware)
+
+# 요청/SQL 지표 수집
+instrument_engine(engine)
+app.add_middleware(MetricsMiddleware)
 
 # CORS 설정 (React Native 앱에서 접근 허용)
 app.add_middleware(
@@ -22,28 +50,72 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 정적 파일 서빙 (업로드된 이미지)
-if os.path.exists("uploads"):
-    app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
-# 서버 시작 시 기존 사진 마이그레이션
-@app.on_event("startup")
-async def startup_event():
+def migrate_existing_files():
+    """기존 사진 마이그레이션 (여러 워커 중 리더 하나만 실행)"""
+    db = SessionLocal()
     try:
-        db = SessionLocal()
         photos.migrate_existing_photos(db)
         contests.migrate_existing_contest_photos(db)
-        db.close()
-        print("기존 사진 마이그레이션 완료")
+        logger.info("기존 사진 마이그레이션 완료")
     except Exception as e:
-        print(f"마이그레이션 중 오류: {e}")
+        logger.error("마이그레이션 중 오류: %s", e)
+    finally:
+        db.close()
+
+coordinator.on_leader_startup("migrate_existing_files", migrate_existing_files)
+# 고아 파일 정리 (LOCA_FILE_GC_INTERVAL_S를 설정한 경우 리더 워커만 주기적으로 실행)
+if FILE_GC_INTERVAL_SECONDS > 0:
+    coordinator.leader_task("file_gc", FILE_GC_INTERVAL_SECONDS, run_file_gc)
+# 마감된 공모의 참여 사진과 오래 조회되지 않은 파일을 팩 파일로 보관 (LOCA_ARCHIVE_INTERVAL_S, 0이면 끔 — archive_files.py로 수동 실행)
+if ARCHIVE_INTERVAL_SECONDS > 0:
+    coordinator.leader_task("archive", ARCHIVE_INTERVAL_SECONDS, run_archive)
+# 만료된 이어 올리기 업로드 세션(받다 만 파일) 정리 (LOCA_UPLOAD_SESSION_GC_S, 0이면 끔)
+if UPLOAD_SESSION_GC_INTERVAL_SECONDS > 0:
+    coordinator.leader_task("upload_session_gc", UPLOAD_SESSION_GC_INTERVAL_SECONDS, run_upload_session_gc)
+# 추천 피드용 사진 이웃 테이블에 좋아요 변경 기록을 주기적으로 반영하고 하루마다 전체를 다시 계산
+# (LOCA_RECOMMEND_REFRESH_S, 0이면 끔 / LOCA_RECOMMEND_FULL_REBUILD_S)
+if REFRESH_INTERVAL_SECONDS > 0:
+    coordinator.leader_task("recommendations", REFRESH_INTERVAL_SECONDS, run_refresh)
+# 제출 직후 심사되지 못한 공모 참여 사진(다른 워커가 심사 중이었거나 종료된 경우)을 리더 워커가 이어서 심사
+if SCREENING_INTERVAL_SECONDS > 0:
+    coordinator.leader_task("contest_screening", SCREENING_INTERVAL_SECONDS, run_screening)
+# 대량 가져오기 등으로 데이터가 통째로 바뀌면 자동완성 색인을 다시 만듦
+coordinator.on_invalidate("suggest", suggest_index.invalidate)
+# 포인트 변경 시 바뀐 유저만, 유저/키워드 생성 시 캐시 전체를 비움
+coordinator.on_invalidate(USERS_CACHE, user_cache.invalidate)
+coordinator.on_invalidate(KEYWORDS_CACHE, keyword_cache.invalidate)
+
+# 서버 시작 시 리더 선출 (리더 워커가 마이그레이션 실행), 캐시 무효화 확인, 워커 간 이벤트 중계 시작
+@app.on_event("startup")
+async def startup_event():
+    await coordinator.start()
+    event_broker.start()
+
+# 서버 종료 시 버퍼에 남은 좋아요, 파일 삭제, 파일 조회 시각 반영, 공모 사진 심사 중단(남은 사진은 다음 리더가 심사), 리더 잠금 해제
+@app.on_event("shutdown")
+async def shutdown_event():
+    await like_buffer.stop()
+    await file_reaper.stop()
+    await access_tracker.stop()
+    await contest_screener.stop()
+    await coordinator.stop()
+    event_broker.stop()
 
 # API 라우터 등록
 app.include_router(keywords.router)
 app.include_router(photos.router)
+# 큰 사진(HEIC/RAW)의 이어 올리기 업로드 (조각 전송 후 완료하면 /photos/upload와 같은 경로로 사진 생성)
+app.include_router(upload_sessions.router)
 app.include_router(search.router)
 app.include_router(users.router)
 app.include_router(contests.router)
+# 업로드 이미지 서빙 (캐시 헤더, Range, WebP/AVIF 변환)
+app.include_router(files.router)
+# 새 사진/좋아요/공모 참여 실시간 알림 (SSE, WebSocket)
+app.include_router(events.router)
+# 느린 엔드포인트/SQL 보고서 (LOCA_ADMIN_TOKEN이 있을 때만)
+app.include_router(admin.router)
 
 @app.get("/")
 async def root():
@@ -61,6 +133,12 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """프로메테우스 형식의 지표를 반환합니다."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
+    # 개발용 단일 프로세스 실행 (운영에서는 serve.py로 여러 워커 실행)
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -3,8 +3,17 @@ from ..database import Base
 from .user import User
 from .keyword import Keyword
 from .photo import Photo
+from .photo_cluster_cell import PhotoClusterCell
+from .photo_neighbors import PhotoNeighbors
+from .photo_tag import PhotoTag
 from .like import Like
+from .like_change import LikeChange
 from .contest import Contest, ContestStatus
 from .contest_photo import ContestPhoto
+from .contest_summary import ContestSummary
+from .stored_object import StoredObject
+from .packed_object import PackedObject
+from .cache_stamp import CacheStamp
+from .cache_invalidation import CacheInvalidation
 
-__all__ = ["Base", "User", "Keyword", "Photo", "Like", "Contest", "ContestStatus", "ContestPhoto"]
+__all__ = ["Base", "User", "Keyword", "Photo", "PhotoClusterCell", "PhotoNeighbors", "PhotoTag", "Like", "LikeChange", "Contest", "ContestStatus", "ContestPhoto", "ContestSummary", "StoredObject", "PackedObject", "CacheStamp", "CacheInvalidation"]
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+class CacheInvalidation(Base):
+    __tablename__ = "cache_invalidations"
+    # 지운 행의 id를 다시 쓰지 않도록 (각 워커는 마지막으로 반영한 id 다음부터 읽음)
+    __table_args__ = {"sqlite_autoincrement": True}
+    
+    # 캐시 항목 단위 무효화 기록 (예: 포인트가 바뀐 유저 id)
+    # 각 워커가 읽어 해당 항목만 지우며, 리더가 LOCA_CACHE_INVALIDATION_RETENTION_S가 지난 기록을 정리합니다.
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(100), nullable=False)  # 캐시 이름 (cache_stamps.name과 같음)
+    entity_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<CacheInvalidation(id={self.id}, name='{self.name}', entity_id={self.entity_id})>"
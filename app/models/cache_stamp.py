@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+class CacheStamp(Base):
+    __tablename__ = "cache_stamps"
+    
+    # 캐시 이름 (예: "keywords"), 값이 바뀔 때마다 version이 1씩 증가
+    name = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<CacheStamp(name='{self.name}', version={self.version})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -28,5 +28,12 @@ class Contest(Base):
     contest_photos = relationship("ContestPhoto", back_populates="contest", foreign_keys="[ContestPhoto.contest_id]")
     selected_photo = relationship("ContestPhoto", foreign_keys=[selected_photo_id], post_update=True)
     
+    # 공모 목록 (최신순, 상태별, 주최자별)
+    __table_args__ = (
+        Index('ix_contests_created_at', 'created_at'),
+        Index('ix_contests_status_created', 'status', 'created_at'),
+        Index('ix_contests_user_created', 'user_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f"<Contest(id={self.id}, title='{self.title}', points={self.points}, status={self.status.value})>"
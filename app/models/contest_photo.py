@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -15,10 +15,23 @@ class ContestPhoto(Base):
     longitude = Column(Float, nullable=True)
     description = Column(Text, nullable=True)  # 참여자가 작성한 설명
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
+    # AI 사전 심사 결과 (제출 후 백그라운드에서 채움, screened_at이 비어 있으면 심사 대기)
+    ai_description = Column(Text, nullable=True)
+    relevance_score = Column(Float, nullable=True)  # 공모 제목/설명과의 관련도 (0~100)
+    screened_at = Column(DateTime(timezone=True), nullable=True)
     
     # 관계 설정
     contest = relationship("Contest", back_populates="contest_photos", foreign_keys=[contest_id])
     user = relationship("User")
     
+    # 공모별 참여 사진 목록/개수(제출순, 관련도순), 유저가 참여한 공모, 파일 경로로 행 찾기, 심사 대기열
+    __table_args__ = (
+        Index('ix_contest_photos_contest_submitted', 'contest_id', 'submitted_at'),
+        Index('ix_contest_photos_contest_relevance', 'contest_id', 'relevance_score', 'id'),
+        Index('ix_contest_photos_screened', 'screened_at'),
+        Index('ix_contest_photos_user_contest', 'user_id', 'contest_id'),
+        Index('ix_contest_photos_image_path', 'image_path'),
+    )
+    
     def __repr__(self):
         return f"<ContestPhoto(id={self.id}, contest_id={self.contest_id}, user_id={self.user_id})>"
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from ..database import Base
+
+class ContestSummary(Base):
+    __tablename__ = "contest_summaries"
+    
+    # 공모 카드용 집계 (services/contest_summaries.py가 제출/선정/삭제와 같은 트랜잭션에서 갱신)
+    contest_id = Column(Integer, ForeignKey("contests.id"), primary_key=True)
+    photo_count = Column(Integer, nullable=False, default=0)  # 참여 사진 수
+    participant_count = Column(Integer, nullable=False, default=0)  # 사진을 낸 유저 수 (중복 제외)
+    latest_submission_at = Column(DateTime(timezone=True), nullable=True)
+    preview_photo_id = Column(Integer, nullable=True)  # 가장 최근 참여 사진 (미리보기 썸네일)
+    winner_photo_id = Column(Integer, nullable=True)  # 선정된 사진
+    
+    def __repr__(self):
+        return f"<ContestSummary(contest_id={self.contest_id}, photo_count={self.photo_count}, participants={self.participant_count})>"
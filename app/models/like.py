@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -16,7 +16,13 @@ class Like(Base):
     photo = relationship("Photo", back_populates="likes")
     
     # 한 사용자가 한 사진에 좋아요를 한 번만 할 수 있도록 제약
-    __table_args__ = (UniqueConstraint('user_id', 'photo_id', name='unique_user_photo_like'),)
+    # (테이블 제약 대신 유니크 인덱스로 두어 대량 적재 시 지웠다가 다시 만들 수 있음)
+    # 사진별 좋아요 수/목록은 photo_id가 앞에 오는 인덱스가 필요합니다.
+    # (user_id까지 넣어 추천 이웃 갱신이 사진별 좋아요 유저를 테이블 조회 없이 읽음)
+    __table_args__ = (
+        Index('unique_user_photo_like', 'user_id', 'photo_id', unique=True),
+        Index('ix_likes_photo_user', 'photo_id', 'user_id'),
+    )
     
     def __repr__(self):
         return f"<Like(id={self.id}, user_id={self.user_id}, photo_id={self.photo_id})>"
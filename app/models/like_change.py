@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer
+from ..database import Base
+
+class LikeChange(Base):
+    __tablename__ = "like_changes"
+    
+    # 좋아요 추가/취소 기록 (좋아요 쓰기와 같은 트랜잭션에서 추가)
+    # services/recommend.py가 추천 이웃에 반영한 id까지 지우므로 반영 전 변경만 남습니다.
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    photo_id = Column(Integer, nullable=False)  # 사진이 지워져도 기록은 남도록 외래 키 없음
+    
+    def __repr__(self):
+        return f"<LikeChange(id={self.id}, user_id={self.user_id}, photo_id={self.photo_id})>"
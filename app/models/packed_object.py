@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+class PackedObject(Base):
+    __tablename__ = "packed_objects"
+    
+    # 팩 파일(uploads/packs/pack-<pack_id>.pack)로 옮긴 업로드 파일의 위치 (services/archive.py가 기록)
+    key = Column(String(200), primary_key=True)  # 저장소 키 (내용 해시 키 또는 이전 방식 경로)
+    pack_id = Column(Integer, nullable=False)
+    offset = Column(BigInteger, nullable=False)  # 팩 파일 안의 시작 위치 (바이트)
+    length = Column(Integer, nullable=False)
+    content_type = Column(String(100), nullable=True)  # 팩에 들어 있는 바이트의 형식 (재압축했으면 바뀜)
+    original_size = Column(Integer, nullable=False)  # 옮기기 전 파일 크기
+    recompressed = Column(Boolean, nullable=False, default=False)
+    packed_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # 팩별 살아 있는 바이트 집계와 압축(compaction) 대상 조회
+        Index('ix_packed_objects_pack', 'pack_id'),
+    )
+    
+    def __repr__(self):
+        return f"<PackedObject(key='{self.key}', pack_id={self.pack_id}, offset={self.offset}, length={self.length})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -13,13 +13,30 @@ class Photo(Base):
     location = Column(String(200), nullable=True)  # 위치 정보
     latitude = Column(Float, nullable=True)  # 위도
     longitude = Column(Float, nullable=True)  # 경도
+    district_id = Column(Integer, nullable=True)  # 좌표로 판정한 행정구역 코드 (예: 30200 유성구)
+    geo_cell = Column(Integer, nullable=True)  # 지도 클러스터용 가장 세밀한 격자 칸의 Z-order 코드 (services/clusters.py)
     ai_description = Column(Text, nullable=True)  # AI 분석 결과
+    ai_model = Column(String(100), nullable=True)  # 분석에 사용한 모델
+    prompt_version = Column(Integer, nullable=True)  # 분석에 사용한 프롬프트 버전
+    analyzed_at = Column(DateTime(timezone=True), nullable=True)  # 마지막 분석 성공 시각
+    captured_at = Column(DateTime(timezone=True), nullable=True)  # EXIF 촬영 시각
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # 관계 설정
     user = relationship("User", back_populates="photos")
     keyword = relationship("Keyword", back_populates="photos")
     likes = relationship("Like", back_populates="photo")
+    tags = relationship("PhotoTag", back_populates="photo")
+    
+    # 목록/필터 경로용 인덱스 (최신순 피드, 키워드별/유저별/행정구역별 피드, 파일 경로로 행 찾기, 지도 클러스터 칸)
+    __table_args__ = (
+        Index('ix_photos_uploaded_at', 'uploaded_at'),
+        Index('ix_photos_keyword_uploaded', 'keyword_id', 'uploaded_at'),
+        Index('ix_photos_user_uploaded', 'user_id', 'uploaded_at'),
+        Index('ix_photos_district_uploaded', 'district_id', 'uploaded_at'),
+        Index('ix_photos_image_path', 'image_path'),
+        Index('ix_photos_geo_cell', 'geo_cell'),
+    )
     
     def __repr__(self):
         return f"<Photo(id={self.id}, user_id={self.user_id}, keyword_id={self.keyword_id})>"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float
+from ..database import Base
+
+class PhotoClusterCell(Base):
+    __tablename__ = "photo_cluster_cells"
+    
+    # 지도 줌 단계별 격자 칸 (Web Mercator 타일 좌표, 칸 단계 = zoom + CELL_SHIFT)
+    zoom = Column(Integer, primary_key=True)
+    cell_x = Column(Integer, primary_key=True)
+    cell_y = Column(Integer, primary_key=True)
+    photo_count = Column(Integer, nullable=False, default=0)
+    sum_latitude = Column(Float, nullable=False, default=0.0)  # 중심점 = 합 / 사진 수
+    sum_longitude = Column(Float, nullable=False, default=0.0)
+    top_photo_id = Column(Integer, nullable=True)  # 칸에서 가장 최근 사진 (대표 썸네일)
+    
+    def __repr__(self):
+        return f"<PhotoClusterCell(zoom={self.zoom}, x={self.cell_x}, y={self.cell_y}, count={self.photo_count})>"
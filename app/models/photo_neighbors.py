@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, LargeBinary, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+class PhotoNeighbors(Base):
+    __tablename__ = "photo_neighbors"
+    
+    # 함께 좋아요를 받은 정도가 높은 사진 top-k (services/recommend.py가 주기적으로 갱신)
+    photo_id = Column(Integer, primary_key=True)
+    neighbor_ids = Column(LargeBinary, nullable=False)  # int32 리틀 엔디언 배열, 유사도 높은 순
+    scores = Column(LargeBinary, nullable=False)  # float32 리틀 엔디언 배열 (코사인 유사도)
+    # 계산 당시 좋아요 집합의 서명 (좋아요 수, 유저 id 합)
+    like_count = Column(Integer, nullable=False)
+    like_checksum = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<PhotoNeighbors(photo_id={self.photo_id}, like_count={self.like_count})>"
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from ..database import Base
+
+class PhotoTag(Base):
+    __tablename__ = "photo_tags"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    photo_id = Column(Integer, ForeignKey("photos.id"), nullable=False)
+    facet = Column(String(20), nullable=False)  # place_type, element, mood
+    value = Column(String(50), nullable=False)  # 정규화된 태그 값
+    
+    # 관계 설정
+    photo = relationship("Photo", back_populates="tags")
+    
+    __table_args__ = (
+        # 패싯 필터(facet, value → photo_id)와 패싯 집계를 인덱스만으로 처리
+        Index('ix_photo_tags_facet_value_photo', 'facet', 'value', 'photo_id', unique=True),
+        Index('ix_photo_tags_photo_id', 'photo_id'),
+    )
+    
+    def __repr__(self):
+        return f"<PhotoTag(photo_id={self.photo_id}, facet='{self.facet}', value='{self.value}')>"
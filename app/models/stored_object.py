@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+class StoredObject(Base):
+    __tablename__ = "stored_objects"
+    
+    # 콘텐츠 해시 기반 저장 키 (예: objects/ab/cd/abcd...ef.jpg)
+    key = Column(String(200), primary_key=True)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String(100), nullable=True)
+    ref_count = Column(Integer, nullable=False, default=1)  # 이 파일을 참조하는 행 수
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_accessed_at = Column(DateTime(timezone=True), nullable=True)  # 원본/변형을 마지막으로 서빙한 시각 (몇 분 단위로 모아 기록)
+    
+    def __repr__(self):
+        return f"<StoredObject(key='{self.key}', size={self.size}, ref_count={self.ref_count})>"
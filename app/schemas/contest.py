@@ -48,3 +48,8 @@ class ContestResponse(BaseModel):
     created_at: datetime
     completed_at: Optional[datetime] = None
     photo_count: int = 0  # 참여 사진 수
+    participant_count: int = 0  # 사진을 낸 유저 수
+    latest_submission_at: Optional[datetime] = None  # 마지막 참여 시각
+    preview_thumbnail_url: Optional[str] = None  # 가장 최근 참여 사진 썸네일
+    winner_user_id: Optional[int] = None  # 선정된 사진을 낸 유저
+    winner_thumbnail_url: Optional[str] = None  # 선정된 사진 썸네일
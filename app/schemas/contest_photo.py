@@ -37,4 +37,8 @@ class ContestPhotoResponse(BaseModel):
     longitude: Optional[float] = None
     description: Optional[str] = None
     submitted_at: datetime
+    # AI 사전 심사 결과 (심사 전에는 비어 있음)
+    ai_description: Optional[str] = None
+    relevance_score: Optional[float] = None
+    screened_at: Optional[datetime] = None
     user_nickname: str = ""  # 유저 닉네임
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class PhotoBase(BaseModel):
     user_id: int
@@ -22,6 +22,7 @@ class Photo(PhotoBase):
     id: int
     image_path: str
     ai_description: Optional[str] = None
+    captured_at: Optional[datetime] = None
     uploaded_at: datetime
     
     class Config:
@@ -36,9 +37,30 @@ class PhotoResponse(BaseModel):
     location: Optional[str] = None
     latitude: Optional[float] = None
     longitude: Optional[float] = None
+    district_id: Optional[int] = None  # 행정구역 코드
     ai_description: Optional[str] = None
+    captured_at: Optional[datetime] = None  # EXIF 촬영 시각
     uploaded_at: datetime
     like_count: int = 0
     
     class Config:
         from_attributes = True
+
+class DistrictCount(BaseModel):
+    id: int  # 행정구역 코드
+    name: str
+    full_name: str
+    photo_count: int
+
+class PhotoCluster(BaseModel):
+    count: int
+    latitude: float  # 클러스터에 속한 사진 좌표의 중심점
+    longitude: float
+    top_photo_id: Optional[int] = None  # 가장 최근 사진
+    thumbnail_url: Optional[str] = None
+
+class PhotoClusters(BaseModel):
+    zoom: int  # 실제로 사용한 줌 단계 (영역이 넓으면 요청보다 낮아짐)
+    total: int
+    truncated: bool  # limit 때문에 잘린 클러스터가 있으면 True
+    clusters: List[PhotoCluster]
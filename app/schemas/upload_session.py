@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+
+class UploadSessionCreate(BaseModel):
+    user_id: int
+    keyword_id: int
+    size: int = Field(..., gt=0)  # 파일 전체 바이트 수
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    location: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    checksum: Optional[str] = Field(None, pattern="^[0-9a-f]{64}$")  # 파일 전체의 sha256 (hex)
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    size: int
+    offset: int  # 지금까지 받은 바이트 수 (다음 조각의 Upload-Offset)
+    chunk_min_size: int  # 마지막 조각이 아닌 조각의 최소 크기
+    chunk_max_size: int
+    expires_at: datetime
+    photo_id: Optional[int] = None  # 완료되어 만들어진 사진
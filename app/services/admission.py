@@ -0,0 +1,263 @@
+import asyncio
+import contextvars
+import logging
+import math
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Deque, Dict, Optional
+from urllib.parse import parse_qs
+
+import orjson
+from fastapi import Form, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 워커 프로세스마다 동시에 처리하는 업로드 수 (저장, DB 쓰기, AI 호출을 하는 요청)
+UPLOAD_CONCURRENCY = int(os.getenv("LOCA_UPLOAD_CONCURRENCY", "4"))
+# 처리 자리를 기다릴 수 있는 업로드 수 (넘치면 바로 503)
+UPLOAD_QUEUE_DEPTH = int(os.getenv("LOCA_UPLOAD_QUEUE", "16"))
+# 대기열에서 이보다 오래 기다린 업로드는 503으로 돌려보냄 (초)
+UPLOAD_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LOCA_UPLOAD_QUEUE_TIMEOUT_S", "10"))
+# 유저별 동시 업로드 수 (넘치면 429)
+UPLOAD_PER_USER = int(os.getenv("LOCA_UPLOAD_PER_USER", "2"))
+# 요청 본문 크기 상한 (Content-Length 기준, 넘치면 본문을 읽기 전에 413)
+MAX_UPLOAD_BYTES = int(os.getenv("LOCA_MAX_UPLOAD_BYTES", str(30 * 1024 * 1024)))
+
+# 업로드 경로 (POST, 이어 올리기 업로드는 조각 전송이 아닌 완료 요청만)
+UPLOAD_PATHS = (re.compile(r"^/photos/upload/?$"), re.compile(r"^/contests/\d+/photos/?$"),
+                re.compile(r"^/upload-sessions/[^/]+/complete/?$"))
+SESSION_COMPLETE_PATH = re.compile(r"^/upload-sessions/([^/]+)/complete/?$")
+# 본문(폼)을 읽기 전에 유저별 한도를 검사할 수 있도록 업로드 유저를 알려주는 헤더 (쿼리 user_id도 받음)
+UPLOAD_USER_HEADER = b"x-loca-user-id"
+# 미들웨어가 유저별 자리를 차지한 유저 id를 남기는 scope 키
+UPLOAD_USER_SCOPE_KEY = "loca.upload_user"
+
+metrics.describe("loca_upload_admissions_total", "업로드 입장 제어 결과")
+
+
+class AdmissionRejected(Exception):
+    """업로드를 받을 수 없음 (status_code와 Retry-After 초)"""
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class UploadGate:
+    """업로드 입장 제어 (워커 프로세스 단위)
+
+    동시에 concurrency개까지 처리하고, 그 뒤로 queue_depth개까지 도착 순서대로 기다리게 합니다.
+    대기열이 차 있거나 queue_timeout보다 오래 기다리면 503, 한 유저가 per_user개를 넘겨 보내면 429로 즉시 응답해
+    업로드가 몰려도 메모리와 SQLite 쓰기 잠금을 일정량 이상 차지하지 않게 합니다.
+    Retry-After는 최근 업로드 처리 시간과 대기열 길이로 추정합니다.
+    """
+
+    def __init__(self, concurrency: int = UPLOAD_CONCURRENCY, queue_depth: int = UPLOAD_QUEUE_DEPTH,
+                 queue_timeout: float = UPLOAD_QUEUE_TIMEOUT_SECONDS, per_user: int = UPLOAD_PER_USER):
+        self.concurrency = max(1, concurrency)
+        self.queue_depth = max(0, queue_depth)
+        self.queue_timeout = queue_timeout
+        self.per_user = max(1, per_user)
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._users: Dict[int, int] = {}
+        self._service_seconds = 1.0  # 업로드 처리 시간 지수 이동 평균
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """지금 들어온 업로드가 자리를 얻기까지 걸릴 것으로 보이는 시간 (초)"""
+        rounds = (len(self._waiters) + 1) / self.concurrency
+        return max(1, math.ceil(rounds * self._service_seconds))
+
+    def _reject(self, status_code: int, result: str, detail: str) -> AdmissionRejected:
+        metrics.inc("loca_upload_admissions_total", {"result": result})
+        return AdmissionRejected(status_code, self.retry_after(), detail)
+
+    async def acquire(self):
+        """처리 자리를 얻을 때까지 기다립니다. 받을 수 없으면 AdmissionRejected."""
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            metrics.inc("loca_upload_admissions_total", {"result": "admitted"})
+            return
+        if len(self._waiters) >= self.queue_depth:
+            raise self._reject(503, "queue_full", "업로드 요청이 많습니다. 잠시 후 다시 시도해주세요.")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        finally:
+            if not waiter.done():
+                # 시간 초과 또는 클라이언트 연결 종료 (자리를 넘겨받기 전)
+                self._waiters.remove(waiter)
+                waiter.cancel()
+        if waiter.cancelled():
+            raise self._reject(503, "queue_timeout", "업로드 요청이 많습니다. 잠시 후 다시 시도해주세요.")
+        metrics.inc("loca_upload_admissions_total", {"result": "queued"})
+
+    def release(self, elapsed: Optional[float] = None):
+        """처리가 끝난 자리를 다음 대기자에게 넘기거나 반납합니다."""
+        if elapsed is not None:
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * elapsed
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # 자리를 그대로 넘김 (active 유지)
+                return
+        self.active -= 1
+
+    def claim_user(self, user_id: int):
+        """유저별 동시 업로드 수를 하나 늘립니다. 한도를 넘으면 AdmissionRejected(429)."""
+        count = self._users.get(user_id, 0)
+        if count >= self.per_user:
+            raise self._reject(429, "per_user", "진행 중인 업로드가 끝난 뒤 다시 시도해주세요.")
+        self._users[user_id] = count + 1
+
+    def release_user(self, user_id: int):
+        count = self._users.get(user_id, 0) - 1
+        if count > 0:
+            self._users[user_id] = count
+        else:
+            self._users.pop(user_id, None)
+
+
+class AdmissionMiddleware:
+    """업로드 경로(UPLOAD_PATHS)만 본문을 읽기 전에 입장 제어하는 ASGI 미들웨어
+
+    나머지 요청은 그대로 통과하므로 업로드가 몰려도 조회 요청은 대기열에 서지 않습니다.
+    유저별 한도는 전역 대기열에 서기 전에 검사하므로 한 유저가 몰아 보낸 업로드가 대기열을 채우지 못하고 바로 429를 받습니다.
+    유저는 쿼리의 user_id나 X-Loca-User-Id 헤더, 이어 올리기 완료 요청은 세션의 유저로 정합니다.
+    """
+
+    def __init__(self, app, gate: Optional[UploadGate] = None, max_body_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.gate = gate or upload_gate
+        self.max_body_bytes = max_body_bytes
+
+    @staticmethod
+    def _is_upload(scope) -> bool:
+        return scope["method"] == "POST" and any(pattern.match(scope["path"]) for pattern in UPLOAD_PATHS)
+
+    @staticmethod
+    async def _upload_user(scope, headers: dict) -> Optional[int]:
+        """본문을 읽지 않고 알 수 있는 업로드 유저 id (모르면 None, 폼의 user_id로 라우트에서 검사)"""
+        match = SESSION_COMPLETE_PATH.match(scope["path"])
+        if match:
+            from .upload_sessions import UploadSessionError, upload_sessions
+
+            try:
+                # 대기열에 서기 전이므로 업로드 전용 스레드가 아닌 기본 스레드풀에서 세션 정보(meta.json)만 읽음
+                session = await run_in_threadpool(upload_sessions.get, match.group(1))
+            except UploadSessionError:
+                return None  # 없는 세션은 라우트가 404로 응답
+            return session.user_id
+        values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("user_id")
+        value = values[0] if values else headers.get(UPLOAD_USER_HEADER, b"").decode("latin-1")
+        return int(value) if value.isdigit() else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._is_upload(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or ())
+        length = headers.get(b"content-length")
+        if length and length.isdigit() and int(length) > self.max_body_bytes:
+            metrics.inc("loca_upload_admissions_total", {"result": "too_large"})
+            await _send_error(send, 413, f"파일이 너무 큽니다. (최대 {self.max_body_bytes // (1024 * 1024)}MB)")
+            return
+        user_id = await self._upload_user(scope, headers)
+        if user_id is not None:
+            try:
+                self.gate.claim_user(user_id)
+            except AdmissionRejected as e:
+                await _send_error(send, e.status_code, e.detail, e.retry_after)
+                return
+            scope[UPLOAD_USER_SCOPE_KEY] = user_id
+        try:
+            try:
+                await self.gate.acquire()
+            except AdmissionRejected as e:
+                await _send_error(send, e.status_code, e.detail, e.retry_after)
+                return
+            started = asyncio.get_running_loop().time()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.gate.release(asyncio.get_running_loop().time() - started)
+        finally:
+            if user_id is not None:
+                self.gate.release_user(user_id)
+
+
+async def _send_error(send, status_code: int, detail: str, retry_after: Optional[int] = None):
+    body = orjson.dumps({"detail": detail})
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+@contextmanager
+def user_upload_slot(request: Request, user_id: int):
+    """같은 유저의 동시 업로드 수를 하나 차지합니다. 한도를 넘으면 HTTPException(429).
+
+    입장 제어 미들웨어가 이미 같은 유저로 자리를 차지한 요청이면 다시 세지 않습니다.
+    """
+    if request.scope.get(UPLOAD_USER_SCOPE_KEY) == user_id:
+        yield
+        return
+    try:
+        upload_gate.claim_user(user_id)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail,
+                            headers={"Retry-After": str(e.retry_after)})
+    try:
+        yield
+    finally:
+        upload_gate.release_user(user_id)
+
+
+async def upload_user_slot(request: Request, user_id: int = Form(...)):
+    """업로드 라우트 의존성: 미들웨어가 유저를 모른 채 들여보낸 업로드도 폼의 user_id로 유저별 한도를 검사합니다. (응답 후 반납)"""
+    with user_upload_slot(request, user_id):
+        yield
+
+
+# 업로드의 블로킹 작업(이미지 처리, 파일 저장, DB 쓰기) 전용 스레드.
+# 조회 요청이 쓰는 기본 스레드풀(동기 의존성 get_db 등)을 업로드가 차지하지 않도록 분리합니다.
+_upload_executor = ThreadPoolExecutor(max_workers=max(1, UPLOAD_CONCURRENCY), thread_name_prefix="upload")
+
+
+async def run_upload_task(fn: Callable, *args, **kwargs):
+    """업로드 처리의 블로킹 작업을 업로드 전용 스레드에서 실행합니다.
+
+    run_in_threadpool처럼 contextvars를 복사해 실행하므로 요청별 SQL 집계와 느린 쿼리 기록이 요청에 이어집니다.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        _upload_executor, context.run, partial(fn, *args, **kwargs))
+
+
+def _collect_admission_metrics():
+    yield "# TYPE loca_upload_active gauge"
+    yield f"loca_upload_active {upload_gate.active}"
+    yield "# TYPE loca_upload_waiting gauge"
+    yield f"loca_upload_waiting {upload_gate.waiting}"
+
+
+# 전역 업로드 입장 제어 인스턴스
+upload_gate = UploadGate()
+metrics.register_collector(_collect_admission_metrics)
@@ -1,25 +1,29 @@
 import google.generativeai as genai
+import asyncio
+import json
 import os
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
 import base64
 from PIL import Image
 import io
 from dotenv import load_dotenv
 import logging
+import time
+
+from .metrics import observe_gemini_call
 
 # HEIC 형식 지원
 try:
     import pillow_heif
     pillow_heif.register_heif_opener()
     logger = logging.getLogger(__name__)
-    logger.info("HEIC 형식 지원 활성화")
+    logger.debug("HEIC 형식 지원 활성화")
 except ImportError:
     logger = logging.getLogger(__name__)
     logger.warning("pillow-heif이 설치되지 않아 HEIC 형식을 지원하지 않습니다.")
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
-
 # .env 파일 로드 (절대 경로 사용)
 import os
 from pathlib import Path
@@ -29,21 +33,112 @@ current_dir = Path(__file__).parent.parent.parent
 env_path = current_dir / ".env"
 load_dotenv(env_path)
 
+# 분석 모델과 프롬프트 버전 (모델이나 프롬프트를 바꾸면 PROMPT_VERSION을 올리고 backfill_ai.py로 재분석)
+AI_MODEL = os.getenv("LOCA_AI_MODEL", "gemini-1.5-flash")
+PROMPT_VERSION = 2
+# 요청 처리 중 동시에 보내는 Gemini 호출 수 (이벤트 루프를 막지 않도록 전용 스레드에서 호출)
+AI_CONCURRENCY = int(os.getenv("LOCA_AI_CONCURRENCY", "4"))
+
+# AI 분석을 위한 상세한 프롬프트 (설명 문장과 패싯 검색용 태그를 JSON으로 요청)
+ANALYSIS_PROMPT = """
+이 이미지를 분석하여 아래 JSON 형식으로만 답해주세요. 다른 문장이나 코드 블록 표시는 넣지 마세요.
+
+{
+  "description": "장소 유형, 주요 요소, 분위기를 담은 자연스러운 한국어 한 문장",
+  "place_type": "구체적인 장소 유형 한 단어 (예: 놀이터, 카페, 공원, 골목, 건물)",
+  "elements": ["눈에 띄는 주요 요소 (예: 회전무대, 벤치, 나무, 벽화), 최대 5개"],
+  "mood": "분위기를 나타내는 한 단어 (예: 한적한, 활발한, 고즈넉한, 아름다운)"
+}
+
+예시: {"description": "한적한 분위기의 놀이터로, 회전무대와 그네가 있는 아담한 공간입니다.", "place_type": "놀이터", "elements": ["회전무대", "그네"], "mood": "한적한"}
+"""
+
+# 공모 참여 사진들의 관련도를 한 번에 매기는 프롬프트 (사진 설명 목록을 번호와 함께 붙여 보냄)
+RELEVANCE_PROMPT = """
+다음은 사진 공모의 제목과 설명입니다.
+
+제목: {title}
+설명: {description}
+
+아래는 참여 사진들의 설명입니다. 각 사진이 공모가 찾는 사진에 얼마나 맞는지 0~100 사이 정수로 평가해
+사진 순서대로 JSON 배열로만 답해주세요. 다른 문장이나 코드 블록 표시는 넣지 마세요. (예: [85, 20, 60])
+
+{entries}
+"""
+
+# 이전 버전이 분석 실패 시 ai_description에 저장하던 문구 (재분석 대상 판별용)
+LEGACY_ERROR_PREFIXES = (
+    "이미지 분석 중 오류가 발생했습니다",
+    "이미지 형식을 인식할 수 없습니다",
+    "이미지 변환 중 오류가 발생했습니다",
+    "이미지를 로드할 수 없습니다",
+    "이미지 분석을 완료할 수 없습니다",
+)
+
+try:
+    from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+    _RATE_LIMIT_ERRORS: tuple = (ResourceExhausted, TooManyRequests)
+except ImportError:
+    _RATE_LIMIT_ERRORS = ()
+
+
+@dataclass
+class ImageAnalysis:
+    """AI 분석 결과 (설명 문장 + 패싯 태그)"""
+    description: str
+    place_type: Optional[str] = None
+    elements: List[str] = field(default_factory=list)
+    mood: Optional[str] = None
+
+
+def parse_analysis(text: str) -> ImageAnalysis:
+    """모델 응답을 ImageAnalysis로 변환합니다. JSON이 아니면 전체를 설명 문장으로 사용합니다."""
+    text = text.strip()
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and isinstance(data.get("description"), str) and data["description"].strip():
+            elements = data.get("elements")
+            if isinstance(elements, str):
+                elements = [elements]
+            return ImageAnalysis(
+                description=data["description"].strip(),
+                place_type=data.get("place_type") if isinstance(data.get("place_type"), str) else None,
+                elements=[e for e in elements if isinstance(e, str)] if isinstance(elements, list) else [],
+                mood=data.get("mood") if isinstance(data.get("mood"), str) else None,
+            )
+    return ImageAnalysis(description=text)
+
+
+class AIAnalysisError(Exception):
+    """이미지 분석 실패"""
+
+
+class AIRateLimitError(AIAnalysisError):
+    """Gemini API 호출 한도 초과 (잠시 후 재시도)"""
+
+
 class AIService:
     def __init__(self):
         # .env 파일에서 API 키 가져오기
         GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-        logger.info(f"API 키 로드 상태: {'성공' if GEMINI_API_KEY else '실패'}")
+        logger.debug("API 키 로드 상태: %s", '성공' if GEMINI_API_KEY else '실패')
         
         if not GEMINI_API_KEY:
             logger.error("GEMINI_API_KEY가 .env 파일에 설정되지 않았습니다.")
             raise ValueError("GEMINI_API_KEY가 .env 파일에 설정되지 않았습니다.")
         
-        logger.info("Gemini API 초기화 중...")
+        logger.debug("Gemini API 초기화 중...")
         genai.configure(api_key=GEMINI_API_KEY)
-        # 멀티모달(이미지+텍스트) 입력을 지원하는 1.5 Flash 사용
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-        logger.info("Gemini API 초기화 완료")
+        # 멀티모달(이미지+텍스트) 입력을 지원하는 모델 사용 (기본 1.5 Flash)
+        self.model_name = AI_MODEL
+        self.prompt_version = PROMPT_VERSION
+        self.model = genai.GenerativeModel(self.model_name)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, AI_CONCURRENCY), thread_name_prefix="gemini")
+        logger.debug("Gemini API 초기화 완료")
     
     def _optimize_image(self, image: Image.Image, max_size: int = 1024) -> Image.Image:
         """
@@ -61,90 +156,128 @@ class AIService:
                 new_width = int(width * (max_size / height))
             
             image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            logger.info(f"이미지 리사이즈: {width}x{height} -> {new_width}x{new_height}")
+            logger.debug("이미지 리사이즈: %dx%d -> %dx%d", width, height, new_width, new_height)
         
         return image
     
-    async def analyze_image_from_path(self, image_path: str) -> Optional[str]:
+    def describe_image(self, image: Image.Image) -> ImageAnalysis:
         """
-        이미지 파일 경로를 받아서 분석합니다. (ai-test.py와 동일한 방식)
+        PIL 이미지를 Gemini로 분석해 설명과 태그를 반환합니다. 실패하면 AIAnalysisError를 던집니다.
         """
+        # RGB 모드로 변환 (HEIC, RGBA 등 모든 형식을 RGB로)
         try:
-            logger.info(f"이미지 파일 분석 시작: {image_path}")
-            
-            # 파일 존재 확인
-            if not os.path.exists(image_path):
-                logger.error(f"이미지 파일이 존재하지 않습니다: {image_path}")
-                return None
-            
-            # 파일 크기 확인
-            file_size = os.path.getsize(image_path)
-            logger.info(f"파일 크기: {file_size} bytes")
-            
-            if file_size == 0:
-                logger.error("빈 파일입니다.")
-                return None
-            
-            # ai-test.py와 동일한 방식: PIL Image 객체 생성
-            try:
-                image = Image.open(image_path)
-                logger.info(f"PIL Image 로드 성공: {image.format}, 크기: {image.size}, 모드: {image.mode}")
-            except Exception as img_error:
-                logger.error(f"PIL Image 로드 실패: {img_error}")
-                return f"이미지 형식을 인식할 수 없습니다: {str(img_error)}"
-            
-            # 이미지가 제대로 로드되었는지 확인
-            if not image:
-                logger.error("이미지 객체가 None입니다.")
-                return "이미지를 로드할 수 없습니다."
-            
-            # RGB 모드로 변환 (HEIC, RGBA 등 모든 형식을 RGB로)
-            try:
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                    logger.info(f"이미지 모드 변환 완료: RGB")
-            except Exception as convert_error:
-                logger.error(f"이미지 모드 변환 실패: {convert_error}")
-                return f"이미지 변환 중 오류가 발생했습니다: {str(convert_error)}"
-            
-            # 이미지 최적화
-            try:
-                image = self._optimize_image(image)
-                logger.info(f"이미지 최적화 완료: {image.size}")
-            except Exception as optimize_error:
-                logger.error(f"이미지 최적화 실패: {optimize_error}")
-                # 최적화 실패해도 원본 이미지로 계속 진행
-            
-            # AI 분석을 위한 상세한 프롬프트
-            prompt = """
-            이 이미지를 분석하여 다음 정보를 포함한 자연스러운 설명을 생성해주세요:
-            
-            1. 장소 유형 (예: 놀이터, 카페, 공원, 골목, 건물 등 구체적인 장소)
-            2. 주요 요소 (예: 회전무대, 벤치, 나무, 벽화 등)
-            3. 분위기 (예: 한적한, 활발한, 고즈넉한, 아름다운 등)
-            
-            설명은 한국어로 작성하고, 자연스러운 한 문장으로 구성해주세요.
-            예시: "한적한 분위기의 놀이터로, 회전무대와 그네가 있는 아담한 공간입니다."
-            """
-            
-            logger.info("AI 분석 요청 시작 (PIL Image 객체 전달)")
-            
-            # ai-test.py와 동일한 방식: PIL Image 객체를 Gemini API에 직접 전달
-            response = self.model.generate_content([prompt, image])
-            
-            if response.text:
-                logger.info("AI 분석 완료")
-                return response.text.strip()
-            else:
-                logger.warning("AI 분석 결과가 비어있습니다")
-                return "이미지 분석을 완료할 수 없습니다."
-                
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+                logger.debug("이미지 모드 변환 완료: RGB")
+        except Exception as convert_error:
+            raise AIAnalysisError(f"이미지 변환 중 오류가 발생했습니다: {convert_error}") from convert_error
+        
+        # 이미지 최적화
+        try:
+            image = self._optimize_image(image)
+            logger.debug("이미지 최적화 완료: %s", image.size)
+        except Exception as optimize_error:
+            logger.warning("이미지 최적화 실패: %s", optimize_error)
+            # 최적화 실패해도 원본 이미지로 계속 진행
+        
+        logger.debug("AI 분석 요청 시작 (PIL Image 객체 전달)")
+        
+        # ai-test.py와 동일한 방식: PIL Image 객체를 Gemini API에 직접 전달
+        started = time.perf_counter()
+        try:
+            response = self.model.generate_content([ANALYSIS_PROMPT, image])
+            text = response.text
+        except _RATE_LIMIT_ERRORS as e:
+            observe_gemini_call(time.perf_counter() - started, "rate_limited")
+            raise AIRateLimitError(str(e)) from e
         except Exception as e:
-            logger.error(f"AI 분석 중 오류 발생: {e}")
-            logger.error(f"오류 타입: {type(e)}")
-            import traceback
-            logger.error(f"스택 트레이스: {traceback.format_exc()}")
-            return f"이미지 분석 중 오류가 발생했습니다: {str(e)}"
+            observe_gemini_call(time.perf_counter() - started, "error")
+            raise AIAnalysisError(f"이미지 분석 중 오류가 발생했습니다: {e}") from e
+        observe_gemini_call(time.perf_counter() - started, "ok")
+        
+        if not text or not text.strip():
+            raise AIAnalysisError("AI 분석 결과가 비어있습니다")
+        logger.debug("AI 분석 완료")
+        return parse_analysis(text)
+    
+    def describe_image_bytes(self, data: bytes) -> ImageAnalysis:
+        """이미지 바이트를 분석합니다. 실패하면 AIAnalysisError를 던집니다."""
+        if not data:
+            raise AIAnalysisError("빈 이미지 데이터입니다.")
+        try:
+            image = Image.open(io.BytesIO(data))
+            logger.debug("PIL Image 로드 성공: %s, 크기: %s, 모드: %s", image.format, image.size, image.mode)
+        except Exception as img_error:
+            raise AIAnalysisError(f"이미지 형식을 인식할 수 없습니다: {img_error}") from img_error
+        return self.describe_image(image)
+    
+    def score_relevance(self, title: str, description: str, texts: List[str]) -> List[float]:
+        """
+        공모 제목/설명에 대한 참여 사진 설명들의 관련도(0~100)를 한 번의 호출로 매깁니다. 실패하면 AIAnalysisError를 던집니다.
+        """
+        entries = "\n".join(f"{i}. {text}" for i, text in enumerate(texts, 1))
+        prompt = RELEVANCE_PROMPT.format(title=title, description=description, entries=entries)
+        started = time.perf_counter()
+        try:
+            text = self.model.generate_content(prompt).text
+        except _RATE_LIMIT_ERRORS as e:
+            observe_gemini_call(time.perf_counter() - started, "rate_limited")
+            raise AIRateLimitError(str(e)) from e
+        except Exception as e:
+            observe_gemini_call(time.perf_counter() - started, "error")
+            raise AIAnalysisError(f"관련도 평가 중 오류가 발생했습니다: {e}") from e
+        observe_gemini_call(time.perf_counter() - started, "ok")
+        return parse_scores(text or "", len(texts))
+    
+    async def analyze_image_from_path(self, image_path: str) -> Optional[ImageAnalysis]:
+        """
+        이미지 파일 경로를 받아서 분석합니다. 실패하면 None을 반환합니다.
+        """
+        if not os.path.exists(image_path):
+            logger.warning("이미지 파일이 존재하지 않습니다: %s", image_path)
+            return None
+        with open(image_path, "rb") as f:
+            return await self.analyze_image_bytes(f.read())
+    
+    async def analyze_image(self, image: Image.Image) -> Optional[ImageAnalysis]:
+        """
+        이미 디코딩된 PIL 이미지를 분석합니다. 실패하면 None을 반환합니다. (업로드 처리 단계에서 디코딩한 이미지 재사용)
+        """
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self.describe_image, image)
+        except AIAnalysisError as e:
+            logger.warning("AI 분석 실패: %s", e)
+            return None
+    
+    async def analyze_image_bytes(self, data: bytes) -> Optional[ImageAnalysis]:
+        """
+        이미지 바이트를 받아서 분석합니다. 실패하면 None을 반환합니다. (로컬 파일이 없는 저장소용)
+        """
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self.describe_image_bytes, data)
+        except AIAnalysisError as e:
+            logger.warning("AI 분석 실패: %s", e)
+            return None
+
+
+def parse_scores(text: str, count: int) -> List[float]:
+    """관련도 응답(JSON 정수 배열)을 0~100 점수 목록으로 변환합니다. 개수가 맞지 않으면 AIAnalysisError."""
+    start, end = text.find("["), text.rfind("]")
+    try:
+        scores = json.loads(text[start:end + 1]) if start != -1 and end > start else None
+    except ValueError:
+        scores = None
+    if not isinstance(scores, list) or len(scores) != count:
+        raise AIAnalysisError(f"관련도 응답을 해석할 수 없습니다: {text[:100]}")
+    try:
+        return [min(100.0, max(0.0, float(score))) for score in scores]
+    except (TypeError, ValueError) as e:
+        raise AIAnalysisError(f"관련도 응답을 해석할 수 없습니다: {text[:100]}") from e
+
+
+def is_failed_description(description: Optional[str]) -> bool:
+    """이전 버전에서 분석 실패 문구가 설명으로 저장된 경우인지 확인합니다."""
+    return bool(description) and description.startswith(LEGACY_ERROR_PREFIXES)
 
 # 전역 AI 서비스 인스턴스
 ai_service = AIService()
@@ -0,0 +1,485 @@
+import asyncio
+import io
+import logging
+import mimetypes
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from PIL import Image, ImageOps, features
+from sqlalchemy import func, or_, select, update
+from starlette.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..models import Contest, ContestPhoto, ContestStatus, PackedObject, StoredObject
+from .coordination import named_lock
+from .metrics import metrics
+from .storage import (
+    PACK_LOCATION_TTL_SECONDS, PackStore, StorageBackend, image_path_for_key, is_content_addressed,
+    key_from_image_path, pack_store, storage,
+)
+
+logger = logging.getLogger(__name__)
+
+# 리더 워커가 보관 작업을 실행하는 주기 (초, 0이면 끔 — archive_files.py로 수동 실행)
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("LOCA_ARCHIVE_INTERVAL_S", "0"))
+# 원본/변형이 이 기간 동안 서빙되지 않은 파일을 보관 (일)
+ARCHIVE_COLD_DAYS = float(os.getenv("LOCA_ARCHIVE_COLD_DAYS", "90"))
+# 마감/취소된 공모의 선정되지 않은 참여 사진은 마감 후 이 기간이 지나면 조회 여부와 관계없이 보관 (일)
+ARCHIVE_CONTEST_GRACE_DAYS = float(os.getenv("LOCA_ARCHIVE_CONTEST_GRACE_DAYS", "7"))
+# 한 번의 실행에서 보관하는 최대 파일 수 (리더 워커의 주기 실행이 오래 걸리지 않도록)
+ARCHIVE_MAX_PER_RUN = int(os.getenv("LOCA_ARCHIVE_MAX_PER_RUN", "2000"))
+# 보관하면서 키와 같은 형식으로 더 낮은 품질로 재압축 (0이면 원본 바이트 그대로 팩에 넣음)
+ARCHIVE_RECOMPRESS = os.getenv("LOCA_ARCHIVE_RECOMPRESS", "1") != "0"
+ARCHIVE_QUALITY = int(os.getenv("LOCA_ARCHIVE_QUALITY", "80"))
+# 재압축할 때 긴 변의 최대 길이 (가장 큰 변형 너비 1600보다 크게 두어 화면 품질은 그대로)
+ARCHIVE_MAX_EDGE = int(os.getenv("LOCA_ARCHIVE_MAX_EDGE", "2560"))
+# 재압축 결과가 원본의 이 비율 이하로 줄 때만 재압축본을 보관
+RECOMPRESS_MAX_RATIO = 0.9
+# 재압축할 수 있는 확장자별 형식. URL 확장자와 다른 형식을 보내지 않도록 키와 같은 형식으로만 다시 인코딩
+_RECOMPRESS_FORMATS = {
+    ".jpg": ("JPEG", "image/jpeg"), ".jpeg": ("JPEG", "image/jpeg"),
+    ".webp": ("WEBP", "image/webp"), ".png": ("PNG", "image/png"),
+}
+# 살아 있는 바이트가 이 비율보다 적은 팩은 살아 있는 파일을 새 팩으로 옮기고 지움
+PACK_COMPACT_RATIO = 0.5
+# 비운 팩을 지우기 전에 기다리는 시간 (다른 워커의 팩 위치 캐시가 만료되도록)
+RETIRED_PACK_GRACE_SECONDS = PACK_LOCATION_TTL_SECONDS * 5
+# 서빙한 파일의 마지막 조회 시각을 모아 기록하는 주기 (초, 0이면 기록하지 않음)
+ACCESS_FLUSH_INTERVAL_SECONDS = float(os.getenv("LOCA_ACCESS_FLUSH_S", "300"))
+# 한 번에 처리하는 파일 수
+ARCHIVE_BATCH = 200
+# 보고서에 남길 예시 수
+REPORT_SAMPLES = 20
+# SQLite 바인드 파라미터 제한을 피하기 위한 IN 절 크기
+_IN_CHUNK = 400
+
+metrics.describe("loca_archive_objects_total", "보관 작업이 팩 파일로 옮긴 파일 수")
+metrics.describe("loca_archive_reclaimed_bytes_total", "보관 작업이 회수한 디스크 바이트")
+metrics.describe("loca_packed_reads_total", "팩 파일에서 서빙한 원본 수")
+
+_stored = StoredObject.__table__
+_packed = PackedObject.__table__
+
+
+def _chunks(values: List[str], size: int = _IN_CHUNK):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class AccessTracker:
+    """서빙한 업로드 파일 키를 모았다가 주기적으로 stored_objects.last_accessed_at에 기록합니다.
+
+    요청 경로에서는 집합에 키를 넣기만 하고, 같은 키는 주기마다 한 번만 기록합니다.
+    보관 작업은 이 시각으로 오랫동안 조회되지 않은 파일을 고릅니다.
+    """
+
+    def __init__(self, interval_seconds: float = ACCESS_FLUSH_INTERVAL_SECONDS, session_factory=SessionLocal):
+        self.interval = interval_seconds
+        self.session_factory = session_factory
+        self._keys: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._keys)
+
+    def touch(self, key: str):
+        if self.interval <= 0:
+            return
+        self._keys.add(key)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await run_in_threadpool(self.flush)
+
+    def flush(self) -> int:
+        """모인 키의 마지막 조회 시각을 기록하고 기록한 키 수를 반환합니다. (스레드에서 호출)"""
+        keys, self._keys = self._keys, set()
+        if not keys:
+            return 0
+        now = datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            for chunk in _chunks(sorted(keys)):
+                db.execute(update(_stored).where(_stored.c.key.in_(chunk)).values(last_accessed_at=now))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("마지막 조회 시각 기록 실패 (%d개)", len(keys))
+            return 0
+        finally:
+            db.close()
+        return len(keys)
+
+    async def stop(self):
+        """남은 키를 기록하고 태스크를 종료합니다."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            if task.get_loop() is asyncio.get_running_loop():
+                await asyncio.gather(task, return_exceptions=True)
+        await run_in_threadpool(self.flush)
+
+
+@dataclass
+class ArchiveReport:
+    """보관 작업 결과 (dry_run이면 옮기거나 지우지 않고 예상치만 셈)"""
+
+    contest_candidates: int = 0
+    cold_candidates: int = 0
+    packed: int = 0
+    recompressed: int = 0
+    missing: int = 0
+    bytes_before: int = 0  # 옮긴 원본 파일 크기 합
+    bytes_after: int = 0  # 팩에 쓴 바이트 합
+    compacted_packs: int = 0
+    dead_pack_bytes: int = 0  # 압축한 팩에서 지워진 파일이 차지하던 바이트
+    moved_pack_bytes: int = 0  # 압축하면서 새 팩으로 옮긴 바이트
+    removed_packs: int = 0
+    freed_pack_bytes: int = 0  # 지운 팩 파일 크기 합
+    restored: int = 0  # 원본 파일이 다시 생겨 팩 위치를 지운 키
+    samples: List[str] = field(default_factory=list)
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        """이번 실행으로 줄어든 디스크 사용량 (dry_run이면 팩 압축으로 회수될 바이트를 포함한 예상치)"""
+        return self.bytes_before - self.bytes_after + self.freed_pack_bytes - self.moved_pack_bytes
+
+    def add(self, key: str, before: int, after: int, recompressed: bool):
+        self.packed += 1
+        self.recompressed += recompressed
+        self.bytes_before += before
+        self.bytes_after += after
+        if len(self.samples) < REPORT_SAMPLES:
+            self.samples.append(key)
+
+    def summary(self) -> str:
+        mib = 1024 * 1024
+        return (f"대상 {self.contest_candidates + self.cold_candidates}개 (마감된 공모 {self.contest_candidates}, "
+                f"오래 조회되지 않음 {self.cold_candidates}), 팩으로 옮김 {self.packed}개 (재압축 {self.recompressed}), "
+                f"파일 없음 {self.missing}개, {self.bytes_before / mib:.1f} MiB -> {self.bytes_after / mib:.1f} MiB, "
+                f"팩 압축 {self.compacted_packs}개 (빈 공간 {self.dead_pack_bytes / mib:.1f} MiB), "
+                f"팩 삭제 {self.removed_packs}개, 회수 {self.reclaimed_bytes / mib:.1f} MiB")
+
+
+def recompress_image(data: bytes, key: str) -> Optional[Tuple[bytes, str]]:
+    """이미지를 보관용으로 키와 같은 형식으로 다시 인코딩해 (바이트, 미디어 타입)을 반환합니다.
+
+    JPEG/WebP는 ARCHIVE_QUALITY로, PNG는 최적화만 해서 저장하며 긴 변은 ARCHIVE_MAX_EDGE로 줄입니다.
+    그 밖의 형식(HEIC, GIF 등)이나 정지 이미지가 아니거나 읽을 수 없으면 None.
+    """
+    target = _RECOMPRESS_FORMATS.get(os.path.splitext(key)[1].lower())
+    if target is None or (target[0] == "WEBP" and not features.check("webp")):
+        return None
+    pil_format, media_type = target
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            if getattr(source, "n_frames", 1) > 1:
+                return None
+            icc_profile = source.info.get("icc_profile")
+            image = ImageOps.exif_transpose(source)
+            if max(image.size) > ARCHIVE_MAX_EDGE:
+                image.thumbnail((ARCHIVE_MAX_EDGE, ARCHIVE_MAX_EDGE), Image.Resampling.LANCZOS)
+            if pil_format == "JPEG":
+                options = {"quality": ARCHIVE_QUALITY, "optimize": True}
+                if image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+            elif pil_format == "WEBP":
+                options = {"quality": ARCHIVE_QUALITY, "method": 4}
+                if image.mode not in ("RGB", "RGBA", "L"):
+                    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            else:
+                options = {"optimize": True}
+            if icc_profile:
+                options["icc_profile"] = icc_profile
+            buffer = io.BytesIO()
+            image.save(buffer, pil_format, **options)
+            return buffer.getvalue(), media_type
+    except Exception as e:
+        logger.info("보관용 재압축 실패 (원본 그대로 보관): %s", e)
+        return None
+
+
+def _closed_contest_keys(db, cutoff: datetime) -> Iterator[str]:
+    """마감/취소 후 유예 기간이 지난 공모의 선정되지 않은 참여 사진 중, 다른 곳에서 참조하지 않는 키
+
+    내용 해시 키는 참조 수(stored_objects.ref_count)가 이런 참여 사진의 수와 같을 때만, 즉 피드 사진이나
+    진행 중인 공모/선정된 사진과 공유되지 않을 때만 고릅니다.
+    """
+    losers = (
+        select(ContestPhoto.image_path, func.count())
+        .join(Contest, Contest.id == ContestPhoto.contest_id)
+        .where(
+            Contest.status != ContestStatus.ACTIVE,
+            func.coalesce(Contest.completed_at, Contest.created_at) < cutoff,
+            or_(Contest.selected_photo_id.is_(None), Contest.selected_photo_id != ContestPhoto.id),
+        )
+        .group_by(ContestPhoto.image_path)
+    )
+    counts: Dict[str, int] = {}
+    for image_path, count in db.execute(losers):
+        key = key_from_image_path(image_path)
+        counts[key] = counts.get(key, 0) + count
+    shared = [key for key in counts if is_content_addressed(key)]
+    ref_counts: Dict[str, int] = {}
+    for chunk in _chunks(shared):
+        ref_counts.update(db.execute(select(_stored.c.key, _stored.c.ref_count).where(_stored.c.key.in_(chunk))).all())
+    for key, count in sorted(counts.items()):
+        if not is_content_addressed(key) or ref_counts.get(key) == count:
+            yield key
+
+
+def _cold_keys(db, cutoff: datetime, batch_size: int) -> Iterator[str]:
+    """마지막 조회(조회 기록이 없으면 저장) 시각이 cutoff보다 오래된 내용 해시 키 (기본 키 순서로 나눠 읽음)"""
+    last_seen = func.coalesce(_stored.c.last_accessed_at, _stored.c.created_at)
+    after = ""
+    while True:
+        keys = list(db.execute(
+            select(_stored.c.key).where(_stored.c.key > after, last_seen < cutoff)
+            .order_by(_stored.c.key).limit(batch_size)
+        ).scalars())
+        db.rollback()  # 배치마다 읽기 트랜잭션을 끝내 오래 잡지 않음
+        if not keys:
+            return
+        yield from keys
+        after = keys[-1]
+
+
+def _winner_keys(db) -> Set[str]:
+    """선정된 공모 사진의 키 (오래 조회되지 않아도 보관하지 않음)"""
+    rows = db.execute(select(ContestPhoto.image_path).join(Contest, Contest.selected_photo_id == ContestPhoto.id))
+    return {key_from_image_path(image_path) for image_path in rows.scalars()}
+
+
+def _batched(items: Iterator, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Archiver:
+    """마감된 공모의 참여 사진과 오래 조회되지 않은 업로드 파일을 팩 파일로 옮기는 보관 작업
+
+    1. 이전 실행이 팩에 쓴 뒤 원본을 지우기 전에 멈춘 키 등, 원본 파일이 있는 키의 팩 위치를 지웁니다.
+    2. 대상 파일을 (재압축해) 팩 끝에 이어 붙이고 fsync한 뒤, 그 사이 삭제되지 않은 키만 packed_objects에
+       커밋하고 원본 파일을 지웁니다. 원본이 지워진 뒤의 요청은 팩의 해당 구간을 그대로 서빙합니다.
+    3. 지워진 파일이 많아 살아 있는 바이트가 PACK_COMPACT_RATIO보다 적은 팩은 살아 있는 파일을 마지막 팩으로
+       옮기고, 다른 워커의 위치 캐시가 만료된 다음 실행에서 지웁니다.
+    """
+
+    def __init__(self, backend: StorageBackend = storage, packs: Optional[PackStore] = pack_store,
+                 session_factory=SessionLocal):
+        self.backend = backend
+        self.packs = packs
+        self.session_factory = session_factory
+
+    def run(self, dry_run: bool = True, cold_days: float = ARCHIVE_COLD_DAYS,
+            contest_grace_days: float = ARCHIVE_CONTEST_GRACE_DAYS, recompress: bool = ARCHIVE_RECOMPRESS,
+            limit: Optional[int] = ARCHIVE_MAX_PER_RUN, batch_size: int = ARCHIVE_BATCH) -> ArchiveReport:
+        if self.packs is None or not self.backend.is_local:
+            raise RuntimeError("팩 보관은 로컬 저장소에서만 지원합니다. (S3는 버킷 수명 주기 규칙으로 계층화하세요)")
+        report = ArchiveReport()
+        now = datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            self._restore_unpacked(db, report, dry_run, batch_size)
+            winners = _winner_keys(db)
+            seen: Set[str] = set()
+
+            def candidates() -> Iterator[Tuple[str, str]]:
+                for reason, keys in (("contest", _closed_contest_keys(db, now - timedelta(days=contest_grace_days))),
+                                     ("cold", _cold_keys(db, now - timedelta(days=cold_days), batch_size))):
+                    for key in keys:
+                        if key not in winners and key not in seen:
+                            seen.add(key)
+                            yield key, reason
+
+            remaining = limit
+            for batch in _batched(candidates(), batch_size):
+                batch = self._unpacked(db, batch)
+                if remaining is not None:
+                    batch = batch[:remaining]
+                for _, reason in batch:
+                    if reason == "contest":
+                        report.contest_candidates += 1
+                    else:
+                        report.cold_candidates += 1
+                self._archive_batch(db, batch, report, dry_run, recompress)
+                if remaining is not None:
+                    remaining -= len(batch)
+                    if remaining <= 0:
+                        break
+            self._compact(db, report, dry_run)
+        finally:
+            db.close()
+        if not dry_run:
+            metrics.inc("loca_archive_reclaimed_bytes_total", amount=max(0, report.reclaimed_bytes))
+        return report
+
+    def _unpacked(self, db, batch: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        keys = [key for key, _ in batch]
+        packed = set(db.execute(select(_packed.c.key).where(_packed.c.key.in_(keys))).scalars())
+        db.rollback()
+        return [item for item in batch if item[0] not in packed]
+
+    def _restore_unpacked(self, db, report: ArchiveReport, dry_run: bool, batch_size: int):
+        """원본 파일이 있는 키의 팩 위치를 지웁니다 (원본 삭제 전에 멈췄거나 같은 내용이 다시 업로드된 경우)."""
+        after = ""
+        while True:
+            keys = list(db.execute(
+                select(_packed.c.key).where(_packed.c.key > after).order_by(_packed.c.key).limit(batch_size)
+            ).scalars())
+            db.rollback()
+            if not keys:
+                return
+            after = keys[-1]
+            restored = [key for key in keys if os.path.isfile(self.backend.local_path(key))]
+            report.restored += len(restored)
+            if restored and not dry_run:
+                for key in restored:
+                    self.packs.forget(db, key)
+                db.commit()
+
+    def _archive_batch(self, db, batch: List[Tuple[str, str]], report: ArchiveReport, dry_run: bool,
+                       recompress: bool):
+        entries = []
+        for key, _ in batch:
+            try:
+                with open(self.backend.local_path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                report.missing += 1
+                continue
+            packed, content_type, recompressed = data, mimetypes.guess_type(key)[0], False
+            if recompress:
+                result = recompress_image(data, key)
+                if result is not None and len(result[0]) <= len(data) * RECOMPRESS_MAX_RATIO:
+                    (packed, content_type), recompressed = result, True
+            if dry_run:
+                report.add(key, len(data), len(packed), recompressed)
+                continue
+            pack_id, offset = self.packs.append(packed)
+            entries.append({"key": key, "pack_id": pack_id, "offset": offset, "length": len(packed),
+                            "content_type": content_type, "original_size": len(data), "recompressed": recompressed})
+        if not entries:
+            return
+
+        committed = []
+        try:
+            for entry in entries:
+                key = entry["key"]
+                if is_content_addressed(key):
+                    # 아무것도 바꾸지 않는 UPDATE로 쓰기 잠금을 잡으면서 그 사이 삭제되지 않았는지 확인
+                    alive = db.execute(update(_stored).where(_stored.c.key == key)
+                                       .values(ref_count=_stored.c.ref_count)).rowcount
+                else:
+                    path = image_path_for_key(key)
+                    alive = db.execute(select(ContestPhoto.id).where(
+                        ContestPhoto.image_path.in_([path, path.replace("/", "\\")])).limit(1)).first()
+                if alive:
+                    committed.append(entry)
+            if committed:
+                db.execute(_packed.insert(), committed)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        # 팩 위치가 커밋된 뒤에 원본을 지움 (그 전에 멈추면 다음 실행의 1단계가 팩 위치를 지움)
+        for entry in committed:
+            self.packs.evict(entry["key"])
+            self.backend.delete(entry["key"])
+            report.add(entry["key"], entry["original_size"], entry["length"], entry["recompressed"])
+            metrics.inc("loca_archive_objects_total", {"result": "recompressed" if entry["recompressed"] else "packed"})
+
+    def _compact(self, db, report: ArchiveReport, dry_run: bool):
+        ids = self.packs.pack_ids()
+        if not ids:
+            return
+        live = dict(db.execute(select(_packed.c.pack_id, func.sum(_packed.c.length)).group_by(_packed.c.pack_id)).all())
+        db.rollback()
+        for pack_id in ids:
+            path = self.packs.pack_path(pack_id)
+            marker = self.packs.retired_marker(pack_id)
+            size = os.path.getsize(path)
+            live_bytes = live.get(pack_id) or 0
+            if pack_id == ids[-1] and live_bytes and not os.path.exists(marker):
+                continue  # 이어 쓰는 중인 마지막 팩은 모두 지워졌을 때만 비움
+            if os.path.exists(marker):
+                if not live_bytes and time.time() - os.path.getmtime(marker) > RETIRED_PACK_GRACE_SECONDS and not dry_run:
+                    os.remove(path)
+                    os.remove(marker)
+                    report.removed_packs += 1
+                    report.freed_pack_bytes += size
+                continue
+            if live_bytes >= size * PACK_COMPACT_RATIO:
+                continue
+            report.compacted_packs += 1
+            report.dead_pack_bytes += size - live_bytes
+            if dry_run:
+                # 예상 회수량: 옮길 파일을 뺀 팩 크기
+                report.freed_pack_bytes += size
+                report.moved_pack_bytes += live_bytes
+                continue
+            report.moved_pack_bytes += self._move_pack(db, pack_id)
+            with open(marker, "w") as f:
+                f.write(f"{time.time()}\n")
+
+    def _move_pack(self, db, pack_id: int) -> int:
+        """팩의 살아 있는 파일을 마지막 팩으로 옮기고 옮긴 바이트 수를 반환합니다."""
+        moved = 0
+        rows = db.execute(select(_packed.c.key, _packed.c.offset, _packed.c.length)
+                          .where(_packed.c.pack_id == pack_id).order_by(_packed.c.offset)).all()
+        db.rollback()
+        with open(self.packs.pack_path(pack_id), "rb") as source:
+            for batch in _batched(iter(rows), ARCHIVE_BATCH):
+                for key, offset, length in batch:
+                    source.seek(offset)
+                    new_pack, new_offset = self.packs.append(source.read(length))
+                    moved += length
+                    # 그 사이 삭제된 키는 갱신되지 않음 (옮긴 바이트는 다음 압축 때 회수)
+                    db.execute(update(_packed).where(_packed.c.key == key, _packed.c.pack_id == pack_id)
+                               .values(pack_id=new_pack, offset=new_offset))
+                db.commit()
+                for key, _, _ in batch:
+                    self.packs.evict(key)
+        return moved
+
+
+def run_archive():
+    """리더 워커의 주기 작업: 보관 작업을 실행합니다. (archive_files.py가 실행 중이면 건너뜀)"""
+    lock = named_lock("archive")
+    if not lock.try_acquire():
+        return
+    try:
+        report = archiver.run(dry_run=False)
+        if report.packed or report.compacted_packs or report.removed_packs or report.restored:
+            logger.info("보관 작업 - %s", report.summary())
+    finally:
+        lock.release()
+
+
+# 전역 보관 작업/조회 기록 인스턴스
+archiver = Archiver()
+access_tracker = AccessTracker()
+
+
+def _collect_archive_metrics():
+    yield "# TYPE loca_access_pending gauge"
+    yield f"loca_access_pending {access_tracker.pending}"
+
+
+metrics.register_collector(_collect_archive_metrics)
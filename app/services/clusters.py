@@ -0,0 +1,266 @@
+import math
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, delete, func, select, update
+
+from ..models import Photo, PhotoClusterCell
+from .storage import thumbnail_url
+
+# 클러스터를 미리 집계해 두는 지도 줌 범위 (범위 밖 줌은 가장 가까운 단계 사용)
+MIN_CLUSTER_ZOOM = 4
+MAX_CLUSTER_ZOOM = 16
+# 칸 크기: 256px 타일 하나를 2^CELL_SHIFT x 2^CELL_SHIFT 칸으로 나눔 (약 64px)
+CELL_SHIFT = 2
+# 사진의 geo_cell이 가리키는 칸(MAX_CLUSTER_ZOOM의 칸)의 타일 단계
+FINEST_LEVEL = MAX_CLUSTER_ZOOM + CELL_SHIFT
+# 한 번의 응답에 담는 최대 클러스터 수 (화면에 들어오는 칸이 더 많으면 더 낮은 줌의 칸을 사용)
+MAX_CLUSTER_CELLS = int(os.getenv("LOCA_MAX_CLUSTER_CELLS", "1000"))
+
+_MAX_LATITUDE = 85.05112878
+_GEO_CELL_BATCH = 5000
+
+_table = PhotoClusterCell.__table__
+
+
+def tile_xy(latitude: float, longitude: float, level: int) -> Tuple[int, int]:
+    """위경도를 Web Mercator 타일 좌표로 바꿉니다."""
+    n = 1 << level
+    latitude = max(-_MAX_LATITUDE, min(_MAX_LATITUDE, latitude))
+    x = int((longitude + 180.0) / 360.0 * n)
+    radians = math.radians(latitude)
+    y = int((1.0 - math.log(math.tan(radians) + 1.0 / math.cos(radians)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def _interleave(x: int, y: int) -> int:
+    code = 0
+    for bit in range(FINEST_LEVEL):
+        code |= ((x >> bit) & 1) << (2 * bit) | ((y >> bit) & 1) << (2 * bit + 1)
+    return code
+
+
+def _deinterleave(code: int) -> Tuple[int, int]:
+    x = y = 0
+    for bit in range(FINEST_LEVEL):
+        x |= ((code >> (2 * bit)) & 1) << bit
+        y |= ((code >> (2 * bit + 1)) & 1) << bit
+    return x, y
+
+
+def geo_cell(latitude: Optional[float], longitude: Optional[float]) -> Optional[int]:
+    """사진의 geo_cell 값 (MAX_CLUSTER_ZOOM 칸의 Z-order 코드, 좌표가 없으면 None)
+
+    Z-order이므로 낮은 줌의 칸은 geo_cell의 연속 구간 하나에 대응합니다.
+    """
+    if latitude is None or longitude is None:
+        return None
+    return _interleave(*tile_xy(latitude, longitude, FINEST_LEVEL))
+
+
+def _cells(code: int) -> Iterator[Tuple[int, int, int]]:
+    """geo_cell이 속한 줌별 칸 (zoom, x, y), 세밀한 줌부터"""
+    x, y = _deinterleave(code)
+    for zoom in range(MAX_CLUSTER_ZOOM, MIN_CLUSTER_ZOOM - 1, -1):
+        shift = MAX_CLUSTER_ZOOM - zoom
+        yield zoom, x >> shift, y >> shift
+
+
+def add_photo(db, photo_id: int, latitude: Optional[float], longitude: Optional[float]):
+    """사진을 줌별 클러스터 집계에 더합니다. (사진 행과 같은 트랜잭션, 커밋은 호출한 쪽에서)"""
+    code = geo_cell(latitude, longitude)
+    if code is None:
+        return
+    rows = [
+        {"zoom": zoom, "cell_x": x, "cell_y": y, "photo_count": 1,
+         "sum_latitude": latitude, "sum_longitude": longitude, "top_photo_id": photo_id}
+        for zoom, x, y in _cells(code)
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(_table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_table.c.zoom, _table.c.cell_x, _table.c.cell_y],
+            set_={
+                "photo_count": _table.c.photo_count + stmt.excluded.photo_count,
+                "sum_latitude": _table.c.sum_latitude + stmt.excluded.sum_latitude,
+                "sum_longitude": _table.c.sum_longitude + stmt.excluded.sum_longitude,
+                "top_photo_id": func.max(func.coalesce(_table.c.top_photo_id, 0), stmt.excluded.top_photo_id),
+            })
+    elif dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(_table)
+        stmt = stmt.on_duplicate_key_update(
+            photo_count=_table.c.photo_count + stmt.inserted.photo_count,
+            sum_latitude=_table.c.sum_latitude + stmt.inserted.sum_latitude,
+            sum_longitude=_table.c.sum_longitude + stmt.inserted.sum_longitude,
+            top_photo_id=func.greatest(func.coalesce(_table.c.top_photo_id, 0), stmt.inserted.top_photo_id))
+    else:
+        for row in rows:
+            key = (row["zoom"], row["cell_x"], row["cell_y"])
+            cell = db.get(PhotoClusterCell, key, with_for_update=True)
+            if cell is None:
+                db.add(PhotoClusterCell(**row))
+                continue
+            cell.photo_count += 1
+            cell.sum_latitude += latitude
+            cell.sum_longitude += longitude
+            cell.top_photo_id = max(cell.top_photo_id or 0, photo_id)
+        return
+    db.execute(stmt, rows)
+
+
+def _key(zoom: int, x: int, y: int):
+    return and_(_table.c.zoom == zoom, _table.c.cell_x == x, _table.c.cell_y == y)
+
+
+def remove_photo(db, photo_id: int, latitude: Optional[float], longitude: Optional[float]):
+    """삭제한 사진을 클러스터 집계에서 뺍니다. 사진 행 삭제를 flush한 뒤 같은 트랜잭션에서 호출합니다.
+
+    대표 사진이 지워진 칸은 가장 세밀한 줌이면 같은 geo_cell의 사진에서, 그보다 낮은 줌이면 네 개의 하위 칸에서 다시 고릅니다.
+    """
+    code = geo_cell(latitude, longitude)
+    if code is None:
+        return
+    cells = list(_cells(code))
+    db.execute(
+        update(_table)
+        .where(_key(bindparam("z"), bindparam("x"), bindparam("y")))
+        .values(photo_count=_table.c.photo_count - 1,
+                sum_latitude=_table.c.sum_latitude - latitude,
+                sum_longitude=_table.c.sum_longitude - longitude),
+        [{"z": zoom, "x": x, "y": y} for zoom, x, y in cells],
+    )
+    for zoom, x, y in cells:
+        top = db.execute(select(_table.c.top_photo_id, _table.c.photo_count).where(_key(zoom, x, y))).first()
+        if top is None:
+            continue
+        if top.photo_count <= 0:
+            db.execute(delete(_table).where(_key(zoom, x, y)))
+            continue
+        if top.top_photo_id != photo_id:
+            continue
+        if zoom == MAX_CLUSTER_ZOOM:
+            newest = db.execute(select(func.max(Photo.id)).where(Photo.geo_cell == code)).scalar()
+        else:
+            newest = db.execute(
+                select(func.max(_table.c.top_photo_id)).where(
+                    _table.c.zoom == zoom + 1,
+                    _table.c.cell_x.between(2 * x, 2 * x + 1),
+                    _table.c.cell_y.between(2 * y, 2 * y + 1),
+                )
+            ).scalar()
+        db.execute(update(_table).where(_key(zoom, x, y)).values(top_photo_id=newest))
+
+
+def fill_geo_cells(db, batch_size: int = _GEO_CELL_BATCH) -> int:
+    """좌표는 있지만 geo_cell이 비어 있는 사진을 채우고 채운 수를 반환합니다. (배치마다 커밋)"""
+    statement = (
+        update(Photo.__table__)
+        .where(Photo.__table__.c.id == bindparam("photo_id"))
+        .values(geo_cell=bindparam("cell"))
+    )
+    filled = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Photo.id, Photo.latitude, Photo.longitude)
+            .where(Photo.id > last_id, Photo.geo_cell.is_(None),
+                   Photo.latitude.isnot(None), Photo.longitude.isnot(None))
+            .order_by(Photo.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return filled
+        last_id = rows[-1][0]
+        db.execute(statement, [{"photo_id": photo_id, "cell": geo_cell(latitude, longitude)}
+                               for photo_id, latitude, longitude in rows])
+        db.commit()
+        filled += len(rows)
+
+
+def rebuild_clusters(db) -> Dict[int, int]:
+    """photo_cluster_cells를 photos.geo_cell에서 다시 계산하고 줌별 칸 수를 반환합니다. (커밋은 호출한 쪽에서)
+
+    가장 세밀한 줌은 geo_cell 인덱스 순서로 한 번 집계하고, 낮은 줌은 바로 위 줌의 칸 네 개를 합쳐 만듭니다.
+    """
+    level: Dict[Tuple[int, int], list] = {}
+    rows = db.execute(
+        select(Photo.geo_cell, func.count(), func.sum(Photo.latitude), func.sum(Photo.longitude), func.max(Photo.id))
+        .where(Photo.geo_cell.isnot(None))
+        .group_by(Photo.geo_cell)
+    )
+    for code, count, sum_latitude, sum_longitude, top in rows:
+        level[_deinterleave(code)] = [count, sum_latitude, sum_longitude, top]
+
+    db.execute(delete(_table))
+    sizes = {}
+    for zoom in range(MAX_CLUSTER_ZOOM, MIN_CLUSTER_ZOOM - 1, -1):
+        if zoom < MAX_CLUSTER_ZOOM:
+            parents: Dict[Tuple[int, int], list] = {}
+            for (x, y), (count, sum_latitude, sum_longitude, top) in level.items():
+                parent = parents.get((x >> 1, y >> 1))
+                if parent is None:
+                    parents[(x >> 1, y >> 1)] = [count, sum_latitude, sum_longitude, top]
+                else:
+                    parent[0] += count
+                    parent[1] += sum_latitude
+                    parent[2] += sum_longitude
+                    parent[3] = max(parent[3], top)
+            level = parents
+        sizes[zoom] = len(level)
+        if level:
+            db.execute(_table.insert(), [
+                {"zoom": zoom, "cell_x": x, "cell_y": y, "photo_count": count,
+                 "sum_latitude": sum_latitude, "sum_longitude": sum_longitude, "top_photo_id": top}
+                for (x, y), (count, sum_latitude, sum_longitude, top) in level.items()
+            ])
+    return sizes
+
+
+def query_clusters(db, west: float, south: float, east: float, north: float, zoom: int,
+                   limit: int = MAX_CLUSTER_CELLS) -> dict:
+    """화면 영역(bbox)의 클러스터를 사진 수가 많은 순서로 반환합니다.
+
+    영역에 들어오는 칸이 MAX_CLUSTER_CELLS보다 많으면 칸이 그 이하가 될 때까지 더 낮은 줌의 칸을 쓰므로
+    응답 크기는 영역 안의 사진 수와 관계없이 제한됩니다.
+    """
+    zoom = max(MIN_CLUSTER_ZOOM, min(MAX_CLUSTER_ZOOM, zoom))
+    limit = max(1, min(limit, MAX_CLUSTER_CELLS))
+    while True:
+        level = zoom + CELL_SHIFT
+        min_x, min_y = tile_xy(north, west, level)
+        max_x, max_y = tile_xy(south, east, level)
+        if zoom == MIN_CLUSTER_ZOOM or (max_x - min_x + 1) * (max_y - min_y + 1) <= MAX_CLUSTER_CELLS:
+            break
+        zoom -= 1
+
+    rows = db.execute(
+        select(_table.c.photo_count, _table.c.sum_latitude, _table.c.sum_longitude, _table.c.top_photo_id)
+        .where(_table.c.zoom == zoom,
+               _table.c.cell_x.between(min_x, max_x),
+               _table.c.cell_y.between(min_y, max_y))
+        .order_by(_table.c.photo_count.desc())
+        .limit(limit + 1)
+    ).all()
+    truncated = len(rows) > limit
+    rows = rows[:limit]
+    top_ids = [row.top_photo_id for row in rows if row.top_photo_id]
+    paths = dict(db.execute(select(Photo.id, Photo.image_path).where(Photo.id.in_(top_ids))).all()) if top_ids else {}
+    clusters = []
+    for count, sum_latitude, sum_longitude, top in rows:
+        path = paths.get(top)
+        clusters.append({
+            "count": count,
+            "latitude": round(sum_latitude / count, 6),
+            "longitude": round(sum_longitude / count, 6),
+            "top_photo_id": top,
+            "thumbnail_url": thumbnail_url(path) if path else None,
+        })
+    return {
+        "zoom": zoom,
+        "total": sum(cluster["count"] for cluster in clusters),
+        "truncated": truncated,
+        "clusters": clusters,
+    }
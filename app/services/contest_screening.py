@@ -0,0 +1,289 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select
+from starlette.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..models import Contest, ContestPhoto
+from .ai_service import AIAnalysisError, AIRateLimitError, ai_service
+from .coordination import named_lock
+from .metrics import metrics
+from .storage import key_from_image_path, object_store
+
+logger = logging.getLogger(__name__)
+
+# 리더 워커가 심사 대기 사진을 확인하는 주기 (초, 0이면 끔 — 제출을 받은 워커가 바로 심사를 시작하는 것은 그대로)
+SCREENING_INTERVAL_SECONDS = float(os.getenv("LOCA_SCREENING_INTERVAL_S", "30"))
+# 제출 후 심사를 시작하기 전에 기다리는 시간 (초, 그동안 들어온 제출을 모아 공모별로 한 번에 평가)
+SCREENING_DELAY_SECONDS = float(os.getenv("LOCA_SCREENING_DELAY_S", "2"))
+# 동시에 보내는 이미지 설명 요청 수
+DESCRIBE_WORKERS = int(os.getenv("LOCA_SCREENING_WORKERS", "4"))
+# 한 번에 꺼내는 심사 대기 사진 수
+SCREENING_BATCH = 200
+# 관련도 평가 한 번의 호출에 넣는 사진 수
+SCORE_BATCH = 25
+# (공모 내용, 사진 설명)별 관련도 캐시 크기
+SCORE_CACHE_SIZE = 20_000
+
+metrics.describe("loca_contest_screenings_total", "공모 참여 사진 AI 사전 심사 결과")
+
+
+def _bigrams(text: str) -> set:
+    text = "".join(text.lower().split())
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def lexical_relevance(brief: str, text: str) -> float:
+    """공모 내용과 사진 설명의 글자 2-gram 코사인 유사도 (0~100, 관련도 응답을 해석할 수 없을 때 사용)"""
+    a, b = _bigrams(brief), _bigrams(text)
+    if not a or not b:
+        return 0.0
+    return round(100.0 * len(a & b) / math.sqrt(len(a) * len(b)), 1)
+
+
+def screening_text(ai_description: Optional[str], description: Optional[str]) -> str:
+    """관련도 평가에 쓰는 사진 설명 (AI 설명 + 참여자 설명)"""
+    parts = [ai_description.strip()] if ai_description and ai_description.strip() else []
+    if description and description.strip():
+        parts.append(f"(참여자 설명: {description.strip()})")
+    return " ".join(parts)
+
+
+@dataclass
+class ScreeningReport:
+    described: int = 0  # AI 설명을 만든 사진 수
+    scored: int = 0  # 관련도를 매긴 사진 수
+    cached: int = 0  # 그중 캐시에서 가져온 수
+    fallback: int = 0  # 그중 글자 유사도로 대신한 수
+    rate_limited: bool = False  # 호출 한도 초과로 남은 사진을 다음 실행으로 미룸
+
+    def summary(self) -> str:
+        text = f"설명 {self.described}장, 관련도 {self.scored}장 (캐시 {self.cached}, 대체 {self.fallback})"
+        return text + (", 호출 한도 초과로 중단" if self.rate_limited else "")
+
+
+class ContestScreener:
+    """공모 참여 사진의 AI 사전 심사 (이미지 설명 + 공모 내용과의 관련도)
+
+    제출 핸들러는 커밋 뒤 notify()만 호출하고 바로 응답합니다. 심사는 screened_at이 비어 있는 행을
+    대기열로 삼아 요청 밖에서 진행하므로, 처리 전에 프로세스가 종료되어도 리더 워커의 주기 작업이 이어받습니다.
+    관련도는 공모별로 여러 장을 한 번의 호출로 평가하고, 같은 (공모 내용, 설명)의 점수는 캐시해 다시 묻지 않습니다.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._scores: "OrderedDict[str, float]" = OrderedDict()
+        self._scores_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def notify(self):
+        """새 참여 사진이 커밋되었음을 알립니다. (이벤트 루프 밖에서는 주기 작업에 맡김)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(SCREENING_DELAY_SECONDS)
+            self._wakeup.clear()
+            try:
+                await run_in_threadpool(self.run_once)
+            except Exception:
+                logger.exception("공모 사진 심사 중 오류")
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            if task.get_loop() is asyncio.get_running_loop():
+                await asyncio.gather(task, return_exceptions=True)
+
+    def run_once(self) -> Optional[ScreeningReport]:
+        """대기 중인 사진을 모두 심사합니다. 다른 워커가 심사 중이면 None을 반환합니다. (스레드에서 호출)"""
+        lock = named_lock("contest_screening")
+        if not lock.try_acquire():
+            return None
+        db = self.session_factory()
+        total = ScreeningReport()
+        try:
+            while True:
+                report = self.screen_pending(db)
+                for name in ("described", "scored", "cached", "fallback"):
+                    setattr(total, name, getattr(total, name) + getattr(report, name))
+                if report.rate_limited:
+                    total.rate_limited = True
+                    break
+                if report.scored < SCREENING_BATCH:
+                    break
+            if total.scored or total.described:
+                logger.info("공모 사진 심사 - %s", total.summary())
+            return total
+        finally:
+            db.close()
+            lock.release()
+
+    def screen_pending(self, db, limit: int = SCREENING_BATCH) -> ScreeningReport:
+        """심사 대기 사진을 최대 limit장 꺼내 설명을 만들고 공모별로 관련도를 매깁니다. (공모마다 커밋)"""
+        report = ScreeningReport()
+        rows = db.execute(
+            select(ContestPhoto.id, ContestPhoto.contest_id, ContestPhoto.image_path,
+                   ContestPhoto.description, ContestPhoto.ai_description)
+            .where(ContestPhoto.screened_at.is_(None))
+            .order_by(ContestPhoto.id)
+            .limit(limit)
+        ).all()
+        if not rows:
+            return report
+
+        # 1) 설명이 없는 사진만 이미지 설명 요청 (결과는 바로 저장해 관련도 평가가 실패해도 다시 묻지 않음)
+        ai_descriptions = {row.id: row.ai_description for row in rows}
+        missing = [row for row in rows if row.ai_description is None]
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, DESCRIBE_WORKERS)) as pool:
+                results = list(pool.map(lambda row: (row.id, *self._describe(row.image_path)), missing))
+            described = []
+            for photo_id, description, rate_limited in results:
+                if rate_limited:
+                    report.rate_limited = True
+                    ai_descriptions.pop(photo_id)
+                elif description is not None:
+                    ai_descriptions[photo_id] = description
+                    described.append({"_id": photo_id, "ai_description": description})
+            if described:
+                table = ContestPhoto.__table__
+                db.execute(table.update().where(table.c.id == bindparam("_id")), described)
+                db.commit()
+                report.described = len(described)
+
+        # 2) 공모별로 관련도 평가
+        by_contest: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+        for row in rows:
+            if row.id in ai_descriptions:
+                by_contest[row.contest_id].append((row.id, screening_text(ai_descriptions[row.id], row.description)))
+        briefs = {
+            contest_id: (title, description)
+            for contest_id, title, description in db.execute(
+                select(Contest.id, Contest.title, Contest.description).where(Contest.id.in_(list(by_contest)))
+            )
+        }
+        for contest_id, entries in by_contest.items():
+            if contest_id not in briefs:
+                continue  # 심사 중에 삭제된 공모
+            scores = self._score(briefs[contest_id], entries, report)
+            now = datetime.now(timezone.utc)
+            updates = [{"_id": photo_id, "relevance_score": score, "screened_at": now}
+                       for photo_id, score in scores.items()]
+            if updates:
+                table = ContestPhoto.__table__
+                db.execute(table.update().where(table.c.id == bindparam("_id")), updates)
+                db.commit()
+                report.scored += len(updates)
+            if report.rate_limited:
+                break
+        return report
+
+    def _describe(self, image_path: str) -> Tuple[Optional[str], bool]:
+        """(설명, 호출 한도 초과 여부). 이미지를 읽거나 분석할 수 없으면 설명 없이 참여자 설명으로만 평가합니다."""
+        try:
+            with object_store.open(key_from_image_path(image_path)) as f:
+                data = f.read()
+            analysis = ai_service.describe_image_bytes(data)
+        except AIRateLimitError:
+            metrics.inc("loca_contest_screenings_total", {"step": "describe", "result": "rate_limited"})
+            return None, True
+        except (AIAnalysisError, OSError, ValueError) as e:
+            logger.warning("공모 사진 설명 실패 (%s): %s", image_path, e)
+            metrics.inc("loca_contest_screenings_total", {"step": "describe", "result": "error"})
+            return "", False
+        metrics.inc("loca_contest_screenings_total", {"step": "describe", "result": "ok"})
+        return analysis.description, False
+
+    def _score(self, brief: Tuple[str, str], entries: List[Tuple[int, str]],
+               report: ScreeningReport) -> Dict[int, Optional[float]]:
+        """한 공모의 (사진 id, 설명) 목록의 관련도. 한도 초과로 평가하지 못한 사진은 결과에서 빠집니다."""
+        title, description = brief
+        brief_key = hashlib.sha1(f"{title}\0{description}".encode("utf-8")).hexdigest()
+        scores: Dict[int, Optional[float]] = {}
+        pending: List[Tuple[int, str, str]] = []
+        for photo_id, text in entries:
+            if not text:
+                scores[photo_id] = None  # 평가할 설명이 없음 (목록에서 맨 뒤)
+                continue
+            key = hashlib.sha1(f"{brief_key}\0{text}".encode("utf-8")).hexdigest()
+            cached = self._cached_score(key)
+            if cached is not None:
+                scores[photo_id] = cached
+                report.cached += 1
+            else:
+                pending.append((photo_id, text, key))
+
+        # 같은 설명은 한 번만 평가
+        unique: Dict[str, str] = {}
+        for _, text, key in pending:
+            unique.setdefault(key, text)
+        keys = list(unique)
+        for i in range(0, len(keys), SCORE_BATCH):
+            chunk = keys[i:i + SCORE_BATCH]
+            texts = [unique[key] for key in chunk]
+            try:
+                values = ai_service.score_relevance(title, description, texts)
+                result = "ok"
+            except AIRateLimitError:
+                metrics.inc("loca_contest_screenings_total", {"step": "score", "result": "rate_limited"})
+                report.rate_limited = True
+                break
+            except AIAnalysisError as e:
+                logger.warning("관련도 평가 실패, 글자 유사도로 대신함: %s", e)
+                values = [lexical_relevance(f"{title} {description}", text) for text in texts]
+                result = "fallback"
+                report.fallback += len(chunk)
+            metrics.inc("loca_contest_screenings_total", {"step": "score", "result": result}, len(chunk))
+            for key, value in zip(chunk, values):
+                self._remember_score(key, value)
+        for photo_id, _, key in pending:
+            value = self._cached_score(key)
+            if value is not None:
+                scores[photo_id] = value
+        return scores
+
+    def _cached_score(self, key: str) -> Optional[float]:
+        with self._scores_lock:
+            value = self._scores.get(key)
+            if value is not None:
+                self._scores.move_to_end(key)
+            return value
+
+    def _remember_score(self, key: str, value: float):
+        with self._scores_lock:
+            self._scores[key] = value
+            self._scores.move_to_end(key)
+            while len(self._scores) > SCORE_CACHE_SIZE:
+                self._scores.popitem(last=False)
+
+
+def run_screening():
+    """리더 워커의 주기 작업: 제출 직후 처리되지 못한 심사 대기 사진을 처리합니다."""
+    contest_screener.run_once()
+
+
+# 전역 공모 사진 심사 인스턴스
+contest_screener = ContestScreener()
@@ -0,0 +1,93 @@
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import case, delete, distinct, exists, func, select, update
+
+from ..models import Contest, ContestPhoto, ContestSummary
+
+# 공모 카드(목록/상세 응답)의 집계는 contest_summaries 한 행에서 읽습니다.
+# 제출/선정/삭제 핸들러가 같은 트랜잭션에서 갱신하므로 목록 조회 때 참여 사진을 다시 세지 않습니다.
+# 행이 없는 공모(마이그레이션 전 데이터 등)는 갱신 시점에 참여 사진으로 다시 계산합니다.
+
+_table = ContestSummary.__table__
+_photos = ContestPhoto.__table__
+
+
+def create_summary(db, contest_id: int):
+    """새 공모의 빈 요약 행을 만듭니다. (공모 행과 같은 트랜잭션, 커밋은 호출한 쪽에서)"""
+    db.execute(_table.insert().values(contest_id=contest_id, photo_count=0, participant_count=0))
+
+
+def add_submission(db, photo: ContestPhoto):
+    """참여 사진을 공모 요약에 더합니다. 사진 행을 flush한 뒤 같은 트랜잭션에서 호출합니다.
+
+    참여자 수는 같은 유저의 다른 참여 사진이 없을 때만 늘리며, 한 번의 UPDATE로 처리합니다.
+    """
+    first_from_user = ~exists().where(
+        _photos.c.contest_id == photo.contest_id,
+        _photos.c.user_id == photo.user_id,
+        _photos.c.id != photo.id,
+    )
+    result = db.execute(
+        update(_table)
+        .where(_table.c.contest_id == photo.contest_id)
+        .values(
+            photo_count=_table.c.photo_count + 1,
+            participant_count=_table.c.participant_count + case((first_from_user, 1), else_=0),
+            latest_submission_at=select(_photos.c.submitted_at).where(_photos.c.id == photo.id).scalar_subquery(),
+            preview_photo_id=photo.id,
+        )
+    )
+    if result.rowcount == 0:
+        rebuild_contest_summaries(db, [photo.contest_id])
+
+
+def set_winner(db, contest_id: int, photo_id: int):
+    """선정된 사진을 공모 요약에 반영합니다. (공모 상태 변경과 같은 트랜잭션)"""
+    result = db.execute(update(_table).where(_table.c.contest_id == contest_id).values(winner_photo_id=photo_id))
+    if result.rowcount == 0:
+        rebuild_contest_summaries(db, [contest_id])
+
+
+def remove_summary(db, contest_id: int):
+    """삭제하는 공모의 요약 행을 지웁니다. (공모 삭제와 같은 트랜잭션)"""
+    db.execute(delete(_table).where(_table.c.contest_id == contest_id))
+
+
+def rebuild_contest_summaries(db, contest_ids: Optional[Iterable[int]] = None) -> int:
+    """참여 사진 테이블에서 공모 요약을 다시 계산하고 계산한 공모 수를 반환합니다. (커밋은 호출한 쪽에서)
+
+    contest_ids가 없으면 모든 공모의 요약을 새로 만듭니다.
+    """
+    contests = select(Contest.id, Contest.selected_photo_id)
+    stats = select(
+        _photos.c.contest_id,
+        func.count(),
+        func.count(distinct(_photos.c.user_id)),
+        func.max(_photos.c.submitted_at),
+        func.max(_photos.c.id),
+    ).group_by(_photos.c.contest_id)
+    if contest_ids is not None:
+        contest_ids = list(contest_ids)
+        contests = contests.where(Contest.id.in_(contest_ids))
+        stats = stats.where(_photos.c.contest_id.in_(contest_ids))
+
+    winners = dict(db.execute(contests).all())
+    rows: Dict[int, dict] = {
+        contest_id: {"contest_id": contest_id, "photo_count": 0, "participant_count": 0,
+                     "latest_submission_at": None, "preview_photo_id": None, "winner_photo_id": winner}
+        for contest_id, winner in winners.items()
+    }
+    for contest_id, count, participants, latest, newest in db.execute(stats):
+        row = rows.get(contest_id)
+        if row is None:
+            continue  # 공모가 지워진 참여 사진
+        row.update(photo_count=count, participant_count=participants,
+                   latest_submission_at=latest, preview_photo_id=newest)
+
+    if contest_ids is None:
+        db.execute(delete(_table))
+    elif contest_ids:
+        db.execute(delete(_table).where(_table.c.contest_id.in_(contest_ids)))
+    if rows:
+        db.execute(_table.insert(), list(rows.values()))
+    return len(rows)
@@ -0,0 +1,327 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경: 프로세스 간 잠금 없이 단일 워커로 동작
+    fcntl = None
+
+from ..database import SessionLocal
+from ..models import CacheInvalidation, CacheStamp
+from .metrics import metrics
+
+# 여러 워커 프로세스가 공유하는 잠금 파일 디렉토리 (같은 호스트의 워커끼리 조율)
+COORDINATION_DIR = os.getenv("LOCA_COORDINATION_DIR", ".loca")
+# 다른 워커의 캐시 무효화를 확인하는 주기 (밀리초)
+CACHE_POLL_INTERVAL_MS = float(os.getenv("LOCA_CACHE_POLL_MS", "1000"))
+# 리더가 아닌 워커가 리더 잠금을 다시 시도하는 주기 (초, 리더 프로세스가 죽으면 넘겨받음)
+LEADER_RETRY_SECONDS = float(os.getenv("LOCA_LEADER_RETRY_S", "5"))
+# 항목 단위 무효화 기록(cache_invalidations)을 남겨 두는 시간 (초, 리더가 이보다 오래된 기록을 지움)
+CACHE_INVALIDATION_RETENTION_SECONDS = float(os.getenv("LOCA_CACHE_INVALIDATION_RETENTION_S", "300"))
+
+logger = logging.getLogger(__name__)
+
+_stamp_table = CacheStamp.__table__
+_invalidation_table = CacheInvalidation.__table__
+
+
+class FileLock:
+    """flock 기반 프로세스 간 배타 잠금
+
+    잠금은 열린 파일에 묶여 있으므로 프로세스가 비정상 종료되어도 OS가 자동으로 풀어 줍니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """잠금을 기다리지 않고 시도합니다. 다른 프로세스가 잡고 있으면 False."""
+        with self._lock:
+            if self._fd is not None:
+                return True
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    os.close(fd)
+                    return False
+            # 디버깅용으로 잠금을 가진 프로세스 ID를 기록
+            os.ftruncate(fd, 0)
+            os.write(fd, f"{os.getpid()}\n".encode())
+            self._fd = fd
+            return True
+
+    def acquire(self, timeout: Optional[float] = None, poll_interval: float = 0.1) -> bool:
+        """잠금을 얻을 때까지 기다립니다. timeout(초)이 지나면 False."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+        return True
+
+    def release(self):
+        with self._lock:
+            if self._fd is None:
+                return
+            fd, self._fd = self._fd, None
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def named_lock(name: str, state_dir: str = COORDINATION_DIR) -> FileLock:
+    """이름별 프로세스 간 잠금 (예: 백필 CLI가 동시에 두 번 실행되지 않도록)"""
+    return FileLock(os.path.join(state_dir, f"{name}.lock"))
+
+
+def bump_cache_stamp(db: Session, name: str):
+    """캐시 버전을 원자적으로 1 올립니다 (없으면 생성). 커밋은 호출한 쪽에서 합니다."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(_stamp_table).values(name=name, version=1).on_conflict_do_update(
+            index_elements=[_stamp_table.c.name], set_={"version": _stamp_table.c.version + 1})
+    elif dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(_stamp_table).values(name=name, version=1).on_duplicate_key_update(
+            version=_stamp_table.c.version + 1)
+    else:
+        existing = db.get(CacheStamp, name, with_for_update=True)
+        if existing:
+            existing.version += 1
+        else:
+            db.add(CacheStamp(name=name, version=1))
+        return
+    db.execute(stmt)
+
+
+def record_cache_invalidation(db: Session, name: str, ids: Iterable[int]):
+    """캐시 항목 단위 무효화를 기록합니다. 커밋은 호출한 쪽에서 합니다."""
+    db.execute(insert(_invalidation_table), [{"name": name, "entity_id": entity_id} for entity_id in ids])
+
+
+class Coordinator:
+    """여러 워커 프로세스로 실행할 때의 리더 선출과 워커 간 캐시 무효화
+
+    - 리더: leader.lock 파일 잠금을 잡은 워커 하나만 시작 시 마이그레이션과 주기 작업을 실행합니다.
+      리더가 종료되면 다른 워커가 LEADER_RETRY_SECONDS 안에 잠금을 넘겨받습니다.
+    - 캐시 무효화: invalidate(name)은 cache_stamps 테이블의 버전을 올리고, 각 워커는
+      CACHE_POLL_INTERVAL_MS마다 버전을 비교해 바뀐 캐시의 콜백을 호출합니다.
+      invalidate(name, ids=...)는 cache_invalidations 테이블에 항목 id를 남기고, 각 워커는 마지막으로 읽은
+      기록 다음부터 읽어 그 id들로만 콜백을 호출합니다. (캐시 전체를 비우지 않음)
+    """
+
+    def __init__(self, state_dir: str = COORDINATION_DIR, session_factory=SessionLocal,
+                 poll_interval_ms: float = CACHE_POLL_INTERVAL_MS,
+                 leader_retry_seconds: float = LEADER_RETRY_SECONDS):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval_ms / 1000.0
+        self.leader_retry = leader_retry_seconds
+        self.leader_lock = FileLock(os.path.join(state_dir, "leader.lock"))
+        self._invalidators: Dict[str, List[Callable[[], None]]] = {}
+        self._startup_tasks: List[Tuple[str, Callable[[], None]]] = [("cache_stamps", self._create_stamp_table)]
+        self._periodic_tasks: List[Tuple[str, float, Callable[[], None]]] = [
+            ("cache_invalidations", CACHE_INVALIDATION_RETENTION_SECONDS, self._prune_invalidations)]
+        self._versions: Optional[Dict[str, int]] = None
+        self._invalidation_id: Optional[int] = None  # 이 워커가 마지막으로 읽은 cache_invalidations.id
+        self._prune_upto: Optional[int] = None  # 다음 정리 때 지울 cache_invalidations.id 상한 (지난 정리 때의 최댓값)
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def is_leader(self) -> bool:
+        return self.leader_lock.held
+
+    def on_invalidate(self, name: str, callback: Callable[..., None]):
+        """name 캐시가 (어느 워커에서든) 무효화되면 이 워커에서 callback을 호출합니다.
+
+        invalidate(name, ids=...)로 무효화되면 callback(ids)로, 캐시 전체 무효화면 인자 없이 호출합니다.
+        """
+        self._invalidators.setdefault(name, []).append(callback)
+
+    def on_leader_startup(self, name: str, fn: Callable[[], None]):
+        """리더가 된 워커에서 한 번 실행할 작업 (마이그레이션 등, 스레드풀에서 실행)"""
+        self._startup_tasks.append((name, fn))
+
+    def leader_task(self, name: str, interval_seconds: float, fn: Callable[[], None]):
+        """리더 워커에서만 interval_seconds마다 실행할 작업 (스레드풀에서 실행)"""
+        self._periodic_tasks.append((name, interval_seconds, fn))
+
+    def invalidate(self, name: str, db: Optional[Session] = None, ids: Optional[Iterable[int]] = None):
+        """모든 워커의 name 캐시를 무효화합니다. ids를 넘기면 그 항목들만 무효화합니다.
+
+        db를 넘기면 그 세션의 트랜잭션에 버전 증가(또는 항목 기록)를 포함시키고(커밋은 호출한 쪽에서),
+        없으면 별도 세션으로 바로 커밋합니다. 현재 워커의 캐시는 즉시 비웁니다.
+        """
+        if ids is not None:
+            ids = sorted(set(ids))
+            if not ids:
+                return
+        if db is not None:
+            self._record(db, name, ids)
+        else:
+            session = self.session_factory()
+            try:
+                self._record(session, name, ids)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+        self._fire(name, ids)
+
+    @staticmethod
+    def _record(db: Session, name: str, ids: Optional[List[int]]):
+        if ids is None:
+            bump_cache_stamp(db, name)
+        else:
+            record_cache_invalidation(db, name, ids)
+
+    def _fire(self, name: str, ids: Optional[List[int]] = None):
+        metrics.inc("loca_cache_invalidations_total", {"cache": name, "scope": "all" if ids is None else "ids"})
+        for callback in self._invalidators.get(name, ()):
+            try:
+                if ids is None:
+                    callback()
+                else:
+                    callback(ids)
+            except Exception:
+                logger.exception("캐시 무효화 콜백 오류: %s", name)
+
+    def poll(self):
+        """cache_stamps와 cache_invalidations를 읽어 다른 워커가 무효화한 캐시(또는 항목)를 비웁니다."""
+        db = self.session_factory()
+        try:
+            rows = db.execute(select(_stamp_table.c.name, _stamp_table.c.version)).all()
+            if self._invalidation_id is None:
+                changes = []
+                last_id = db.execute(select(func.max(_invalidation_table.c.id))).scalar() or 0
+            else:
+                changes = db.execute(
+                    select(_invalidation_table.c.id, _invalidation_table.c.name, _invalidation_table.c.entity_id)
+                    .where(_invalidation_table.c.id > self._invalidation_id)
+                    .order_by(_invalidation_table.c.id)
+                ).all()
+                last_id = changes[-1][0] if changes else self._invalidation_id
+        except SQLAlchemyError as e:
+            # 리더가 아직 테이블을 만들기 전일 수 있습니다.
+            logger.debug("캐시 스탬프 조회 실패: %s", e)
+            return
+        finally:
+            db.close()
+        versions = dict(rows)
+        previous, self._versions = self._versions, versions
+        self._invalidation_id = last_id
+        if previous is None:
+            return
+        cleared: Set[str] = set()
+        for name, version in versions.items():
+            if previous.get(name) != version:
+                self._fire(name)
+                cleared.add(name)
+        changed: Dict[str, Set[int]] = {}
+        for _, name, entity_id in changes:
+            if name not in cleared:
+                changed.setdefault(name, set()).add(entity_id)
+        for name, ids in changed.items():
+            self._fire(name, sorted(ids))
+
+    def _create_stamp_table(self):
+        _stamp_table.create(bind=self.session_factory.kw["bind"], checkfirst=True)
+        _invalidation_table.create(bind=self.session_factory.kw["bind"], checkfirst=True)
+
+    def _prune_invalidations(self):
+        """지난 정리 때까지 쌓인 항목 무효화 기록을 지웁니다. (각 기록은 보존 시간 이상 남아 있다가 지워짐)"""
+        db = self.session_factory()
+        try:
+            if self._prune_upto is not None:
+                db.execute(delete(_invalidation_table).where(_invalidation_table.c.id <= self._prune_upto))
+                db.commit()
+            self._prune_upto = db.execute(select(func.max(_invalidation_table.c.id))).scalar()
+        finally:
+            db.close()
+
+    async def _elect(self):
+        if self.leader_lock.held or not self.leader_lock.try_acquire():
+            return
+        logger.info("리더 워커로 선출되었습니다 (pid=%s)", os.getpid())
+        for name, fn in self._startup_tasks:
+            try:
+                await run_in_threadpool(fn)
+                logger.info("시작 작업 완료: %s", name)
+            except Exception:
+                logger.exception("시작 작업 오류: %s", name)
+
+    async def _leader_loop(self):
+        last_run: Dict[str, float] = {}
+        while True:
+            await self._elect()
+            delay = self.leader_retry
+            if self.is_leader:
+                now = time.monotonic()
+                for name, interval, fn in self._periodic_tasks:
+                    due = last_run.get(name, now - interval) + interval
+                    if now >= due:
+                        last_run[name] = now
+                        try:
+                            await run_in_threadpool(fn)
+                        except Exception:
+                            logger.exception("주기 작업 오류: %s", name)
+                        due = now + interval
+                    delay = min(delay, max(due - time.monotonic(), 0.0))
+            await asyncio.sleep(delay)
+
+    async def _poll_loop(self):
+        while True:
+            await run_in_threadpool(self.poll)
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self):
+        """리더 선출(리더면 시작 작업 실행)과 무효화 확인 루프를 시작합니다."""
+        await self.stop()
+        await self._elect()
+        await run_in_threadpool(self.poll)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._leader_loop()), loop.create_task(self._poll_loop())]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        # 이벤트 루프가 바뀐 경우(테스트 클라이언트 등) 이전 루프의 태스크는 기다리지 않습니다.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(task for task in tasks if task.get_loop() is loop), return_exceptions=True)
+        self.leader_lock.release()
+        self._versions = None
+        self._invalidation_id = None
+        self._prune_upto = None
+
+
+# 전역 조율 인스턴스
+coordinator = Coordinator()
+
+
+def _collect_coordination_metrics():
+    yield "# TYPE loca_worker_leader gauge"
+    yield f'loca_worker_leader{{pid="{os.getpid()}"}} {1 if coordinator.is_leader else 0}'
+
+
+metrics.register_collector(_collect_coordination_metrics)
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Generic, Iterable, Optional, Set, TypeVar
+
+from sqlalchemy.orm import Session
+
+from ..models import Keyword, User
+from .metrics import metrics
+
+# 캐시 항목 유지 시간 (초). 쓰기 시 무효화되므로 다른 경로로 바뀐 값의 최대 지연 시간입니다.
+ENTITY_CACHE_TTL_SECONDS = float(os.getenv("LOCA_ENTITY_CACHE_TTL_S", "60"))
+# 캐시별 최대 항목 수 (넘으면 가장 오래 쓰이지 않은 항목부터 제거)
+ENTITY_CACHE_MAX_SIZE = int(os.getenv("LOCA_ENTITY_CACHE_SIZE", "10000"))
+
+# coordinator.invalidate()에 쓰는 캐시 이름
+USERS_CACHE = "users"
+KEYWORDS_CACHE = "keywords"
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class UserSummary:
+    id: int
+    nickname: str
+    points: int
+
+
+@dataclass(frozen=True)
+class KeywordInfo:
+    id: int
+    keyword: str
+    category: Optional[str]
+
+
+class EntityCache(Generic[T]):
+    """자주 읽는 작은 참조 엔티티를 id로 캐시하는 read-through 캐시
+
+    없는 id는 캐시하지 않으므로 새로 만든 행은 바로 보입니다. 무효화 도중에 시작된 조회 결과가
+    무효화 뒤에 다시 채워지지 않도록 세대(generation) 번호를 비교합니다.
+    """
+
+    def __init__(self, name: str, loader: Callable[[Session, Set[int]], Dict[int, T]],
+                 ttl_seconds: float = ENTITY_CACHE_TTL_SECONDS, max_size: int = ENTITY_CACHE_MAX_SIZE):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # id -> (만료 시각, 값)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, db: Session, ids: Iterable[int]) -> Dict[int, T]:
+        """id들의 값을 반환합니다. 캐시에 없거나 만료된 id만 한 번의 쿼리로 읽습니다."""
+        wanted = set(ids)
+        found: Dict[int, T] = {}
+        if not wanted:
+            return found
+        now = time.monotonic()
+        with self._lock:
+            for entity_id in wanted:
+                entry = self._entries.get(entity_id)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(entity_id)
+                    found[entity_id] = entry[1]
+            generation = self._generation
+        missing = wanted.difference(found)
+        self._count(len(found), len(missing))
+        if missing:
+            loaded = self.loader(db, missing)
+            found.update(loaded)
+            self._store(loaded, generation)
+        return found
+
+    def get(self, db: Session, entity_id: int) -> Optional[T]:
+        return self.get_many(db, (entity_id,)).get(entity_id)
+
+    def _store(self, values: Dict[int, T], generation: int):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if generation != self._generation:
+                return
+            for entity_id, value in values.items():
+                self._entries[entity_id] = (expires_at, value)
+                self._entries.move_to_end(entity_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _count(self, hits: int, misses: int):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+        if hits:
+            metrics.inc("loca_entity_cache_requests_total", {"cache": self.name, "result": "hit"}, hits)
+        if misses:
+            metrics.inc("loca_entity_cache_requests_total", {"cache": self.name, "result": "miss"}, misses)
+
+    def invalidate(self, ids: Optional[Iterable[int]] = None):
+        """이 워커의 캐시에서 id들을 (없으면 전부) 지웁니다. 다른 워커는 coordinator.invalidate()로 알립니다."""
+        with self._lock:
+            self._generation += 1
+            if ids is None:
+                self._entries.clear()
+            else:
+                for entity_id in ids:
+                    self._entries.pop(entity_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def _load_users(db: Session, ids: Set[int]) -> Dict[int, UserSummary]:
+    rows = db.query(User.id, User.nickname, User.points).filter(User.id.in_(ids)).all()
+    return {user_id: UserSummary(user_id, nickname, points) for user_id, nickname, points in rows}
+
+
+def _load_keywords(db: Session, ids: Set[int]) -> Dict[int, KeywordInfo]:
+    rows = db.query(Keyword.id, Keyword.keyword, Keyword.category).filter(Keyword.id.in_(ids)).all()
+    return {keyword_id: KeywordInfo(keyword_id, keyword, category) for keyword_id, keyword, category in rows}
+
+
+# 전역 캐시 인스턴스 (유저 닉네임/포인트 요약, 키워드 메타데이터)
+user_cache: EntityCache[UserSummary] = EntityCache(USERS_CACHE, _load_users)
+keyword_cache: EntityCache[KeywordInfo] = EntityCache(KEYWORDS_CACHE, _load_keywords)
+
+metrics.describe("loca_entity_cache_requests_total", "엔티티 캐시 조회 수 (hit/miss)")
+
+
+def _collect_entity_cache_metrics():
+    yield "# TYPE loca_entity_cache_size gauge"
+    for cache in (user_cache, keyword_cache):
+        yield f'loca_entity_cache_size{{cache="{cache.name}"}} {cache.stats()["size"]}'
+
+
+metrics.register_collector(_collect_entity_cache_metrics)
@@ -0,0 +1,336 @@
+import asyncio
+import itertools
+import logging
+import os
+import socket
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import orjson
+from starlette.responses import Response
+
+from .coordination import COORDINATION_DIR
+from .metrics import metrics
+
+# 구독자 하나가 쌓아 둘 수 있는 최대 이벤트 수 (넘으면 비우고 resync를 보냄)
+EVENT_MAX_PENDING = int(os.getenv("LOCA_EVENT_MAX_PENDING", "100"))
+# 연결 하나가 구독할 수 있는 최대 토픽 수
+EVENT_MAX_TOPICS = int(os.getenv("LOCA_EVENT_MAX_TOPICS", "50"))
+# 같은 호스트의 다른 워커로 이벤트를 전달하는 유닉스 소켓 디렉토리
+EVENT_RELAY_DIR = os.getenv("LOCA_EVENT_RELAY_DIR", os.path.join(COORDINATION_DIR, "events"))
+# 다른 워커 소켓 목록을 다시 읽는 주기 (초)
+_PEER_REFRESH_SECONDS = 1.0
+# 유닉스 데이터그램 하나로 보낼 수 있는 최대 크기 (리눅스 기본 버퍼보다 작게)
+_MAX_DATAGRAM = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def keyword_topic(keyword_id: int) -> str:
+    return f"keyword:{keyword_id}"
+
+
+def contest_topic(contest_id: int) -> str:
+    return f"contest:{contest_id}"
+
+
+def photo_topic(photo_id: int) -> str:
+    return f"photo:{photo_id}"
+
+
+def _sum_delta(old: dict, new: dict) -> dict:
+    return {**new, "delta": old.get("delta", 0) + new.get("delta", 0)}
+
+
+# 아직 전달되지 않은 같은 토픽의 이벤트를 하나로 합치는 이벤트 종류와 병합 함수
+# (좋아요가 몰리면 구독자에게는 변화량 합계 하나만 전달)
+COALESCERS: Dict[str, Callable[[dict, dict], dict]] = {
+    "photo.likes": _sum_delta,
+}
+
+_Event = Tuple[str, str, dict]  # (이벤트 종류, 토픽, 데이터)
+
+
+class Subscription:
+    """연결 하나의 구독 상태. 발행은 대기열에 넣기만 하므로 느린 구독자가 발행을 막지 않습니다."""
+
+    __slots__ = ("topics", "max_pending", "lagged", "closed", "active", "_pending", "_wakeup", "_ids")
+
+    def __init__(self, topics: Iterable[str], max_pending: int):
+        self.topics: Set[str] = set(topics)
+        self.max_pending = max_pending
+        self.lagged = False
+        self.closed = False
+        self.active = True  # 브로커에 등록되어 있는지
+        self._pending: Dict[object, _Event] = {}
+        self._wakeup = asyncio.Event()
+        self._ids = itertools.count()
+
+    def push(self, event_type: str, topic: str, data: dict):
+        merge = COALESCERS.get(event_type)
+        key = (event_type, topic) if merge is not None else next(self._ids)
+        existing = self._pending.get(key)
+        if existing is not None:
+            self._pending[key] = (event_type, topic, merge(existing[2], data))
+        elif len(self._pending) >= self.max_pending:
+            # 따라오지 못하는 구독자: 쌓인 이벤트를 버리고 다시 조회하도록 알림
+            self._pending.clear()
+            self.lagged = True
+            metrics.inc("loca_events_dropped_total")
+        else:
+            self._pending[key] = (event_type, topic, data)
+        self._wakeup.set()
+
+    def close(self):
+        """연결이 끊겼음을 표시하고 대기 중인 next_batch를 깨웁니다."""
+        self.closed = True
+        self._wakeup.set()
+
+    async def next_batch(self, timeout: float) -> Tuple[List[_Event], bool]:
+        """이벤트가 올 때까지(최대 timeout초) 기다렸다가 쌓인 이벤트와 유실 여부를 반환합니다."""
+        if not self._pending and not self.lagged and not self.closed:
+            # wait_for는 대기마다 태스크를 만들므로 타이머로 깨웁니다 (유휴 연결 메모리 절약)
+            timer = asyncio.get_running_loop().call_later(timeout, self._wakeup.set)
+            try:
+                await self._wakeup.wait()
+            finally:
+                timer.cancel()
+        self._wakeup.clear()
+        events = list(self._pending.values())
+        self._pending.clear()
+        lagged, self.lagged = self.lagged, False
+        return events, lagged
+
+
+class EventRelay:
+    """같은 호스트의 다른 워커 프로세스와 이벤트를 주고받는 유닉스 데이터그램 소켓
+
+    워커마다 <디렉토리>/<pid>.sock 을 열고, 발행된 이벤트를 다른 워커 소켓 전부에 보냅니다.
+    수신 버퍼가 가득 찬 워커에는 이벤트를 버리므로 발행하는 쪽은 막히지 않습니다.
+    """
+
+    def __init__(self, directory: str, on_message: Callable[[dict], None]):
+        self.directory = directory
+        self.on_message = on_message
+        self.path = os.path.join(directory, f"{os.getpid()}.sock")
+        self._sock: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._peers: List[str] = []
+        self._peers_at = 0.0
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        self._sock = sock
+        self._loop = loop
+        loop.add_reader(sock.fileno(), self._on_readable)
+
+    def stop(self):
+        if self._sock is None:
+            return
+        try:
+            self._loop.remove_reader(self._sock.fileno())
+        except Exception:
+            pass
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _on_readable(self):
+        while self._sock is not None:
+            try:
+                data = self._sock.recv(_MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                self.on_message(orjson.loads(data))
+            except Exception:
+                logger.exception("다른 워커의 이벤트 처리 오류")
+
+    def _peer_paths(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_at >= _PEER_REFRESH_SECONDS:
+            self._peers_at = now
+            try:
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                names = []
+            self._peers = [os.path.join(self.directory, name) for name in names
+                           if name.endswith(".sock") and os.path.join(self.directory, name) != self.path]
+        return self._peers
+
+    def send(self, message: dict):
+        if self._sock is None:
+            return
+        peers = self._peer_paths()
+        if not peers:
+            return
+        payload = orjson.dumps(message)
+        if len(payload) > _MAX_DATAGRAM:
+            logger.warning("이벤트가 너무 커서 다른 워커로 전달하지 않습니다: %s", message.get("type"))
+            return
+        for peer in peers:
+            try:
+                self._sock.sendto(payload, peer)
+            except BlockingIOError:
+                metrics.inc("loca_events_relay_dropped_total")
+            except (ConnectionRefusedError, FileNotFoundError):
+                # 종료된 워커가 남긴 소켓 파일
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+                self._peers_at = 0.0
+            except OSError as e:
+                logger.debug("이벤트 전달 실패 (%s): %s", peer, e)
+
+
+class EventBroker:
+    """토픽(keyword:<id>, contest:<id>, photo:<id>)별로 구독자에게 이벤트를 나눠 주는 프로세스 내 브로커
+
+    publish()는 이벤트 루프 스레드에서 호출해야 하며, 구독자 대기열에 넣기만 하고 바로 반환합니다.
+    여러 워커로 실행하면 EventRelay로 같은 호스트의 다른 워커 구독자에게도 전달됩니다.
+    """
+
+    def __init__(self, max_pending: int = EVENT_MAX_PENDING, relay_dir: Optional[str] = EVENT_RELAY_DIR):
+        self.max_pending = max_pending
+        self.relay_dir = relay_dir
+        self.relay: Optional[EventRelay] = None
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self.subscriber_count = 0
+        self.published = 0
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        subscription = Subscription(topics, self.max_pending)
+        for topic in subscription.topics:
+            self._topics.setdefault(topic, set()).add(subscription)
+        self.subscriber_count += 1
+        return subscription
+
+    def update(self, subscription: Subscription, add: Iterable[str] = (), remove: Iterable[str] = ()):
+        """구독 중인 연결의 토픽을 추가/제거합니다. (WebSocket)"""
+        for topic in remove:
+            if topic in subscription.topics:
+                subscription.topics.discard(topic)
+                self._discard(topic, subscription)
+        for topic in add:
+            if topic not in subscription.topics:
+                subscription.topics.add(topic)
+                self._topics.setdefault(topic, set()).add(subscription)
+
+    def unsubscribe(self, subscription: Subscription):
+        if not subscription.active:
+            return
+        subscription.active = False
+        for topic in subscription.topics:
+            self._discard(topic, subscription)
+        subscription.close()
+        self.subscriber_count -= 1
+
+    def _discard(self, topic: str, subscription: Subscription):
+        subscribers = self._topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._topics[topic]
+
+    def publish(self, topic: str, event_type: str, data: dict):
+        """이벤트를 현재 워커의 구독자와 다른 워커에 발행합니다."""
+        self.published += 1
+        self._deliver(topic, event_type, data)
+        if self.relay is not None:
+            self.relay.send({"topic": topic, "type": event_type, "data": data})
+
+    def _deliver(self, topic: str, event_type: str, data: dict):
+        for subscription in tuple(self._topics.get(topic, ())):
+            subscription.push(event_type, topic, data)
+
+    def _on_relay(self, message: dict):
+        self._deliver(message["topic"], message["type"], message["data"])
+
+    def start(self):
+        """다른 워커와 이벤트를 주고받는 소켓을 엽니다. (유닉스 소켓이 없는 환경에서는 생략)"""
+        self.stop()
+        if self.relay_dir is None or not hasattr(socket, "AF_UNIX"):
+            return
+        relay = EventRelay(self.relay_dir, self._on_relay)
+        try:
+            relay.start(asyncio.get_running_loop())
+        except OSError as e:
+            logger.warning("이벤트 중계 소켓을 열 수 없어 현재 워커 구독자에게만 전달합니다: %s", e)
+            return
+        self.relay = relay
+
+    def stop(self):
+        if self.relay is not None:
+            self.relay.stop()
+            self.relay = None
+
+
+class EventStreamResponse(Response):
+    """구독을 Server-Sent Events로 흘려보내는 응답
+
+    StreamingResponse는 연결마다 태스크 그룹을 만들기 때문에, 유휴 연결이 많을 때의 메모리를
+    줄이려고 연결 종료 감지용 태스크 하나만 두고 나머지는 요청 코루틴에서 처리합니다.
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(self, subscription: Subscription, broker: "EventBroker", heartbeat_seconds: float,
+                 headers: Optional[Dict[str, str]] = None):
+        self.subscription = subscription
+        self.broker = broker
+        self.heartbeat_seconds = heartbeat_seconds
+        self.status_code = 200
+        self.background = None
+        self.init_headers(headers)
+
+    @staticmethod
+    def format(event_type: str, data: dict) -> bytes:
+        return b"event: " + event_type.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+    async def __call__(self, scope, receive, send):
+        subscription = self.subscription
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            subscription.close()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            # 연결이 끊기면 3초 뒤 재연결하도록 안내
+            await send({"type": "http.response.body", "body": b"retry: 3000\n\n", "more_body": True})
+            while True:
+                events, lagged = await subscription.next_batch(self.heartbeat_seconds)
+                if subscription.closed:
+                    break
+                chunks = [self.format("resync", {})] if lagged else []
+                chunks.extend(self.format(event_type, {"topic": topic, **data}) for event_type, topic, data in events)
+                await send({"type": "http.response.body", "body": b"".join(chunks) if chunks else b": ping\n\n",
+                            "more_body": True})
+        finally:
+            watcher.cancel()
+            self.broker.unsubscribe(subscription)
+
+
+# 전역 이벤트 브로커 인스턴스
+event_broker = EventBroker()
+
+
+def _collect_event_metrics():
+    yield "# TYPE loca_event_subscribers gauge"
+    yield f"loca_event_subscribers {event_broker.subscriber_count}"
+    yield "# TYPE loca_events_published_total counter"
+    yield f"loca_events_published_total {event_broker.published}"
+
+
+metrics.register_collector(_collect_event_metrics)
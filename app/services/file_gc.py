@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import os
+import shutil
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, or_, select
+from starlette.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..models import ContestPhoto, Photo, StoredObject
+from .coordination import named_lock
+from .image_serving import ImageVariantCache, image_variants
+from .metrics import metrics
+from .storage import (
+    ObjectStore, StorageBackend, image_path_for_key, is_content_addressed, is_pack_file, object_store, storage,
+)
+
+logger = logging.getLogger(__name__)
+
+# 리더 워커가 고아 파일 정리를 실행하는 주기 (초, 0이면 끔 — gc_files.py로 수동 실행)
+FILE_GC_INTERVAL_SECONDS = float(os.getenv("LOCA_FILE_GC_INTERVAL_S", "0"))
+# 이보다 최근에 만들어진 파일은 고아여도 지우지 않음 (업로드 중 커밋 전인 파일 보호)
+FILE_GC_MIN_AGE_SECONDS = float(os.getenv("LOCA_FILE_GC_MIN_AGE_S", "86400"))
+# 한 번에 DB와 대조할 파일 수
+FILE_GC_BATCH = 400
+# 보고서에 남길 고아 파일 예시 수
+REPORT_SAMPLES = 20
+# SQLite 바인드 파라미터 제한을 피하기 위한 IN 절 크기
+_IN_CHUNK = 400
+
+metrics.describe("loca_file_deletions_total", "백그라운드 파일 삭제 결과")
+
+
+def _chunks(values: List[str], size: int = _IN_CHUNK):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class FileReaper:
+    """커밋된 삭제의 파일 정리를 요청 밖에서 처리하는 백그라운드 삭제 대기열
+
+    핸들러는 DB 커밋 뒤에 discard()로 키/디렉토리를 넘기고 바로 응답합니다.
+    프로세스가 처리 전에 종료되어 남은 파일은 고아 파일 정리(collect_orphans)가 회수합니다.
+    """
+
+    def __init__(self, store: ObjectStore = object_store, variants: ImageVariantCache = image_variants):
+        self.store = store
+        self.variants = variants
+        self._pending: Deque[Tuple[str, str]] = deque()  # ("key" | "dir", 대상)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def discard(self, keys: Iterable[str] = (), directories: Iterable[str] = ()):
+        """커밋 후 더 이상 참조되지 않는 저장소 키와 이전 방식 디렉토리의 삭제를 예약합니다."""
+        self._pending.extend(("key", key) for key in keys)
+        self._pending.extend(("dir", directory) for directory in directories)
+        if not self._pending:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 이벤트 루프 밖(CLI 등)에서는 바로 삭제
+            self.drain()
+            return
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await run_in_threadpool(self.drain)
+
+    def drain(self):
+        """대기 중인 삭제를 모두 처리합니다. (스레드에서 호출)"""
+        while self._pending:
+            try:
+                kind, target = self._pending.popleft()
+            except IndexError:
+                break
+            if kind == "dir":
+                shutil.rmtree(target, ignore_errors=True)
+                metrics.inc("loca_file_deletions_total", {"result": "directory"})
+                continue
+            try:
+                deleted = self.store.delete(target)
+            except Exception:
+                logger.exception("파일 삭제 실패: %s", target)
+                metrics.inc("loca_file_deletions_total", {"result": "error"})
+                continue
+            if deleted:
+                self.variants.discard(target)
+            # 그 사이 같은 내용이 다시 업로드되어 참조가 생겼으면 파일을 유지
+            metrics.inc("loca_file_deletions_total", {"result": "deleted" if deleted else "kept"})
+
+    async def stop(self):
+        """남은 삭제를 처리하고 태스크를 종료합니다."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            if task.get_loop() is asyncio.get_running_loop():
+                await asyncio.gather(task, return_exceptions=True)
+        await run_in_threadpool(self.drain)
+
+
+@dataclass
+class OrphanReport:
+    """고아 파일 정리 결과 (dry_run이면 deleted는 항상 0)"""
+
+    area: str
+    scanned: int = 0
+    orphans: int = 0
+    orphan_bytes: int = 0
+    recent: int = 0
+    deleted: int = 0
+    samples: List[str] = field(default_factory=list)
+
+    def add_orphan(self, name: str, size: int):
+        self.orphans += 1
+        self.orphan_bytes += size
+        if len(self.samples) < REPORT_SAMPLES:
+            self.samples.append(name)
+
+    def summary(self) -> str:
+        return (f"{self.area}: {self.scanned}개 확인, 고아 {self.orphans}개 ({self.orphan_bytes / 1024 / 1024:.1f} MiB), "
+                f"최근 파일이라 보류 {self.recent}개, 삭제 {self.deleted}개")
+
+
+def _batched(items: Iterator, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _referenced_keys(db, keys: List[str]) -> Set[str]:
+    """키들 중 DB가 참조하는 키를 반환합니다 (stored_objects, photos/contest_photos.image_path)."""
+    referenced: Set[str] = set()
+    content_keys = [key for key in keys if is_content_addressed(key)]
+    for chunk in _chunks(content_keys):
+        referenced.update(db.execute(select(StoredObject.key).where(StoredObject.key.in_(chunk))).scalars())
+    # 참조 수 행이 없는 파일만 image_path로 확인 (대부분 위에서 걸러짐)
+    paths = {}
+    for key in keys:
+        if key not in referenced:
+            path = image_path_for_key(key)
+            paths[path] = key
+            # Windows에서 os.path.join으로 저장된 이전 방식 경로
+            paths[path.replace("/", "\\")] = key
+    for chunk in _chunks(list(paths)):
+        for column in (Photo.image_path, ContestPhoto.image_path):
+            referenced.update(paths[path] for path in db.execute(select(column).where(column.in_(chunk))).scalars())
+    return referenced
+
+
+def _cached_digests(db, digests: List[str]) -> Set[str]:
+    """digest 중 stored_objects에 원본 키가 있는 것을 반환합니다 (키 범위 조건으로 기본 키 색인 사용)."""
+    found: Set[str] = set()
+    for chunk in _chunks(digests, _IN_CHUNK // 2):
+        ranges = []
+        for digest in chunk:
+            prefix = f"objects/{digest[:2]}/{digest[2:4]}/{digest}"
+            # 키는 "<prefix>" 또는 "<prefix>.<확장자>" 형태 ("/"는 "."보다 뒤)
+            ranges.append(and_(StoredObject.key >= prefix, StoredObject.key < prefix + "/"))
+        for key in db.execute(select(StoredObject.key).where(or_(*ranges))).scalars():
+            found.add(os.path.splitext(key.rsplit("/", 1)[-1])[0])
+    return found
+
+
+def _iter_cache_files(root: str) -> Iterator[Tuple[str, int, float]]:
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat_result = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield path, stat_result.st_size, stat_result.st_mtime
+
+
+def collect_orphans(dry_run: bool = True, min_age_seconds: float = FILE_GC_MIN_AGE_SECONDS,
+                    batch_size: int = FILE_GC_BATCH, backend: StorageBackend = storage,
+                    store: ObjectStore = object_store, variants: ImageVariantCache = image_variants,
+                    session_factory=SessionLocal) -> List[OrphanReport]:
+    """업로드 저장소와 이미지 캐시를 DB와 대조해 어떤 행도 참조하지 않는 파일을 찾고 (dry_run이 아니면) 지웁니다.
+
+    파일 목록은 한 번에 읽지 않고 batch_size개씩 DB와 대조합니다.
+    """
+    cutoff = time.time() - min_age_seconds
+    uploads = OrphanReport("uploads")
+    cache = OrphanReport("image_cache")
+    db = session_factory()
+    try:
+        # 팩 파일은 보관 작업이 관리 (packed_objects가 색인)
+        files = (item for item in backend.iter_keys() if not is_pack_file(item[0]))
+        for batch in _batched(files, batch_size):
+            uploads.scanned += len(batch)
+            referenced = _referenced_keys(db, [key for key, _, _ in batch])
+            db.rollback()  # 배치마다 읽기 트랜잭션을 끝내 오래 잡지 않음
+            for key, size, mtime in batch:
+                if key in referenced:
+                    continue
+                if mtime > cutoff:
+                    uploads.recent += 1
+                    continue
+                uploads.add_orphan(key, size)
+                # delete()는 그 사이 참조가 다시 생겼는지 쓰기 잠금 아래에서 한 번 더 확인
+                if not dry_run and store.delete(key):
+                    uploads.deleted += 1
+
+        for batch in _batched(_iter_cache_files(variants.root), batch_size):
+            cache.scanned += len(batch)
+            digests = {path: os.path.basename(path)[:64] for path, _, _ in batch}
+            alive = _cached_digests(db, sorted({digest for digest in digests.values() if len(digest) == 64}))
+            db.rollback()
+            for path, size, mtime in batch:
+                if digests[path] in alive:
+                    continue
+                if mtime > cutoff:
+                    cache.recent += 1
+                    continue
+                cache.add_orphan(os.path.relpath(path, variants.root), size)
+                if not dry_run:
+                    try:
+                        os.remove(path)
+                        cache.deleted += 1
+                    except FileNotFoundError:
+                        pass
+    finally:
+        db.close()
+    return [uploads, cache]
+
+
+def run_file_gc():
+    """리더 워커의 주기 작업: 오래된 고아 파일을 지웁니다. (gc_files.py가 실행 중이면 건너뜀)"""
+    lock = named_lock("file_gc")
+    if not lock.try_acquire():
+        return
+    try:
+        for report in collect_orphans(dry_run=False):
+            if report.orphans:
+                logger.info("고아 파일 정리 - %s", report.summary())
+    finally:
+        lock.release()
+
+
+# 전역 파일 삭제 대기열 인스턴스
+file_reaper = FileReaper()
+
+
+def _collect_file_gc_metrics():
+    yield "# TYPE loca_file_deletions_pending gauge"
+    yield f"loca_file_deletions_pending {file_reaper.pending}"
+
+
+metrics.register_collector(_collect_file_gc_metrics)
@@ -0,0 +1,241 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 행정구역 경계 파일 (GeoJSON, 좌표는 [경도, 위도], properties에 공식 행정구역 코드 code와 name/full_name/level).
+# 설정하지 않으면 역지오코딩을 하지 않아 district_id를 채우지 않습니다. (정확하지 않은 경계로 잘못된 코드를 저장하지 않도록)
+DISTRICTS_PATH = os.getenv("LOCA_DISTRICTS_PATH") or None
+# 격자 한 칸의 크기 (도, 약 500m)
+GRID_CELL_DEGREES = 0.005
+
+Ring = List[Tuple[float, float]]
+
+# 격자 칸 상태: 어느 구역에도 속하지 않음 / 경계가 지나가 후보를 직접 판정
+_OUTSIDE = -1
+_MIXED = -2
+
+
+@dataclass(frozen=True)
+class District:
+    """행정구역 (id는 행정구역 코드, 예: 30200 유성구)"""
+
+    id: int
+    name: str
+    full_name: str
+    level: str
+
+
+def _point_in_ring(lng: float, lat: float, ring: Ring) -> bool:
+    inside = False
+    x1, y1 = ring[-1]
+    for x2, y2 in ring:
+        if (y1 > lat) != (y2 > lat) and lng < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+def _segment_touches_box(x1: float, y1: float, x2: float, y2: float,
+                         min_x: float, min_y: float, max_x: float, max_y: float) -> bool:
+    """선분이 사각형과 만나는지 (Liang-Barsky 클리핑)"""
+    dx, dy = x2 - x1, y2 - y1
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, x1 - min_x), (dx, max_x - x1), (-dy, y1 - min_y), (dy, max_y - y1)):
+        if p == 0:
+            if q < 0:
+                return False
+            continue
+        t = q / p
+        if p < 0:
+            t0 = max(t0, t)
+        else:
+            t1 = min(t1, t)
+        if t0 > t1:
+            return False
+    return True
+
+
+class _Shape:
+    __slots__ = ("district", "polygons", "bbox")
+
+    def __init__(self, district: District, polygons: List[List[Ring]]):
+        self.district = district
+        self.polygons = polygons  # [외곽선, 구멍...]의 목록
+        xs = [x for polygon in polygons for x, _ in polygon[0]]
+        ys = [y for polygon in polygons for _, y in polygon[0]]
+        self.bbox = (min(xs), min(ys), max(xs), max(ys))
+
+    def contains(self, lng: float, lat: float) -> bool:
+        min_x, min_y, max_x, max_y = self.bbox
+        if not (min_x <= lng <= max_x and min_y <= lat <= max_y):
+            return False
+        for outer, *holes in self.polygons:
+            if _point_in_ring(lng, lat, outer) and not any(_point_in_ring(lng, lat, hole) for hole in holes):
+                return True
+        return False
+
+    def edges(self):
+        for polygon in self.polygons:
+            for ring in polygon:
+                for i in range(len(ring) - 1):
+                    yield ring[i], ring[i + 1]
+
+
+class DistrictGeocoder:
+    """좌표를 행정구역으로 바꾸는 오프라인 역지오코더
+
+    경계 폴리곤을 격자로 나눠 두고, 경계선이 지나지 않는 칸은 구역을 미리 정해 두어
+    대부분의 조회가 나눗셈 두 번과 목록 조회로 끝납니다. 경계가 지나는 칸만 그 칸에 걸친
+    구역들에 대해 점-폴리곤 판정을 합니다. 동(洞) 단위 피처가 함께 있으면 더 작은 구역을 우선합니다.
+    """
+
+    def __init__(self, path: Optional[str] = DISTRICTS_PATH, cell: float = GRID_CELL_DEGREES):
+        self.path = path
+        self.cell = cell
+        self._lock = threading.Lock()
+        self._shapes: Optional[List[_Shape]] = None
+        self._districts: Dict[int, District] = {}
+        self._by_name: Dict[str, District] = {}
+        self._grid: List[int] = []
+        self._candidates: Dict[int, Tuple[_Shape, ...]] = {}
+        self._origin = (0.0, 0.0)
+        self._size = (0, 0)
+
+    @property
+    def enabled(self) -> bool:
+        """경계 파일이 설정되어 있는지"""
+        return self.path is not None
+
+    def _load(self):
+        if self.path is None:
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            collection = json.load(f)
+        shapes = []
+        for feature in collection["features"]:
+            properties, geometry = feature["properties"], feature["geometry"]
+            district = District(int(properties["code"]), properties["name"],
+                                properties.get("full_name", properties["name"]), properties.get("level", "gu"))
+            polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+            shapes.append(_Shape(district, [[[(float(x), float(y)) for x, y in ring] for ring in polygon]
+                                            for polygon in polygons]))
+        # 작은 구역(동)이 큰 구역(구)보다 먼저 판정되도록 경계 상자 넓이 순으로 정렬
+        shapes.sort(key=lambda s: (s.bbox[2] - s.bbox[0]) * (s.bbox[3] - s.bbox[1]))
+        return shapes
+
+    def _build(self, shapes: List[_Shape]):
+        cell = self.cell
+        min_x = min(s.bbox[0] for s in shapes)
+        min_y = min(s.bbox[1] for s in shapes)
+        columns = int((max(s.bbox[2] for s in shapes) - min_x) / cell) + 1
+        rows = int((max(s.bbox[3] for s in shapes) - min_y) / cell) + 1
+
+        # 경계선이 지나는 칸에 그 선의 구역을 후보로 기록
+        touching: Dict[int, List[int]] = {}
+        for index, shape in enumerate(shapes):
+            for (x1, y1), (x2, y2) in shape.edges():
+                for column in range(int((min(x1, x2) - min_x) / cell), int((max(x1, x2) - min_x) / cell) + 1):
+                    for row in range(int((min(y1, y2) - min_y) / cell), int((max(y1, y2) - min_y) / cell) + 1):
+                        left, bottom = min_x + column * cell, min_y + row * cell
+                        if not _segment_touches_box(x1, y1, x2, y2, left, bottom, left + cell, bottom + cell):
+                            continue
+                        owners = touching.setdefault(row * columns + column, [])
+                        if index not in owners:
+                            owners.append(index)
+
+        grid = [_OUTSIDE] * (rows * columns)
+        candidates: Dict[int, Tuple[_Shape, ...]] = {}
+        for row in range(rows):
+            for column in range(columns):
+                key = row * columns + column
+                center = (min_x + (column + 0.5) * cell, min_y + (row + 0.5) * cell)
+                # 경계선이 없는 칸은 칸 전체가 중심점과 같은 구역들에 속함
+                inside = [i for i, shape in enumerate(shapes) if shape.contains(*center)]
+                if key in touching:
+                    grid[key] = _MIXED
+                    candidates[key] = tuple(shapes[i] for i in sorted(set(inside) | set(touching[key])))
+                elif inside:
+                    grid[key] = inside[0]
+        self._origin = (min_x, min_y)
+        self._size = (columns, rows)
+        self._grid = grid
+        self._candidates = candidates
+
+    def load(self):
+        """경계 데이터를 읽고 격자 색인을 만듭니다. (처음 조회할 때 자동으로 호출)"""
+        with self._lock:
+            if self._shapes is not None:
+                return
+            shapes = self._load()
+            if not shapes:
+                self._shapes = []
+                logger.info("행정구역 경계 데이터가 설정되지 않아 역지오코딩을 하지 않습니다. (LOCA_DISTRICTS_PATH)")
+                return
+            self._build(shapes)
+            self._districts = {shape.district.id: shape.district for shape in shapes}
+            self._by_name = {}
+            for district in self._districts.values():
+                self._by_name.setdefault(district.name, district)
+                self._by_name.setdefault(district.full_name, district)
+            self._shapes = shapes
+            mixed = len(self._candidates)
+            logger.info("행정구역 %d개 로드 (격자 %dx%d, 경계 칸 %d개)", len(shapes), *self._size, mixed)
+
+    def lookup(self, latitude: Optional[float], longitude: Optional[float]) -> Optional[District]:
+        """좌표가 속한 행정구역을 반환합니다. 경계 밖이거나 좌표가 없으면 None."""
+        if latitude is None or longitude is None:
+            return None
+        if self._shapes is None:
+            self.load()
+        column = int((longitude - self._origin[0]) / self.cell)
+        row = int((latitude - self._origin[1]) / self.cell)
+        columns, rows = self._size
+        if not (0 <= column < columns and 0 <= row < rows) or longitude < self._origin[0] or latitude < self._origin[1]:
+            return None
+        key = row * columns + column
+        owner = self._grid[key]
+        if owner >= 0:
+            return self._shapes[owner].district
+        if owner == _OUTSIDE:
+            return None
+        for shape in self._candidates[key]:
+            if shape.contains(longitude, latitude):
+                return shape.district
+        return None
+
+    def district_id(self, latitude: Optional[float], longitude: Optional[float]) -> Optional[int]:
+        district = self.lookup(latitude, longitude)
+        return district.id if district else None
+
+    def assign(self, points: Sequence[Tuple[Optional[float], Optional[float]]]) -> List[Optional[int]]:
+        """(위도, 경도) 목록의 행정구역 id 목록 (백필용)"""
+        lookup = self.lookup
+        return [(district.id if (district := lookup(lat, lng)) else None) for lat, lng in points]
+
+    def resolve(self, value: str) -> Optional[District]:
+        """행정구역 코드("30200") 또는 이름("유성구", "대전광역시 유성구")으로 구역을 찾습니다."""
+        if self._shapes is None:
+            self.load()
+        value = value.strip()
+        if value.isdigit():
+            return self._districts.get(int(value))
+        return self._by_name.get(value)
+
+    def get(self, district_id: int) -> Optional[District]:
+        if self._shapes is None:
+            self.load()
+        return self._districts.get(district_id)
+
+    def districts(self) -> List[District]:
+        if self._shapes is None:
+            self.load()
+        return sorted(self._districts.values(), key=lambda district: district.id)
+
+
+# 전역 역지오코더 인스턴스
+district_geocoder = DistrictGeocoder()
@@ -0,0 +1,375 @@
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+from PIL import Image, ImageOps, features
+from starlette.responses import Response
+
+from .metrics import metrics
+from .storage import PackStore, StorageBackend, is_content_addressed, pack_store, storage
+
+logger = logging.getLogger(__name__)
+
+# 변환된 이미지(리사이즈/WebP/AVIF)와 원격 저장소 원본을 보관하는 로컬 캐시 디렉토리
+IMAGE_CACHE_DIR = os.getenv("LOCA_IMAGE_CACHE_DIR", "image_cache")
+# 허용하는 가로 크기 (요청한 w는 이 중 가장 가까운 큰 값으로 맞춰 변형 수를 제한합니다)
+VARIANT_WIDTHS = (320, 640, 1080, 1600)
+# 선호 순서대로 나열한 변환 대상 형식
+NEGOTIABLE_FORMATS = [
+    ("image/avif", "avif", "AVIF"),
+    ("image/webp", "webp", "WEBP"),
+]
+# 크기/형식 변환 대상인 정지 이미지 형식 (애니메이션 GIF 등은 원본 그대로 보냅니다)
+TRANSCODABLE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".heic", ".heif", ".bmp", ".tif", ".tiff"}
+# 브라우저가 표시하지 못하는 원본 형식은 기본적으로 JPEG로 변환합니다
+FALLBACK_FORMAT = ("image/jpeg", "jpg", "JPEG")
+BROWSER_UNSUPPORTED_EXTENSIONS = {".heic", ".heif", ".tif", ".tiff"}
+ENCODE_OPTIONS = {"AVIF": {"quality": 60}, "WEBP": {"quality": 80, "method": 4}, "JPEG": {"quality": 85}}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+LEGACY_CACHE_CONTROL = "public, max-age=3600"
+
+_READ_CHUNK = 256 * 1024
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+metrics.describe("loca_image_variants_total", "이미지 변형 캐시 조회 결과")
+
+
+def _supported(pil_format: str) -> bool:
+    return features.check(pil_format.lower())
+
+
+def negotiate_format(accept: Optional[str]) -> Optional[Tuple[str, str, str]]:
+    """Accept 헤더에서 클라이언트가 받을 수 있는 가장 효율적인 형식을 고릅니다."""
+    if not accept:
+        return None
+    accepted = {part.split(";")[0].strip().lower() for part in accept.split(",")}
+    for media_type, ext, pil_format in NEGOTIABLE_FORMATS:
+        if media_type in accepted and _supported(pil_format):
+            return media_type, ext, pil_format
+    return None
+
+
+def snap_width(width: Optional[int]) -> Optional[int]:
+    if not width or width <= 0:
+        return None
+    for candidate in VARIANT_WIDTHS:
+        if width <= candidate:
+            return candidate
+    return None
+
+
+class ImageVariantCache:
+    """내용 해시 기반 이미지의 변형을 디스크에 캐시합니다.
+
+    원본이 바뀌지 않으므로 캐시된 변형은 무효화할 필요가 없습니다.
+    """
+
+    def __init__(self, backend: StorageBackend, root: str = IMAGE_CACHE_DIR, packs: Optional[PackStore] = None):
+        self.backend = backend
+        self.root = root
+        self.packs = packs
+        self._locks: Dict[str, List] = {}  # 경로 -> [잠금, 잡고 있거나 기다리는 스레드 수]
+        self._locks_guard = threading.Lock()
+
+    @contextmanager
+    def _path_lock(self, name: str):
+        """경로별 잠금. 잡고 있거나 기다리는 스레드가 모두 끝나야 항목을 지워, 같은 경로에 잠금이 둘 생기지 않게 합니다."""
+        with self._locks_guard:
+            entry = self._locks.get(name)
+            if entry is None:
+                entry = self._locks[name] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[name]
+
+    def _cache_path(self, key: str, suffix: str) -> str:
+        name = os.path.basename(key)
+        digest = os.path.splitext(name)[0]
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}{suffix}")
+
+    def original_path(self, key: str) -> Optional[str]:
+        """원본 파일의 로컬 경로를 반환합니다. 원격 저장소면 로컬 캐시에 내려받습니다."""
+        path = self.backend.local_path(key)
+        if path is not None:
+            return path if os.path.isfile(path) else None
+        if not is_content_addressed(key):
+            return None
+        path = self._cache_path(key, os.path.splitext(key)[1])
+        if os.path.isfile(path):
+            return path
+        with self._path_lock(path):
+            if not os.path.isfile(path):
+                if not self.backend.exists(key):
+                    return None
+                with self.backend.open(key) as f:
+                    _write_atomic(path, f.read())
+        return path
+
+    def transcode_packed(self, key: str, fmt: Tuple[str, str, str]) -> Optional[bytes]:
+        """팩에 보관된 원본을 캐시하지 않고 fmt로 변환합니다. (브라우저가 표시하지 못하는 원본 형식용)"""
+        data = self.packs.read(key) if self.packs is not None else None
+        if data is None:
+            return None
+        metrics.inc("loca_image_variants_total", {"result": "uncached"})
+        return _transcode(io.BytesIO(data), None, fmt[2])
+
+    def discard(self, key: str) -> int:
+        """원본이 삭제된 키의 변형/원본 캐시 파일을 지우고 지운 파일 수를 반환합니다."""
+        if not is_content_addressed(key):
+            return 0
+        digest = os.path.splitext(os.path.basename(key))[0]
+        directory = os.path.dirname(self._cache_path(key, ""))
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return 0
+        removed = 0
+        for name in names:
+            if name.startswith(digest):
+                try:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def variant_path(self, key: str, width: Optional[int], fmt: Optional[Tuple[str, str, str]]) -> Optional[str]:
+        """요청한 크기/형식의 변형 파일 경로를 반환합니다. 변환할 수 없으면 None."""
+        ext = fmt[1] if fmt else os.path.splitext(key)[1].lstrip(".") or "jpg"
+        path = self._cache_path(key, f"-w{width or 0}.{ext}")
+        if os.path.isfile(path):
+            metrics.inc("loca_image_variants_total", {"result": "hit"})
+            return path
+        source = self.original_path(key)
+        if source is None:
+            # 보관 작업이 팩 파일로 옮긴 원본. 원본 크기 변형은 만들지 않음 (보관으로 회수한 공간을 캐시가 다시 쓰지 않도록)
+            if width is None:
+                return None
+            data = self.packs.read(key) if self.packs is not None else None
+            if data is None:
+                return None
+            source = io.BytesIO(data)
+        with self._path_lock(path):
+            if not os.path.isfile(path):
+                metrics.inc("loca_image_variants_total", {"result": "miss"})
+                data = _transcode(source, width, fmt[2] if fmt else None)
+                if data is None:
+                    return None
+                _write_atomic(path, data)
+            else:
+                metrics.inc("loca_image_variants_total", {"result": "hit"})
+        return path
+
+
+def _transcode(source, width: Optional[int], pil_format: Optional[str]) -> Optional[bytes]:
+    try:
+        with Image.open(source) as image:
+            target_format = pil_format or image.format or "JPEG"
+            image = ImageOps.exif_transpose(image)
+            if width and image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.Resampling.LANCZOS)
+            if target_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            elif image.mode not in ("RGB", "RGBA", "L"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            buffer = io.BytesIO()
+            image.save(buffer, target_format, **ENCODE_OPTIONS.get(target_format, {}))
+            return buffer.getvalue()
+    except Exception as e:
+        logger.warning("이미지 변환 실패: %s (%s)", source, e)
+        return None
+
+
+def _write_atomic(path: str, data: bytes):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def parse_range(header: Optional[str], size: int) -> Tuple[Optional[Tuple[int, int]], bool]:
+    """단일 Range 헤더를 (시작, 끝) 구간으로 해석합니다.
+
+    (None, True)는 만족할 수 없는 범위(416)를, (None, False)는 전체 응답을 뜻합니다.
+    여러 구간 요청이나 잘못된 형식은 전체 응답으로 처리합니다.
+    """
+    if not header:
+        return None, False
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None, False
+    first, last = match.groups()
+    if not first and not last:
+        return None, False
+    if not first:
+        length = int(last)
+        if length == 0:
+            return None, True
+        return (max(0, size - length), size - 1), False
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        return None, True
+    if end < start:
+        return None, False
+    return (start, end), False
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    weak = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == weak:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(mtime) <= since
+
+
+class ImageFileResponse(Response):
+    """Range/조건부 요청과 제로 카피 전송을 지원하는 파일 응답입니다.
+
+    서버가 ASGI `http.response.pathsend` 또는 `http.response.zerocopysend` 확장을 지원하면
+    파일 전송을 서버(sendfile)에 맡기고, 아니면 스레드에서 큰 청크로 읽어 보냅니다.
+    offset/length를 주면 파일의 그 구간(팩 파일 안의 파일 하나)을 하나의 파일처럼 보내며,
+    Last-Modified에는 파일 수정 시각 대신 mtime을 씁니다.
+    """
+
+    def __init__(self, path: str, media_type: str, etag: str, cache_control: str,
+                 request_headers: Dict[str, str], method: str = "GET", vary: Optional[str] = None,
+                 offset: int = 0, length: Optional[int] = None, mtime: Optional[float] = None):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.mtime = mtime
+        self.media_type = media_type
+        self.etag = etag
+        self.cache_control = cache_control
+        self.request_headers = request_headers
+        self.send_header_only = method.upper() == "HEAD"
+        self.vary = vary
+        self.background = None
+        self.init_headers()
+
+    def _base_headers(self, mtime: float) -> List[Tuple[bytes, bytes]]:
+        headers = [
+            (b"etag", self.etag.encode("latin-1")),
+            (b"last-modified", formatdate(mtime, usegmt=True).encode("latin-1")),
+            (b"cache-control", self.cache_control.encode("latin-1")),
+            (b"accept-ranges", b"bytes"),
+        ]
+        if self.vary:
+            headers.append((b"vary", self.vary.encode("latin-1")))
+        return headers
+
+    async def __call__(self, scope, receive, send):
+        if self.length is None:
+            stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            size, mtime = stat_result.st_size, stat_result.st_mtime
+        else:
+            size, mtime = self.length, self.mtime or 0.0
+        headers = self._base_headers(mtime)
+
+        if_none_match = self.request_headers.get("if-none-match")
+        if_modified_since = self.request_headers.get("if-modified-since")
+        if (if_none_match and _etag_matches(if_none_match, self.etag)) or (
+                not if_none_match and if_modified_since and _not_modified_since(if_modified_since, mtime)):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        range_header = self.request_headers.get("range")
+        if_range = self.request_headers.get("if-range")
+        if range_header and if_range and if_range.strip() != self.etag:
+            range_header = None
+        byte_range, unsatisfiable = parse_range(range_header, size)
+
+        if unsatisfiable:
+            headers.append((b"content-range", f"bytes */{size}".encode("latin-1")))
+            headers.append((b"content-length", b"0"))
+            await send({"type": "http.response.start", "status": 416, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        start, end = byte_range if byte_range else (0, size - 1)
+        count = end - start + 1 if size else 0
+        status = 206 if byte_range else 200
+        headers.append((b"content-type", self.media_type.encode("latin-1")))
+        headers.append((b"content-length", str(count).encode("latin-1")))
+        if byte_range:
+            headers.append((b"content-range", f"bytes {start}-{end}/{size}".encode("latin-1")))
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        if self.send_header_only or count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if not byte_range and self.length is None and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+            return
+        if "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f.fileno(),
+                            "offset": self.offset + start, "count": count})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            await f.seek(self.offset + start)
+            remaining = count
+            while remaining > 0:
+                chunk = await f.read(min(_READ_CHUNK, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b""})
+
+
+def content_etag(key: str, variant: str) -> str:
+    """내용 해시 기반 키는 해시 자체로 강한 ETag를 만듭니다."""
+    digest = os.path.splitext(os.path.basename(key))[0]
+    return f'"{digest}-{variant}"'
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    base = f"{stat_result.st_mtime}-{stat_result.st_size}".encode()
+    return '"' + hashlib.md5(base, usedforsecurity=False).hexdigest() + '"'
+
+
+# 전역 이미지 변형 캐시
+image_variants = ImageVariantCache(storage, packs=pack_store)
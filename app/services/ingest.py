@@ -0,0 +1,248 @@
+import io
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# AI 분석용으로 디코딩할 최대 크기 (JPEG는 이 크기 이상인 가장 작은 배율로 디코딩)
+AI_DECODE_SIZE = (1024, 1024)
+# 회전을 적용해 다시 인코딩할 때의 JPEG 품질
+REENCODE_QUALITY = 92
+# 촬영 시각에 시간대 정보(OffsetTimeOriginal)가 없으면 한국 표준시로 간주
+DEFAULT_CAPTURE_OFFSET = timezone(timedelta(hours=9))
+
+# EXIF 태그 번호
+_ORIENTATION = 0x0112
+_DATETIME = 0x0132
+_EXIF_IFD = 0x8769
+_GPS_IFD = 0x8825
+_DATETIME_ORIGINAL = 0x9003
+_OFFSET_TIME_ORIGINAL = 0x9011
+
+# 저장 파일에서 지우는 JPEG 세그먼트: APP1(EXIF/XMP, 내장 썸네일), APP12, APP13(Photoshop/IPTC), COM
+_STRIP_MARKERS = {0xE1, 0xEC, 0xED, 0xFE}
+# 길이 필드가 없는 마커 (SOI, EOI, RSTn, TEM)
+_STANDALONE_MARKERS = {0xD8, 0xD9, 0x01} | set(range(0xD0, 0xD8))
+# 다시 저장할 때 지우는 PIL 메타데이터 (EXIF, XMP, 주석)
+_METADATA_INFO_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "comment")
+# 저장 형식별 콘텐츠 유형과 확장자
+_STORED_TYPES = {"JPEG": ("image/jpeg", ".jpg"), "PNG": ("image/png", ".png"),
+                 "WEBP": ("image/webp", ".webp"), "GIF": ("image/gif", ".gif")}
+
+metrics.describe("loca_ingest_images_total", "업로드 이미지 처리 결과")
+
+
+class ImageIngestError(Exception):
+    """이미지로 읽을 수 없는 업로드 (저장하지 않고 거절)"""
+
+
+@dataclass
+class IngestedImage:
+    """업로드 처리 결과
+
+    data는 저장할 바이트(메타데이터 제거, 회전 적용), image는 한 번 디코딩한 PIL 이미지로
+    AI 분석 등 이후 단계가 다시 디코딩하지 않고 사용합니다. filename/content_type은 업로드한 이름이 아닌
+    저장할 바이트의 실제 형식에 맞춘 값입니다. (예: HEIC를 JPEG로 저장하면 IMG_1.heic -> IMG_1.jpg)
+    """
+
+    data: bytes
+    image: Image.Image
+    format: str
+    filename: str
+    content_type: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    captured_at: Optional[datetime] = None
+
+
+def _rational(value) -> float:
+    if isinstance(value, tuple) and len(value) == 2:
+        return value[0] / value[1]
+    return float(value)
+
+
+def _gps_coordinates(exif: Image.Exif) -> Tuple[Optional[float], Optional[float]]:
+    try:
+        gps = exif.get_ifd(_GPS_IFD)
+    except Exception:
+        return None, None
+    try:
+        lat_ref, lat, lon_ref, lon = gps.get(1), gps.get(2), gps.get(3), gps.get(4)
+        if not lat or not lon:
+            return None, None
+        latitude = sum(_rational(part) / 60 ** i for i, part in enumerate(lat))
+        longitude = sum(_rational(part) / 60 ** i for i, part in enumerate(lon))
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None, None
+    if str(lat_ref).upper().startswith("S"):
+        latitude = -latitude
+    if str(lon_ref).upper().startswith("W"):
+        longitude = -longitude
+    # (0, 0)은 GPS를 잡지 못한 기기가 채우는 값
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or (latitude == 0 and longitude == 0):
+        return None, None
+    return round(latitude, 7), round(longitude, 7)
+
+
+def _capture_time(exif: Image.Exif) -> Optional[datetime]:
+    try:
+        details = exif.get_ifd(_EXIF_IFD)
+    except Exception:
+        details = {}
+    raw = details.get(_DATETIME_ORIGINAL) or exif.get(_DATETIME)
+    if not raw:
+        return None
+    try:
+        captured_at = datetime.strptime(str(raw).strip("\x00 ")[:19], "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+    offset = details.get(_OFFSET_TIME_ORIGINAL)
+    tz = DEFAULT_CAPTURE_OFFSET
+    if offset:
+        try:
+            sign = -1 if str(offset).startswith("-") else 1
+            hours, minutes = str(offset).strip("+-\x00 ").split(":")
+            tz = timezone(sign * timedelta(hours=int(hours), minutes=int(minutes)))
+        except ValueError:
+            pass
+    return captured_at.replace(tzinfo=tz)
+
+
+def strip_jpeg_metadata(data: bytes) -> bytes:
+    """JPEG를 다시 인코딩하지 않고 EXIF/XMP/IPTC/주석 세그먼트와 EOI 뒤에 붙은 데이터(MPF 미리보기 등)를 지웁니다.
+
+    색 재현에 필요한 APP0(JFIF), APP2(ICC), APP14(Adobe)는 유지합니다. 구조를 해석할 수 없으면 원본을 반환합니다.
+    """
+    if not data.startswith(b"\xff\xd8"):
+        return data
+    out = [data[:2]]
+    position = 2
+    length = len(data)
+    while position + 4 <= length:
+        if data[position] != 0xFF:
+            return data
+        marker = data[position + 1]
+        if marker == 0xFF:  # 채움 바이트
+            position += 1
+            continue
+        if marker in _STANDALONE_MARKERS:
+            out.append(data[position:position + 2])
+            position += 2
+            continue
+        segment_end = position + 2 + int.from_bytes(data[position + 2:position + 4], "big")
+        if segment_end > length:
+            return data
+        if marker == 0xDA:
+            # 스캔 데이터 안의 0xFF는 항상 0x00 또는 RSTn이 뒤따르므로 처음 나오는 FFD9가 EOI
+            end = data.find(b"\xff\xd9", segment_end)
+            if end < 0:
+                return data
+            out.append(data[position:end + 2])
+            return b"".join(out)
+        segment = data[position:segment_end]
+        is_mpf = marker == 0xE2 and segment[4:8] == b"MPF\x00"
+        if marker not in _STRIP_MARKERS and not is_mpf:
+            out.append(segment)
+        position = segment_end
+    return data
+
+
+def _without_metadata(image: Image.Image) -> Image.Image:
+    for key in _METADATA_INFO_KEYS:
+        image.info.pop(key, None)
+    return image
+
+
+def _encode(image: Image.Image, pil_format: str, icc_profile: Optional[bytes], save_all: bool = False) -> bytes:
+    buffer = io.BytesIO()
+    options = {"icc_profile": icc_profile} if icc_profile else {}
+    if pil_format == "JPEG":
+        if image.mode not in ("RGB", "L", "CMYK"):
+            image = image.convert("RGB")
+        options.update(quality=REENCODE_QUALITY, optimize=True)
+    elif pil_format == "WEBP":
+        options.update(quality=REENCODE_QUALITY)
+    if save_all:
+        options["save_all"] = True
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def _target_format(image: Image.Image, pil_format: str) -> str:
+    # GIF/WebP는 애니메이션과 투명도를 지키도록 같은 형식으로, 그 밖의 형식(HEIC 등)은
+    # 어느 클라이언트나 표시할 수 있도록 JPEG로 (투명도가 있으면 WebP로) 다시 저장
+    if pil_format in ("GIF", "WEBP"):
+        return pil_format
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        return "WEBP"
+    return "JPEG"
+
+
+def _stored_name(filename: Optional[str], pil_format: str) -> str:
+    return os.path.splitext(os.path.basename(filename or ""))[0] + _STORED_TYPES[pil_format][1]
+
+
+def ingest_image(data: bytes, filename: Optional[str] = None) -> IngestedImage:
+    """업로드 바이트를 한 번만 디코딩해 EXIF 위치/촬영 시각을 읽고, 저장할 바이트와 디코딩된 이미지를 만듭니다. (스레드에서 호출)
+
+    - JPEG: 회전이 필요 없으면 다시 인코딩하지 않고 메타데이터 세그먼트만 지우고, AI용으로는
+      축소 배율로 디코딩합니다(draft). 회전이 필요하면 전체를 디코딩해 회전한 뒤 다시 인코딩합니다.
+    - PNG: 회전을 적용하고 EXIF/텍스트 청크 없이 무손실로 다시 저장합니다.
+    - GIF, WebP: 같은 형식으로 (애니메이션은 모든 프레임을) EXIF/XMP 없이 다시 저장합니다.
+    - 그 밖의 형식(HEIC 등): 회전을 적용해 JPEG(투명도가 있으면 WebP)로 다시 저장합니다.
+
+    원본 바이트는 GPS 등 메타데이터가 남아 있어 그대로 저장하지 않으며, 디코딩할 수 없으면 ImageIngestError를 던집니다.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        pil_format = image.format
+        exif = image.getexif()
+    except Exception as e:
+        logger.info("이미지로 읽을 수 없는 업로드: %s", e)
+        metrics.inc("loca_ingest_images_total", {"result": "undecodable"})
+        raise ImageIngestError("이미지 파일을 읽을 수 없습니다.") from e
+
+    latitude, longitude = _gps_coordinates(exif)
+    captured_at = _capture_time(exif)
+    orientation = exif.get(_ORIENTATION, 1)
+    icc_profile = image.info.get("icc_profile")
+    stored_format = pil_format
+    try:
+        if pil_format == "JPEG" and orientation in (1, None):
+            stored = strip_jpeg_metadata(data)
+            image.draft("RGB", AI_DECODE_SIZE)
+            image.load()
+            result = "stripped"
+        elif pil_format in ("JPEG", "PNG"):
+            image.load()
+            image = _without_metadata(ImageOps.exif_transpose(image))
+            stored = _encode(image, pil_format, icc_profile)
+            result = "reencoded"
+        elif getattr(image, "is_animated", False) and pil_format in ("GIF", "WEBP"):
+            image.load()
+            stored = _encode(_without_metadata(image), pil_format, icc_profile, save_all=True)
+            image.seek(0)
+            image = ImageOps.exif_transpose(image)
+            result = "reencoded"
+        else:
+            image.load()
+            image = _without_metadata(ImageOps.exif_transpose(image))
+            stored_format = _target_format(image, pil_format)
+            stored = _encode(image, stored_format, icc_profile)
+            result = "reencoded" if stored_format == pil_format else "converted"
+    except Exception as e:
+        logger.warning("이미지 디코딩 실패: %s", e)
+        metrics.inc("loca_ingest_images_total", {"result": "undecodable"})
+        raise ImageIngestError("이미지 파일을 읽을 수 없습니다.") from e
+
+    metrics.inc("loca_ingest_images_total", {"result": result})
+    return IngestedImage(data=stored, image=image, format=pil_format, filename=_stored_name(filename, stored_format),
+                         content_type=_STORED_TYPES[stored_format][0],
+                         latitude=latitude, longitude=longitude, captured_at=captured_at)
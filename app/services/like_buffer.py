@@ -0,0 +1,239 @@
+import asyncio
+import enum
+import os
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..models import Like, Photo
+from .metrics import metrics
+from .recommend import record_like_changes
+
+# 좋아요 요청을 모아서 한 번에 커밋하는 주기 (밀리초)
+LIKE_FLUSH_INTERVAL_MS = float(os.getenv("LOCA_LIKE_FLUSH_MS", "5"))
+# 한 번의 트랜잭션에서 처리할 최대 (user_id, photo_id) 쌍 수
+LIKE_MAX_BATCH = int(os.getenv("LOCA_LIKE_MAX_BATCH", "1000"))
+# SQLite 바인드 파라미터 제한을 피하기 위한 IN 절 크기
+_IN_CHUNK = 500
+
+_like_table = Like.__table__
+
+
+class LikeAction(enum.Enum):
+    LIKE = "like"
+    UNLIKE = "unlike"
+
+
+class LikeOutcome(enum.Enum):
+    LIKED = "liked"
+    UNLIKED = "unliked"
+    ALREADY_LIKED = "already_liked"
+    LIKE_NOT_FOUND = "like_not_found"
+    PHOTO_NOT_FOUND = "photo_not_found"
+    ERROR = "error"
+
+
+_Key = Tuple[int, int]  # (user_id, photo_id)
+
+
+def _chunks(values: List[int]):
+    for i in range(0, len(values), _IN_CHUNK):
+        yield values[i:i + _IN_CHUNK]
+
+
+def _resolve(initial: bool, photo_exists: bool, actions: List[LikeAction]) -> Tuple[bool, List[LikeOutcome]]:
+    """DB의 현재 상태에서 출발해 의도들을 순서대로 적용하고 최종 상태와 각 응답을 계산합니다."""
+    state = initial
+    outcomes = []
+    for action in actions:
+        if action is LikeAction.LIKE:
+            if not photo_exists:
+                outcomes.append(LikeOutcome.PHOTO_NOT_FOUND)
+            elif state:
+                outcomes.append(LikeOutcome.ALREADY_LIKED)
+            else:
+                state = True
+                outcomes.append(LikeOutcome.LIKED)
+        else:
+            if state:
+                state = False
+                outcomes.append(LikeOutcome.UNLIKED)
+            else:
+                outcomes.append(LikeOutcome.LIKE_NOT_FOUND)
+    return state, outcomes
+
+
+class LikeBuffer:
+    """좋아요/좋아요 취소 의도를 메모리에 모았다가 짧은 주기로 하나의 트랜잭션에 반영합니다.
+
+    같은 (user_id, photo_id)에 대한 의도는 도착 순서대로 합쳐지고, 최종 상태가 바뀐 쌍만
+    INSERT/DELETE 됩니다. 각 요청은 자신의 의도가 커밋된 뒤에 결과를 받으므로 기존
+    엔드포인트와 동일한 응답(중복 좋아요 400, 없는 좋아요 404 등)을 돌려줄 수 있습니다.
+    """
+
+    def __init__(self, session_factory=SessionLocal,
+                 flush_interval_ms: float = LIKE_FLUSH_INTERVAL_MS,
+                 max_batch: int = LIKE_MAX_BATCH):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending: Dict[_Key, List[Tuple[LikeAction, asyncio.Future]]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+        self.flushed_batches = 0
+        self.flushed_intents = 0
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            # 이벤트 루프가 바뀌었으면 (테스트 클라이언트 등) 이전 루프의 대기열은 버립니다.
+            if self._loop is not loop:
+                self._pending = {}
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, user_id: int, photo_id: int, action: LikeAction) -> LikeOutcome:
+        """좋아요 의도를 버퍼에 넣고, 해당 배치가 커밋되면 결과를 반환합니다."""
+        self._ensure_running()
+        future = self._loop.create_future()
+        self._pending.setdefault((user_id, photo_id), []).append((action, future))
+        self._wakeup.set()
+        return await future
+
+    async def like(self, user_id: int, photo_id: int) -> LikeOutcome:
+        return await self.submit(user_id, photo_id, LikeAction.LIKE)
+
+    async def unlike(self, user_id: int, photo_id: int) -> LikeOutcome:
+        return await self.submit(user_id, photo_id, LikeAction.UNLIKE)
+
+    async def _run(self):
+        while not self._stopping:
+            await self._wakeup.wait()
+            if not self._stopping:
+                # 짧게 기다리며 같은 주기에 들어온 요청들을 모읍니다.
+                await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """현재까지 쌓인 의도들을 DB에 반영합니다."""
+        while self._pending:
+            batch = self._take_batch()
+            actions = {key: [action for action, _ in items] for key, items in batch.items()}
+            try:
+                results = await run_in_threadpool(self._apply, actions)
+            except Exception:
+                results = {key: [LikeOutcome.ERROR] * len(items) for key, items in batch.items()}
+            for key, items in batch.items():
+                for (_, future), outcome in zip(items, results[key]):
+                    if not future.done():
+                        future.set_result(outcome)
+        if self._wakeup is not None:
+            self._wakeup.clear()
+
+    def _take_batch(self) -> Dict[_Key, List[Tuple[LikeAction, asyncio.Future]]]:
+        if len(self._pending) <= self.max_batch:
+            batch, self._pending = self._pending, {}
+            return batch
+        batch = {}
+        for key in list(self._pending)[:self.max_batch]:
+            batch[key] = self._pending.pop(key)
+        return batch
+
+    async def stop(self):
+        """남은 의도를 모두 반영하고 플러시 태스크를 종료합니다."""
+        if self._task is not None and not self._task.done() and self._loop is asyncio.get_running_loop():
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+        self._task = None
+        self._stopping = False
+
+    def _apply(self, actions: Dict[_Key, List[LikeAction]]) -> Dict[_Key, List[LikeOutcome]]:
+        db = self.session_factory()
+        try:
+            try:
+                return self._apply_batch(db, actions)
+            except IntegrityError:
+                # 버퍼 밖(다른 워커 등)에서 동시에 쓴 행과 충돌한 경우 쌍별로 다시 처리합니다.
+                db.rollback()
+                results = {}
+                for key, key_actions in actions.items():
+                    try:
+                        results.update(self._apply_batch(db, {key: key_actions}))
+                    except Exception:
+                        db.rollback()
+                        results[key] = [LikeOutcome.ERROR] * len(key_actions)
+                return results
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _apply_batch(self, db, actions: Dict[_Key, List[LikeAction]]) -> Dict[_Key, List[LikeOutcome]]:
+        photo_ids = sorted({photo_id for _, photo_id in actions})
+        user_ids = sorted({user_id for user_id, _ in actions})
+
+        existing_photos = set()
+        for chunk in _chunks(photo_ids):
+            existing_photos.update(db.execute(select(Photo.id).where(Photo.id.in_(chunk))).scalars())
+
+        existing_likes = set()
+        for photo_chunk in _chunks(photo_ids):
+            for user_chunk in _chunks(user_ids):
+                rows = db.execute(
+                    select(Like.user_id, Like.photo_id).where(
+                        Like.photo_id.in_(photo_chunk), Like.user_id.in_(user_chunk)
+                    )
+                )
+                existing_likes.update((row.user_id, row.photo_id) for row in rows)
+
+        results = {}
+        to_insert = []
+        to_delete = []
+        for key, key_actions in actions.items():
+            initial = key in existing_likes
+            final, outcomes = _resolve(initial, key[1] in existing_photos, key_actions)
+            results[key] = outcomes
+            if final and not initial:
+                to_insert.append({"user_id": key[0], "photo_id": key[1]})
+            elif initial and not final:
+                to_delete.append({"u": key[0], "p": key[1]})
+
+        if to_insert:
+            db.execute(insert(_like_table), to_insert)
+        if to_delete:
+            db.execute(
+                delete(_like_table).where(and_(_like_table.c.user_id == bindparam("u"), _like_table.c.photo_id == bindparam("p"))),
+                to_delete,
+            )
+        # 추천 이웃 증분 갱신이 읽는 좋아요 변경 기록을 같은 트랜잭션에서 남김
+        record_like_changes(db, [(row["user_id"], row["photo_id"]) for row in to_insert]
+                            + [(row["u"], row["p"]) for row in to_delete])
+        db.commit()
+
+        self.flushed_batches += 1
+        self.flushed_intents += sum(len(a) for a in actions.values())
+        return results
+
+
+# 전역 좋아요 버퍼 인스턴스
+like_buffer = LikeBuffer()
+
+
+def _collect_like_buffer_metrics():
+    yield "# TYPE loca_like_buffer_flushes_total counter"
+    yield f"loca_like_buffer_flushes_total {like_buffer.flushed_batches}"
+    yield "# TYPE loca_like_buffer_intents_total counter"
+    yield f"loca_like_buffer_intents_total {like_buffer.flushed_intents}"
+    yield "# TYPE loca_like_buffer_pending gauge"
+    yield f"loca_like_buffer_pending {len(like_buffer._pending)}"
+
+
+metrics.register_collector(_collect_like_buffer_metrics)
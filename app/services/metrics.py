@@ -0,0 +1,410 @@
+import contextvars
+import heapq
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# 샘플링된 요청만 INFO로 추적 로그를 남깁니다 (0.0 ~ 1.0)
+TRACE_SAMPLE_RATE = float(os.getenv("LOCA_TRACE_SAMPLE_RATE", "0"))
+# 이보다 느린 요청은 샘플링과 관계없이 WARNING으로 남깁니다
+TRACE_SLOW_MS = float(os.getenv("LOCA_TRACE_SLOW_MS", "1000"))
+# 이보다 오래 걸린 SQL 문을 바인딩 값과 함께 남깁니다 (ms, 0이면 끔)
+SLOW_QUERY_MS = float(os.getenv("LOCA_SLOW_QUERY_MS", "0"))
+# 느린 엔드포인트 보고서(/admin/slow)의 집계 구간 (초, 0이면 끔)
+SLOW_REPORT_WINDOW_SECONDS = int(os.getenv("LOCA_SLOW_REPORT_WINDOW_S", "0"))
+
+# 지연 시간 히스토그램 버킷 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+trace_logger = logging.getLogger("loca.trace")
+slow_query_logger = logging.getLogger("loca.slow_query")
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> _Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: _Labels, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, bucket_count: int):
+        self.counts = [0] * (bucket_count + 1)
+        self.total = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """프로메테우스 텍스트 형식으로 내보낼 수 있는 간단한 카운터/히스토그램 저장소입니다."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[_Labels, float]] = {}
+        self._histograms: Dict[str, Dict[_Labels, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, amount: float = 1.0):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        key = _labels(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(len(self.buckets))
+            histogram.counts[index] += 1
+            histogram.total += value
+            histogram.count += 1
+
+    def register_collector(self, collector: Callable[[], Iterable[str]]):
+        """렌더링 시점에 추가 지표 줄을 만들어 내는 콜백을 등록합니다."""
+        self._collectors.append(collector)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, [('le', f'{bound:g}')])} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+# 전역 지표 저장소
+metrics = MetricsRegistry()
+metrics.describe("loca_http_requests_total", "HTTP 요청 수")
+metrics.describe("loca_http_request_duration_seconds", "라우트별 HTTP 요청 처리 시간")
+metrics.describe("loca_sql_statements_total", "실행된 SQL 문 수")
+metrics.describe("loca_sql_statement_duration_seconds", "SQL 문 실행 시간")
+metrics.describe("loca_gemini_requests_total", "Gemini API 호출 수")
+metrics.describe("loca_gemini_request_duration_seconds", "Gemini API 호출 시간")
+
+# 요청 단위 SQL 통계 [문장 수, 누적 시간, "메서드 경로"]
+_request_sql: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("loca_request_sql", default=None)
+
+# 느린 SQL 로그에 남기는 문장/바인딩 값의 최대 길이
+_SQL_TEXT_LIMIT = 2000
+_SQL_PARAMS_LIMIT = 500
+
+
+def _format_parameters(parameters, executemany: bool) -> str:
+    if executemany and parameters:
+        text = f"{len(parameters)}행, 첫 행 {parameters[0]!r}"
+    else:
+        text = repr(parameters)
+    return text if len(text) <= _SQL_PARAMS_LIMIT else text[:_SQL_PARAMS_LIMIT] + "..."
+
+
+class SlowQueryLog:
+    """threshold_ms보다 오래 걸린 SQL 문을 바인딩 값, 요청과 함께 로그로 남기고 최근 keep개를 보관합니다.
+
+    꺼져 있으면(threshold_ms=0) SQL 실행마다 비교 한 번만 더해집니다.
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, keep: int = 200):
+        self.threshold: Optional[float] = threshold_ms / 1000 if threshold_ms > 0 else None
+        self._lock = threading.Lock()
+        self._entries: Deque[tuple] = deque(maxlen=keep)
+
+    def record(self, statement: str, parameters, executemany: bool, elapsed: float, request: Optional[str]):
+        statement = " ".join(statement.split())[:_SQL_TEXT_LIMIT]
+        params = _format_parameters(parameters, executemany)
+        slow_query_logger.warning("duration_ms=%.1f request=%s sql=%s params=%s",
+                                  elapsed * 1000, request or "-", statement, params)
+        with self._lock:
+            self._entries.append((time.time(), elapsed, request, statement, params))
+
+    def report(self, window_seconds: Optional[float], limit: int) -> List[dict]:
+        """최근 window_seconds초(None이면 보관 중인 전체)의 느린 SQL 문을 문장별로 묶어 가장 오래 걸린 순서로 반환합니다."""
+        since = time.time() - window_seconds if window_seconds else 0.0
+        with self._lock:
+            entries = [entry for entry in self._entries if entry[0] >= since]
+        grouped: Dict[str, dict] = {}
+        for at, elapsed, request, statement, params in entries:
+            row = grouped.get(statement)
+            if row is None:
+                row = grouped[statement] = {"sql": statement, "count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            row["count"] += 1
+            row["total_ms"] += elapsed * 1000
+            if elapsed * 1000 >= row["max_ms"]:
+                row.update(max_ms=elapsed * 1000, params=params, request=request, at=at)
+        rows = sorted(grouped.values(), key=lambda row: row["max_ms"], reverse=True)[:limit]
+        for row in rows:
+            row["total_ms"] = round(row["total_ms"], 1)
+            row["max_ms"] = round(row["max_ms"], 1)
+        return rows
+
+
+class _RouteStats:
+    __slots__ = ("counts", "total", "count", "max", "errors")
+
+    def __init__(self, bucket_count: int):
+        self.counts = [0] * (bucket_count + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+        self.errors = 0
+
+
+class EndpointReport:
+    """라우트별 요청 시간을 분 단위로 모아 최근 window_seconds초 동안의 느린 엔드포인트를 보고합니다. (워커 프로세스 단위)
+
+    분마다 라우트별 히스토그램과 가장 느린 요청 slowest_keep개만 보관하므로 메모리는 구간 길이에만 비례합니다.
+    꺼져 있으면(window_seconds=0) 아무것도 기록하지 않습니다.
+    """
+
+    def __init__(self, window_seconds: int = SLOW_REPORT_WINDOW_SECONDS, buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+                 slowest_keep: int = 20):
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self.slowest_keep = slowest_keep
+        self._lock = threading.Lock()
+        # (분, {(메서드, 라우트): _RouteStats}, 가장 느린 요청 최소 힙)
+        self._minutes: Deque[Tuple[int, Dict[Tuple[str, str], _RouteStats], list]] = deque()
+
+    def record(self, method: str, route: str, path: str, status: int, elapsed: float, sql_count: int, sql_seconds: float):
+        minute = int(time.time() // 60)
+        index = bisect_left(self.buckets, elapsed)
+        with self._lock:
+            if not self._minutes or self._minutes[-1][0] != minute:
+                self._minutes.append((minute, {}, []))
+                oldest = minute - (self.window_seconds + 59) // 60
+                while self._minutes[0][0] <= oldest:
+                    self._minutes.popleft()
+            _, routes, slowest = self._minutes[-1]
+            stats = routes.get((method, route))
+            if stats is None:
+                stats = routes[(method, route)] = _RouteStats(len(self.buckets))
+            stats.counts[index] += 1
+            stats.total += elapsed
+            stats.count += 1
+            if elapsed > stats.max:
+                stats.max = elapsed
+            if status >= 500:
+                stats.errors += 1
+            if len(slowest) < self.slowest_keep or elapsed > slowest[0][0]:
+                sample = (elapsed, time.time(), method, path, status, sql_count, sql_seconds)
+                if len(slowest) < self.slowest_keep:
+                    heapq.heappush(slowest, sample)
+                else:
+                    heapq.heapreplace(slowest, sample)
+
+    def _quantile(self, stats: _RouteStats, q: float) -> float:
+        """히스토그램에서 추정한 분위수 (해당 버킷의 상한, 최댓값을 넘지 않음)"""
+        target = q * stats.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, stats.counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(bound, stats.max)
+        return stats.max
+
+    def report(self, limit: int, sort: str = "total") -> Tuple[List[dict], List[dict]]:
+        """(느린 엔드포인트 상위 limit개, 가장 느린 요청 상위 limit개). sort: total(누적 시간)/p99/max"""
+        oldest = int(time.time() // 60) - (self.window_seconds + 59) // 60
+        merged: Dict[Tuple[str, str], _RouteStats] = {}
+        samples: list = []
+        with self._lock:
+            for minute, routes, slowest in self._minutes:
+                if minute <= oldest:
+                    continue
+                samples.extend(slowest)
+                for key, stats in routes.items():
+                    total = merged.get(key)
+                    if total is None:
+                        total = merged[key] = _RouteStats(len(self.buckets))
+                    total.counts = [a + b for a, b in zip(total.counts, stats.counts)]
+                    total.total += stats.total
+                    total.count += stats.count
+                    total.max = max(total.max, stats.max)
+                    total.errors += stats.errors
+
+        endpoints = [
+            {
+                "method": method,
+                "route": route,
+                "count": stats.count,
+                "errors": stats.errors,
+                "total_ms": round(stats.total * 1000, 1),
+                "mean_ms": round(stats.total / stats.count * 1000, 2),
+                "p50_ms": round(self._quantile(stats, 0.50) * 1000, 2),
+                "p99_ms": round(self._quantile(stats, 0.99) * 1000, 2),
+                "max_ms": round(stats.max * 1000, 2),
+            }
+            for (method, route), stats in merged.items()
+        ]
+        key = {"p99": "p99_ms", "max": "max_ms"}.get(sort, "total_ms")
+        endpoints.sort(key=lambda row: row[key], reverse=True)
+        slowest = [
+            {"method": method, "path": path, "status": status, "duration_ms": round(elapsed * 1000, 2),
+             "sql_count": sql_count, "sql_ms": round(sql_seconds * 1000, 2), "at": at}
+            for elapsed, at, method, path, status, sql_count, sql_seconds in heapq.nlargest(limit, samples)
+        ]
+        return endpoints[:limit], slowest
+
+
+# 전역 느린 SQL 로그, 느린 엔드포인트 보고서
+slow_query_log = SlowQueryLog()
+endpoint_report = EndpointReport()
+
+
+def _statement_kind(statement: str) -> str:
+    head = statement.lstrip()[:6].upper()
+    for kind in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        if head.startswith(kind):
+            return kind.lower()
+    return "other"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("loca_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("loca_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    labels = {"kind": _statement_kind(statement)}
+    metrics.inc("loca_sql_statements_total", labels)
+    metrics.observe("loca_sql_statement_duration_seconds", elapsed, labels)
+    stats = _request_sql.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+    threshold = slow_query_log.threshold
+    if threshold is not None and elapsed >= threshold:
+        slow_query_log.record(statement, parameters, executemany, elapsed, stats[2] if stats is not None else None)
+
+
+def instrument_engine(engine):
+    """SQLAlchemy 엔진에 SQL 문 수/실행 시간 수집 이벤트를 등록합니다."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """라우트별 요청 지연 시간을 기록하고, 샘플링된 요청/느린 요청만 추적 로그로 남기는 ASGI 미들웨어입니다."""
+
+    def __init__(self, app, sample_rate: float = TRACE_SAMPLE_RATE, slow_ms: float = TRACE_SLOW_MS):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self._route_paths: Dict[object, str] = {}
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            path = "unmatched"
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint or getattr(route, "app", None) is endpoint:
+                    path = route.path
+                    break
+            self._route_paths[endpoint] = path
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                # 이벤트 스트림(SSE)은 연결 시간만큼 길어지므로 느린 요청 로그에서 제외
+                status["streaming"] = any(name == b"content-type" and value.startswith(b"text/event-stream")
+                                          for name, value in message.get("headers", []))
+            await send(message)
+
+        sql_stats = [0, 0.0, f"{scope['method']} {scope['path']}"]
+        token = _request_sql.set(sql_stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_sql.reset(token)
+            route = self._route_label(scope)
+            labels = {"method": scope["method"], "route": route}
+            metrics.observe("loca_http_request_duration_seconds", elapsed, labels)
+            metrics.inc("loca_http_requests_total", {**labels, "status": str(status["code"])})
+
+            if endpoint_report.window_seconds and not status.get("streaming"):
+                path = scope["path"]
+                if scope.get("query_string"):
+                    path = f"{path}?{scope['query_string'].decode('latin-1')[:200]}"
+                endpoint_report.record(scope["method"], route, path, status["code"], elapsed,
+                                       sql_stats[0], sql_stats[1])
+
+            elapsed_ms = elapsed * 1000
+            slow = elapsed_ms >= self.slow_ms and not status.get("streaming")
+            if slow or (self.sample_rate and random.random() < self.sample_rate):
+                trace_logger.log(
+                    logging.WARNING if slow else logging.INFO,
+                    "method=%s route=%s path=%s status=%d duration_ms=%.1f sql_count=%d sql_ms=%.1f",
+                    scope["method"], route, scope["path"], status["code"], elapsed_ms,
+                    sql_stats[0], sql_stats[1] * 1000,
+                )
+
+
+def observe_gemini_call(elapsed: float, outcome: str):
+    """Gemini API 호출 결과와 소요 시간을 기록합니다."""
+    labels = {"outcome": outcome}
+    metrics.inc("loca_gemini_requests_total", labels)
+    metrics.observe("loca_gemini_request_duration_seconds", elapsed, labels)
@@ -0,0 +1,131 @@
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import time
+from typing import Optional
+from urllib.parse import parse_qs
+
+from .metrics import _request_sql, metrics
+
+logger = logging.getLogger(__name__)
+
+# 관리 기능(/admin, 요청 프로파일링)을 쓰기 위한 토큰 (없으면 관리 기능 전체를 끔)
+ADMIN_TOKEN = os.getenv("LOCA_ADMIN_TOKEN") or None
+# 프로파일 결과에 출력하는 함수 수
+PROFILE_LINES = int(os.getenv("LOCA_PROFILE_LINES", "60"))
+
+ADMIN_TOKEN_HEADER = b"x-loca-admin-token"
+PROFILE_HEADER = b"x-loca-profile"
+PROFILE_QUERY = "_profile"
+# 프로파일 결과 정렬 기준 (헤더/쿼리 값)
+PROFILE_SORTS = {"1": "cumulative", "cumulative": "cumulative", "tottime": "tottime", "calls": "calls"}
+
+metrics.describe("loca_profiled_requests_total", "프로파일링한 요청 수")
+
+
+class AdminAccess:
+    """관리 기능 접근 토큰 확인 (token이 None이면 관리 기능이 꺼진 상태)"""
+
+    def __init__(self, token: Optional[str] = ADMIN_TOKEN):
+        self.token = token
+
+    @property
+    def enabled(self) -> bool:
+        return self.token is not None
+
+    def check(self, value) -> bool:
+        if self.token is None or not value:
+            return False
+        if isinstance(value, str):
+            value = value.encode("latin-1", "replace")
+        return hmac.compare_digest(value, self.token.encode("utf-8"))
+
+
+class ProfilingMiddleware:
+    """요청 하나를 cProfile로 프로파일링해 원래 응답 대신 결과를 돌려주는 ASGI 미들웨어
+
+    관리자 토큰(`X-Loca-Admin-Token`)과 함께 `X-Loca-Profile: cumulative|tottime|calls` 헤더나
+    `?_profile=cumulative` 쿼리를 보낸 요청만 프로파일링하고, 응답 본문은 원래 상태 코드/처리 시간/SQL 통계와
+    pstats 출력(상위 PROFILE_LINES개 함수)으로 바뀝니다. 관리 기능이 꺼져 있으면 속성 확인 한 번만 하고 그대로 통과합니다.
+
+    프로파일러는 이벤트 루프 스레드 전체를 기록하므로 같은 워커에서 동시에 처리 중인 다른 요청의 코드가 섞일 수 있고,
+    스레드풀에서 실행되는 작업은 포함되지 않습니다. 한 워커에서 한 번에 한 요청만 프로파일링합니다(나머지는 409).
+    """
+
+    def __init__(self, app, access: Optional[AdminAccess] = None):
+        self.app = app
+        self.access = access or admin_access
+        self._active = False
+
+    @staticmethod
+    def _requested_sort(scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return PROFILE_SORTS.get(value.decode("latin-1").strip().lower(), "cumulative")
+        query = scope.get("query_string")
+        if query and PROFILE_QUERY.encode() in query:
+            values = parse_qs(query.decode("latin-1")).get(PROFILE_QUERY)
+            if values:
+                return PROFILE_SORTS.get(values[0].strip().lower(), "cumulative")
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.access.token is None:
+            await self.app(scope, receive, send)
+            return
+        sort = self._requested_sort(scope)
+        if sort is None:
+            await self.app(scope, receive, send)
+            return
+        token = next((value for name, value in scope["headers"] if name == ADMIN_TOKEN_HEADER), None)
+        if not self.access.check(token):
+            await _send_text(send, 403, "관리자 토큰이 올바르지 않습니다.\n")
+            return
+        if self._active:
+            await _send_text(send, 409, "이 워커에서 다른 요청을 프로파일링 중입니다. 잠시 후 다시 시도해주세요.\n")
+            return
+
+        status = {"code": 500}
+
+        async def capture(message):
+            # 원래 응답은 보내지 않고 상태 코드만 기록
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        self._active = True
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, capture)
+        except Exception:
+            logger.exception("프로파일링 중인 요청 처리 실패: %s", scope["path"])
+        finally:
+            profiler.disable()
+            self._active = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics.inc("loca_profiled_requests_total")
+
+        sql_stats = _request_sql.get()
+        buffer = io.StringIO()
+        buffer.write(f"{scope['method']} {scope['path']} status={status['code']} duration_ms={elapsed_ms:.1f}")
+        if sql_stats is not None:
+            buffer.write(f" sql_count={sql_stats[0]} sql_ms={sql_stats[1] * 1000:.1f}")
+        buffer.write(f" pid={os.getpid()}\n\n")
+        pstats.Stats(profiler, stream=buffer).sort_stats(sort).print_stats(PROFILE_LINES)
+        await _send_text(send, 200, buffer.getvalue())
+
+
+async def _send_text(send, status_code: int, text: str):
+    body = text.encode("utf-8")
+    headers = [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(body)).encode()),
+               (b"cache-control", b"no-store")]
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+# 전역 관리 기능 접근 설정
+admin_access = AdminAccess()
@@ -0,0 +1,434 @@
+import heapq
+import logging
+import math
+import os
+import sys
+import time
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import chain
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, func, select
+
+from ..database import SessionLocal
+from ..models import Like, LikeChange, PhotoNeighbors
+from .coordination import named_lock
+from .metrics import metrics
+
+# NumPy/SciPy가 있으면 희소 행렬 곱으로 한 번에 계산하고, 없으면 같은 결과를 순수 파이썬으로 계산
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+logger = logging.getLogger(__name__)
+
+# 사진마다 저장하는 이웃 수
+NEIGHBORS_K = int(os.getenv("LOCA_RECOMMEND_K", "50"))
+# 리더 워커가 이웃 테이블을 갱신하는 주기 (초, 0이면 끔 — build_recommendations.py로 수동 실행)
+REFRESH_INTERVAL_SECONDS = float(os.getenv("LOCA_RECOMMEND_REFRESH_S", "900"))
+# 증분 갱신이 반영하지 못하는 좋아요 수 변화를 정리하도록 전체를 다시 계산하는 주기 (초, 0이면 끔)
+FULL_REBUILD_INTERVAL_SECONDS = float(os.getenv("LOCA_RECOMMEND_FULL_REBUILD_S", "86400"))
+# 반영할 좋아요 변경 기록이 이보다 많으면 증분 대신 전체를 다시 계산
+MAX_INCREMENTAL_CHANGES = 100_000
+# 추천 후보를 만들 때 쓰는 최근 좋아요 수
+MAX_SEED_LIKES = 200
+# 한 번에 유사도를 계산하는 사진 수 (희소 행렬 곱의 메모리 상한)
+_ROW_BLOCK = 1024
+_WRITE_BATCH = 2000
+# SQLite 바인드 파라미터 제한을 피하기 위한 IN 절 크기
+_IN_CHUNK = 500
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+metrics.describe("loca_recommendations_total", "추천 피드 요청 (후보 출처별)")
+
+_neighbors = PhotoNeighbors.__table__
+_changes = LikeChange.__table__
+
+
+def _pack(values: Sequence, typecode: str) -> bytes:
+    packed = array(typecode, values)
+    if not _LITTLE_ENDIAN:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(data: bytes, typecode: str) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if not _LITTLE_ENDIAN:
+        values.byteswap()
+    return values
+
+
+@dataclass
+class RefreshReport:
+    full: bool = False  # 전체 다시 계산했는지
+    changes: int = 0  # 반영한 좋아요 변경 기록 수
+    photos: int = 0  # 좋아요가 있는 사진 수 (전체 계산)
+    changed: int = 0  # 좋아요 집합이 바뀐 사진 수
+    recomputed: int = 0  # 이웃을 다시 계산한 사진 수
+    patched: int = 0  # 바뀐 사진과의 유사도만 고친 사진 수
+    removed: int = 0  # 좋아요가 모두 사라져 지운 행 수
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        if self.full:
+            return f"전체 계산: 사진 {self.photos}장 재계산, {self.removed}행 삭제 ({self.seconds:.1f}s)"
+        return (f"좋아요 변경 {self.changes}건 (사진 {self.changed}장): {self.recomputed}장 재계산, "
+                f"{self.patched}장 유사도 수정, {self.removed}행 삭제 ({self.seconds:.1f}s)")
+
+
+class _PythonLikes:
+    """좋아요 (유저, 사진) 쌍의 양방향 색인 (NumPy/SciPy가 없을 때)
+
+    degrees를 주면 그 좋아요 수로 정규화합니다. (일부 유저의 좋아요만 읽은 경우)
+    """
+
+    def __init__(self, pairs: List[Tuple[int, int]], degrees: Optional[Dict[int, int]] = None):
+        self.photo_users: Dict[int, List[int]] = defaultdict(list)
+        self.user_photos: Dict[int, List[int]] = defaultdict(list)
+        for user_id, photo_id in pairs:
+            self.photo_users[photo_id].append(user_id)
+            self.user_photos[user_id].append(photo_id)
+        self.degree = {photo_id: len(users) for photo_id, users in self.photo_users.items()}
+        if degrees:
+            self.degree.update((photo_id, max(count, self.degree.get(photo_id, 0)))
+                               for photo_id, count in degrees.items())
+
+    def signatures(self) -> Dict[int, Tuple[int, int]]:
+        return {photo_id: (len(users), sum(users)) for photo_id, users in self.photo_users.items()}
+
+    def similarity(self, pairs: Sequence[Tuple[int, int]]) -> List[float]:
+        """(사진, 사진) 쌍마다 코사인 유사도 (첫 사진의 좋아요 유저를 모두 읽었어야 정확)"""
+        result = []
+        for photo_id, other in pairs:
+            common = len(set(self.photo_users.get(photo_id, ())).intersection(self.photo_users.get(other, ())))
+            result.append(common / math.sqrt(self.degree[photo_id] * self.degree[other]) if common else 0.0)
+        return result
+
+    def top_k(self, rows: Sequence[int], k: int) -> Iterable[Tuple[int, List[int], List[float]]]:
+        degree = self.degree
+        for photo_id in rows:
+            counts: Dict[int, int] = defaultdict(int)
+            for user_id in self.photo_users[photo_id]:
+                for other in self.user_photos[user_id]:
+                    counts[other] += 1
+            counts.pop(photo_id, None)
+            norm = degree[photo_id]
+            best = heapq.nsmallest(k, ((-count / math.sqrt(norm * degree[other]), other)
+                                       for other, count in counts.items()))
+            yield photo_id, [other for _, other in best], [-score for score, _ in best]
+
+
+class _SparseLikes:
+    """사진 x 유저 이진 희소 행렬. 선택한 사진 행 블록마다 X[블록] X^T로 공동 좋아요 수를 한 번에 계산합니다.
+
+    degrees를 주면 그 좋아요 수로 정규화합니다. (일부 유저의 좋아요만 읽은 경우)
+    """
+
+    def __init__(self, pairs: List[Tuple[int, int]], degrees: Optional[Dict[int, int]] = None):
+        pairs = np.fromiter(chain.from_iterable(pairs), dtype=np.int64, count=2 * len(pairs)).reshape(-1, 2)
+        user_ids, user_index = np.unique(pairs[:, 0], return_inverse=True)
+        self.photo_ids, photo_index = np.unique(pairs[:, 1], return_inverse=True)
+        self.likes = sparse.csr_matrix(
+            (np.ones(len(pairs), dtype=np.float32), (photo_index, user_index)),
+            shape=(len(self.photo_ids), len(user_ids)),
+        )
+        self.users_by_photo = self.likes.T.tocsr()
+        self.degree = np.diff(self.likes.indptr).astype(np.float64)
+        if degrees:
+            known = np.fromiter((degrees.get(photo_id, 0) for photo_id in self.photo_ids.tolist()),
+                                dtype=np.float64, count=len(self.photo_ids))
+            self.degree = np.maximum(self.degree, known)
+        self.checksum = np.bincount(photo_index, weights=pairs[:, 0], minlength=len(self.photo_ids))
+
+    def signatures(self) -> Dict[int, Tuple[int, int]]:
+        counts = np.diff(self.likes.indptr)
+        return dict(zip(self.photo_ids.tolist(), zip(counts.tolist(), self.checksum.astype(np.int64).tolist())))
+
+    def _index(self, photo_ids: Iterable[int]):
+        """사진 id마다 행 번호 (행렬에 없으면 -1)"""
+        photo_ids = np.fromiter(photo_ids, dtype=np.int64)
+        index = np.minimum(np.searchsorted(self.photo_ids, photo_ids), len(self.photo_ids) - 1)
+        return np.where(self.photo_ids[index] == photo_ids, index, -1)
+
+    def similarity(self, pairs: Sequence[Tuple[int, int]]) -> List[float]:
+        """(사진, 사진) 쌍마다 코사인 유사도 (첫 사진의 좋아요 유저를 모두 읽었어야 정확)"""
+        if not pairs:
+            return []
+        first = self._index(photo_id for photo_id, _ in pairs)
+        second = self._index(other for _, other in pairs)
+        known = (first >= 0) & (second >= 0)
+        result = np.zeros(len(pairs))
+        if known.any():
+            rows, others = first[known], second[known]
+            common = np.asarray(self.likes[rows].multiply(self.likes[others]).sum(axis=1)).ravel()
+            result[known] = common / np.sqrt(self.degree[rows] * self.degree[others])
+        return result.tolist()
+
+    def top_k(self, rows: Sequence[int], k: int) -> Iterable[Tuple[int, List[int], List[float]]]:
+        photo_ids, degree = self.photo_ids, self.degree
+        row_index = np.searchsorted(photo_ids, np.asarray(rows, dtype=np.int64))
+        for start in range(0, len(row_index), _ROW_BLOCK):
+            block = row_index[start:start + _ROW_BLOCK]
+            co_likes = (self.likes[block] @ self.users_by_photo).tocsr()
+            for offset, row in enumerate(block):
+                begin, end = co_likes.indptr[offset], co_likes.indptr[offset + 1]
+                columns = co_likes.indices[begin:end]
+                keep = columns != row
+                columns = columns[keep]
+                scores = co_likes.data[begin:end][keep] / np.sqrt(degree[row] * degree[columns])
+                if len(columns) > k:
+                    # k번째 점수와 같은 후보까지 남겨 동점은 아래 정렬에서 사진 id로 가름
+                    keep = scores >= np.partition(scores, len(scores) - k)[len(scores) - k]
+                    columns, scores = columns[keep], scores[keep]
+                # 유사도 내림차순, 같으면 사진 id 오름차순
+                order = np.lexsort((photo_ids[columns], -scores))[:k]
+                yield int(photo_ids[row]), photo_ids[columns[order]].tolist(), scores[order].tolist()
+
+
+def _graph(pairs: List[Tuple[int, int]], degrees: Optional[Dict[int, int]] = None):
+    return _SparseLikes(pairs, degrees) if np is not None and pairs else _PythonLikes(pairs, degrees)
+
+
+def _chunks(values: Sequence[int], size: int = _IN_CHUNK) -> Iterator[List[int]]:
+    values = sorted(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _fetch_rows(db, statement) -> List[tuple]:
+    """결과를 Row 객체로 감싸지 않고 DBAPI 커서에서 튜플로 바로 읽습니다. (좋아요 수십만 행을 읽을 때 대부분이 행 처리 시간)"""
+    result = db.connection().execute(statement)
+    try:
+        return result.cursor.fetchall()
+    finally:
+        result.close()
+
+
+def _load_likes(db, user_ids: Optional[Set[int]] = None) -> List[Tuple[int, int]]:
+    """좋아요 (유저, 사진) 쌍 (user_ids를 주면 그 유저들의 좋아요만)"""
+    statement = select(Like.user_id, Like.photo_id)
+    if user_ids is None:
+        return _fetch_rows(db, statement)
+    pairs = []
+    for chunk in _chunks(user_ids):
+        pairs.extend(_fetch_rows(db, statement.where(Like.user_id.in_(chunk))))
+    return pairs
+
+
+def _likers(db, photo_ids: Set[int]) -> Set[int]:
+    users = set()
+    for chunk in _chunks(photo_ids):
+        users.update(user_id for user_id, in _fetch_rows(db, select(Like.user_id).where(Like.photo_id.in_(chunk))))
+    return users
+
+
+def _degrees(db, photo_ids: Set[int]) -> Dict[int, int]:
+    statement = select(Like.photo_id, func.count()).group_by(Like.photo_id)
+    if len(photo_ids) > _IN_CHUNK * 20:
+        # 사진이 많으면 IN 절 여러 번보다 인덱스 전체를 한 번 훑는 편이 빠름
+        return {photo_id: count for photo_id, count in _fetch_rows(db, statement) if photo_id in photo_ids}
+    degrees = {}
+    for chunk in _chunks(photo_ids):
+        degrees.update(_fetch_rows(db, statement.where(Like.photo_id.in_(chunk))))
+    return degrees
+
+
+def record_like_changes(db, pairs: Iterable[Tuple[int, int]]):
+    """좋아요 추가/취소를 추천 이웃 증분 갱신용으로 기록합니다. (좋아요 쓰기와 같은 트랜잭션, 커밋은 호출한 쪽에서)"""
+    rows = [{"user_id": user_id, "photo_id": photo_id} for user_id, photo_id in pairs]
+    if rows:
+        db.execute(_changes.insert(), rows)
+
+
+def reset_neighbors(db):
+    """이웃 테이블과 좋아요 변경 기록을 비워 다음 갱신이 전체를 다시 계산하게 합니다. (대량 적재 후, 커밋은 호출한 쪽에서)"""
+    db.execute(delete(_neighbors))
+    db.execute(delete(_changes))
+
+
+def _full_rebuild_due(db) -> bool:
+    """이웃 테이블이 비었거나 가장 오래된 행이 LOCA_RECOMMEND_FULL_REBUILD_S보다 오래되었으면 True"""
+    oldest = db.execute(select(func.min(_neighbors.c.updated_at))).scalar()
+    if oldest is None:
+        return True
+    if FULL_REBUILD_INTERVAL_SECONDS <= 0:
+        return False
+    if oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - oldest > timedelta(seconds=FULL_REBUILD_INTERVAL_SECONDS)
+
+
+def refresh_neighbors(db, full: bool = False, k: int = NEIGHBORS_K) -> RefreshReport:
+    """좋아요 변경 기록(like_changes)을 photo_neighbors에 반영합니다. (배치마다 커밋)
+
+    변경 기록이 가리키는 사진 D는 지금 D를 좋아요한 유저들의 좋아요만 읽어 이웃을 정확히 다시 계산하고,
+    좋아요가 바뀐 유저들이 좋아요한 다른 사진은 저장된 이웃 목록에서 D와의 유사도만 고칩니다.
+    D의 좋아요 수가 바뀌어 달라진 다른 사진들의 정규화나, 유사도가 줄어 목록 밖 후보에 밀려야 할 이웃은
+    반영하지 않으므로 LOCA_RECOMMEND_FULL_REBUILD_S마다(또는 full=True) 전체를 다시 계산합니다.
+    반영한 변경 기록은 마지막에 지우므로 중간에 멈춰도 다음 실행이 다시 반영합니다.
+    """
+    started = time.perf_counter()
+    watermark = db.execute(select(func.max(_changes.c.id))).scalar() or 0
+    if full or _full_rebuild_due(db):
+        report = _rebuild_all(db, k)
+    else:
+        changes = db.execute(select(_changes.c.user_id, _changes.c.photo_id)
+                             .where(_changes.c.id <= watermark)).all()
+        report = _apply_changes(db, changes, k) if len(changes) < MAX_INCREMENTAL_CHANGES else _rebuild_all(db, k)
+        report.changes = len(changes)
+    if watermark:
+        db.execute(delete(_changes).where(_changes.c.id <= watermark))
+        db.commit()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _rebuild_all(db, k: int) -> RefreshReport:
+    report = RefreshReport(full=True)
+    graph = _graph(_load_likes(db))
+    current = graph.signatures()
+    stored = db.execute(select(_neighbors.c.photo_id)).scalars().all()
+    report.photos = len(current)
+    batch = []
+    for photo_id, neighbor_ids, scores in graph.top_k(sorted(current), k):
+        batch.append(_row(photo_id, neighbor_ids, scores, current[photo_id]))
+        if len(batch) >= _WRITE_BATCH:
+            report.recomputed += _write(db, batch)
+            batch = []
+    if batch:
+        report.recomputed += _write(db, batch)
+    report.removed = _remove(db, [photo_id for photo_id in stored if photo_id not in current])
+    return report
+
+
+def _apply_changes(db, changes: Sequence[Tuple[int, int]], k: int) -> RefreshReport:
+    report = RefreshReport()
+    if not changes:
+        return report
+    changed = {photo_id for _, photo_id in changes}
+    users = {user_id for user_id, _ in changes}
+    # 좋아요가 바뀐 유저들(고칠 사진)과 D를 지금 좋아요한 유저들(D의 공동 좋아요 계산)의 좋아요만 읽음
+    user_pairs = _load_likes(db, users)
+    pairs = user_pairs + _load_likes(db, _likers(db, changed) - users)
+    graph = _graph(pairs, _degrees(db, {photo_id for _, photo_id in pairs}))
+    current = graph.signatures()
+
+    rows = sorted(changed & current.keys())
+    report.changed = len(changed)
+    batch = []
+    for photo_id, neighbor_ids, scores in graph.top_k(rows, k):
+        batch.append(_row(photo_id, neighbor_ids, scores, current[photo_id]))
+        if len(batch) >= _WRITE_BATCH:
+            report.recomputed += _write(db, batch)
+            batch = []
+    if batch:
+        report.recomputed += _write(db, batch)
+
+    # 좋아요가 바뀐 유저 u의 다른 사진 q는 D와의 공동 좋아요 수만 바뀜
+    liked_by: Dict[int, List[int]] = defaultdict(list)
+    for user_id, photo_id in user_pairs:
+        liked_by[user_id].append(photo_id)
+    targets: Dict[int, Set[int]] = defaultdict(set)
+    for user_id, photo_id in changes:
+        for other in liked_by.get(user_id, ()):
+            if other not in changed:
+                targets[other].add(photo_id)
+    for chunk in _chunks(list(targets), _WRITE_BATCH):
+        stored = db.execute(select(_neighbors).where(_neighbors.c.photo_id.in_(chunk))).mappings().all()
+        db.rollback()
+        requests = [(photo_id, row["photo_id"]) for row in stored for photo_id in sorted(targets[row["photo_id"]])]
+        similarity = iter(graph.similarity(requests))
+        patched = []
+        for row in stored:
+            merged = dict(zip(_unpack(row["neighbor_ids"], "i"), _unpack(row["scores"], "f")))
+            # 목록이 차 있으면 k번째보다 낮은 새 후보는 들어갈 수 없음
+            floor = min(merged.values()) if len(merged) >= k else 0.0
+            dirty = False
+            for photo_id in sorted(targets[row["photo_id"]]):
+                score = next(similarity)
+                if photo_id in merged or score > floor:
+                    dirty = True
+                    if score > 0:
+                        merged[photo_id] = score
+                    else:
+                        merged.pop(photo_id, None)
+            if not dirty:
+                continue
+            best = heapq.nsmallest(k, ((-score, photo_id) for photo_id, score in merged.items()))
+            patched.append(_row(row["photo_id"], [photo_id for _, photo_id in best], [-score for score, _ in best],
+                                (row["like_count"], row["like_checksum"])))
+        report.patched += _write(db, patched) if patched else 0
+
+    report.removed = _remove(db, sorted(changed - current.keys()))
+    return report
+
+
+def _row(photo_id: int, neighbor_ids: List[int], scores: List[float], signature: Tuple[int, int]) -> dict:
+    return {"photo_id": photo_id, "neighbor_ids": _pack(neighbor_ids, "i"), "scores": _pack(scores, "f"),
+            "like_count": signature[0], "like_checksum": signature[1]}
+
+
+def _write(db, rows: List[dict]) -> int:
+    db.execute(delete(_neighbors).where(_neighbors.c.photo_id.in_([row["photo_id"] for row in rows])))
+    db.execute(_neighbors.insert(), rows)
+    db.commit()
+    return len(rows)
+
+
+def _remove(db, photo_ids: List[int]) -> int:
+    for i in range(0, len(photo_ids), _WRITE_BATCH):
+        db.execute(delete(_neighbors).where(_neighbors.c.photo_id.in_(photo_ids[i:i + _WRITE_BATCH])))
+        db.commit()
+    return len(photo_ids)
+
+
+def run_refresh():
+    """리더 워커의 주기 작업: 좋아요 변경 기록을 이웃 테이블에 반영하고, 때가 되면 전체를 다시 계산합니다.
+    (CLI가 실행 중이면 건너뜀)
+    """
+    lock = named_lock("recommendations")
+    if not lock.try_acquire():
+        return
+    db = SessionLocal()
+    try:
+        report = refresh_neighbors(db)
+        if report.full or report.changes:
+            logger.info("추천 이웃 갱신 - %s", report.summary())
+    finally:
+        db.close()
+        lock.release()
+
+
+def recommend_photo_ids(db, user_id: int, limit: int, offset: int = 0) -> Tuple[List[int], int, Set[int]]:
+    """유저의 최근 좋아요 사진들의 이웃 점수를 합쳐 추천 사진 id를 순위대로 반환합니다. (요청 시점 계산)
+
+    (이번 페이지의 추천 id 목록, 전체 추천 후보 수, 유저가 이미 좋아요한 사진 id)를 반환합니다. 최근 좋아요일수록 조금 더 큰 가중치를 둡니다.
+    """
+    liked = db.execute(
+        select(Like.photo_id).where(Like.user_id == user_id).order_by(Like.id.desc())
+    ).scalars().all()
+    if not liked:
+        return [], 0, set()
+    weights = {photo_id: 1.0 / (1.0 + rank / 50.0) for rank, photo_id in enumerate(liked[:MAX_SEED_LIKES])}
+    scores: Dict[int, float] = defaultdict(float)
+    rows = db.execute(
+        select(PhotoNeighbors.photo_id, PhotoNeighbors.neighbor_ids, PhotoNeighbors.scores)
+        .where(PhotoNeighbors.photo_id.in_(list(weights)))
+    )
+    for photo_id, neighbor_ids, similarity in rows:
+        weight = weights[photo_id]
+        for neighbor_id, score in zip(_unpack(neighbor_ids, "i"), _unpack(similarity, "f")):
+            scores[neighbor_id] += weight * score
+    liked_set = set(liked)
+    for photo_id in liked_set:
+        scores.pop(photo_id, None)
+    ranked = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], -item[0]))
+    return [photo_id for photo_id, _ in ranked[offset:]], len(scores), liked_set
@@ -0,0 +1,159 @@
+from typing import Dict, Iterable, List, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+
+from ..models import Contest, ContestPhoto, ContestSummary, Like, Photo
+from .entity_cache import user_cache
+from .storage import thumbnail_url
+
+# 목록 응답은 ORM 객체 대신 필요한 컬럼만 튜플로 가져와 dict로 바로 만듭니다.
+# DB에서 읽은 값이므로 pydantic 검증 없이 ORJSONResponse로 직렬화합니다.
+# (응답 형태는 각 라우트의 response_model 스키마와 동일하게 유지해야 합니다)
+
+UNKNOWN_NICKNAME = "알 수 없는 사용자"
+
+PHOTO_COLUMNS = (
+    Photo.id, Photo.user_id, Photo.keyword_id, Photo.image_path, Photo.location,
+    Photo.latitude, Photo.longitude, Photo.district_id, Photo.ai_description,
+    Photo.captured_at, Photo.uploaded_at,
+)
+
+_preview_photo = aliased(ContestPhoto, name="preview_photo")
+_winner_photo = aliased(ContestPhoto, name="winner_photo")
+
+# 공모 카드: 공모 + 요약(contest_summaries) + 미리보기/선정 사진 경로 (query_contests로 조회)
+CONTEST_COLUMNS = (
+    Contest.id, Contest.title, Contest.description, Contest.points, Contest.deadline,
+    Contest.status, Contest.user_id, Contest.selected_photo_id, Contest.created_at, Contest.completed_at,
+    ContestSummary.photo_count, ContestSummary.participant_count, ContestSummary.latest_submission_at,
+    _preview_photo.image_path, _winner_photo.user_id, _winner_photo.image_path,
+)
+
+CONTEST_PHOTO_COLUMNS = (
+    ContestPhoto.id, ContestPhoto.contest_id, ContestPhoto.user_id, ContestPhoto.image_path,
+    ContestPhoto.location, ContestPhoto.latitude, ContestPhoto.longitude, ContestPhoto.description,
+    ContestPhoto.submitted_at, ContestPhoto.ai_description, ContestPhoto.relevance_score, ContestPhoto.screened_at,
+)
+
+
+def query_contests(db: Session):
+    """CONTEST_COLUMNS를 조회하는 쿼리 (공모 요약과 미리보기/선정 사진은 기본 키로 조인하므로 공모당 추가 쿼리 없음)"""
+    return (
+        db.query(*CONTEST_COLUMNS)
+        .outerjoin(ContestSummary, ContestSummary.contest_id == Contest.id)
+        .outerjoin(_preview_photo, _preview_photo.id == ContestSummary.preview_photo_id)
+        .outerjoin(_winner_photo, _winner_photo.id == ContestSummary.winner_photo_id)
+    )
+
+
+def photo_row(photo: Photo) -> tuple:
+    """이미 로드된 Photo 객체를 PHOTO_COLUMNS 순서의 행으로 바꿉니다."""
+    return tuple(getattr(photo, column.key) for column in PHOTO_COLUMNS)
+
+
+def fetch_nicknames(db: Session, user_ids: Iterable[int]) -> Dict[int, str]:
+    """유저 ID들의 닉네임을 가져옵니다. (유저 캐시에 없는 ID만 한 번의 쿼리로 조회)"""
+    return {user_id: user.nickname for user_id, user in user_cache.get_many(db, user_ids).items()}
+
+
+def fetch_like_counts(db: Session, photo_ids: Sequence[int]) -> Dict[int, int]:
+    """사진 ID들의 좋아요 수를 한 번의 쿼리로 가져옵니다."""
+    if not photo_ids:
+        return {}
+    return dict(
+        db.query(Like.photo_id, func.count(Like.id))
+        .filter(Like.photo_id.in_(photo_ids))
+        .group_by(Like.photo_id)
+        .all()
+    )
+
+
+def fetch_contest_photo_counts(db: Session, contest_ids: Sequence[int]) -> Dict[int, int]:
+    """공모 ID들의 참여 사진 수를 한 번의 쿼리로 가져옵니다."""
+    if not contest_ids:
+        return {}
+    return dict(
+        db.query(ContestPhoto.contest_id, func.count(ContestPhoto.id))
+        .filter(ContestPhoto.contest_id.in_(contest_ids))
+        .group_by(ContestPhoto.contest_id)
+        .all()
+    )
+
+
+def photo_rows_to_dicts(db: Session, rows: Sequence[tuple]) -> List[dict]:
+    """PHOTO_COLUMNS 순서의 행들을 PhotoResponse 형태의 dict로 변환합니다."""
+    nicknames = fetch_nicknames(db, (row[1] for row in rows))
+    like_counts = fetch_like_counts(db, [row[0] for row in rows])
+    return [
+        {
+            "id": photo_id,
+            "user_id": user_id,
+            "user_nickname": nicknames.get(user_id, UNKNOWN_NICKNAME),
+            "keyword_id": keyword_id,
+            "image_path": image_path,
+            "location": location,
+            "latitude": latitude,
+            "longitude": longitude,
+            "district_id": district_id,
+            "ai_description": ai_description,
+            "captured_at": captured_at,
+            "uploaded_at": uploaded_at,
+            "like_count": like_counts.get(photo_id, 0),
+        }
+        for (photo_id, user_id, keyword_id, image_path, location,
+             latitude, longitude, district_id, ai_description, captured_at, uploaded_at) in rows
+    ]
+
+
+def contest_rows_to_dicts(db: Session, rows: Sequence[tuple]) -> List[dict]:
+    """CONTEST_COLUMNS 순서의 행들을 ContestResponse 형태의 dict로 변환합니다."""
+    # 요약 행이 아직 없는 공모(마이그레이션 전)만 참여 사진 수를 직접 셈
+    photo_counts = fetch_contest_photo_counts(db, [row[0] for row in rows if row[10] is None])
+    return [
+        {
+            "id": contest_id,
+            "title": title,
+            "description": description,
+            "points": points,
+            "deadline": deadline,
+            "status": status.value if status is not None else None,
+            "user_id": user_id,
+            "selected_photo_id": selected_photo_id,
+            "created_at": created_at,
+            "completed_at": completed_at,
+            "photo_count": photo_count if photo_count is not None else photo_counts.get(contest_id, 0),
+            "participant_count": participant_count or 0,
+            "latest_submission_at": latest_submission_at,
+            "preview_thumbnail_url": thumbnail_url(preview_path) if preview_path else None,
+            "winner_user_id": winner_user_id,
+            "winner_thumbnail_url": thumbnail_url(winner_path) if winner_path else None,
+        }
+        for (contest_id, title, description, points, deadline, status, user_id, selected_photo_id, created_at,
+             completed_at, photo_count, participant_count, latest_submission_at, preview_path, winner_user_id,
+             winner_path) in rows
+    ]
+
+
+def contest_photo_rows_to_dicts(db: Session, rows: Sequence[tuple]) -> List[dict]:
+    """CONTEST_PHOTO_COLUMNS 순서의 행들을 ContestPhotoResponse 형태의 dict로 변환합니다."""
+    nicknames = fetch_nicknames(db, (row[2] for row in rows))
+    return [
+        {
+            "id": photo_id,
+            "contest_id": contest_id,
+            "user_id": user_id,
+            "image_path": image_path,
+            "location": location,
+            "latitude": latitude,
+            "longitude": longitude,
+            "description": description,
+            "submitted_at": submitted_at,
+            "ai_description": ai_description,
+            "relevance_score": relevance_score,
+            "screened_at": screened_at,
+            "user_nickname": nicknames.get(user_id, ""),
+        }
+        for (photo_id, contest_id, user_id, image_path, location, latitude, longitude, description,
+             submitted_at, ai_description, relevance_score, screened_at) in rows
+    ]
@@ -0,0 +1,462 @@
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import PackedObject, StoredObject
+
+logger = logging.getLogger(__name__)
+
+# 저장소 설정 (local: uploads/ 디렉토리, s3: S3 호환 오브젝트 스토리지)
+STORAGE_BACKEND = os.getenv("LOCA_STORAGE_BACKEND", "local")
+UPLOAD_ROOT = os.getenv("LOCA_UPLOAD_ROOT", "uploads")
+# DB의 image_path는 항상 "uploads/<key>" 형태로 저장되어 /uploads 경로로 서빙됩니다.
+IMAGE_PATH_PREFIX = "uploads/"
+OBJECTS_PREFIX = "objects"
+# 보관 작업이 오래된 파일을 이어 붙이는 팩 파일 디렉토리 (업로드 저장소 아래, 직접 서빙하지 않음)
+PACKS_PREFIX = "packs"
+# 팩 파일 하나의 최대 크기 (넘으면 다음 번호의 팩에 씀)
+PACK_MAX_BYTES = int(os.getenv("LOCA_PACK_MAX_BYTES", str(1024 * 1024 * 1024)))
+# 목록/지도 카드의 썸네일 너비 (이미지 변형 캐시의 너비 단계 중 하나)
+THUMBNAIL_WIDTH = 320
+
+_SAFE_EXT = re.compile(r"^\.[a-z0-9]{1,5}$")
+_CHUNK_SIZE = 1024 * 1024
+
+
+def content_key(digest: str, ext: str) -> str:
+    """해시 앞 두 글자씩 두 단계로 디렉토리를 나눈 저장 키를 만듭니다."""
+    return f"{OBJECTS_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def guess_extension(filename: Optional[str], content_type: Optional[str]) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    if _SAFE_EXT.match(ext):
+        return ".jpg" if ext == ".jpeg" else ext
+    guessed = mimetypes.guess_extension(content_type or "") or ""
+    return guessed if _SAFE_EXT.match(guessed) else ""
+
+
+def key_from_image_path(image_path: str) -> str:
+    """DB에 저장된 image_path에서 저장소 키를 얻습니다."""
+    path = image_path.replace("\\", "/")
+    return path[len(IMAGE_PATH_PREFIX):] if path.startswith(IMAGE_PATH_PREFIX) else path
+
+
+def image_path_for_key(key: str) -> str:
+    return IMAGE_PATH_PREFIX + key
+
+
+def thumbnail_url(image_path: str, width: int = THUMBNAIL_WIDTH) -> str:
+    """DB의 image_path를 너비 width로 줄인 변형의 URL로 바꿉니다."""
+    return f"/{image_path_for_key(key_from_image_path(image_path))}?w={width}"
+
+
+def is_content_addressed(key: str) -> bool:
+    return key.startswith(OBJECTS_PREFIX + "/")
+
+
+def is_pack_file(key: str) -> bool:
+    return key.startswith(PACKS_PREFIX + "/")
+
+
+def pack_file_name(pack_id: int) -> str:
+    return f"pack-{pack_id:06d}.pack"
+
+
+class StorageBackend:
+    """업로드 파일 저장소 인터페이스"""
+
+    is_local = False
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None):
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def open(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def iter_chunks(self, key: str, chunk_size: int = _CHUNK_SIZE) -> Iterator[bytes]:
+        with self.open(key) as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                yield block
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def iter_keys(self) -> Iterator[Tuple[str, int, float]]:
+        """저장된 모든 파일을 (키, 크기, 수정 시각 epoch) 순서로 하나씩 나열합니다."""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """로컬 파일 시스템 경로가 있으면 반환합니다 (sendfile 등 직접 접근용)."""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """uploads/ 디렉토리에 저장하는 기본 저장소"""
+
+    is_local = True
+
+    def __init__(self, root: str = UPLOAD_ROOT):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"잘못된 저장 키입니다: {key}")
+        return path
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # 임시 파일에 쓴 뒤 이름을 바꿔 반쯤 쓰인 파일이 서빙되지 않도록 합니다.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_keys(self) -> Iterator[Tuple[str, int, float]]:
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat_result = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                yield key, stat_result.st_size, stat_result.st_mtime
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+
+class S3Storage(StorageBackend):
+    """S3 호환 오브젝트 스토리지 (AWS S3, MinIO 등). boto3가 필요합니다."""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region_name: Optional[str] = None, client=None):
+        if client is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise RuntimeError("S3 저장소를 사용하려면 boto3를 설치해야 합니다.") from e
+            client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region_name)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None):
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=self._object_key(key), Body=data, **extra)
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def open(self, key: str) -> BinaryIO:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))["Body"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def iter_keys(self) -> Iterator[Tuple[str, int, float]]:
+        prefix = f"{self.prefix}/" if self.prefix else ""
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get("Contents", ()):
+                yield item["Key"][len(prefix):], item["Size"], item["LastModified"].timestamp()
+
+
+def create_storage() -> StorageBackend:
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=os.environ["LOCA_S3_BUCKET"],
+            prefix=os.getenv("LOCA_S3_PREFIX", ""),
+            endpoint_url=os.getenv("LOCA_S3_ENDPOINT_URL"),
+            region_name=os.getenv("LOCA_S3_REGION"),
+        )
+    return LocalStorage()
+
+
+@dataclass(frozen=True)
+class PackLocation:
+    """팩 파일 안에 있는 업로드 파일 하나의 위치"""
+
+    path: str
+    offset: int
+    length: int
+    content_type: Optional[str]
+    recompressed: bool
+    packed_at: float  # epoch (Last-Modified로 사용)
+
+
+_PACK_NAME = re.compile(r"^pack-(\d{6,})\.pack$")
+# 위치 조회 캐시 (팩 안의 위치는 압축 전까지 바뀌지 않고, 압축된 팩은 이 시간보다 늦게 지움)
+PACK_LOCATION_TTL_SECONDS = 60.0
+_PACK_LOCATION_CACHE_SIZE = 10000
+
+
+class PackStore:
+    """오래된 업로드 파일을 이어 붙여 보관하는 추가 전용 팩 파일 (로컬 저장소 전용)
+
+    파일 내용은 pack-<번호>.pack 끝에 이어 붙이기만 하고, 키별 위치(팩 번호, 오프셋, 길이)는
+    packed_objects 테이블이 색인입니다. 서빙은 팩 파일의 해당 구간을 그대로 보냅니다(제로 카피 전송 가능).
+    팩에 쓰는 것은 보관 작업(services/archive.py) 하나뿐이며, 지워진 파일이 남긴 빈 공간은 보관 작업이
+    팩을 압축해 회수합니다. 위치 조회 결과는 워커마다 PACK_LOCATION_TTL_SECONDS 동안 캐시합니다.
+    """
+
+    def __init__(self, root: str, session_factory=SessionLocal, max_pack_bytes: int = PACK_MAX_BYTES):
+        self.root = root
+        self.session_factory = session_factory
+        self.max_pack_bytes = max_pack_bytes
+        self._locations: "OrderedDict[str, Tuple[float, Optional[PackLocation]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pack_path(self, pack_id: int) -> str:
+        return os.path.join(self.root, pack_file_name(pack_id))
+
+    def retired_marker(self, pack_id: int) -> str:
+        """비워서 삭제를 기다리는 팩의 표시 파일 (표시된 팩에는 더 이어 쓰지 않음)"""
+        return self.pack_path(pack_id) + ".retired"
+
+    def pack_ids(self) -> List[int]:
+        """디스크에 있는 팩 번호를 오름차순으로 반환합니다."""
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        return sorted(int(match.group(1)) for match in map(_PACK_NAME.match, names) if match)
+
+    def locate(self, key: str) -> Optional[PackLocation]:
+        """팩에 들어 있는 키의 위치를 반환합니다. 없으면 None."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._locations.get(key)
+            if cached is not None and cached[0] > now:
+                self._locations.move_to_end(key)
+                return cached[1]
+        db = self.session_factory()
+        try:
+            row = db.get(PackedObject, key)
+            location = None if row is None else PackLocation(
+                path=self.pack_path(row.pack_id), offset=row.offset, length=row.length,
+                content_type=row.content_type, recompressed=row.recompressed,
+                packed_at=row.packed_at.timestamp() if row.packed_at else 0.0)
+        finally:
+            db.close()
+        with self._lock:
+            self._locations[key] = (now + PACK_LOCATION_TTL_SECONDS, location)
+            self._locations.move_to_end(key)
+            while len(self._locations) > _PACK_LOCATION_CACHE_SIZE:
+                self._locations.popitem(last=False)
+        return location
+
+    def read(self, key: str) -> Optional[bytes]:
+        """팩에 들어 있는 키의 내용을 읽습니다. 없으면 None."""
+        location = self.locate(key)
+        if location is None:
+            return None
+        try:
+            with open(location.path, "rb") as f:
+                f.seek(location.offset)
+                data = f.read(location.length)
+        except FileNotFoundError:
+            return None
+        return data if len(data) == location.length else None
+
+    def append(self, data: bytes) -> Tuple[int, int]:
+        """마지막 팩 끝에 내용을 이어 붙이고 fsync한 뒤 (팩 번호, 오프셋)을 반환합니다. (보관 작업만 호출)"""
+        ids = self.pack_ids()
+        pack_id = ids[-1] if ids else 1
+        path = self.pack_path(pack_id)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size and (size + len(data) > self.max_pack_bytes or os.path.exists(self.retired_marker(pack_id))):
+            pack_id += 1
+            path = self.pack_path(pack_id)
+            size = 0
+        os.makedirs(self.root, exist_ok=True)
+        with open(path, "ab") as f:
+            # 이전 실행이 쓰다 만 바이트가 있어도 실제 파일 끝부터 씀
+            offset = f.seek(0, os.SEEK_END)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return pack_id, offset
+
+    def forget(self, db: Session, key: str):
+        """키의 팩 위치 행을 지웁니다. (호출한 쪽의 트랜잭션, 팩 안의 바이트는 압축 때 회수)"""
+        db.execute(delete(PackedObject.__table__).where(PackedObject.key == key))
+        self.evict(key)
+
+    def evict(self, key: str):
+        with self._lock:
+            self._locations.pop(key, None)
+
+
+def _increment_ref(db: Session, key: str, size: int, content_type: Optional[str]):
+    """StoredObject 참조 수를 원자적으로 1 늘립니다 (없으면 생성)."""
+    table = StoredObject.__table__
+    dialect = db.get_bind().dialect.name
+    values = {"key": key, "size": size, "content_type": content_type, "ref_count": 1}
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(**values).on_conflict_do_update(
+            index_elements=[table.c.key], set_={"ref_count": table.c.ref_count + 1})
+    elif dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(**values).on_duplicate_key_update(ref_count=table.c.ref_count + 1)
+    else:
+        existing = db.get(StoredObject, key, with_for_update=True)
+        if existing:
+            existing.ref_count += 1
+        else:
+            db.add(StoredObject(**values))
+        return
+    db.execute(stmt)
+
+
+class ObjectStore:
+    """콘텐츠 주소 기반 업로드 저장과 참조 수 관리
+
+    같은 내용의 파일은 한 번만 저장되고, DB 행이 참조할 때마다 ref_count가 늘어납니다.
+    참조 수 변경은 호출한 쪽의 트랜잭션에 포함되므로 커밋/롤백과 함께 반영됩니다.
+    """
+
+    def __init__(self, backend: StorageBackend, session_factory=SessionLocal, packs: Optional[PackStore] = None):
+        self.backend = backend
+        self.session_factory = session_factory
+        self.packs = packs
+
+    def store(self, db: Session, data: bytes, filename: Optional[str] = None,
+              content_type: Optional[str] = None) -> str:
+        """파일을 저장하고 참조를 하나 추가한 뒤 DB에 기록할 image_path를 반환합니다."""
+        digest = hashlib.sha256(data).hexdigest()
+        key = content_key(digest, guess_extension(filename, content_type))
+        # 참조를 먼저 늘려 쓰기 잠금을 잡은 뒤 파일을 확인하므로,
+        # 동시에 진행 중인 삭제(delete)와 순서가 보장됩니다.
+        _increment_ref(db, key, len(data), content_type)
+        if not self.backend.exists(key):
+            self.backend.put(key, data, content_type)
+        return image_path_for_key(key)
+
+    def open(self, key: str) -> BinaryIO:
+        """업로드 파일을 읽기용으로 엽니다. 팩 파일로 옮겨진 파일은 팩에서 읽습니다."""
+        try:
+            return self.backend.open(key)
+        except FileNotFoundError:
+            data = self.packs.read(key) if self.packs is not None else None
+            if data is None:
+                raise
+            return io.BytesIO(data)
+
+    def release(self, db: Session, image_path: str) -> Optional[str]:
+        """참조를 하나 줄이고, 더 이상 참조가 없어 지워도 되는 키를 반환합니다.
+
+        반환된 키의 파일은 트랜잭션이 커밋된 뒤에 delete()로 지워야 합니다.
+        콘텐츠 주소 방식 이전에 저장된 파일은 참조 수가 없으므로 항상 삭제 대상입니다.
+        """
+        key = key_from_image_path(image_path)
+        if not is_content_addressed(key):
+            return key
+        obj = db.get(StoredObject, key, with_for_update=True)
+        if obj is None:
+            return None
+        if obj.ref_count > 1:
+            obj.ref_count -= 1
+            return None
+        db.delete(obj)
+        return key
+
+    def delete(self, key: str) -> bool:
+        """release()가 반환한 키의 파일을, 그 사이 다시 참조되지 않았을 때만 삭제합니다."""
+        if is_content_addressed(key):
+            db = self.session_factory()
+            try:
+                # 아무것도 바꾸지 않는 UPDATE로 쓰기 잠금을 잡으면서 참조 행이 다시 생겼는지 확인합니다.
+                table = StoredObject.__table__
+                result = db.execute(
+                    update(table).where(table.c.key == key).values(ref_count=table.c.ref_count))
+                if result.rowcount:
+                    db.rollback()
+                    return False
+                if self.packs is not None:
+                    self.packs.forget(db, key)
+                self._delete_file(key)
+                db.commit()
+                return True
+            finally:
+                db.close()
+        if self.packs is not None:
+            db = self.session_factory()
+            try:
+                self.packs.forget(db, key)
+                db.commit()
+            finally:
+                db.close()
+        self._delete_file(key)
+        return True
+
+    def _delete_file(self, key: str):
+        try:
+            self.backend.delete(key)
+        except Exception:
+            logger.exception("파일 삭제 실패: %s", key)
+
+
+# 전역 저장소 인스턴스 (팩 파일은 로컬 저장소에서만 사용, S3는 수명 주기 규칙으로 계층화)
+storage = create_storage()
+pack_store = PackStore(os.path.join(storage.root, PACKS_PREFIX)) if storage.is_local else None
+object_store = ObjectStore(storage, packs=pack_store)
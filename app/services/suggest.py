@@ -0,0 +1,441 @@
+import asyncio
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..models import Keyword, Photo
+
+# 다른 워커/스크립트가 추가한 키워드와 사진 위치를 따라잡는 최소 간격 (초)
+SUGGEST_REFRESH_SECONDS = 2.0
+# 후보 키가 이보다 많은 접두어는 종류별 상위 목록을 미리 만들어 두고, 적은 접두어는 조회 때 전부 순위를 매김
+SUGGEST_PRECOMPUTE_ABOVE = 128
+# 미리 만들어 두는 종류별 상위 목록 길이 (/search/suggest의 limit 상한)
+SUGGEST_TOP_K = 50
+# 같은 질의 결과를 재사용하는 캐시 크기 (색인이 바뀌면 비움)
+SUGGEST_CACHE_SIZE = 1024
+
+SUGGEST_KEYWORD = "keyword"
+SUGGEST_CATEGORY = "category"
+SUGGEST_LOCATION = "location"
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+
+# 초성/중성/종성 (겹모음, 겹받침은 타이핑 순서대로 풀어서 "달ㄱ"이 "닭"과 맞도록 함)
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = ("ㅏ", "ㅐ", "ㅑ", "ㅒ", "ㅓ", "ㅔ", "ㅕ", "ㅖ", "ㅗ", "ㅗㅏ", "ㅗㅐ", "ㅗㅣ", "ㅛ", "ㅜ",
+              "ㅜㅓ", "ㅜㅔ", "ㅜㅣ", "ㅠ", "ㅡ", "ㅡㅣ", "ㅣ")
+_JONGSEONG = ("", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ",
+              "ㄹㅍ", "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ")
+# 따로 입력된 겹자모 (예: 질의 끝의 "ㄳ", "ㅘ")
+_COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ", "ㄾ": "ㄹㅌ",
+    "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ", "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ",
+    "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+_CHOSEONG_SET = frozenset(_CHOSEONG)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def decompose(text: str) -> str:
+    """한글 음절을 자모로 풀어 씁니다. (예: "한적" -> "ㅎㅏㄴㅈㅓㄱ")"""
+    out = []
+    for char in text:
+        code = ord(char)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            offset = code - _HANGUL_BASE
+            out.append(_CHOSEONG[offset // 588])
+            out.append(_JUNGSEONG[(offset % 588) // 28])
+            out.append(_JONGSEONG[offset % 28])
+        else:
+            out.append(_COMPOUND_JAMO.get(char, char))
+    return "".join(out)
+
+
+def choseong(text: str) -> str:
+    """한글 음절을 초성만 남기고 공백은 뺍니다. (예: "한적한 놀이터" -> "ㅎㅈㅎㄴㅇㅌ")"""
+    out = []
+    for char in text:
+        code = ord(char)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            out.append(_CHOSEONG[(code - _HANGUL_BASE) // 588])
+        elif not char.isspace():
+            out.append(char)
+    return "".join(out)
+
+
+def is_choseong_query(text: str) -> bool:
+    """초성만으로 된 질의인지 (예: "ㅎㅈ")"""
+    letters = [char for char in text if not char.isspace()]
+    return bool(letters) and all(char in _CHOSEONG_SET for char in letters)
+
+
+@dataclass
+class Suggestion:
+    kind: str
+    text: str
+    weight: int = 0
+    id: Optional[int] = None
+    category: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        item = {"type": self.kind, "text": self.text}
+        if self.id is not None:
+            item["id"] = self.id
+        if self.category is not None:
+            item["category"] = self.category
+        return item
+
+
+class _PrefixArray:
+    """정렬된 키 배열과 bisect로 접두어 검색을 하는 색인
+
+    후보 키가 SUGGEST_PRECOMPUTE_ABOVE개보다 많은 접두어는 종류별 상위 SUGGEST_TOP_K개를 순위대로
+    미리 만들어 두므로, 짧은 접두어("ㄷ")도 앞쪽 키만 잘라 보지 않고 전체 후보 중 상위를 바로 돌려줍니다.
+    새 키는 bisect 위치에 끼워 넣고 해당 접두어들의 상위 목록에도 반영합니다. 가중치는 늘어나기만 하므로
+    목록에서 밀려난 항목은 자기 가중치가 늘 때(raise_weight)만 다시 들어올 수 있습니다.
+    """
+
+    def __init__(self, items: List[Suggestion]):
+        self.items = items
+        self.keys: List[str] = []
+        self.refs: List[Tuple[int, bool]] = []  # (항목 번호, 단어 중간부터 맞는 키인지)
+        self.top: Dict[str, Dict[str, List[Tuple[int, bool]]]] = {}  # 접두어 -> 종류 -> 순위순 참조
+
+    def _rank(self, ref: Tuple[int, bool]):
+        # 문장 앞부분 일치, 사용 빈도, 짧은 문자열, 문자열 순
+        number, inner = ref
+        item = self.items[number]
+        return inner, -item.weight, len(item.text), item.text, number
+
+    @staticmethod
+    def _best(refs) -> Dict[int, bool]:
+        # 한 항목이 여러 키로 맞으면 문장 앞부분 일치를 우선
+        best: Dict[int, bool] = {}
+        for number, inner in refs:
+            if not inner or number not in best:
+                best[number] = inner
+        return best
+
+    def _ranked(self, refs) -> Dict[str, List[Tuple[int, bool]]]:
+        by_kind: Dict[str, List[Tuple[int, bool]]] = {}
+        for ref in self._best(refs).items():
+            by_kind.setdefault(self.items[ref[0]].kind, []).append(ref)
+        return {kind: heapq.nsmallest(SUGGEST_TOP_K, kind_refs, key=self._rank)
+                for kind, kind_refs in by_kind.items()}
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        start = bisect_left(self.keys, prefix)
+        return start, bisect_left(self.keys, prefix + "\U0010ffff", start)
+
+    def _build_top(self, start: int, end: int, depth: int) -> Dict[str, List[Tuple[int, bool]]]:
+        # [start, end)는 길이 depth의 접두어를 공유. 후보가 많은 하위 접두어는 그 상위 목록만 합쳐 위로 올림
+        keys = self.keys
+        refs = []
+        index = start
+        while index < end and len(keys[index]) == depth:
+            refs.append(self.refs[index])
+            index += 1
+        while index < end:
+            prefix = keys[index][:depth + 1]
+            child_end = bisect_left(keys, prefix + "\U0010ffff", index, end)
+            if child_end - index > SUGGEST_PRECOMPUTE_ABOVE:
+                child = self.top[prefix] = self._build_top(index, child_end, depth + 1)
+                for kind_refs in child.values():
+                    refs.extend(kind_refs)
+            else:
+                refs.extend(self.refs[index:child_end])
+            index = child_end
+        return self._ranked(refs)
+
+    def _offer(self, prefix: str, ref: Tuple[int, bool]):
+        number, inner = ref
+        ranked = self.top[prefix].setdefault(self.items[number].kind, [])
+        for position, (other, other_inner) in enumerate(ranked):
+            if other == number:
+                if other_inner and not inner:
+                    ranked[position] = ref
+                break
+        else:
+            if len(ranked) >= SUGGEST_TOP_K and self._rank(ref) >= self._rank(ranked[-1]):
+                return
+            ranked.append(ref)
+        ranked.sort(key=self._rank)
+        del ranked[SUGGEST_TOP_K:]
+
+    def _heavy_prefixes(self, key: str):
+        return [key[:length] for length in range(1, len(key) + 1) if key[:length] in self.top]
+
+    def add(self, key: str, ref: Tuple[int, bool]):
+        index = bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        self.refs.insert(index, ref)
+        for prefix in self._heavy_prefixes(key):
+            self._offer(prefix, ref)
+
+    def raise_weight(self, key: str, ref: Tuple[int, bool]):
+        """항목 가중치가 늘었을 때 key의 접두어 상위 목록에서 순위를 다시 매깁니다."""
+        for prefix in self._heavy_prefixes(key):
+            self._offer(prefix, ref)
+
+    def build(self, pairs: List[Tuple[str, Tuple[int, bool]]]):
+        pairs.sort(key=lambda pair: pair[0])
+        self.keys = [key for key, _ in pairs]
+        self.refs = [ref for _, ref in pairs]
+        self.top = {}
+        self._build_top(0, len(self.keys), 0)
+
+    def search(self, prefix: str, limit: int, kinds: Sequence[str] = ()) -> List[int]:
+        """prefix로 시작하는 키의 항목 번호를 순위대로 최대 limit(<= SUGGEST_TOP_K)개 반환합니다."""
+        ranked = self.top.get(prefix)
+        if ranked is None:
+            start, end = self._range(prefix)
+            if end - start <= SUGGEST_PRECOMPUTE_ABOVE:
+                refs = [ref for ref in self._best(self.refs[start:end]).items()
+                        if not kinds or self.items[ref[0]].kind in kinds]
+                return [number for number, _ in sorted(refs, key=self._rank)[:limit]]
+            # 새 키가 쌓여 후보가 많아진 접두어: 한 번 순위를 매겨 두고 이후엔 add()로 갱신
+            ranked = self.top[prefix] = self._ranked(self.refs[start:end])
+        lists = [ranked[kind] for kind in (kinds or ranked) if kind in ranked]
+        return [number for number, _ in islice(heapq.merge(*lists, key=self._rank), limit)]
+
+
+class SuggestIndex:
+    """키워드, 카테고리, 사진 위치 문자열에 대한 메모리 자동완성 색인
+
+    각 항목은 단어 시작 위치마다 자모 키(decompose)와 초성 키(choseong)로 색인되어
+    "한저" / "ㅎㅈ" / "놀이" 모두 "한적한 놀이터"에 맞습니다. 순위는 문장 앞부분 일치, 사용 빈도
+    (키워드/위치별 사진 수), 짧은 문자열 순이며, 후보가 많은 접두어는 상위 목록을 미리 만들어 두어
+    조회가 접두어 길이와 무관하게 짧게 끝납니다. 새 키워드와 사진은 id 기준으로 따라잡아
+    점진적으로 반영하고, 삭제는 반영하지 않습니다 (rebuild()로 다시 만듦).
+    """
+
+    def __init__(self, session_factory=SessionLocal, refresh_seconds: float = SUGGEST_REFRESH_SECONDS):
+        self.session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_task: Optional[asyncio.Future] = None
+        self._reset()
+
+    def _reset(self):
+        self.items: List[Suggestion] = []
+        self._by_text: Dict[Tuple[str, str], int] = {}
+        self._keyword_items: Dict[int, int] = {}
+        self._jamo = _PrefixArray(self.items)
+        self._initials = _PrefixArray(self.items)
+        self._cache: Dict[Tuple[str, int, Tuple[str, ...]], List[dict]] = {}
+        self._last_keyword_id = 0
+        self._last_photo_id = 0
+        self._refreshed_at = 0.0
+        self.built = False
+
+    @staticmethod
+    def _word_starts(text: str) -> List[int]:
+        return [i for i, char in enumerate(text) if not char.isspace() and (i == 0 or text[i - 1].isspace())]
+
+    def _keys(self, text: str):
+        normalized = _normalize(text)
+        for position in self._word_starts(normalized):
+            tail = normalized[position:]
+            yield decompose(tail), choseong(tail), position > 0
+
+    def _add_item(self, item: Suggestion) -> Optional[int]:
+        key = (item.kind, _normalize(item.text))
+        if not key[1] or key in self._by_text:
+            return self._by_text.get(key)
+        number = len(self.items)
+        self.items.append(item)
+        self._by_text[key] = number
+        for jamo_key, initials_key, inner in self._keys(item.text):
+            self._jamo.add(jamo_key, (number, inner))
+            self._initials.add(initials_key, (number, inner))
+        return number
+
+    def _bump(self, kind: str, text: Optional[str], amount: int = 1):
+        if not text or not text.strip():
+            return
+        number = self._by_text.get((kind, _normalize(text)))
+        if number is None:
+            number = self._add_item(Suggestion(kind, text.strip()))
+        if number is not None:
+            self._raise_weight(number, amount)
+
+    def _raise_weight(self, number: int, amount: int):
+        self.items[number].weight += amount
+        for jamo_key, initials_key, inner in self._keys(self.items[number].text):
+            self._jamo.raise_weight(jamo_key, (number, inner))
+            self._initials.raise_weight(initials_key, (number, inner))
+
+    def rebuild(self, db: Optional[Session] = None):
+        """DB에서 전체 색인을 새로 만듭니다."""
+        own = db is None
+        db = db or self.session_factory()
+        try:
+            # 집계 중에 추가된 사진은 catch_up()에서 (중복 집계가 되더라도) 빠짐없이 반영
+            last_photo_id = db.execute(select(func.max(Photo.id))).scalar() or 0
+            keywords = db.execute(select(Keyword.id, Keyword.keyword, Keyword.category).order_by(Keyword.id)).all()
+            keyword_counts = dict(db.execute(
+                select(Photo.keyword_id, func.count(Photo.id)).group_by(Photo.keyword_id)).all())
+            locations = db.execute(
+                select(Photo.location, func.count(Photo.id))
+                .where(Photo.location.isnot(None)).group_by(Photo.location)).all()
+        finally:
+            if own:
+                db.close()
+
+        items: List[Suggestion] = []
+        by_text: Dict[Tuple[str, str], int] = {}
+        keyword_items: Dict[int, int] = {}
+
+        def add(item: Suggestion) -> int:
+            key = (item.kind, _normalize(item.text))
+            number = by_text.get(key)
+            if number is None:
+                number = by_text[key] = len(items)
+                items.append(item)
+            else:
+                items[number].weight += item.weight
+            return number
+
+        category_counts: Dict[str, int] = {}
+        for keyword_id, text, category in keywords:
+            if text and text.strip():
+                keyword_items[keyword_id] = add(Suggestion(SUGGEST_KEYWORD, text.strip(), keyword_counts.get(keyword_id, 0),
+                                                           id=keyword_id, category=category))
+            if category:
+                category_counts[category] = category_counts.get(category, 0) + 1
+        for category, count in category_counts.items():
+            add(Suggestion(SUGGEST_CATEGORY, category, count))
+        for location, count in locations:
+            if location and location.strip():
+                add(Suggestion(SUGGEST_LOCATION, location.strip(), count))
+
+        jamo_pairs, initials_pairs = [], []
+        for number, item in enumerate(items):
+            for jamo_key, initials_key, inner in self._keys(item.text):
+                jamo_pairs.append((jamo_key, (number, inner)))
+                initials_pairs.append((initials_key, (number, inner)))
+        jamo, initials = _PrefixArray(items), _PrefixArray(items)
+        jamo.build(jamo_pairs)
+        initials.build(initials_pairs)
+
+        with self._lock:
+            self.items, self._by_text, self._keyword_items = items, by_text, keyword_items
+            self._jamo, self._initials = jamo, initials
+            self._cache = {}
+            self._last_keyword_id = keywords[-1][0] if keywords else 0
+            self._last_photo_id = last_photo_id
+            self._refreshed_at = time.monotonic()
+            self.built = True
+
+    def catch_up(self, db: Optional[Session] = None, batch: int = 5000):
+        """마지막으로 본 id 이후에 추가된 키워드/사진만 읽어 색인에 반영합니다."""
+        own = db is None
+        db = db or self.session_factory()
+        try:
+            keywords = db.execute(
+                select(Keyword.id, Keyword.keyword, Keyword.category)
+                .where(Keyword.id > self._last_keyword_id).order_by(Keyword.id)).all()
+            photos = []
+            while True:
+                last = photos[-1][0] if photos else self._last_photo_id
+                rows = db.execute(
+                    select(Photo.id, Photo.keyword_id, Photo.location)
+                    .where(Photo.id > last).order_by(Photo.id).limit(batch)).all()
+                photos.extend(rows)
+                if len(rows) < batch:
+                    break
+        finally:
+            if own:
+                db.close()
+
+        with self._lock:
+            if not keywords and not photos:
+                self._refreshed_at = time.monotonic()
+                return
+            for keyword_id, text, category in keywords:
+                if keyword_id <= self._last_keyword_id:
+                    continue
+                if text and text.strip():
+                    number = self._add_item(Suggestion(SUGGEST_KEYWORD, text.strip(), id=keyword_id, category=category))
+                    if number is not None:
+                        self._keyword_items[keyword_id] = number
+                self._bump(SUGGEST_CATEGORY, category)
+                self._last_keyword_id = keyword_id
+            # 같은 키워드의 사진은 모아서 한 번에 순위를 다시 매김
+            keyword_added: Dict[int, int] = {}
+            for photo_id, keyword_id, location in photos:
+                if photo_id <= self._last_photo_id:
+                    continue
+                number = self._keyword_items.get(keyword_id)
+                if number is not None:
+                    keyword_added[number] = keyword_added.get(number, 0) + 1
+                self._bump(SUGGEST_LOCATION, location)
+                self._last_photo_id = photo_id
+            for number, amount in keyword_added.items():
+                self._raise_weight(number, amount)
+            self._cache = {}
+            self._refreshed_at = time.monotonic()
+
+    def refresh(self):
+        """처음이면 전체 색인을, 아니면 새로 추가된 행만 반영합니다. (스레드에서 호출)"""
+        with self._refresh_lock:
+            if not self.built:
+                self.rebuild()
+            elif time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+                self.catch_up()
+
+    def needs_refresh(self) -> bool:
+        return not self.built or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+
+    async def ensure_fresh(self):
+        """색인이 없으면 만들 때까지 기다리고, 따라잡기가 필요하면 백그라운드로 실행합니다."""
+        if not self.built:
+            await run_in_threadpool(self.refresh)
+        elif self.needs_refresh() and not self._refresh_lock.locked() and (
+                self._refresh_task is None or self._refresh_task.done()):
+            # 응답은 현재 색인으로 바로 하고, 새 행 반영은 다음 요청부터 적용
+            self._refresh_task = asyncio.ensure_future(run_in_threadpool(self.refresh))
+
+    def invalidate(self):
+        """다음 refresh()에서 전체 색인을 다시 만들도록 합니다. (대량 가져오기/삭제 후)"""
+        with self._lock:
+            self.built = False
+            self._cache = {}
+
+    def suggest(self, query: str, limit: int = 10, kinds: Sequence[str] = ()) -> List[dict]:
+        """질의로 시작하는(단어 단위) 항목을 순위대로 최대 limit(<= SUGGEST_TOP_K)개 반환합니다."""
+        normalized = _normalize(query)
+        if not normalized:
+            return []
+        cache_key = (normalized, limit, tuple(kinds))
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+            if is_choseong_query(normalized):
+                numbers = self._initials.search(choseong(normalized), limit, kinds)
+            else:
+                numbers = self._jamo.search(decompose(normalized), limit, kinds)
+            result = [self.items[number].to_dict() for number in numbers]
+            if len(self._cache) >= SUGGEST_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[cache_key] = result
+            return result
+
+
+# 전역 자동완성 색인 인스턴스
+suggest_index = SuggestIndex()
@@ -0,0 +1,97 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import Photo, PhotoTag
+from .ai_service import ImageAnalysis
+
+# 패싯 종류 (photo_tags.facet 값)
+FACET_PLACE_TYPE = "place_type"
+FACET_ELEMENT = "element"
+FACET_MOOD = "mood"
+FACETS = (FACET_PLACE_TYPE, FACET_ELEMENT, FACET_MOOD)
+
+MAX_ELEMENTS = 5
+MAX_TAG_LENGTH = 50
+
+_WHITESPACE = re.compile(r"\s+")
+_STRIP_CHARS = " \t\n\"'`#.,!?·"
+
+
+def normalize_tag(value: Optional[str]) -> Optional[str]:
+    """태그 값을 비교 가능한 형태로 정규화합니다. (공백 정리, 앞뒤 기호 제거, 소문자)"""
+    if not value:
+        return None
+    value = _WHITESPACE.sub(" ", value).strip(_STRIP_CHARS).lower()
+    if not value or len(value) > MAX_TAG_LENGTH:
+        return None
+    return value
+
+
+def analysis_tags(analysis: ImageAnalysis) -> List[Tuple[str, str]]:
+    """분석 결과에서 (패싯, 값) 태그 목록을 중복 없이 만듭니다."""
+    tags: List[Tuple[str, str]] = []
+    place_type = normalize_tag(analysis.place_type)
+    if place_type:
+        tags.append((FACET_PLACE_TYPE, place_type))
+    elements = []
+    for element in analysis.elements:
+        element = normalize_tag(element)
+        if element and element not in elements:
+            elements.append(element)
+    tags.extend((FACET_ELEMENT, element) for element in elements[:MAX_ELEMENTS])
+    mood = normalize_tag(analysis.mood)
+    if mood:
+        tags.append((FACET_MOOD, mood))
+    return tags
+
+
+def replace_photo_tags(db: Session, photo_id: int, analysis: ImageAnalysis):
+    """사진의 태그를 분석 결과로 교체합니다. (커밋은 호출한 쪽에서)"""
+    table = PhotoTag.__table__
+    db.execute(table.delete().where(table.c.photo_id == photo_id))
+    rows = [{"photo_id": photo_id, "facet": facet, "value": value} for facet, value in analysis_tags(analysis)]
+    if rows:
+        db.execute(table.insert(), rows)
+
+
+def delete_photo_tags(db: Session, photo_id: int):
+    table = PhotoTag.__table__
+    db.execute(table.delete().where(table.c.photo_id == photo_id))
+
+
+def tag_conditions(place_type: Optional[str] = None, elements: Sequence[str] = (),
+                   mood: Optional[str] = None) -> list:
+    """선택한 패싯 값을 모두 가진 사진만 남기는 Photo.id 조건 목록을 만듭니다."""
+    selected = [(FACET_PLACE_TYPE, place_type), (FACET_MOOD, mood)]
+    selected.extend((FACET_ELEMENT, element) for element in elements)
+    conditions = []
+    for facet, value in selected:
+        value = normalize_tag(value)
+        if value is None:
+            continue
+        conditions.append(Photo.id.in_(
+            select(PhotoTag.photo_id).where(PhotoTag.facet == facet, PhotoTag.value == value)
+        ))
+    return conditions
+
+
+def facet_counts(db: Session, photo_ids=None, limit_per_facet: int = 20) -> Dict[str, List[dict]]:
+    """패싯별 태그 값과 사진 수를 한 번의 GROUP BY 쿼리로 집계합니다.
+
+    photo_ids에 사진 ID 서브쿼리를 넘기면 해당 사진들로 범위를 좁힙니다.
+    """
+    query = db.query(PhotoTag.facet, PhotoTag.value, func.count(PhotoTag.photo_id).label("count"))
+    if photo_ids is not None:
+        query = query.filter(PhotoTag.photo_id.in_(photo_ids))
+    rows = query.group_by(PhotoTag.facet, PhotoTag.value).all()
+
+    result: Dict[str, List[dict]] = {facet: [] for facet in FACETS}
+    for facet, value, count in rows:
+        result.setdefault(facet, []).append({"value": value, "count": count})
+    for facet, values in result.items():
+        values.sort(key=lambda item: (-item["count"], item["value"]))
+        del values[limit_per_facet:]
+    return result
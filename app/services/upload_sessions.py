@@ -0,0 +1,304 @@
+import hashlib
+import logging
+import os
+import re
+import secrets
+import shutil
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Tuple
+
+import orjson
+
+from .admission import MAX_UPLOAD_BYTES
+from .coordination import FileLock
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 이어 올리기 업로드의 받는 중인 파일을 두는 디렉토리 (여러 워커가 같은 디렉토리를 써야 함)
+UPLOAD_SESSION_DIR = os.getenv("LOCA_UPLOAD_SESSION_DIR", "upload_sessions")
+# 마지막 조각을 받은 뒤 이 시간이 지나도록 완료되지 않은 세션은 지움 (완료된 세션의 기록도 이만큼 유지, 초)
+UPLOAD_SESSION_TTL_SECONDS = float(os.getenv("LOCA_UPLOAD_SESSION_TTL_S", "86400"))
+# 리더 워커가 만료된 세션을 지우는 주기 (초, 0이면 끔)
+UPLOAD_SESSION_GC_INTERVAL_SECONDS = float(os.getenv("LOCA_UPLOAD_SESSION_GC_S", "600"))
+# 이어 올리기로 받을 수 있는 파일 크기 상한 (HEIC/RAW 원본)
+UPLOAD_SESSION_MAX_BYTES = int(os.getenv("LOCA_UPLOAD_SESSION_MAX_BYTES", str(max(MAX_UPLOAD_BYTES, 64 * 1024 * 1024))))
+# 조각 하나의 크기 상한 (조각은 끝까지 받은 뒤 한 번에 기록하므로 요청당 메모리 상한이기도 함)
+UPLOAD_CHUNK_MAX_BYTES = int(os.getenv("LOCA_UPLOAD_CHUNK_MAX_BYTES", str(8 * 1024 * 1024)))
+# 마지막 조각이 아닌 조각의 최소 크기 (세션 기록의 조각 목록이 너무 길어지지 않도록)
+UPLOAD_CHUNK_MIN_BYTES = 256 * 1024
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+_META = "meta.json"
+_DATA = "data"
+_LOCK = ".lock"
+_INDEX_DIR = "_index"
+
+metrics.describe("loca_upload_sessions_total", "이어 올리기 업로드 세션 결과")
+metrics.describe("loca_upload_chunks_total", "이어 올리기 업로드 조각 처리 결과")
+
+
+class UploadSessionError(Exception):
+    """이어 올리기 요청을 처리할 수 없음 (status_code, 클라이언트가 이어서 보낼 offset)"""
+
+    def __init__(self, status_code: int, detail: str, offset: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.offset = offset
+
+
+@dataclass
+class UploadSession:
+    """이어 올리기 업로드 세션 (세션 디렉토리의 meta.json)
+
+    chunks는 받은 조각의 [offset, 길이, sha256]이며, 응답을 받지 못한 클라이언트가 같은 조각을 다시 보내면
+    해시로 확인해 다시 쓰지 않습니다.
+    """
+
+    id: str
+    user_id: int
+    keyword_id: int
+    size: int
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    location: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    checksum: Optional[str] = None  # 파일 전체의 sha256 (hex, 클라이언트가 보낸 경우 완료 시 확인)
+    offset: int = 0
+    created_at: float = 0.0
+    expires_at: float = 0.0
+    photo_id: Optional[int] = None  # 완료되어 만들어진 사진
+    chunks: List[list] = field(default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.size
+
+
+class UploadSessionStore:
+    """디스크에 두는 이어 올리기 업로드 세션 (tus 프로토콜과 같은 방식)
+
+    세션마다 디렉토리 하나(root/<id>/)에 받은 바이트(data)와 세션 기록(meta.json)을 두므로
+    워커 프로세스가 달라도 같은 세션을 이어 받을 수 있습니다. 한 세션에 대한 쓰기/완료는 세션 디렉토리의
+    flock으로 한 번에 하나만 처리하고(나머지는 409), 조각은 data에 쓰고 fsync한 뒤 meta.json을 원자적으로
+    바꿔 offset을 올립니다. 그 사이에 프로세스가 죽어 data가 offset보다 길면 다음 조각이 잘라내고 씁니다.
+    메서드는 파일 I/O를 하므로 스레드에서 호출합니다.
+    """
+
+    def __init__(self, root: str = UPLOAD_SESSION_DIR, ttl_seconds: float = UPLOAD_SESSION_TTL_SECONDS,
+                 max_bytes: int = UPLOAD_SESSION_MAX_BYTES, chunk_max_bytes: int = UPLOAD_CHUNK_MAX_BYTES):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.chunk_max_bytes = chunk_max_bytes
+
+    def _dir(self, session_id: str) -> str:
+        if not _SESSION_ID.match(session_id):
+            raise UploadSessionError(404, "업로드 세션을 찾을 수 없습니다.")
+        return os.path.join(self.root, session_id)
+
+    def _index_path(self, user_id: int, keyword_id: int, checksum: str) -> str:
+        return os.path.join(self.root, _INDEX_DIR, f"{user_id}-{keyword_id}-{checksum}")
+
+    def _save(self, session: UploadSession):
+        path = os.path.join(self._dir(session.id), _META)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(orjson.dumps(asdict(session)))
+        os.replace(temp, path)
+
+    def _load(self, session_id: str) -> Optional[UploadSession]:
+        try:
+            with open(os.path.join(self._dir(session_id), _META), "rb") as f:
+                return UploadSession(**orjson.loads(f.read()))
+        except FileNotFoundError:
+            return None
+
+    def get(self, session_id: str) -> UploadSession:
+        """만료되지 않은 세션을 반환합니다. 없으면 UploadSessionError(404)."""
+        session = self._load(session_id)
+        if session is None or session.expires_at < time.time():
+            raise UploadSessionError(404, "업로드 세션을 찾을 수 없습니다.")
+        return session
+
+    @contextmanager
+    def locked(self, session_id: str):
+        """세션 하나를 배타적으로 잡습니다. 다른 요청(다른 워커 포함)이 잡고 있으면 UploadSessionError(409)."""
+        lock = FileLock(os.path.join(self._dir(session_id), _LOCK))
+        if not os.path.isdir(self._dir(session_id)):
+            raise UploadSessionError(404, "업로드 세션을 찾을 수 없습니다.")
+        if not lock.try_acquire():
+            raise UploadSessionError(409, "이 업로드 세션을 다른 요청이 처리 중입니다.")
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def create(self, user_id: int, keyword_id: int, size: int, checksum: Optional[str] = None,
+               **details) -> Tuple[UploadSession, bool]:
+        """세션을 만들고 (세션, 새로 만들었는지)를 반환합니다.
+
+        같은 유저/키워드/파일 체크섬의 세션이 남아 있으면 새로 만들지 않고 그 세션을 돌려주므로,
+        세션 ID를 잃어버린 클라이언트도 이미 보낸 부분부터 이어 올릴 수 있습니다.
+        """
+        if size > self.max_bytes:
+            raise UploadSessionError(413, f"파일이 너무 큽니다. (최대 {self.max_bytes // (1024 * 1024)}MB)")
+        if checksum:
+            try:
+                with open(self._index_path(user_id, keyword_id, checksum)) as f:
+                    existing = self.get(f.read().strip())
+                if existing.size == size:
+                    metrics.inc("loca_upload_sessions_total", {"result": "resumed"})
+                    return existing, False
+            except (FileNotFoundError, UploadSessionError):
+                pass
+
+        now = time.time()
+        session = UploadSession(id=secrets.token_urlsafe(18), user_id=user_id, keyword_id=keyword_id, size=size,
+                                checksum=checksum, created_at=now, expires_at=now + self.ttl_seconds, **details)
+        os.makedirs(self._dir(session.id))
+        self._save(session)
+        if checksum:
+            index_path = self._index_path(user_id, keyword_id, checksum)
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            temp = f"{index_path}.{os.getpid()}.tmp"
+            with open(temp, "w") as f:
+                f.write(session.id)
+            os.replace(temp, index_path)
+        metrics.inc("loca_upload_sessions_total", {"result": "created"})
+        return session, True
+
+    def write_chunk(self, session_id: str, offset: int, data: bytes,
+                    chunk_checksum: Optional[bytes] = None) -> UploadSession:
+        """offset 위치에 조각을 기록하고 갱신된 세션을 반환합니다.
+
+        이미 받은 조각과 위치/길이/sha256이 같은 조각은 다시 쓰지 않고 현재 상태를 돌려줍니다.
+        offset이 세션의 offset과 다르면 UploadSessionError(409, offset=현재 offset).
+        chunk_checksum(조각의 sha256 digest)이 있으면 받은 내용과 비교합니다.
+        """
+        digest = hashlib.sha256(data).digest()
+        if chunk_checksum is not None and chunk_checksum != digest:
+            metrics.inc("loca_upload_chunks_total", {"result": "checksum_mismatch"})
+            raise UploadSessionError(400, "조각의 체크섬이 맞지 않습니다. 다시 보내주세요.")
+        with self.locked(session_id):
+            session = self.get(session_id)
+            if offset != session.offset:
+                if [offset, len(data), digest.hex()] in session.chunks:
+                    metrics.inc("loca_upload_chunks_total", {"result": "duplicate"})
+                    return session
+                metrics.inc("loca_upload_chunks_total", {"result": "conflict"})
+                raise UploadSessionError(409, "Upload-Offset이 받은 크기와 다릅니다.", session.offset)
+            if not data:
+                return session
+            end = offset + len(data)
+            if end > session.size:
+                raise UploadSessionError(413, "조각이 업로드 크기를 넘습니다.", session.offset)
+            if end < session.size and len(data) < UPLOAD_CHUNK_MIN_BYTES:
+                raise UploadSessionError(
+                    400, f"마지막 조각이 아니면 {UPLOAD_CHUNK_MIN_BYTES // 1024}KB 이상이어야 합니다.", session.offset)
+
+            path = os.path.join(self._dir(session_id), _DATA)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.seek(offset)
+                f.write(data)
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+            session.chunks.append([offset, len(data), digest.hex()])
+            session.offset = end
+            session.expires_at = time.time() + self.ttl_seconds
+            self._save(session)
+        metrics.inc("loca_upload_chunks_total", {"result": "appended"})
+        return session
+
+    def read(self, session: UploadSession) -> bytes:
+        """다 받은 세션의 파일 내용을 읽습니다. (locked() 안에서 호출)
+
+        세션에 파일 체크섬이 있으면 확인하고, 맞지 않으면 받은 내용을 버리고 처음부터 다시 받도록 합니다.
+        """
+        if not session.complete:
+            raise UploadSessionError(409, "아직 파일을 다 받지 않았습니다.", session.offset)
+        with open(os.path.join(self._dir(session.id), _DATA), "rb") as f:
+            data = f.read(session.size)
+        if len(data) != session.size:
+            raise UploadSessionError(500, "받은 파일이 손상되었습니다. 새 세션으로 다시 올려주세요.")
+        if session.checksum and hashlib.sha256(data).hexdigest() != session.checksum:
+            session.offset = 0
+            session.chunks = []
+            self._save(session)
+            metrics.inc("loca_upload_sessions_total", {"result": "checksum_mismatch"})
+            raise UploadSessionError(400, "파일 체크섬이 맞지 않습니다. 처음부터 다시 보내주세요.", 0)
+        return data
+
+    def mark_completed(self, session: UploadSession, photo_id: int):
+        """사진을 만든 세션의 받은 파일을 지우고 결과를 기록합니다. (locked() 안에서 호출)
+
+        기록은 만료 시각까지 남아 완료 응답을 받지 못한 클라이언트가 다시 완료를 요청하면 같은 사진을 돌려줍니다.
+        """
+        session.photo_id = photo_id
+        session.chunks = []
+        session.expires_at = time.time() + self.ttl_seconds
+        self._save(session)
+        try:
+            os.remove(os.path.join(self._dir(session.id), _DATA))
+        except FileNotFoundError:
+            pass
+        metrics.inc("loca_upload_sessions_total", {"result": "completed"})
+
+    def collect_expired(self, now: Optional[float] = None) -> int:
+        """만료된 세션 디렉토리와 가리키는 세션이 없는 색인을 지우고 지운 세션 수를 반환합니다."""
+        now = time.time() if now is None else now
+        removed = 0
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            if name == _INDEX_DIR or not _SESSION_ID.match(name):
+                continue
+            directory = os.path.join(self.root, name)
+            try:
+                session = self._load(name)
+                # 기록이 없는 디렉토리(만드는 중 종료)는 디렉토리 수정 시각으로 판단
+                expires_at = session.expires_at if session else os.path.getmtime(directory) + self.ttl_seconds
+            except (OSError, ValueError, TypeError):
+                logger.warning("읽을 수 없는 업로드 세션: %s", name)
+                expires_at = 0
+            if expires_at >= now:
+                continue
+            lock = FileLock(os.path.join(directory, _LOCK))
+            if not lock.try_acquire():
+                continue  # 처리 중인 요청이 있으면 다음 주기에
+            try:
+                shutil.rmtree(directory, ignore_errors=True)
+            finally:
+                lock.release()
+            removed += 1
+        metrics.inc("loca_upload_sessions_total", {"result": "expired"}, removed)
+
+        index_dir = os.path.join(self.root, _INDEX_DIR)
+        for name in os.listdir(index_dir) if os.path.isdir(index_dir) else ():
+            path = os.path.join(index_dir, name)
+            try:
+                with open(path) as f:
+                    session_id = f.read().strip()
+                if not _SESSION_ID.match(session_id) or not os.path.isdir(os.path.join(self.root, session_id)):
+                    os.remove(path)
+            except OSError:
+                pass
+        return removed
+
+
+def run_upload_session_gc():
+    """리더 워커의 주기 작업: 만료된 이어 올리기 세션을 지웁니다."""
+    removed = upload_sessions.collect_expired()
+    if removed:
+        logger.info("만료된 업로드 세션 %d개 삭제", removed)
+
+
+# 전역 이어 올리기 세션 저장소
+upload_sessions = UploadSessionStore()
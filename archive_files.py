@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+사진 보관 도구
+
+마감된 공모의 선정되지 않은 참여 사진과 오래 조회되지 않은 업로드 파일을 (재압축해) 팩 파일(uploads/packs/)에
+이어 붙이고 원본 파일을 지웁니다. 팩에 옮긴 파일은 /uploads/ 경로에서 팩의 해당 구간으로 그대로 서빙됩니다.
+지워진 파일이 많은 팩은 살아 있는 파일만 새 팩으로 옮겨 공간을 회수합니다.
+기본은 보고만 하는 dry-run이며, --apply를 주면 옮깁니다. (로컬 저장소 전용)
+
+사용법:
+    python archive_files.py                 # 보고만
+    python archive_files.py --apply [--cold-days 90] [--contest-grace-days 7] [--limit 2000] [--no-recompress]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.archive import (
+    ARCHIVE_BATCH, ARCHIVE_COLD_DAYS, ARCHIVE_CONTEST_GRACE_DAYS, ARCHIVE_MAX_PER_RUN, ARCHIVE_RECOMPRESS, archiver,
+)
+from app.services.coordination import named_lock
+
+
+def archive_files(apply: bool, cold_days: float, contest_grace_days: float, recompress: bool, limit: int,
+                  batch_size: int, show_samples: bool):
+    # 리더 워커의 주기 보관(LOCA_ARCHIVE_INTERVAL_S)과 동시에 실행되지 않도록 잠금을 잡습니다.
+    lock = named_lock("archive")
+    if not lock.try_acquire():
+        print("다른 보관 작업이 실행 중입니다.")
+        return
+    try:
+        started = time.perf_counter()
+        report = archiver.run(dry_run=not apply, cold_days=cold_days, contest_grace_days=contest_grace_days,
+                              recompress=recompress, limit=limit or None, batch_size=batch_size)
+        print(f"{'보관' if apply else 'dry-run'} 완료 ({time.perf_counter() - started:.1f}s)")
+        print(f"  {report.summary()}")
+        if show_samples:
+            for key in report.samples:
+                print(f"    - {key}")
+        if not apply and report.packed:
+            print("실제로 옮기려면 --apply 옵션을 주세요.")
+    finally:
+        lock.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="사진 보관 (팩 파일)")
+    parser.add_argument("--apply", action="store_true", help="실제로 팩 파일로 옮김 (기본은 보고만)")
+    parser.add_argument("--cold-days", type=float, default=ARCHIVE_COLD_DAYS,
+                        help="이 기간 동안 조회되지 않은 파일을 보관")
+    parser.add_argument("--contest-grace-days", type=float, default=ARCHIVE_CONTEST_GRACE_DAYS,
+                        help="마감 후 이 기간이 지난 공모의 참여 사진을 보관")
+    parser.add_argument("--no-recompress", action="store_true", help="원본 바이트를 그대로 보관")
+    parser.add_argument("--limit", type=int, default=ARCHIVE_MAX_PER_RUN, help="한 번에 옮길 최대 파일 수 (0이면 제한 없음)")
+    parser.add_argument("--batch", type=int, default=ARCHIVE_BATCH, help="한 번에 처리할 파일 수")
+    parser.add_argument("--quiet", action="store_true", help="보관한 파일 예시 목록을 출력하지 않음")
+    args = parser.parse_args()
+
+    archive_files(args.apply, args.cold_days, args.contest_grace_days, ARCHIVE_RECOMPRESS and not args.no_recompress,
+                  args.limit, args.batch, not args.quiet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+AI 설명 재분석(backfill) 도구
+
+현재 모델/프롬프트 버전(app/services/ai_service.py의 AI_MODEL, PROMPT_VERSION)으로
+분석되지 않은 사진(이전 버전, 분석 실패, 미분석)만 좋아요가 많은 순서대로 다시 분석하고
+설명과 패싯 태그(photo_tags)를 갱신합니다.
+분석이 끝난 사진은 배치마다 커밋되어 대상에서 빠지므로 중단 후 다시 실행하면 이어서 진행하고,
+반복해서 실패한 사진은 체크포인트 파일에 기록해 건너뜁니다.
+
+사용법:
+    python backfill_ai.py [--rate 60] [--workers 4] [--batch 50] [--limit 1000]
+    python backfill_ai.py --only-failed
+    python backfill_ai.py --dry-run
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import and_, func, or_
+
+from app.database import SessionLocal
+from app.models import Like, Photo
+from app.services.ai_service import (
+    LEGACY_ERROR_PREFIXES, AIAnalysisError, AIRateLimitError, ImageAnalysis, ai_service,
+)
+from app.services.coordination import named_lock
+from app.services.storage import key_from_image_path, object_store
+from app.services.tags import replace_photo_tags
+
+CHECKPOINT_FILE = ".backfill_ai.json"
+# 호출 한도 초과 시 대기 시간 (초, 연속으로 초과하면 두 배씩 늘림)
+RATE_LIMIT_BACKOFF = 10.0
+MAX_BACKOFF = 300.0
+
+
+class RateLimiter:
+    """분당 호출 수를 제한하고, 한도 초과 응답을 받으면 모든 작업자를 잠시 멈춥니다."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = time.monotonic()
+        self._backoff = RATE_LIMIT_BACKOFF
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def penalize(self) -> float:
+        with self._lock:
+            delay = self._backoff
+            self._backoff = min(self._backoff * 2, MAX_BACKOFF)
+            self._next_at = max(self._next_at, time.monotonic() + delay)
+            return delay
+
+    def recovered(self):
+        with self._lock:
+            self._backoff = RATE_LIMIT_BACKOFF
+
+
+def _stale_filter(model: str, version: int, only_failed: bool):
+    failed = or_(
+        Photo.ai_description.is_(None),
+        Photo.ai_description == "",
+        *[Photo.ai_description.startswith(prefix) for prefix in LEGACY_ERROR_PREFIXES],
+    )
+    if only_failed:
+        return and_(Photo.analyzed_at.is_(None), failed)
+    return or_(
+        Photo.analyzed_at.is_(None),
+        Photo.ai_model.is_(None),
+        Photo.prompt_version.is_(None),
+        Photo.ai_model != model,
+        Photo.prompt_version != version,
+        failed,
+    )
+
+
+def _priority_ids(db, stale) -> List[int]:
+    """재분석 대상 사진 ID를 좋아요 많은 순서로 한 번에 가져옵니다."""
+    like_counts = (
+        db.query(Like.photo_id, func.count(Like.id).label("like_count"))
+        .group_by(Like.photo_id)
+        .subquery()
+    )
+    rows = (
+        db.query(Photo.id)
+        .outerjoin(like_counts, like_counts.c.photo_id == Photo.id)
+        .filter(stale)
+        .order_by(func.coalesce(like_counts.c.like_count, 0).desc(), Photo.id)
+        .all()
+    )
+    return [row[0] for row in rows]
+
+
+def _load_checkpoint(path: str, model: str, version: int) -> dict:
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("model") == model and checkpoint.get("prompt_version") == version:
+            return checkpoint
+        print("모델/프롬프트 버전이 바뀌어 체크포인트를 새로 시작합니다.")
+    return {"model": model, "prompt_version": version, "processed": 0, "failed": {}}
+
+
+def _save_checkpoint(path: str, checkpoint: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _describe(limiter: RateLimiter, photo_id: int, image_path: str) -> Tuple[int, Optional[ImageAnalysis], Optional[str]]:
+    """사진 하나를 분석합니다. (사진 ID, 분석 결과, 오류) 를 반환하며, 한도 초과면 대기 후 재시도합니다."""
+    try:
+        with object_store.open(key_from_image_path(image_path)) as f:
+            data = f.read()
+    except (OSError, ValueError) as e:
+        return photo_id, None, f"이미지를 읽을 수 없습니다: {e}"
+    while True:
+        limiter.acquire()
+        try:
+            analysis = ai_service.describe_image_bytes(data)
+            limiter.recovered()
+            return photo_id, analysis, None
+        except AIRateLimitError:
+            delay = limiter.penalize()
+            print(f"  호출 한도 초과, {delay:.0f}초 대기 후 재시도 (photo_id={photo_id})")
+        except AIAnalysisError as e:
+            return photo_id, None, str(e)
+
+
+class Progress:
+    def __init__(self, total: int, every: float):
+        self.total = total
+        self.every = every
+        self.done = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._last = self.started
+
+    def update(self, succeeded: int, failed: int, skipped: int = 0, force: bool = False):
+        self.succeeded += succeeded
+        self.failed += failed
+        self.done += succeeded + failed + skipped
+        now = time.monotonic()
+        if not force and now - self._last < self.every:
+            return
+        self._last = now
+        elapsed = max(now - self.started, 1e-9)
+        rate = self.done / elapsed
+        remaining = (self.total - self.done) / rate if rate > 0 else float("inf")
+        eta = f"{remaining / 60:.1f}분" if remaining != float("inf") else "-"
+        percent = self.done / self.total * 100 if self.total else 100.0
+        print(f"  진행 {self.done}/{self.total} ({percent:.1f}%) | 성공 {self.succeeded} 실패 {self.failed} | "
+              f"{rate * 60:.1f}장/분 | 남은 시간 약 {eta}")
+
+
+def backfill(rate: float, workers: int, batch_size: int, limit: Optional[int], only_failed: bool,
+             max_attempts: int, checkpoint_path: str, progress_every: float, dry_run: bool = False):
+    # 서버 워커나 다른 터미널에서 동시에 실행되면 같은 사진을 두 번 분석하므로 잠금을 잡습니다.
+    lock = named_lock("backfill_ai")
+    if not lock.try_acquire():
+        print("다른 backfill_ai 작업이 실행 중입니다.")
+        return
+    try:
+        _backfill(rate, workers, batch_size, limit, only_failed, max_attempts, checkpoint_path,
+                  progress_every, dry_run)
+    finally:
+        lock.release()
+
+
+def _backfill(rate: float, workers: int, batch_size: int, limit: Optional[int], only_failed: bool,
+              max_attempts: int, checkpoint_path: str, progress_every: float, dry_run: bool):
+    model, version = ai_service.model_name, ai_service.prompt_version
+    checkpoint = _load_checkpoint(checkpoint_path, model, version)
+    failed_attempts: Dict[str, int] = checkpoint["failed"]
+
+    db = SessionLocal()
+    try:
+        stale = _stale_filter(model, version, only_failed)
+        ids = [photo_id for photo_id in _priority_ids(db, stale)
+               if failed_attempts.get(str(photo_id), 0) < max_attempts]
+    finally:
+        db.close()
+    if limit is not None:
+        ids = ids[:limit]
+
+    print(f"대상 모델: {model}, 프롬프트 버전: {version}")
+    print(f"재분석 대상 {len(ids)}장 (반복 실패로 건너뛴 사진 "
+          f"{sum(1 for attempts in failed_attempts.values() if attempts >= max_attempts)}장)")
+    if dry_run or not ids:
+        return
+
+    limiter = RateLimiter(rate)
+    progress = Progress(len(ids), progress_every)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, len(ids), batch_size):
+                chunk = ids[start:start + batch_size]
+                db = SessionLocal()
+                try:
+                    # 그 사이 업로드 등으로 이미 최신 버전이 된 사진은 제외
+                    rows = db.query(Photo.id, Photo.image_path).filter(Photo.id.in_(chunk), stale).all()
+                    results = list(executor.map(lambda row: _describe(limiter, row[0], row[1]), rows))
+
+                    analyzed_at = datetime.now(timezone.utc)
+                    succeeded = 0
+                    for photo_id, analysis, error in results:
+                        if error is not None:
+                            failed_attempts[str(photo_id)] = failed_attempts.get(str(photo_id), 0) + 1
+                            print(f"  분석 실패 photo_id={photo_id}: {error}")
+                            continue
+                        db.query(Photo).filter(Photo.id == photo_id).update({
+                            Photo.ai_description: analysis.description,
+                            Photo.ai_model: model,
+                            Photo.prompt_version: version,
+                            Photo.analyzed_at: analyzed_at,
+                        }, synchronize_session=False)
+                        replace_photo_tags(db, photo_id, analysis)
+                        failed_attempts.pop(str(photo_id), None)
+                        succeeded += 1
+                    db.commit()
+                finally:
+                    db.close()
+
+                checkpoint["processed"] += succeeded
+                _save_checkpoint(checkpoint_path, checkpoint)
+                progress.update(succeeded, len(results) - succeeded, skipped=len(chunk) - len(rows))
+    except KeyboardInterrupt:
+        print("중단되었습니다. 완료된 배치까지 반영되었으며 다시 실행하면 이어서 진행합니다.")
+    finally:
+        progress.update(0, 0, force=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 설명 재분석(backfill)")
+    parser.add_argument("--rate", type=float, default=60, help="분당 최대 Gemini 호출 수 (0이면 제한 없음)")
+    parser.add_argument("--workers", type=int, default=4, help="동시 호출 수")
+    parser.add_argument("--batch", type=int, default=50, help="커밋/체크포인트 단위 사진 수")
+    parser.add_argument("--limit", type=int, default=None, help="이번 실행에서 처리할 최대 사진 수")
+    parser.add_argument("--only-failed", action="store_true", help="분석 실패/미분석 사진만 처리")
+    parser.add_argument("--max-attempts", type=int, default=3, help="이 횟수만큼 실패한 사진은 건너뜀")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="체크포인트 파일 경로")
+    parser.add_argument("--progress-every", type=float, default=10.0, help="진행 상황 출력 간격 (초)")
+    parser.add_argument("--dry-run", action="store_true", help="대상 수만 출력")
+    args = parser.parse_args()
+
+    backfill(args.rate, args.workers, args.batch, args.limit, args.only_failed,
+             args.max_attempts, args.checkpoint, args.progress_every, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
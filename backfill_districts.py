@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+사진 행정구역(district_id) 채우기 도구
+
+좌표가 있지만 행정구역이 비어 있는 사진의 district_id를 LOCA_DISTRICTS_PATH로 지정한
+공식 행정구역 경계 파일로 판정해 채웁니다. id 순서로 batch개씩 읽고 바뀐 행만
+갱신한 뒤 배치마다 커밋하므로, 중단 후 다시 실행하면 남은 사진부터 이어서 진행합니다.
+경계 데이터를 바꾼 뒤에는 --all로 모든 사진을 다시 판정합니다.
+
+사용법:
+    python migrate_photo_district.py   # 기존 DB에 컬럼/인덱스 추가 (최초 1회)
+    LOCA_DISTRICTS_PATH=/data/daejeon_districts.geojson python backfill_districts.py [--batch 5000]
+    python backfill_districts.py --all
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import bindparam, select, update
+
+from app.database import SessionLocal
+from app.models import Photo
+from app.services.geocoder import district_geocoder
+
+
+def backfill_districts(batch_size: int = 5000, recompute: bool = False, dry_run: bool = False,
+                       progress_every: float = 10.0):
+    """district_id를 채우고 (검사한 사진 수, 갱신한 사진 수)를 반환합니다."""
+    district_geocoder.load()
+    statement = (
+        update(Photo.__table__)
+        .where(Photo.__table__.c.id == bindparam("photo_id"))
+        .values(district_id=bindparam("district"))
+    )
+    db = SessionLocal()
+    scanned = updated = 0
+    last_id = 0
+    started = reported = time.monotonic()
+    try:
+        while True:
+            query = (
+                select(Photo.id, Photo.latitude, Photo.longitude, Photo.district_id)
+                .where(Photo.id > last_id, Photo.latitude.isnot(None), Photo.longitude.isnot(None))
+                .order_by(Photo.id)
+                .limit(batch_size)
+            )
+            if not recompute:
+                query = query.where(Photo.district_id.is_(None))
+            rows = db.execute(query).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            district_ids = district_geocoder.assign([(latitude, longitude) for _, latitude, longitude, _ in rows])
+            changes = [
+                {"photo_id": photo_id, "district": district_id}
+                for (photo_id, _, _, current), district_id in zip(rows, district_ids)
+                if district_id != current
+            ]
+            scanned += len(rows)
+            if changes and not dry_run:
+                db.execute(statement, changes)
+                db.commit()
+            else:
+                db.rollback()
+            updated += len(changes)
+            if time.monotonic() - reported >= progress_every:
+                reported = time.monotonic()
+                print(f"  {scanned}장 검사, {updated}장 갱신 (id {last_id}까지, {scanned / (reported - started):.0f}장/s)")
+    finally:
+        db.close()
+    return scanned, updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="사진 행정구역(district_id) 채우기")
+    parser.add_argument("--batch", type=int, default=5000, help="커밋 단위 사진 수")
+    parser.add_argument("--all", action="store_true", help="이미 채워진 사진도 다시 판정 (경계 데이터 변경 후)")
+    parser.add_argument("--progress-every", type=float, default=10.0, help="진행 상황 출력 간격 (초)")
+    parser.add_argument("--dry-run", action="store_true", help="갱신하지 않고 대상 수만 출력")
+    args = parser.parse_args()
+
+    if not district_geocoder.enabled:
+        raise SystemExit("LOCA_DISTRICTS_PATH에 행정구역 경계 파일을 지정해야 합니다.")
+    started = time.monotonic()
+    scanned, updated = backfill_districts(args.batch, recompute=args.all, dry_run=args.dry_run,
+                                          progress_every=args.progress_every)
+    verb = "갱신 대상" if args.dry_run else "갱신"
+    print(f"완료: {scanned}장 검사, {updated}장 {verb} ({time.monotonic() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
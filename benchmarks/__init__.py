@@ -0,0 +1,6 @@
+# Benchmarks package initialization
+import os
+
+# 합성 데이터의 생활권이 각 구에 들어가도록 그린 근사 경계 (실제 경계 아님, 벤치마크 전용)
+os.environ.setdefault(
+    "LOCA_DISTRICTS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "daejeon_districts.geojson"))
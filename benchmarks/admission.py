@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+업로드 폭주 중 조회 지연 시간 부하 테스트
+
+같은 합성 DB에 대해 (1) 조회만 보내는 구간과 (2) 같은 조회에 더해 업로드를 동시에 대량으로 보내는 구간을
+차례로 실행하고, 조회 요청의 p50/p99를 비교합니다. 업로드 입장 제어와 업로드/AI 전용 스레드 덕분에
+업로드 폭주 중에도 조회 p99가 기준 구간의 --max-ratio배(+ --slack-ms) 이내로 유지되어야 하며,
+넘으면 실패(종료 코드 1)합니다. 업로드 응답 코드(200/429/503)별 개수도 출력합니다.
+
+사용법:
+    python -m benchmarks.admission --scale tiny --duration 10 --uploaders 64 --ai-latency-ms 300
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from benchmarks.run import DEFAULT_WORKDIR, Recorder, Workloads, percentile, prepare_database
+
+READ_LABELS = ("GET /photos/", "GET /photos/?keyword_id", "GET /search/photos", "GET /search/keywords")
+
+
+async def _readers(workloads: Workloads, duration: float, concurrency: int, seed: int):
+    deadline = time.perf_counter() + duration
+
+    async def reader(worker_id: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            if rng.random() < 0.7:
+                await workloads.feed(rng)
+            else:
+                params = {"q": rng.choice(Workloads.SEARCH_TERMS), "limit": 20}
+                await workloads.recorder.call("GET /search/photos", workloads.client.get("/search/photos", params=params))
+
+    await asyncio.gather(*(reader(i) for i in range(concurrency)))
+
+
+async def _uploaders(client, images, sizes: dict, duration: float, concurrency: int, seed: int, statuses: Counter):
+    deadline = time.perf_counter() + duration
+
+    async def uploader(worker_id: int):
+        rng = random.Random(seed * 7919 + worker_id)
+        while time.perf_counter() < deadline:
+            data = {"user_id": str(rng.randint(1, sizes["users"])), "keyword_id": str(rng.randint(1, sizes["keywords"]))}
+            files = {"file": (f"storm_{rng.randint(0, 10**9)}.jpg", rng.choice(images), "image/jpeg")}
+            response = await client.post("/photos/upload", data=data, files=files,
+                                         headers={"X-Loca-User-Id": data["user_id"]})
+            statuses[response.status_code] += 1
+            if response.status_code in (429, 503):
+                # Retry-After를 지키되 재시도가 한꺼번에 몰리지 않도록 흩뜨림
+                assert response.headers.get("retry-after"), "Retry-After 헤더 없음"
+                await asyncio.sleep(float(response.headers["retry-after"]) * rng.uniform(0.5, 1.0))
+
+    await asyncio.gather(*(uploader(i) for i in range(concurrency)))
+
+
+def _read_stats(recorder: Recorder):
+    values = sorted(value for label in READ_LABELS for value in recorder.latencies.get(label, ()))
+    return len(values), percentile(values, 50) * 1000, percentile(values, 99) * 1000
+
+
+async def _main_async(args, sizes):
+    import httpx
+
+    from app.main import app
+    from app.services.admission import upload_gate
+    from app.services.like_buffer import like_buffer
+    from benchmarks.stub_ai import install_stub
+
+    install_stub(args.ai_latency_ms)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        baseline = Workloads(client, Recorder(), sizes, args.seed)
+        print(f"기준 구간: 조회 {args.readers}개 동시, {args.duration:.0f}s")
+        await _readers(baseline, args.duration, args.readers, args.seed)
+
+        storm = Workloads(client, Recorder(), sizes, args.seed + 1)
+        statuses: Counter = Counter()
+        print(f"폭주 구간: 조회 {args.readers}개 + 업로드 {args.uploaders}개 동시, {args.duration:.0f}s "
+              f"(업로드 동시 처리 {upload_gate.concurrency}, 대기열 {upload_gate.queue_depth})")
+        await asyncio.gather(
+            _readers(storm, args.duration, args.readers, args.seed + 1),
+            _uploaders(client, storm.images, sizes, args.duration, args.uploaders, args.seed, statuses),
+        )
+    await like_buffer.stop()
+    return _read_stats(baseline.recorder), _read_stats(storm.recorder), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="업로드 폭주 중 조회 지연 시간 부하 테스트")
+    parser.add_argument("--scale", default="tiny", help="합성 데이터 규모 (tiny/small/medium/large)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--duration", type=float, default=10.0, help="구간별 실행 시간(초)")
+    parser.add_argument("--readers", type=int, default=8, help="동시 조회 클라이언트 수")
+    parser.add_argument("--uploaders", type=int, default=64, help="동시 업로드 클라이언트 수")
+    parser.add_argument("--ai-latency-ms", type=float, default=300.0, help="대체 AI 모델의 응답 지연")
+    parser.add_argument("--max-ratio", type=float, default=2.0, help="허용하는 폭주 구간/기준 구간 조회 p99 비율")
+    parser.add_argument("--slack-ms", type=float, default=5.0, help="비율에 더해 허용하는 p99 차이")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.workdir)
+    os.environ["LOCA_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'run', 'loca.db')}"
+    os.environ["LOCA_COORDINATION_DIR"] = os.path.join(workdir, "run", ".loca")
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    run_db, sizes = prepare_database(workdir, args.scale, args.seed)
+    os.chdir(os.path.dirname(run_db))
+    os.makedirs("uploads", exist_ok=True)
+
+    (base_count, base_p50, base_p99), (storm_count, storm_p50, storm_p99), statuses = asyncio.run(_main_async(args, sizes))
+
+    print()
+    print(f"{'구간':<8} {'조회 수':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    print(f"{'기준':<8} {base_count:>8} {base_p50:>9.2f} {base_p99:>9.2f}")
+    print(f"{'폭주':<8} {storm_count:>8} {storm_p50:>9.2f} {storm_p99:>9.2f}")
+    print("업로드 응답: " + ", ".join(f"{status} x{count}" for status, count in sorted(statuses.items())))
+
+    limit = base_p99 * args.max_ratio + args.slack_ms
+    if storm_p99 > limit:
+        print(f"\n업로드 폭주 중 조회 p99가 허용치를 넘었습니다: {storm_p99:.2f}ms > {limit:.2f}ms")
+        sys.exit(1)
+    print(f"\n조회 p99 유지 ({storm_p99:.2f}ms <= {limit:.2f}ms)")
+
+
+if __name__ == "__main__":
+    main()
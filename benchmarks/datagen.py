@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+벤치마크용 합성 데이터 생성기
+
+대전 지역 좌표/동 이름을 가진 사진, 인기 사진에 몰리는 좋아요, 공모와 공모 참여 사진을
+Core INSERT(executemany)로 빠르게 생성합니다. 같은 시드에서는 항상 같은 데이터가 만들어집니다.
+공모 참여 사진은 콘텐츠 주소 키의 자리표시 이미지를 가리키며, 파일은 --uploads로 함께 씁니다.
+
+사용법:
+    python -m benchmarks.datagen --db bench.db --scale medium --uploads uploads
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 규모별 기본 데이터 크기
+SCALES = {
+    "tiny": dict(users=200, keywords=30, photos=2_000, likes=10_000, contests=50, contest_photos=500),
+    "small": dict(users=2_000, keywords=100, photos=50_000, likes=200_000, contests=500, contest_photos=10_000),
+    "medium": dict(users=20_000, keywords=300, photos=500_000, likes=2_000_000, contests=2_000, contest_photos=60_000),
+    "large": dict(users=100_000, keywords=1_000, photos=2_000_000, likes=10_000_000, contests=5_000, contest_photos=250_000),
+}
+
+# 생성 규칙이 바뀌면 올려서 캐시된 합성 DB를 새로 만들게 함
+DATAGEN_VERSION = 2
+# 공모 참여 사진들이 나눠 가리키는 자리표시 이미지 수
+PLACEHOLDER_IMAGES = 16
+
+# 대전 중심 좌표와 대략적인 시 경계
+DAEJEON_CENTER = (36.3504, 127.3845)
+DAEJEON_BOUNDS = (36.18, 127.25, 36.50, 127.56)  # (min_lat, min_lng, max_lat, max_lng)
+
+# 사진이 몰리는 생활권 (위도, 경도, 가중치, 이름)
+HOTSPOTS = [
+    (36.3623, 127.3562, 3.0, "대전 유성구 봉명동"),
+    (36.3510, 127.3786, 2.5, "대전 서구 둔산동"),
+    (36.3286, 127.4274, 2.0, "대전 중구 은행동"),
+    (36.3326, 127.4346, 1.5, "대전 동구 중앙동"),
+    (36.3720, 127.3600, 1.5, "대전 유성구 궁동"),
+    (36.3505, 127.3892, 1.2, "대전 서구 탄방동"),
+    (36.3680, 127.3880, 1.0, "대전 서구 만년동"),
+    (36.3540, 127.4540, 1.0, "대전 동구 가양동"),
+    (36.3460, 127.4140, 0.8, "대전 중구 대흥동"),
+    (36.4380, 127.4260, 0.8, "대전 대덕구 신탄진동"),
+    (36.3180, 127.4040, 0.7, "대전 중구 문화동"),
+    (36.3830, 127.3930, 0.7, "대전 유성구 도룡동"),
+    (36.3010, 127.3350, 0.5, "대전 서구 관저동"),
+    (36.3480, 127.4530, 0.5, "대전 동구 용전동"),
+    (36.3650, 127.4170, 0.5, "대전 대덕구 오정동"),
+]
+
+KEYWORD_ADJECTIVES = ["한적한", "분위기 있는", "고즈넉한", "아름다운", "조용한", "맛있는", "예쁜", "시원한",
+                      "독특한", "평화로운", "활기찬", "따뜻한", "오래된", "숨겨진", "반짝이는"]
+KEYWORD_PLACES = [("놀이터", "놀이터"), ("카페", "카페"), ("골목", "골목"), ("벚꽃길", "길"), ("도서관", "문화시설"),
+                  ("분식집", "음식점"), ("벽화거리", "거리"), ("공원", "공원"), ("벽돌집", "건물"), ("호수", "자연"),
+                  ("시장", "시장"), ("산책로", "길"), ("계단", "골목"), ("빵집", "음식점"), ("정류장", "거리")]
+MOODS = ["한적한", "활발한", "고즈넉한", "아름다운", "따뜻한", "차분한", "생기 있는"]
+ELEMENTS = ["벤치", "나무", "벽화", "그네", "미끄럼틀", "가로등", "창문", "화분", "계단", "간판", "자전거", "테이블"]
+CONTEST_TITLES = ["가장 예쁜 노을 사진", "우리 동네 숨은 맛집", "비 오는 날의 골목", "봄꽃 명소를 찾아주세요",
+                  "조용히 책 읽기 좋은 곳", "아이와 가기 좋은 놀이터", "야경이 멋진 장소", "레트로 감성 간판"]
+
+BATCH_SIZE = 20_000
+
+
+def _weighted_hotspot(rng: random.Random):
+    total = sum(h[2] for h in HOTSPOTS)
+    pick = rng.random() * total
+    for hotspot in HOTSPOTS:
+        pick -= hotspot[2]
+        if pick <= 0:
+            return hotspot
+    return HOTSPOTS[-1]
+
+
+def daejeon_point(rng: random.Random):
+    """생활권 주변에 몰리고 일부는 시 전역에 흩어지는 대전 좌표를 반환합니다."""
+    min_lat, min_lng, max_lat, max_lng = DAEJEON_BOUNDS
+    if rng.random() < 0.8:
+        lat0, lng0, _, name = _weighted_hotspot(rng)
+        lat = min(max(rng.gauss(lat0, 0.006), min_lat), max_lat)
+        lng = min(max(rng.gauss(lng0, 0.007), min_lng), max_lng)
+        return lat, lng, name
+    lat = min(max(rng.gauss(DAEJEON_CENTER[0], 0.05), min_lat), max_lat)
+    lng = min(max(rng.gauss(DAEJEON_CENTER[1], 0.06), min_lng), max_lng)
+    nearest = min(HOTSPOTS, key=lambda h: (h[0] - lat) ** 2 + (h[1] - lng) ** 2)
+    return lat, lng, nearest[3]
+
+
+def ai_analysis(rng: random.Random, place: str):
+    """AI 분석 결과를 흉내 낸 (설명 문장, 분위기, 주요 요소 2개)를 반환합니다."""
+    mood = rng.choice(MOODS)
+    a, b = rng.sample(ELEMENTS, 2)
+    return f"{mood} 분위기의 {place}로, {a}와 {b}가 있는 공간입니다.", mood, (a, b)
+
+
+def ai_sentence(rng: random.Random, place: str) -> str:
+    return ai_analysis(rng, place)[0]
+
+
+def schema_fingerprint() -> str:
+    """현재 모델 스키마(와 생성 규칙 버전)의 지문. 캐시된 합성 DB가 최신인지 확인하는 데 씁니다."""
+    import hashlib
+
+    from app.database import Base
+    from app import models  # noqa: F401
+
+    columns = sorted(f"{table.name}.{column.name}" for table in Base.metadata.tables.values()
+                     for column in table.columns)
+    indexes = sorted(index.name for table in Base.metadata.tables.values() for index in table.indexes)
+    return hashlib.md5("|".join([f"v{DATAGEN_VERSION}"] + columns + indexes).encode()).hexdigest()[:8]
+
+
+def placeholder_images(seed: int = 42) -> List[Tuple[str, bytes]]:
+    """공모 참여 사진이 가리키는 작은 JPEG들의 (콘텐츠 주소 키, 바이트). 시드가 같으면 항상 같습니다."""
+    import hashlib
+    import io
+
+    from PIL import Image
+
+    from app.services.storage import content_key
+
+    rng = random.Random(seed)
+    images = []
+    for _ in range(PLACEHOLDER_IMAGES):
+        image = Image.new("RGB", (64, 48), (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=80)
+        data = buffer.getvalue()
+        images.append((content_key(hashlib.sha256(data).hexdigest(), ".jpg"), data))
+    return images
+
+
+def write_placeholder_images(upload_root: str, seed: int = 42):
+    """generate()가 만든 공모 사진 행이 가리키는 파일을 upload_root 아래에 씁니다."""
+    for key, data in placeholder_images(seed):
+        path = os.path.join(upload_root, *key.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+def _insert_batches(conn, table, rows, batch_size: int = BATCH_SIZE) -> int:
+    batch = []
+    total = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.execute(table.insert(), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+        total += len(batch)
+    return total
+
+
+def _zipf_index(rng: random.Random, n: int, skew: float = 1.1) -> int:
+    """앞쪽(인기) 인덱스가 자주 뽑히는 근사 Zipf 분포"""
+    u = rng.random()
+    if skew == 1.0:
+        return min(int(n ** u) - 1, n - 1)
+    value = ((n ** (1 - skew) - 1) * u + 1) ** (1 / (1 - skew))
+    return min(max(int(value) - 1, 0), n - 1)
+
+
+def generate(engine, users: int, keywords: int, photos: int, likes: int, contests: int,
+             contest_photos: int, seed: int = 42, verbose: bool = True):
+    """engine이 가리키는 빈 DB에 합성 데이터를 채웁니다."""
+    from app.database import Base
+    from app.models import Contest, ContestPhoto, Keyword, Like, Photo, PhotoTag, StoredObject, User
+    from app.services.clusters import geo_cell, rebuild_clusters
+    from app.services.contest_summaries import rebuild_contest_summaries
+    from app.services.geocoder import district_geocoder
+    from app.services.storage import image_path_for_key
+
+    rng = random.Random(seed)
+    Base.metadata.create_all(bind=engine)
+    now = datetime(2025, 10, 1, 12, 0, 0)
+    started = time.perf_counter()
+
+    def log(message):
+        if verbose:
+            print(f"  [{time.perf_counter() - started:7.1f}s] {message}")
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+
+        _insert_batches(conn, User.__table__, (
+            {"id": i, "nickname": f"user{i:06d}", "points": 10000,
+             "created_at": now - timedelta(days=rng.randint(0, 365))}
+            for i in range(1, users + 1)
+        ))
+        log(f"유저 {users}명")
+
+        keyword_rows = []
+        seen = set()
+        i = 0
+        while len(keyword_rows) < keywords:
+            adjective = KEYWORD_ADJECTIVES[i % len(KEYWORD_ADJECTIVES)]
+            place, category = KEYWORD_PLACES[(i // len(KEYWORD_ADJECTIVES)) % len(KEYWORD_PLACES)]
+            suffix = i // (len(KEYWORD_ADJECTIVES) * len(KEYWORD_PLACES))
+            text = f"{adjective} {place}" + (f" {suffix + 1}" if suffix else "")
+            if text not in seen:
+                seen.add(text)
+                keyword_rows.append({"id": len(keyword_rows) + 1, "keyword": text, "category": category,
+                                     "_place": place, "_place_index": (i // len(KEYWORD_ADJECTIVES)) % len(KEYWORD_PLACES)})
+            i += 1
+        _insert_batches(conn, Keyword.__table__, ({k: v for k, v in row.items() if not k.startswith("_")}
+                                                  for row in keyword_rows))
+        log(f"키워드 {keywords}개")
+
+        # 사진별 태그 (장소, 분위기, 요소 2개)의 목록 인덱스를 4바이트씩 보관
+        tag_codes = bytearray()
+
+        def photo_rows():
+            span = 365 * 24 * 3600
+            for photo_id in range(1, photos + 1):
+                keyword = keyword_rows[_zipf_index(rng, keywords, 1.05)]
+                lat, lng, location = daejeon_point(rng)
+                description, mood, (a, b) = ai_analysis(rng, keyword["_place"])
+                tag_codes.extend((keyword["_place_index"], MOODS.index(mood), ELEMENTS.index(a), ELEMENTS.index(b)))
+                # id가 클수록 최근 업로드 (피드 정렬과 일치)
+                uploaded_at = now - timedelta(seconds=int(span * (1 - photo_id / photos)) + rng.randint(0, 59))
+                yield {
+                    "id": photo_id,
+                    "user_id": rng.randint(1, users),
+                    "keyword_id": keyword["id"],
+                    "image_path": f"uploads/keywords/{keyword['id']}/synthetic_{photo_id}.jpg",
+                    "location": location,
+                    "latitude": round(lat, 6),
+                    "longitude": round(lng, 6),
+                    "district_id": district_geocoder.district_id(round(lat, 6), round(lng, 6)),
+                    "geo_cell": geo_cell(round(lat, 6), round(lng, 6)),
+                    "ai_description": description,
+                    "uploaded_at": uploaded_at,
+                }
+
+        _insert_batches(conn, Photo.__table__, photo_rows())
+        log(f"사진 {photos}장")
+        cells = sum(rebuild_clusters(conn).values())
+        log(f"지도 클러스터 {cells}칸")
+
+        def tag_rows():
+            tag_id = 0
+            for index in range(photos):
+                place, mood, a, b = tag_codes[index * 4:index * 4 + 4]
+                for facet, value in (("place_type", KEYWORD_PLACES[place][0]), ("mood", MOODS[mood]),
+                                     ("element", ELEMENTS[a]), ("element", ELEMENTS[b])):
+                    tag_id += 1
+                    yield {"id": tag_id, "photo_id": index + 1, "facet": facet, "value": value}
+
+        tag_count = _insert_batches(conn, PhotoTag.__table__, tag_rows())
+        log(f"사진 태그 {tag_count}개")
+
+        def like_rows():
+            seen_pairs = set()
+            like_id = 0
+            attempts = 0
+            while like_id < likes and attempts < likes * 4:
+                attempts += 1
+                # 최근/인기 사진에 좋아요가 몰리도록 뒤쪽 id를 Zipf로 선택
+                photo_id = photos - _zipf_index(rng, photos, 1.05)
+                user_id = rng.randint(1, users)
+                key = (user_id, photo_id)
+                if key in seen_pairs:
+                    continue
+                seen_pairs.add(key)
+                like_id += 1
+                yield {"id": like_id, "user_id": user_id, "photo_id": photo_id,
+                       "created_at": now - timedelta(seconds=rng.randint(0, 30 * 24 * 3600))}
+
+        like_count = _insert_batches(conn, Like.__table__, like_rows())
+        log(f"좋아요 {like_count}개")
+
+        contest_rows = []
+        for contest_id in range(1, contests + 1):
+            created_at = now - timedelta(days=rng.randint(0, 180))
+            contest_rows.append({
+                "id": contest_id,
+                "user_id": rng.randint(1, users),
+                "title": f"{rng.choice(CONTEST_TITLES)} #{contest_id}",
+                "description": f"{_weighted_hotspot(rng)[3]} 근처의 {rng.choice(KEYWORD_PLACES)[0]} 사진을 찾습니다.",
+                "points": rng.choice([100, 300, 500, 1000]),
+                "deadline": created_at + timedelta(days=14),
+                "status": "ACTIVE",
+                "created_at": created_at,
+            })
+        _insert_batches(conn, Contest.__table__, contest_rows)
+
+        # 공모 사진은 실제로 열 수 있도록 자리표시 이미지를 나눠 가리킴 (파일은 write_placeholder_images)
+        images = placeholder_images(seed)
+        ref_counts = [0] * len(images)
+
+        def contest_photo_rows():
+            for photo_id in range(1, contest_photos + 1):
+                contest_id = rng.randint(1, contests)
+                lat, lng, location = daejeon_point(rng)
+                submitted_at = contest_rows[contest_id - 1]["created_at"] + timedelta(hours=rng.randint(1, 300))
+                # 대부분 AI 사전 심사가 끝났고, 최근 일부는 심사 대기
+                screened = rng.random() < 0.95
+                image = photo_id % len(images)
+                ref_counts[image] += 1
+                yield {
+                    "id": photo_id,
+                    "contest_id": contest_id,
+                    "user_id": rng.randint(1, users),
+                    "image_path": image_path_for_key(images[image][0]),
+                    "location": location,
+                    "latitude": round(lat, 6),
+                    "longitude": round(lng, 6),
+                    "description": "합성 공모 참여 사진",
+                    "submitted_at": submitted_at,
+                    "ai_description": ai_sentence(rng, rng.choice(KEYWORD_PLACES)[0]) if screened else None,
+                    "relevance_score": float(rng.randint(0, 100)) if screened else None,
+                    "screened_at": submitted_at + timedelta(minutes=1) if screened else None,
+                }
+
+        _insert_batches(conn, ContestPhoto.__table__, contest_photo_rows())
+        _insert_batches(conn, StoredObject.__table__, (
+            {"key": key, "size": len(data), "content_type": "image/jpeg", "ref_count": count}
+            for (key, data), count in zip(images, ref_counts) if count))
+        rebuild_contest_summaries(conn)
+        log(f"공모 {contests}개, 공모 사진 {contest_photos}장")
+
+    return {"users": users, "keywords": keywords, "photos": photos, "likes": like_count,
+            "contests": contests, "contest_photos": contest_photos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 데이터 생성")
+    parser.add_argument("--db", required=True, help="생성할 SQLite 파일 경로")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--uploads", help="공모 사진 자리표시 이미지를 쓸 업로드 디렉토리 (예: uploads)")
+    for name in SCALES["small"]:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=None, help=f"{name} 수 (scale 기본값 덮어쓰기)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        raise SystemExit(f"이미 존재하는 파일입니다: {args.db}")
+    sizes = dict(SCALES[args.scale])
+    for name in sizes:
+        if getattr(args, name) is not None:
+            sizes[name] = getattr(args, name)
+
+    from sqlalchemy import create_engine
+    engine = create_engine(f"sqlite:///{args.db}")
+    print(f"합성 데이터 생성: {sizes}")
+    generate(engine, seed=args.seed, **sizes)
+    if args.uploads:
+        write_placeholder_images(args.uploads, args.seed)
+    print("완료")
+
+
+if __name__ == "__main__":
+    main()
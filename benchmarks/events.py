@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+실시간 이벤트(SSE) 구독자 규모 벤치마크
+
+앱의 /events/stream 엔드포인트에 ASGI로 직접 N개의 SSE 연결을 열어 둔 채로
+  - 유휴 구독자 하나당 메모리 (tracemalloc)
+  - 모든 구독자가 듣는 토픽에 이벤트 하나를 발행했을 때 전원에게 전달되기까지의 시간
+  - 좋아요 이벤트가 몰릴 때 구독자별로 합쳐지는지(coalescing)
+를 측정합니다. 네트워크 소켓 비용은 포함되지 않습니다.
+
+사용법:
+    python -m benchmarks.events --subscribers 10000
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _Connection:
+    """응답 본문을 받아 두는 가짜 SSE 클라이언트 연결"""
+
+    __slots__ = ("disconnect", "chunks", "received")
+
+    def __init__(self):
+        self.disconnect = asyncio.Event()
+        self.chunks = 0
+        self.received = asyncio.Event()
+
+    async def receive(self):
+        await self.disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.body" and message.get("body", b"").startswith(b"event:"):
+            self.chunks += 1
+            self.received.set()
+
+
+def _scope(app, query: str) -> dict:
+    return {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/events/stream", "raw_path": b"/events/stream", "root_path": "",
+        "query_string": query.encode(), "headers": [], "server": ("bench", 80), "client": ("bench", 1),
+        "app": app,
+    }
+
+
+async def _run(subscribers: int, likes: int):
+    from app.main import app
+    from app.services.events import event_broker, keyword_topic, photo_topic
+
+    connections = []
+    tasks = []
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    for i in range(subscribers):
+        connection = _Connection()
+        connections.append(connection)
+        # 모두 keyword:1을 듣고, 각자 사진 하나씩 추가로 구독
+        tasks.append(asyncio.ensure_future(app(_scope(app, f"keyword_id=1&photo_id={i + 1}"),
+                                               connection.receive, connection.send)))
+    while event_broker.subscriber_count < subscribers:
+        await asyncio.sleep(0.01)
+    opened = time.perf_counter() - started
+    await asyncio.sleep(0.2)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"구독자 {subscribers}명 연결: {opened:.2f}s, 메모리 {used / 1024 / 1024:.1f} MiB "
+          f"(구독자당 {used / subscribers / 1024:.1f} KiB)")
+
+    # 전원이 듣는 토픽으로 팬아웃
+    started = time.perf_counter()
+    event_broker.publish(keyword_topic(1), "photo.created", {"id": 1, "keyword_id": 1})
+    publish_ms = (time.perf_counter() - started) * 1000
+    await asyncio.gather(*(connection.received.wait() for connection in connections))
+    delivered_ms = (time.perf_counter() - started) * 1000
+    print(f"팬아웃: 발행 {publish_ms:.1f}ms, 전원 수신 {delivered_ms:.1f}ms")
+
+    # 한 사진에 좋아요가 몰리는 경우: 구독자에게는 합쳐진 이벤트만 전달
+    for connection in connections:
+        connection.chunks = 0
+    started = time.perf_counter()
+    for _ in range(likes):
+        event_broker.publish(photo_topic(1), "photo.likes", {"photo_id": 1, "delta": 1})
+    await asyncio.sleep(0.05)
+    print(f"좋아요 {likes}건 발행 {(time.perf_counter() - started) * 1000:.1f}ms → "
+          f"구독자가 받은 이벤트 {connections[0].chunks}개")
+
+    for connection in connections:
+        connection.disconnect.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print(f"연결 종료 후 구독자 {event_broker.subscriber_count}명")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="실시간 이벤트 구독자 규모 벤치마크")
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--likes", type=int, default=1000, help="한 사진에 연달아 발행할 좋아요 이벤트 수")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["LOCA_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+        asyncio.run(_run(args.subscribers, args.likes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+좋아요 처리량(likes/sec) 비교 벤치마크
+
+기존 방식(요청마다 SELECT 2회 + INSERT + COMMIT)과 좋아요 버퍼(일괄 커밋)를
+같은 SQLite 파일 DB에서 동시 요청으로 실행해 초당 처리량을 비교합니다.
+
+사용법:
+    python -m benchmarks.like_throughput --likes 5000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _prepare_database(path: str, users: int, photos: int):
+    os.environ["LOCA_DATABASE_URL"] = f"sqlite:///{path}"
+    from app.database import Base, engine
+    from app.models import Keyword, Photo, User
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(Keyword.__table__.insert(), [{"id": 1, "keyword": "벤치마크"}])
+        conn.execute(User.__table__.insert(), [{"id": i, "nickname": f"user{i}"} for i in range(1, users + 1)])
+        conn.execute(Photo.__table__.insert(), [
+            {"id": i, "user_id": 1, "keyword_id": 1, "image_path": f"uploads/bench/{i}.jpg"}
+            for i in range(1, photos + 1)
+        ])
+
+
+async def _legacy_like(photo_id: int, user_id: int):
+    """기존 like_photo 핸들러와 동일한 방식 (요청마다 커밋)"""
+    from app.database import SessionLocal
+    from app.models import Like, Photo
+
+    db = SessionLocal()
+    try:
+        photo = db.query(Photo).filter(Photo.id == photo_id).first()
+        if not photo:
+            return False
+        existing = db.query(Like).filter(Like.photo_id == photo_id, Like.user_id == user_id).first()
+        if existing:
+            return False
+        db.add(Like(photo_id=photo_id, user_id=user_id))
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+async def _run(mode: str, pairs, concurrency: int) -> float:
+    from app.services.like_buffer import LikeBuffer
+
+    buffer = LikeBuffer()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(user_id, photo_id):
+        async with semaphore:
+            if mode == "legacy":
+                await _legacy_like(photo_id, user_id)
+            else:
+                await buffer.like(user_id, photo_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(u, p) for u, p in pairs))
+    await buffer.stop()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="좋아요 처리량 벤치마크")
+    parser.add_argument("--likes", type=int, default=5000, help="모드별 좋아요 요청 수")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--hot-photos", type=int, default=5, help="좋아요가 몰리는 인기 사진 수")
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _prepare_database(os.path.join(tmp, "bench.db"), args.users, args.hot_photos)
+
+        rng = random.Random(42)
+        all_pairs = [(u, p) for u in range(1, args.users + 1) for p in range(1, args.hot_photos + 1)]
+        rng.shuffle(all_pairs)
+        if len(all_pairs) < args.likes * 2:
+            raise SystemExit("--users * --hot-photos 가 --likes * 2 보다 커야 합니다.")
+
+        print(f"좋아요 {args.likes}건, 동시 요청 {args.concurrency}, 인기 사진 {args.hot_photos}장")
+        results = {}
+        for index, mode in enumerate(("legacy", "buffered")):
+            pairs = all_pairs[index * args.likes:(index + 1) * args.likes]
+            elapsed = asyncio.run(_run(mode, pairs, args.concurrency))
+            results[mode] = args.likes / elapsed
+            print(f"  {mode:>8}: {elapsed:.2f}s, {results[mode]:.0f} likes/sec")
+        print(f"  개선 배율: x{results['buffered'] / results['legacy']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
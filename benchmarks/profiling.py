@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+프로파일링/느린 요청 기록 훅의 오버헤드 벤치마크
+
+같은 합성 DB에 같은 조회 요청(피드/검색)을 순서대로 보내 세 설정의 요청당 시간을 비교합니다.
+  - stripped: 프로파일링 미들웨어를 뺀 앱, 느린 SQL 로그/엔드포인트 보고서 꺼짐 (훅이 없던 때와 같음)
+  - off:      기본 설정 (LOCA_ADMIN_TOKEN, LOCA_SLOW_QUERY_MS, LOCA_SLOW_REPORT_WINDOW_S 없음)
+  - on:       관리 기능, 느린 SQL 로그(--slow-query-ms), 엔드포인트 보고서를 켜고 프로파일 헤더는 보내지 않음
+설정 순서를 라운드마다 섞어 번갈아 실행하고, 라운드마다 stripped 대비 비율을 구해 그 중앙값을 출력합니다.
+요청 단위 비교는 SQLite/이벤트 루프 잡음(±수 %)보다 훅 비용이 훨씬 작아 참고용이므로, 판정은 꺼진 상태 훅의
+직접 비용으로 합니다: 지표+프로파일링 미들웨어를 빈 엔드포인트로 통과하는 시간과 SQL 문 하나의 이벤트 훅 시간
+(--sql-per-request배)을 합한 값(기존 지표 수집 비용까지 포함한 상한)이 stripped 요청당 시간의
+--max-overhead(비율)를 넘으면 실패(종료 코드 1)합니다.
+마지막으로 프로파일 헤더를 보낸 요청이 pstats 결과를 돌려주는지, /admin/slow가 보고서를 돌려주는지 확인합니다.
+
+사용법:
+    python -m benchmarks.profiling --scale tiny --rounds 15 --requests 300
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from benchmarks.run import DEFAULT_WORKDIR, Workloads, prepare_database
+
+MODES = ("stripped", "off", "on")
+ADMIN_TOKEN = "benchmark-admin-token"
+
+
+async def _round(client, sizes: dict, requests: int, seed: int) -> float:
+    """같은 시드의 조회 요청 requests개를 순서대로 보내고 요청당 시간(초)을 반환합니다."""
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for _ in range(requests):
+        if rng.random() < 0.6:
+            params = {"limit": 20, "offset": rng.choice([0, 0, 20, 40])}
+            if rng.random() < 0.5:
+                params["keyword_id"] = rng.randint(1, min(sizes["keywords"], 20))
+            response = await client.get("/photos/", params=params)
+        else:
+            response = await client.get("/search/photos", params={"q": rng.choice(Workloads.SEARCH_TERMS), "limit": 20})
+        assert response.status_code == 200, response.text
+    return (time.perf_counter() - started) / requests
+
+
+async def _hook_cost(iterations: int):
+    """꺼진 상태 훅의 직접 비용 (요청당 프로파일링 미들웨어 통과 초, 요청당 지표+프로파일링 미들웨어 통과 초,
+    SQL 문당 이벤트 훅 초)"""
+    from app.services.metrics import MetricsMiddleware, _after_cursor_execute, _before_cursor_execute
+    from app.services.profiling import ProfilingMiddleware
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/photos/", "query_string": b"limit=20",
+             "headers": [(b"host", b"bench")]}
+    profiling = ProfilingMiddleware(endpoint)
+    hooked = MetricsMiddleware(profiling)
+
+    async def per_call(target) -> float:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await target(dict(scope), receive, send)
+        return (time.perf_counter() - started) / iterations
+
+    profiling_only = min([await per_call(profiling) - await per_call(endpoint) for _ in range(5)])
+    middleware = min([await per_call(hooked) - await per_call(endpoint) for _ in range(5)])
+
+    class _Connection:
+        info: dict = {}
+
+    connection = _Connection()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        _before_cursor_execute(connection, None, "SELECT 1", (), None, False)
+        _after_cursor_execute(connection, None, "SELECT 1", (), None, False)
+    return max(0.0, profiling_only), max(0.0, middleware), (time.perf_counter() - started) / iterations
+
+
+async def _main_async(args, sizes):
+    import httpx
+
+    from app.main import app
+    from app.services.like_buffer import like_buffer
+    from app.services.metrics import endpoint_report, slow_query_log
+    from app.services.profiling import ProfilingMiddleware, admin_access
+    from benchmarks.stub_ai import install_stub
+
+    install_stub(0)
+    full_stack = app.build_middleware_stack()
+    user_middleware = app.user_middleware
+    app.user_middleware = [m for m in user_middleware if m.cls is not ProfilingMiddleware]
+    stripped_stack = app.build_middleware_stack()
+    app.user_middleware = user_middleware
+
+    def configure(mode: str):
+        app.middleware_stack = stripped_stack if mode == "stripped" else full_stack
+        enabled = mode == "on"
+        admin_access.token = ADMIN_TOKEN if enabled else None
+        slow_query_log.threshold = args.slow_query_ms / 1000 if enabled else None
+        endpoint_report.window_seconds = 600 if enabled else 0
+
+    timings = {mode: [] for mode in MODES}
+    configure("off")
+    hook_costs = await _hook_cost(args.hook_iterations)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in MODES:  # 워밍업 (라우트/쿼리 캐시)
+            configure(mode)
+            await _round(client, sizes, max(20, args.requests // 10), args.seed)
+        order = list(MODES)
+        rng = random.Random(args.seed)
+        for round_index in range(args.rounds):
+            rng.shuffle(order)
+            for mode in order:
+                configure(mode)
+                timings[mode].append(await _round(client, sizes, args.requests, args.seed + round_index))
+
+        configure("on")
+        response = await client.get("/photos/", params={"limit": 20},
+                                    headers={"X-Loca-Profile": "cumulative", "X-Loca-Admin-Token": ADMIN_TOKEN})
+        profiled = response.status_code == 200 and "function calls" in response.text
+        report = await client.get("/admin/slow", headers={"X-Loca-Admin-Token": ADMIN_TOKEN})
+        reported = report.status_code == 200 and bool(report.json()["endpoints"])
+    await like_buffer.stop()
+    return timings, hook_costs, profiled, reported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프로파일링/느린 요청 기록 훅의 오버헤드 벤치마크")
+    parser.add_argument("--scale", default="tiny", help="합성 데이터 규모 (tiny/small/medium/large)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rounds", type=int, default=15, help="설정별 반복 횟수")
+    parser.add_argument("--requests", type=int, default=300, help="라운드당 요청 수")
+    parser.add_argument("--slow-query-ms", type=float, default=100.0, help="on 설정의 느린 SQL 기준 시간")
+    parser.add_argument("--hook-iterations", type=int, default=20_000, help="훅 직접 비용 측정 반복 횟수")
+    parser.add_argument("--sql-per-request", type=int, default=5, help="훅 비용 상한 계산에 쓰는 요청당 SQL 문 수")
+    parser.add_argument("--max-overhead", type=float, default=0.02, help="허용하는 꺼진 상태 훅 비용/요청당 시간 비율")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.workdir)
+    os.environ["LOCA_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'run', 'loca.db')}"
+    os.environ["LOCA_COORDINATION_DIR"] = os.path.join(workdir, "run", ".loca")
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    for name in ("LOCA_ADMIN_TOKEN", "LOCA_SLOW_QUERY_MS", "LOCA_SLOW_REPORT_WINDOW_S"):
+        os.environ.pop(name, None)
+    run_db, sizes = prepare_database(workdir, args.scale, args.seed)
+    os.chdir(os.path.dirname(run_db))
+
+    timings, (profiling_cost, middleware_cost, sql_hook_cost), profiled, reported = asyncio.run(_main_async(args, sizes))
+
+    request_time = statistics.median(timings["stripped"])
+    print(f"{'설정':<10} {'요청당 ms':>10} {'stripped 대비':>14}  (라운드별 비율의 중앙값, 참고용)")
+    for mode in MODES:
+        ratio = statistics.median(a / b for a, b in zip(timings[mode], timings["stripped"])) - 1
+        print(f"{mode:<10} {statistics.median(timings[mode]) * 1000:>10.3f} {ratio:>+13.2%}")
+
+    hook_cost = middleware_cost + sql_hook_cost * args.sql_per_request
+    overhead = hook_cost / request_time
+    print(f"\n꺼진 상태 훅 비용: 미들웨어 {middleware_cost * 1e6:.1f}us/요청 + SQL 훅 {sql_hook_cost * 1e6:.2f}us/문 "
+          f"x {args.sql_per_request} = {hook_cost * 1e6:.1f}us (요청당 시간의 {overhead:.3%}, 기존 지표 수집 포함 상한)")
+    print(f"그중 프로파일링 미들웨어만: {profiling_cost * 1e6:.2f}us/요청 ({profiling_cost / request_time:.3%})")
+    print(f"프로파일 응답: {'정상' if profiled else '실패'}, /admin/slow 보고서: {'정상' if reported else '실패'}")
+
+    if not profiled or not reported:
+        sys.exit(1)
+    if overhead > args.max_overhead:
+        print(f"\n꺼진 상태의 오버헤드가 허용치를 넘었습니다: {overhead:.3%} > {args.max_overhead:.0%}")
+        sys.exit(1)
+    print(f"\n꺼진 상태의 오버헤드 {overhead:.3%} (허용 {args.max_overhead:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+라우터 쿼리 실행 계획(EXPLAIN QUERY PLAN) 점검
+
+합성 데이터 DB(기본 small 규모)에 대해 각 API 경로를 한 번씩 호출하면서 실행된 SQL을 모으고,
+SQLite의 EXPLAIN QUERY PLAN으로 큰 테이블을 인덱스 없이 전체 스캔하는 쿼리가 있으면
+실패(종료 코드 1)합니다. 의도된 전체 스캔(부분 문자열 검색 등)은 ALLOWED_SCANS에 이유와 함께 둡니다.
+
+사용법:
+    python -m benchmarks.query_plans --scale small
+    python -m benchmarks.query_plans --scale tiny --verbose
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from benchmarks.run import DEFAULT_WORKDIR, prepare_database
+
+# 행 수가 적어 전체 스캔해도 되는 테이블
+SMALL_TABLES = {"keywords", "cache_stamps"}
+
+# (라우트 이름, 테이블) -> 전체 스캔을 허용하는 이유
+ALLOWED_SCANS = {
+    ("GET /search/photos?q", "photos"): "부분 문자열 검색(LIKE '%q%')은 B-tree 인덱스를 쓸 수 없음",
+    ("GET /search/photos/facets?q", "photos"): "부분 문자열 검색(LIKE '%q%')은 B-tree 인덱스를 쓸 수 없음",
+    ("GET /search/photos?sort_by=likes", "photos"): "좋아요 수 정렬은 모든 사진의 개수를 계산 (좋아요 수 비정규화 전까지)",
+    ("GET /search/suggest", "photos"): "자동완성 색인을 처음 만들 때 위치별로 한 번 집계",
+    ("GET /users/", "users"): "전체 유저 목록 API",
+}
+
+_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+class Case:
+    __slots__ = ("name", "method", "path", "params")
+
+    def __init__(self, name: str, method: str, path: str, params: Optional[dict] = None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.params = params or {}
+
+
+def build_cases(sizes: dict) -> List[Case]:
+    photo_id = sizes["photos"] // 2
+    contest_id = max(1, sizes["contests"] // 2)
+    return [
+        Case("GET /photos/", "GET", "/photos/"),
+        Case("GET /photos/?keyword_id", "GET", "/photos/", {"keyword_id": 3}),
+        Case("GET /photos/?user_id", "GET", "/photos/", {"user_id": 5}),
+        Case("GET /photos/?district", "GET", "/photos/", {"district": "유성구"}),
+        Case("GET /photos/districts", "GET", "/photos/districts"),
+        Case("GET /photos/clusters", "GET", "/photos/clusters", {"bbox": "127.25,36.18,127.56,36.50", "zoom": 12}),
+        Case("GET /photos/clusters?zoom=16", "GET", "/photos/clusters", {"bbox": "127.37,36.35,127.39,36.36", "zoom": 16}),
+        Case("GET /photos/for-you", "GET", "/photos/for-you", {"user_id": 7}),
+        Case("GET /photos/for-you?before_id", "GET", "/photos/for-you", {"user_id": 7, "before_id": photo_id}),
+        Case("GET /photos/{id}", "GET", f"/photos/{photo_id}"),
+        Case("GET /search/photos?q", "GET", "/search/photos", {"q": "카페"}),
+        Case("GET /search/photos?sort_by=likes", "GET", "/search/photos", {"sort_by": "likes"}),
+        Case("GET /search/photos?place_type", "GET", "/search/photos", {"place_type": "놀이터", "mood": "한적한"}),
+        Case("GET /search/photos/facets", "GET", "/search/photos/facets"),
+        Case("GET /search/photos/facets?q", "GET", "/search/photos/facets", {"q": "카페"}),
+        Case("GET /search/keywords", "GET", "/search/keywords", {"q": "한적"}),
+        Case("GET /search/suggest", "GET", "/search/suggest", {"q": "ㅎㅈ"}),
+        Case("GET /contests/", "GET", "/contests/"),
+        Case("GET /contests/?status", "GET", "/contests/", {"status": "active"}),
+        Case("GET /contests/?user_id", "GET", "/contests/", {"user_id": 7}),
+        Case("GET /contests/applied", "GET", "/contests/applied", {"user_id": 7}),
+        Case("GET /contests/{id}", "GET", f"/contests/{contest_id}"),
+        Case("GET /contests/{id}/photos", "GET", f"/contests/{contest_id}/photos"),
+        Case("GET /contests/{id}/photos?sort=recent", "GET", f"/contests/{contest_id}/photos", {"sort": "recent", "offset": 20}),
+        Case("GET /users/", "GET", "/users/"),
+        Case("GET /users/{id}", "GET", "/users/7"),
+        Case("GET /users/{id}/points", "GET", "/users/8/points"),
+        Case("GET /users/{id}/stats", "GET", "/users/7/stats"),
+        Case("GET /keywords/", "GET", "/keywords/"),
+        Case("GET /keywords/random", "GET", "/keywords/random"),
+        Case("GET /keywords/time-based", "GET", "/keywords/time-based", {"time_type": "morning"}),
+        Case("GET /keywords/{id}", "GET", "/keywords/2"),
+        Case("POST /photos/{id}/like", "POST", f"/photos/{photo_id}/like", {"user_id": 9}),
+        Case("DELETE /photos/{id}/like", "DELETE", f"/photos/{photo_id}/like", {"user_id": 9}),
+        Case("DELETE /photos/{id}", "DELETE", f"/photos/{sizes['photos']}"),
+    ]
+
+
+def explain(conn: sqlite3.Connection, statement: str, parameters) -> List[str]:
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan: List[str], tables: Set[str]) -> List[str]:
+    """실행 계획에서 인덱스 없이 전체 스캔하는 큰 테이블 이름들 (서브쿼리 결과 스캔은 제외)"""
+    scanned = []
+    for detail in plan:
+        match = _SCAN.match(detail.strip())
+        if match and match.group(1) in tables and match.group(1) not in SMALL_TABLES:
+            scanned.append(match.group(1))
+    return scanned
+
+
+async def capture(cases: List[Case]) -> Dict[str, List[Tuple[str, tuple]]]:
+    """각 케이스를 순서대로 호출하면서 실행된 SQL 문과 파라미터를 모읍니다."""
+    import httpx
+    from sqlalchemy import event
+
+    from app.database import engine
+    from app.main import app
+    from app.services.like_buffer import like_buffer
+
+    current = {"name": None}
+    captured: Dict[str, List[Tuple[str, tuple]]] = defaultdict(list)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current["name"] and not executemany and statement.lstrip()[:6].upper() in ("SELECT", "UPDATE", "DELETE"):
+            captured[current["name"]].append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://plans") as client:
+        for case in cases:
+            current["name"] = case.name
+            response = await client.request(case.method, case.path, params=case.params)
+            if response.status_code >= 400:
+                print(f"  경고: {case.name} -> {response.status_code} {response.text[:100]}")
+            current["name"] = None
+    await like_buffer.stop()
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def main():
+    parser = argparse.ArgumentParser(description="라우터 쿼리 실행 계획 점검")
+    parser.add_argument("--scale", default="small", help="합성 데이터 규모 (tiny/small/medium/large)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    parser.add_argument("--verbose", action="store_true", help="모든 쿼리의 실행 계획 출력")
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.workdir)
+    os.environ["LOCA_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'run', 'loca.db')}"
+    os.environ["LOCA_COORDINATION_DIR"] = os.path.join(workdir, "run", ".loca")
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    run_db, sizes = prepare_database(workdir, args.scale, args.seed)
+    os.chdir(os.path.dirname(run_db))
+    os.makedirs("uploads", exist_ok=True)
+
+    captured = asyncio.run(capture(build_cases(sizes)))
+
+    conn = sqlite3.connect(run_db)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    failures = []
+    allowed = 0
+    for name, statements in captured.items():
+        seen = set()
+        for statement, parameters in statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan = explain(conn, statement, parameters)
+            scans = full_scans(plan, tables)
+            if args.verbose or scans:
+                print(f"\n[{name}] {' '.join(statement.split())[:160]}")
+                for detail in plan:
+                    print(f"    {detail}")
+            for table in scans:
+                reason = ALLOWED_SCANS.get((name, table))
+                if reason:
+                    allowed += 1
+                    print(f"    허용된 전체 스캔: {table} ({reason})")
+                else:
+                    failures.append(f"{name}: {table} 전체 스캔")
+    conn.close()
+
+    total = sum(len(set(statement for statement, _ in statements)) for statements in captured.values())
+    print(f"\n라우트 {len(captured)}개, 쿼리 {total}개 점검, 허용된 전체 스캔 {allowed}개")
+    if failures:
+        print("인덱스 없이 전체 스캔하는 쿼리:")
+        for line in failures:
+            print(f"  - {line}")
+        sys.exit(1)
+    print("전체 스캔 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+추천 피드(/photos/for-you) 벤치마크
+
+합성 데이터(기본 좋아요 100만 개)로 사진 이웃 테이블을 전체 계산한 뒤,
+무작위 유저의 추천 후보 생성(recommend_photo_ids) p50/p99 지연 시간(ms)을 출력합니다.
+좋아요를 조금 추가/취소한 뒤의 증분 갱신 시간과, 그 결과가 전체 다시 계산한 이웃과 얼마나 같은지
+(사진별 top-k 겹침 비율)도 함께 측정합니다.
+
+사용법:
+    python -m benchmarks.recommend --likes 1000000 --queries 2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _percentiles(values):
+    values = sorted(values)
+    return values[len(values) // 2] * 1e3, values[min(len(values) - 1, int(len(values) * 0.99))] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추천 피드 벤치마크")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--photos", type=int, default=50_000)
+    parser.add_argument("--likes", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--changes", type=int, default=1_000, help="증분 갱신 전에 추가/취소할 좋아요 수")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["LOCA_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from sqlalchemy import delete, func, select
+
+        from app.database import SessionLocal, engine
+        from app.models import Like, PhotoNeighbors
+        from app.services.recommend import (
+            NEIGHBORS_K, _unpack, np, recommend_photo_ids, record_like_changes, refresh_neighbors,
+        )
+        from benchmarks.datagen import SCALES, generate
+
+        sizes = dict(SCALES["small"], users=args.users, photos=args.photos, likes=args.likes)
+        generate(engine, seed=args.seed, verbose=False, **sizes)
+        rng = random.Random(args.seed)
+        db = SessionLocal()
+        try:
+            like_count = db.execute(select(func.count()).select_from(Like)).scalar()
+            print(f"좋아요 {like_count}개, 사진 {args.photos}장, 유저 {args.users}명, k={NEIGHBORS_K}, "
+                  f"{'numpy/scipy' if np is not None else '순수 파이썬'}")
+
+            report = refresh_neighbors(db, full=True)
+            print(report.summary())
+
+            latencies = []
+            candidates = []
+            for _ in range(args.queries):
+                user_id = rng.randint(1, args.users)
+                started = time.perf_counter()
+                _, total, _ = recommend_photo_ids(db, user_id, 20)
+                latencies.append(time.perf_counter() - started)
+                candidates.append(total)
+            p50, p99 = _percentiles(latencies)
+            print(f"추천 후보 생성: p50 {p50:.2f}ms  p99 {p99:.2f}ms  평균 {statistics.mean(latencies) * 1e3:.2f}ms  "
+                  f"(후보 평균 {statistics.mean(candidates):.0f}개)")
+
+            # 좋아요 일부 취소 + 새 좋아요 추가 후 증분 갱신
+            removed = db.execute(select(Like.id, Like.user_id, Like.photo_id).order_by(func.random())
+                                 .limit(args.changes // 2)).all()
+            db.execute(delete(Like).where(Like.id.in_([row.id for row in removed])))
+            existing = set(db.execute(select(Like.user_id, Like.photo_id)).tuples())
+            added = []
+            while len(added) < args.changes - len(removed):
+                pair = (rng.randint(1, args.users), rng.randint(1, args.photos))
+                if pair not in existing:
+                    existing.add(pair)
+                    added.append({"user_id": pair[0], "photo_id": pair[1]})
+            db.execute(Like.__table__.insert(), added)
+            record_like_changes(db, [(row.user_id, row.photo_id) for row in removed]
+                                + [(row["user_id"], row["photo_id"]) for row in added])
+            db.commit()
+            report = refresh_neighbors(db)
+            print(f"좋아요 {args.changes}개 변경 후 증분 갱신: {report.summary()}")
+
+            def neighbor_sets():
+                return {photo_id: set(_unpack(neighbor_ids, "i")) for photo_id, neighbor_ids in
+                        db.execute(select(PhotoNeighbors.photo_id, PhotoNeighbors.neighbor_ids))}
+
+            incremental = neighbor_sets()
+            report = refresh_neighbors(db, full=True)
+            print(f"비교용 {report.summary()}")
+            exact = neighbor_sets()
+            overlaps = [len(incremental.get(photo_id, set()) & neighbors) / len(neighbors)
+                        for photo_id, neighbors in exact.items() if neighbors]
+            print(f"증분 결과와 전체 계산의 top-{NEIGHBORS_K} 겹침: 평균 {statistics.mean(overlaps) * 100:.2f}%, "
+                  f"완전히 같은 사진 {sum(o == 1.0 for o in overlaps) / len(overlaps) * 100:.1f}%")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
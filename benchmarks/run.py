@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+LOCA API 부하 테스트/벤치마크 실행기
+
+합성 데이터 DB를 만든 뒤(또는 캐시된 DB를 복사한 뒤) 앱을 프로세스 안에서 띄우고,
+스크립트로 정의된 워크로드를 동시 요청으로 실행합니다. 엔드포인트별 p50/p99 지연 시간과
+초당 요청 수를 출력하고, 저장된 기준값(baseline)과 비교해 성능 저하가 있으면 실패합니다.
+Gemini 호출은 대체 모델로 바꾸므로 네트워크 없이 실행됩니다.
+
+사용법:
+    python -m benchmarks.run --scale tiny --duration 10
+    python -m benchmarks.run --scale tiny --save-baseline
+    python -m benchmarks.run --workloads feed,search --concurrency 32
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+DEFAULT_WORKDIR = os.path.join(ROOT, ".bench")
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+WORKLOADS = ("feed", "search", "like", "upload", "contest")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """엔드포인트별 지연 시간/상태 코드를 모읍니다."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.elapsed: Dict[str, float] = defaultdict(float)
+
+    async def call(self, label: str, request):
+        started = time.perf_counter()
+        response = await request
+        self.latencies[label].append(time.perf_counter() - started)
+        if response.status_code >= 500:
+            self.errors[label] += 1
+        return response
+
+    def summary(self) -> Dict[str, dict]:
+        result = {}
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            elapsed = self.elapsed.get(label) or 1e-9
+            result[label] = {
+                "count": len(values),
+                "errors": self.errors.get(label, 0),
+                "rps": round(len(values) / elapsed, 1),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+            }
+        return result
+
+
+def _tiny_jpeg(rng: random.Random) -> bytes:
+    from PIL import Image
+
+    image = Image.new("RGB", (64, 48), (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+
+class Workloads:
+    """워크로드별 요청 시나리오"""
+
+    SEARCH_TERMS = ["한적한", "카페", "놀이터", "벤치", "유성구", "둔산동", "고즈넉한", "공원", "벽화", "호수"]
+
+    def __init__(self, client, recorder: Recorder, sizes: dict, seed: int):
+        self.client = client
+        self.recorder = recorder
+        self.sizes = sizes
+        self.seed = seed
+        self.images = [_tiny_jpeg(random.Random(seed + i)) for i in range(8)]
+
+    async def feed(self, rng: random.Random):
+        params = {"limit": 20, "offset": rng.choice([0, 0, 0, 20, 40, 100])}
+        label = "GET /photos/"
+        if rng.random() < 0.5:
+            params["keyword_id"] = rng.randint(1, min(self.sizes["keywords"], 20))
+            label = "GET /photos/?keyword_id"
+        await self.recorder.call(label, self.client.get("/photos/", params=params))
+
+    async def search(self, rng: random.Random):
+        params = {"q": rng.choice(self.SEARCH_TERMS), "limit": 20}
+        label = "GET /search/photos"
+        if rng.random() < 0.3:
+            params["sort_by"] = "likes"
+            label = "GET /search/photos?sort_by=likes"
+        await self.recorder.call(label, self.client.get("/search/photos", params=params))
+        if rng.random() < 0.3:
+            await self.recorder.call("GET /search/keywords",
+                                     self.client.get("/search/keywords", params={"q": params["q"][:1]}))
+
+    async def like(self, rng: random.Random):
+        photos = self.sizes["photos"]
+        # 최근 사진에 좋아요가 몰리는 패턴
+        photo_id = photos - min(int(rng.expovariate(1 / 50)), photos - 1)
+        user_id = rng.randint(1, self.sizes["users"])
+        if rng.random() < 0.8:
+            await self.recorder.call("POST /photos/{id}/like", self.client.post(
+                f"/photos/{photo_id}/like", params={"user_id": user_id}))
+        else:
+            await self.recorder.call("DELETE /photos/{id}/like", self.client.delete(
+                f"/photos/{photo_id}/like", params={"user_id": user_id}))
+
+    async def upload(self, rng: random.Random):
+        from benchmarks.datagen import daejeon_point
+
+        lat, lng, location = daejeon_point(rng)
+        data = {
+            "user_id": str(rng.randint(1, self.sizes["users"])),
+            "keyword_id": str(rng.randint(1, self.sizes["keywords"])),
+            "location": location,
+            "latitude": str(lat),
+            "longitude": str(lng),
+        }
+        files = {"file": (f"bench_{rng.randint(0, 10**9)}.jpg", rng.choice(self.images), "image/jpeg")}
+        await self.recorder.call("POST /photos/upload", self.client.post(
+            "/photos/upload", data=data, files=files, headers={"X-Loca-User-Id": data["user_id"]}))
+
+    async def contest(self, rng: random.Random):
+        host_id = rng.randint(1, self.sizes["users"])
+        response = await self.recorder.call("POST /contests/", self.client.post(
+            "/contests/", params={"user_id": host_id},
+            json={"title": "벤치마크 공모", "description": "대전의 숨은 명소를 찾습니다.", "points": 100}))
+        if response.status_code != 200:
+            return
+        contest_id = response.json()["id"]
+        submitted = []
+        for _ in range(3):
+            files = {"file": ("contest.jpg", rng.choice(self.images), "image/jpeg")}
+            data = {"user_id": str(rng.randint(1, self.sizes["users"])), "description": "참여합니다"}
+            response = await self.recorder.call("POST /contests/{id}/photos", self.client.post(
+                f"/contests/{contest_id}/photos", data=data, files=files, headers={"X-Loca-User-Id": data["user_id"]}))
+            if response.status_code == 200:
+                submitted.append(response.json()["id"])
+        await self.recorder.call("GET /contests/{id}/photos", self.client.get(f"/contests/{contest_id}/photos"))
+        await self.recorder.call("GET /contests/", self.client.get("/contests/", params={"limit": 20}))
+        if submitted:
+            await self.recorder.call("PUT /contests/{id}/select", self.client.put(
+                f"/contests/{contest_id}/select",
+                params={"photo_id": rng.choice(submitted), "user_id": host_id}))
+
+
+async def run_workload(name: str, workloads: Workloads, duration: float, concurrency: int, seed: int):
+    scenario = getattr(workloads, name)
+    deadline = time.perf_counter() + duration
+    before = {label: len(values) for label, values in workloads.recorder.latencies.items()}
+    started = time.perf_counter()
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            await scenario(rng)
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    for label, values in workloads.recorder.latencies.items():
+        if len(values) != before.get(label, 0):
+            workloads.recorder.elapsed[label] += elapsed
+
+
+def prepare_database(workdir: str, scale: str, seed: int) -> Tuple[str, dict]:
+    """scale/seed별 합성 DB를 캐시해 두고, 실행마다 복사본과 공모 사진 파일을 만듭니다."""
+    from benchmarks.datagen import SCALES, schema_fingerprint, write_placeholder_images
+
+    os.makedirs(workdir, exist_ok=True)
+    # 스키마가 바뀌면 지문이 달라져 합성 DB를 새로 만듭니다.
+    template = os.path.join(workdir, f"{scale}-{seed}-{schema_fingerprint()}.db")
+    sizes = dict(SCALES[scale])
+    if not os.path.exists(template):
+        from sqlalchemy import create_engine
+        from benchmarks.datagen import generate
+
+        print(f"합성 데이터 생성 중 ({scale}): {sizes}")
+        partial = template + ".partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        engine = create_engine(f"sqlite:///{partial}")
+        generate(engine, seed=seed, **sizes)
+        engine.dispose()
+        os.replace(partial, template)
+
+    run_dir = os.path.join(workdir, "run")
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.makedirs(run_dir)
+    run_db = os.path.join(run_dir, "loca.db")
+    shutil.copyfile(template, run_db)
+    write_placeholder_images(os.path.join(run_dir, "uploads"), seed)
+    return run_db, sizes
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for label, current in results.items():
+        reference = baseline.get(label)
+        if not reference:
+            continue
+        if reference["p99_ms"] > 0 and current["p99_ms"] > reference["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p99 {reference['p99_ms']}ms -> {current['p99_ms']}ms")
+        if reference["rps"] > 0 and current["rps"] < reference["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: req/s {reference['rps']} -> {current['rps']}")
+    return regressions
+
+
+def print_table(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None):
+    header = f"{'endpoint':<36} {'count':>7} {'err':>4} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f" {'base p99':>9}"
+    print(header)
+    print("-" * len(header))
+    for label, row in results.items():
+        line = (f"{label:<36} {row['count']:>7} {row['errors']:>4} {row['rps']:>9.1f} "
+                f"{row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f}")
+        if baseline:
+            reference = baseline.get(label)
+            line += f" {reference['p99_ms']:>9.2f}" if reference else f" {'-':>9}"
+        print(line)
+
+
+async def _main_async(args, sizes):
+    import httpx
+
+    from app.main import app
+    from app.services.like_buffer import like_buffer
+    from benchmarks.stub_ai import install_stub
+
+    install_stub(args.ai_latency_ms)
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        workloads = Workloads(client, recorder, sizes, args.seed)
+        for name in args.workloads:
+            print(f"워크로드 실행: {name} ({args.duration:.0f}s, 동시 {args.concurrency})")
+            await run_workload(name, workloads, args.duration, args.concurrency, args.seed)
+    await like_buffer.stop()
+    return recorder.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LOCA API 벤치마크")
+    parser.add_argument("--scale", default="tiny", help="합성 데이터 규모 (tiny/small/medium/large)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help=f"쉼표로 구분 ({', '.join(WORKLOADS)})")
+    parser.add_argument("--duration", type=float, default=10.0, help="워크로드별 실행 시간(초)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--ai-latency-ms", type=float, default=0.0, help="대체 AI 모델의 응답 지연")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    parser.add_argument("--baseline", help="기준값 JSON 경로 (기본: benchmarks/baselines/<scale>.json)")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="허용 성능 저하 비율")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+    args.baseline = args.baseline or os.path.join(BASELINE_DIR, f"{args.scale}.json")
+    args.workloads = [name.strip() for name in args.workloads.split(",") if name.strip()]
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        raise SystemExit(f"알 수 없는 워크로드: {', '.join(sorted(unknown))}")
+
+    # 앱(app.database) import 전에 DB/오프라인 설정을 마칩니다.
+    workdir = os.path.abspath(args.workdir)
+    os.environ["LOCA_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'run', 'loca.db')}"
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    run_db, sizes = prepare_database(workdir, args.scale, args.seed)
+
+    os.chdir(os.path.dirname(run_db))
+    os.makedirs("uploads", exist_ok=True)
+
+    results = asyncio.run(_main_async(args, sizes))
+
+    baseline_doc = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline_doc = json.load(f)
+    baseline = None
+    if baseline_doc and baseline_doc.get("scale") == args.scale:
+        baseline = baseline_doc.get("results")
+
+    print()
+    print_table(results, baseline)
+
+    document = {
+        "scale": args.scale,
+        "seed": args.seed,
+        "duration": args.duration,
+        "concurrency": args.concurrency,
+        "machine": f"{platform.system()} {platform.machine()} py{platform.python_version()}",
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+        print(f"\n기준값 저장: {args.baseline}")
+        return
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\n성능 저하 감지:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\n기준값 대비 성능 저하 없음 (허용 {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+목록 응답 직렬화 마이크로 벤치마크 (요청당 사진 1000장)
+
+같은 사진 1000장을 세 방식으로 JSON 응답 본문까지 만들어 요청당 시간을 비교합니다.
+  - legacy: ORM 객체 조회 → 사진마다 좋아요 수/유저 조회 → PhotoResponse(**photo.__dict__)
+            → FastAPI의 response_model 재검증 → jsonable_encoder → json.dumps
+  - pydantic: 조회는 lean과 같고 직렬화만 기존 방식 (검증 2회 + jsonable_encoder + json)
+  - lean:   필요한 컬럼만 튜플로 조회 → 좋아요 수/닉네임 일괄 조회 → dict → orjson
+세 방식의 결과가 같은지도 함께 확인합니다.
+
+사용법:
+    python -m benchmarks.serialization --photos 1000 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _legacy(db, limit: int) -> bytes:
+    """기존 get_photos 핸들러 + FastAPI 응답 처리와 동일한 방식"""
+    from typing import List
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    from app.models import Like, Photo, User
+    from app.schemas.photo import PhotoResponse
+
+    photos = db.query(Photo).order_by(Photo.uploaded_at.desc()).limit(limit).all()
+    result = []
+    for photo in photos:
+        like_count = db.query(Like).filter(Like.photo_id == photo.id).count()
+        user = db.query(User).filter(User.id == photo.user_id).first()
+        photo_dict = photo.__dict__.copy()
+        photo_dict.pop("image_path", None)
+        result.append(PhotoResponse(
+            **photo_dict,
+            image_path=photo.image_path,
+            user_nickname=user.nickname if user else "알 수 없는 사용자",
+            like_count=like_count,
+        ))
+    # FastAPI는 response_model로 반환값을 한 번 더 검증한 뒤 JSON으로 인코딩합니다.
+    adapter = TypeAdapter(List[PhotoResponse])
+    content = adapter.dump_python(adapter.validate_python(result, from_attributes=True), mode="json")
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _pydantic(db, limit: int) -> bytes:
+    """일괄 조회는 lean과 같고 직렬화만 기존 방식 (직렬화 비용만 비교)"""
+    from typing import List
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    from app.models import Photo
+    from app.schemas.photo import PhotoResponse
+    from app.services.serialization import PHOTO_COLUMNS, photo_rows_to_dicts
+
+    rows = db.query(*PHOTO_COLUMNS).order_by(Photo.uploaded_at.desc()).limit(limit).all()
+    result = [PhotoResponse(**item) for item in photo_rows_to_dicts(db, rows)]
+    adapter = TypeAdapter(List[PhotoResponse])
+    content = adapter.dump_python(adapter.validate_python(result, from_attributes=True), mode="json")
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _lean(db, limit: int) -> bytes:
+    """현재 get_photos 핸들러와 동일한 방식"""
+    from fastapi.responses import ORJSONResponse
+
+    from app.models import Photo
+    from app.services.serialization import PHOTO_COLUMNS, photo_rows_to_dicts
+
+    rows = db.query(*PHOTO_COLUMNS).order_by(Photo.uploaded_at.desc()).limit(limit).all()
+    return ORJSONResponse(photo_rows_to_dicts(db, rows)).body
+
+
+def _measure(fn, session_factory, limit: int, repeat: int):
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            body = fn(db, limit)
+            timings.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    return timings, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="목록 응답 직렬화 마이크로 벤치마크")
+    parser.add_argument("--photos", type=int, default=1000, help="요청당 사진 수")
+    parser.add_argument("--repeat", type=int, default=20, help="방식별 반복 횟수")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["LOCA_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from app.database import SessionLocal, engine
+
+        from benchmarks.datagen import generate
+
+        generate(engine, users=500, keywords=20, photos=args.photos, likes=args.photos * 5,
+                 contests=0, contest_photos=0, seed=args.seed, verbose=False)
+
+        results = {}
+        for name, fn in (("legacy", _legacy), ("pydantic", _pydantic), ("lean", _lean)):
+            results[name] = _measure(fn, SessionLocal, args.photos, args.repeat)
+
+        expected = json.loads(results["lean"][1])
+        for name, (_, body) in results.items():
+            if json.loads(body) != expected:
+                raise SystemExit(f"{name} 방식의 응답 내용이 다릅니다.")
+
+        print(f"사진 {args.photos}장 목록, 방식별 {args.repeat}회 (응답 {len(results['lean'][1]) / 1024:.0f} KiB)")
+        for name, (timings, _) in results.items():
+            print(f"  {name:>8}: 중앙값 {statistics.median(timings) * 1000:.1f}ms, 최소 {min(timings) * 1000:.1f}ms")
+        lean = statistics.median(results["lean"][0])
+        print(f"  개선 배율: 전체 x{statistics.median(results['legacy'][0]) / lean:.1f}, "
+              f"직렬화만 x{statistics.median(results['pydantic'][0]) / lean:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+오프라인 벤치마크용 Gemini 대체 모델
+
+실제 API 대신 고정된 설명을 돌려주며, 선택적으로 응답 지연을 흉내 냅니다.
+공모 관련도 평가(ai_service.RELEVANCE_PROMPT)에는 사진 수만큼의 점수 배열을 돌려줍니다.
+"""
+
+import json
+import re
+import time
+import zlib
+
+# 구조화된 분석 응답 (ai_service.ANALYSIS_PROMPT가 요청하는 JSON 형식)
+DEFAULT_RESPONSE = json.dumps({
+    "description": "한적한 분위기의 공원으로, 벤치와 나무가 있는 조용한 공간입니다.",
+    "place_type": "공원",
+    "elements": ["벤치", "나무"],
+    "mood": "한적한",
+}, ensure_ascii=False)
+
+
+_ENTRY = re.compile(r"^(\d+)\. (.*)$")
+
+
+def relevance_scores(prompt: str) -> str:
+    """관련도 프롬프트의 번호 붙은 사진 설명마다 0~100 점수를 (설명 내용 기준으로 항상 같게) 매깁니다."""
+    scores = []
+    for line in prompt.splitlines():
+        match = _ENTRY.match(line)
+        if match and int(match.group(1)) == len(scores) + 1:
+            scores.append(zlib.crc32(match.group(2).encode("utf-8")) % 101)
+    return json.dumps(scores)
+
+
+class _StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubGenerativeModel:
+    """genai.GenerativeModel.generate_content와 같은 모양의 대체 모델"""
+
+    def __init__(self, latency_ms: float = 0.0, text: str = DEFAULT_RESPONSE):
+        self.latency = latency_ms / 1000.0
+        self.text = text
+        self.calls = 0
+
+    def generate_content(self, contents, **kwargs):
+        from app.services.ai_service import RELEVANCE_PROMPT
+
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(contents, str) and contents.startswith(RELEVANCE_PROMPT.split("{title}")[0]):
+            return _StubResponse(relevance_scores(contents))
+        return _StubResponse(self.text)
+
+
+def install_stub(latency_ms: float = 0.0) -> StubGenerativeModel:
+    """전역 ai_service의 모델을 대체 모델로 바꿉니다."""
+    from app.services.ai_service import ai_service
+
+    stub = StubGenerativeModel(latency_ms)
+    ai_service.model = stub
+    return stub
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+자동완성(/search/suggest) 색인 지연 시간 벤치마크
+
+합성 데이터에 서로 다른 위치 문자열을 추가로 넣어 색인을 만든 뒤,
+무작위 접두어(완성형 일부, 자모 단위 입력 중, 초성)로 suggest()를 호출해
+캐시 없는 조회와 캐시된 조회의 p50/p99 지연 시간(µs)을 출력하고,
+일부 질의는 모든 항목을 직접 비교한 순위와 같은지 검사합니다.
+기존 방식(LIKE '%q%' 전체 검색)과 색인 생성/따라잡기 시간도 함께 비교합니다.
+
+사용법:
+    python -m benchmarks.suggest --locations 50000 --queries 5000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _percentiles(values):
+    values = sorted(values)
+    return values[len(values) // 2] * 1e6, values[min(len(values) - 1, int(len(values) * 0.99))] * 1e6
+
+
+def _queries(rng: random.Random, texts, count: int):
+    from app.services.suggest import choseong, decompose
+
+    queries = []
+    for _ in range(count):
+        text = rng.choice(texts)
+        words = text.split()
+        word = " ".join(words[rng.randrange(len(words)):])
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(word[:rng.randint(1, min(4, len(word)))])
+        elif kind < 0.7:
+            # 입력 중인 마지막 글자: 완성된 앞 글자 + 다음 글자의 초성
+            cut = rng.randint(1, min(3, len(word)))
+            queries.append(word[:cut - 1] + decompose(word[cut - 1])[0])
+        else:
+            queries.append(choseong(word)[:rng.randint(1, 4)])
+    return queries
+
+
+def _expected(index, query: str, limit: int):
+    """색인 없이 모든 항목을 직접 비교해 순위를 매긴 정답 (전체 후보 기준)"""
+    from app.services.suggest import _normalize, choseong, decompose, is_choseong_query
+
+    normalized = _normalize(query)
+    initials = is_choseong_query(normalized)
+    prefix = choseong(normalized) if initials else decompose(normalized)
+    candidates = []
+    for number, item in enumerate(index.items):
+        inner = [inner for jamo_key, initials_key, inner in index._keys(item.text)
+                 if (initials_key if initials else jamo_key).startswith(prefix)]
+        if inner:
+            candidates.append((min(inner), -item.weight, len(item.text), item.text, number))
+    return [index.items[candidate[-1]].text for candidate in sorted(candidates)[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="자동완성 색인 지연 시간 벤치마크")
+    parser.add_argument("--locations", type=int, default=50_000, help="추가할 서로 다른 위치 문자열 수")
+    parser.add_argument("--queries", type=int, default=5_000)
+    parser.add_argument("--check", type=int, default=200, help="전체 비교로 순위를 검사할 질의 수")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["LOCA_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from app.database import SessionLocal, engine
+        from app.models import Keyword, Photo
+        from app.services.suggest import SuggestIndex
+        from benchmarks.datagen import HOTSPOTS, KEYWORD_ADJECTIVES, KEYWORD_PLACES, SCALES, generate
+
+        sizes = dict(SCALES["tiny"])
+        generate(engine, seed=args.seed, verbose=False, **sizes)
+        rng = random.Random(args.seed)
+        places = [place for place, _ in KEYWORD_PLACES]
+        rows = []
+        for i in range(args.locations):
+            hotspot = rng.choice(HOTSPOTS)[3]
+            rows.append({"id": sizes["photos"] + i + 1, "user_id": 1, "keyword_id": 1,
+                         "image_path": f"uploads/bench/{i}.jpg",
+                         "location": f"{hotspot} {rng.choice(KEYWORD_ADJECTIVES)} {rng.choice(places)} {i}"})
+        with engine.begin() as conn:
+            conn.execute(Photo.__table__.insert(), rows)
+
+        index = SuggestIndex(refresh_seconds=0)
+        started = time.perf_counter()
+        index.rebuild()
+        build_ms = (time.perf_counter() - started) * 1000
+
+        texts = [item.text for item in index.items]
+        queries = _queries(rng, texts, args.queries)
+
+        cold = []
+        for query in queries:
+            index._cache.clear()
+            started = time.perf_counter()
+            index.suggest(query, 10)
+            cold.append(time.perf_counter() - started)
+        warm = []
+        for query in queries:
+            started = time.perf_counter()
+            index.suggest(query, 10)
+            warm.append(time.perf_counter() - started)
+
+        # 기존 방식: 키워드 LIKE '%q%' + 위치 DISTINCT LIKE '%q%'
+        db = SessionLocal()
+        like = []
+        try:
+            for query in queries[:200]:
+                started = time.perf_counter()
+                db.query(Keyword).filter(Keyword.keyword.contains(query)).all()
+                db.query(Photo.location).filter(Photo.location.contains(query)).distinct().limit(10).all()
+                like.append(time.perf_counter() - started)
+        finally:
+            db.close()
+
+        # 새 사진 100장 따라잡기
+        with engine.begin() as conn:
+            conn.execute(Photo.__table__.insert(), [
+                {"id": sizes["photos"] + args.locations + i + 1, "user_id": 1, "keyword_id": 2,
+                 "image_path": f"uploads/bench/new{i}.jpg", "location": f"대전 서구 새로운 장소 {i}"}
+                for i in range(100)
+            ])
+        started = time.perf_counter()
+        index.catch_up()
+        catch_up_ms = (time.perf_counter() - started) * 1000
+        found = index.suggest("ㅅㄹㅇ", 5)
+
+        # 짧은 접두어(한 글자, 초성 하나)를 포함해 전체 비교 결과와 순위가 같은지 검사
+        checks = ["ㄷ", "ㅎ", "대", "ㅅ", "ㄷㅈ"] + queries[:args.check]
+        index._cache.clear()
+        mismatched = [query for query in checks
+                      if [item["text"] for item in index.suggest(query, 10)] != _expected(index, query, 10)]
+
+        print(f"색인 항목 {len(index.items)}개, 생성 {build_ms:.0f}ms, 새 사진 100장 따라잡기 {catch_up_ms:.1f}ms")
+        for name, values in (("캐시 없음", cold), ("캐시", warm), ("LIKE 검색", like)):
+            p50, p99 = _percentiles(values)
+            print(f"  {name:>8}: p50 {p50:8.1f}µs  p99 {p99:8.1f}µs  평균 {statistics.mean(values) * 1e6:8.1f}µs")
+        print(f"  순위 검사: {len(checks) - len(mismatched)}/{len(checks)} 일치"
+              + (f" (불일치 예: {mismatched[:5]})" if mismatched else ""))
+        print(f"  예: 'ㅎㅈ' -> {[item['text'] for item in index.suggest('ㅎㅈ', 3)]}")
+        print(f"  예: 'ㅅㄹㅇ' (따라잡은 위치) -> {[item['text'] for item in found][:3]}")
+
+
+if __name__ == "__main__":
+    main()
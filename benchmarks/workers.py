@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+워커 수에 따른 읽기 처리량(req/s) 확장성 벤치마크
+
+합성 데이터 DB로 serve.py를 워커 1개, 2개, ... 로 실제 HTTP 서버로 띄우고,
+여러 클라이언트 프로세스에서 읽기 엔드포인트(피드/공모 목록)를 동시에 호출해
+워커 수별 초당 처리량과 1워커 대비 확장 효율을 출력합니다.
+클라이언트도 CPU를 쓰므로 코어 수가 워커 수 + 클라이언트 수보다 넉넉한 머신에서 측정해야 합니다.
+
+사용법:
+    python -m benchmarks.workers --scale small --workers 1,2,4 --clients 8
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+READ_PATHS = ("/photos/", "/contests/")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, timeout: float = 30.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base_url + "/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit("서버가 시작되지 않았습니다.")
+
+
+def _client(base_url: str, duration: float, seed: int, keywords: int, counter):
+    """한 클라이언트 프로세스: 정해진 시간 동안 읽기 요청을 연속으로 보냅니다."""
+    import httpx
+
+    rng = random.Random(seed)
+    done = errors = 0
+    deadline = time.monotonic() + duration
+    with httpx.Client(base_url=base_url, timeout=30.0) as client:
+        while time.monotonic() < deadline:
+            path = rng.choice(READ_PATHS)
+            params = {"limit": 20}
+            if path == "/photos/" and rng.random() < 0.5:
+                params["keyword_id"] = rng.randint(1, keywords)
+            if client.get(path, params=params).status_code >= 500:
+                errors += 1
+            done += 1
+    with counter.get_lock():
+        counter[0] += done
+        counter[1] += errors
+
+
+def measure(run_db: str, workers: int, clients: int, duration: float, keywords: int) -> dict:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    run_dir = os.path.dirname(run_db)
+    env = dict(os.environ,
+               LOCA_DATABASE_URL=f"sqlite:///{run_db}",
+               LOCA_COORDINATION_DIR=os.path.join(run_dir, ".loca"),
+               GEMINI_API_KEY=os.getenv("GEMINI_API_KEY", "offline-benchmark"),
+               PYTHONPATH=ROOT)
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "serve.py"), "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers)],
+        cwd=run_dir, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(base_url)
+        # 워커 전부가 요청을 받을 수 있도록 잠시 예열
+        _client(base_url, 1.0, 0, keywords, multiprocessing.Array("l", 2))
+        counter = multiprocessing.Array("l", 2)
+        processes = [
+            multiprocessing.Process(target=_client, args=(base_url, duration, i + 1, keywords, counter))
+            for i in range(clients)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    return {"workers": workers, "requests": counter[0], "errors": counter[1], "rps": counter[0] / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워커 수별 읽기 처리량 확장성 벤치마크")
+    parser.add_argument("--scale", default="tiny", help="합성 데이터 규모 (tiny/small/medium/large)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", default="1,2,4", help="쉼표로 구분한 워커 수 목록")
+    parser.add_argument("--clients", type=int, default=8, help="클라이언트 프로세스 수")
+    parser.add_argument("--duration", type=float, default=10.0, help="워커 수별 측정 시간(초)")
+    parser.add_argument("--workdir", default=os.path.join(ROOT, ".bench"))
+    args = parser.parse_args()
+
+    from benchmarks.run import prepare_database
+
+    counts = [int(value) for value in args.workers.split(",") if value.strip()]
+    print(f"CPU 코어 {os.cpu_count()}개, 클라이언트 프로세스 {args.clients}개")
+    results = []
+    for workers in counts:
+        run_db, sizes = prepare_database(os.path.abspath(args.workdir), args.scale, args.seed)
+        result = measure(run_db, workers, args.clients, args.duration, min(sizes["keywords"], 20))
+        results.append(result)
+        print(f"  워커 {workers}개: {result['rps']:.1f} req/s (요청 {result['requests']}, 오류 {result['errors']})")
+
+    base = results[0]
+    print()
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8} {'efficiency':>10}")
+    for result in results:
+        speedup = result["rps"] / base["rps"] if base["rps"] else 0.0
+        efficiency = speedup / (result["workers"] / base["workers"])
+        print(f"{result['workers']:>8} {result['rps']:>10.1f} {speedup:>7.2f}x {efficiency * 100:>9.0f}%")
+
+
+if __name__ == "__main__":
+    main()
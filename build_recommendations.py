@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+추천 이웃 테이블(photo_neighbors) 생성 도구
+
+좋아요 테이블로 사진 간 공동 좋아요 유사도를 계산해 사진마다 상위 k개 이웃을 저장합니다.
+기본은 좋아요 변경 기록(like_changes)만 반영하며(전체 계산한 지 LOCA_RECOMMEND_FULL_REBUILD_S가 지났으면 전체),
+--full이면 전체를 다시 계산합니다.
+numpy/scipy가 설치되어 있으면 희소 행렬 곱으로, 없으면 순수 파이썬으로 같은 결과를 계산합니다.
+
+사용법:
+    python build_recommendations.py             # 좋아요 변경 기록 반영
+    python build_recommendations.py --full [--k 50]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.services.coordination import named_lock
+from app.services.recommend import NEIGHBORS_K, np, refresh_neighbors
+
+
+def build_recommendations(full: bool, k: int):
+    # 리더 워커의 주기 갱신(LOCA_RECOMMEND_REFRESH_S)과 동시에 실행되지 않도록 잠금을 잡습니다.
+    lock = named_lock("recommendations")
+    if not lock.try_acquire():
+        print("다른 추천 이웃 갱신 작업이 실행 중입니다.")
+        return
+    db = SessionLocal()
+    try:
+        print(f"{'전체' if full else '증분'} 갱신 ({'numpy/scipy' if np is not None else '순수 파이썬'}, k={k})")
+        report = refresh_neighbors(db, full=full, k=k)
+        print(f"완료: {report.summary()}")
+    finally:
+        db.close()
+        lock.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추천 이웃 테이블 생성")
+    parser.add_argument("--full", action="store_true", help="변경 기록만이 아니라 전체를 다시 계산")
+    parser.add_argument("--k", type=int, default=NEIGHBORS_K, help="사진마다 저장할 이웃 수")
+    args = parser.parse_args()
+
+    build_recommendations(args.full, args.k)
+
+
+if __name__ == "__main__":
+    main()
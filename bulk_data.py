@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+대용량 데이터 가져오기/내보내기 도구
+
+유저, 키워드, 사진(파일 포함), 좋아요, 공모, 공모 사진을 테이블별 JSONL 또는 CSV로
+스트리밍 내보내고, 큰 트랜잭션 안에서 executemany로 다시 적재합니다.
+적재 중에는 보조 인덱스를 지우고 끝난 뒤 한 번에 다시 만듭니다.
+
+사용법:
+    python bulk_data.py export snapshot/ [--format csv] [--no-files]
+    python bulk_data.py import snapshot/ [--truncate] [--uploads-root .]
+    python bulk_data.py verify [snapshot/] [--uploads-root .]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# orjson이 있으면 JSONL 파싱에 사용 (없으면 표준 json)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+from app.database import Base, SessionLocal, engine
+from app.services.clusters import fill_geo_cells, rebuild_clusters
+from app.services.contest_summaries import rebuild_contest_summaries
+from app.services.coordination import coordinator
+from app.services.recommend import reset_neighbors
+from app.services.entity_cache import KEYWORDS_CACHE, USERS_CACHE
+from app.services.storage import PACKS_PREFIX, image_path_for_key, key_from_image_path, pack_file_name
+from app import models  # noqa: F401  (모든 테이블을 메타데이터에 등록)
+
+# 의존 순서대로 정렬한 대상 테이블
+TABLES = ["users", "keywords", "photos", "photo_tags", "likes", "contests", "contest_photos", "stored_objects",
+          "packed_objects"]
+# 이미지 파일을 참조하는 테이블과 컬럼
+FILE_COLUMNS = {"photos": "image_path", "contest_photos": "image_path"}
+
+BATCH_SIZE = 50_000
+CSV_NULL = "\\N"
+MANIFEST = "manifest.json"
+FILES_DIR = "files"
+FILES_MANIFEST = "files.jsonl"
+# verify에서 개별로 출력할 최대 문제 파일 수
+MAX_REPORTED = 50
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_packed(conn, image_path: str) -> bool:
+    """보관 작업이 팩 파일로 옮긴 파일인지 확인합니다. (팩 파일은 따로 내보내고 복원)"""
+    cursor = conn.connection.cursor()
+    cursor.execute("SELECT 1 FROM packed_objects WHERE key = ?", (key_from_image_path(image_path),))
+    found = cursor.fetchone() is not None
+    cursor.close()
+    return found
+
+
+def _columns(table_name: str) -> List[str]:
+    return [column.name for column in Base.metadata.tables[table_name].columns]
+
+
+def _batched(rows: Iterable, size: int = BATCH_SIZE) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------------------------------------------------------------------------
+# 내보내기
+# ---------------------------------------------------------------------------
+
+def _iter_table(conn, table_name: str, columns: Sequence[str]) -> Iterator[tuple]:
+    """DB에 저장된 값을 그대로(드라이버 값) 스트리밍합니다."""
+    cursor = conn.connection.cursor()
+    try:
+        order_by = ", ".join(column.name for column in Base.metadata.tables[table_name].primary_key.columns)
+        cursor.execute(f"SELECT {', '.join(columns)} FROM {table_name} ORDER BY {order_by}")
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def _write_rows(path: str, fmt: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow([CSV_NULL if value is None else value for value in row])
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str))
+                f.write("\n")
+                count += 1
+    return count
+
+
+def export_snapshot(out_dir: str, fmt: str = "jsonl", include_files: bool = True, uploads_root: str = "."):
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {"format": fmt, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "tables": {}}
+
+    with engine.connect() as conn:
+        for table_name in TABLES:
+            columns = _columns(table_name)
+            started = time.perf_counter()
+            path = os.path.join(out_dir, f"{table_name}.{fmt}")
+            count = _write_rows(path, fmt, columns, _iter_table(conn, table_name, columns))
+            manifest["tables"][table_name] = {"file": os.path.basename(path), "columns": columns, "rows": count}
+            print(f"  {table_name}: {count}행 ({time.perf_counter() - started:.1f}s)")
+
+        if include_files:
+            copied = missing = packed = 0
+            with open(os.path.join(out_dir, FILES_MANIFEST), "w", encoding="utf-8") as files_out:
+
+                def copy_file(image_path: str) -> bool:
+                    source = os.path.join(uploads_root, image_path)
+                    if not os.path.isfile(source):
+                        return False
+                    target = os.path.join(out_dir, FILES_DIR, image_path)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.copyfile(source, target)
+                    record = {"path": image_path, "size": os.path.getsize(target), "sha256": _sha256(target)}
+                    files_out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    return True
+
+                for table_name, column in FILE_COLUMNS.items():
+                    cursor = conn.connection.cursor()
+                    cursor.execute(f"SELECT {column} FROM {table_name} ORDER BY id")
+                    for (image_path,) in iter(cursor.fetchone, None):
+                        if copy_file(image_path):
+                            copied += 1
+                        elif _is_packed(conn, image_path):
+                            packed += 1
+                        else:
+                            missing += 1
+                    cursor.close()
+                # 팩으로 옮긴 파일은 팩 파일을 통째로 복사 (packed_objects 테이블이 색인)
+                cursor = conn.connection.cursor()
+                cursor.execute("SELECT DISTINCT pack_id FROM packed_objects ORDER BY pack_id")
+                for (pack_id,) in iter(cursor.fetchone, None):
+                    image_path = image_path_for_key(f"{PACKS_PREFIX}/{pack_file_name(pack_id)}")
+                    if copy_file(image_path):
+                        copied += 1
+                    else:
+                        missing += 1
+                cursor.close()
+            manifest["files"] = {"copied": copied, "missing": missing, "packed": packed}
+            print(f"  파일: {copied}개 복사 (팩에 보관된 파일 {packed}개), {missing}개 누락")
+
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+# ---------------------------------------------------------------------------
+# 가져오기
+# ---------------------------------------------------------------------------
+
+def _read_rows(path: str, fmt: str, columns: Sequence[str]) -> Iterator[list]:
+    if fmt == "csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            if header == list(columns):
+                for record in reader:
+                    yield [None if value == CSV_NULL else value for value in record]
+            else:
+                order = [header.index(column) if column in header else None for column in columns]
+                for record in reader:
+                    yield [None if i is None or record[i] == CSV_NULL else record[i] for i in order]
+    else:
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    record = _json_loads(line)
+                    yield [record.get(column) for column in columns]
+
+
+def _secondary_indexes(table_names: Iterable[str]):
+    for table_name in table_names:
+        yield from Base.metadata.tables[table_name].indexes
+
+
+def import_snapshot(in_dir: str, truncate: bool = False, restore_files: bool = True, uploads_root: str = "."):
+    with open(os.path.join(in_dir, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    fmt = manifest["format"]
+
+    Base.metadata.create_all(bind=engine)
+    indexes = list(_secondary_indexes(TABLES))
+    sqlite = engine.dialect.name == "sqlite"
+    total_started = time.perf_counter()
+
+    with engine.connect() as conn:
+        if sqlite:
+            # 적재 동안만 안전장치를 끄고 끝나면 원래 값으로 되돌립니다.
+            journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            conn.exec_driver_sql("PRAGMA journal_mode=MEMORY")
+            conn.exec_driver_sql("PRAGMA cache_size=-262144")
+            conn.exec_driver_sql("PRAGMA temp_store=MEMORY")
+            conn.commit()
+        try:
+            with conn.begin():
+                for table_name in TABLES:
+                    if not truncate:
+                        existing = conn.exec_driver_sql(f"SELECT 1 FROM {table_name} LIMIT 1").first()
+                        if existing:
+                            raise SystemExit(f"{table_name} 테이블이 비어 있지 않습니다. --truncate 를 사용하세요.")
+                    else:
+                        conn.exec_driver_sql(f"DELETE FROM {table_name}")
+
+                # 보조 인덱스는 적재 후 한 번에 생성
+                for index in indexes:
+                    conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+
+                for table_name in TABLES:
+                    info = manifest["tables"].get(table_name)
+                    if not info:
+                        continue
+                    started = time.perf_counter()
+                    columns = [c for c in info["columns"] if c in _columns(table_name)]
+                    sql = (f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                           f"VALUES ({', '.join('?' if sqlite else '%s' for _ in columns)})")
+                    rows = _read_rows(os.path.join(in_dir, info["file"]), fmt, columns)
+                    count = 0
+                    # 같은 트랜잭션의 DBAPI 커서로 직접 executemany (행별 타입 처리 비용 없음)
+                    cursor = conn.connection.cursor()
+                    for batch in _batched(rows):
+                        cursor.executemany(sql, batch)
+                        count += len(batch)
+                    cursor.close()
+                    print(f"  {table_name}: {count}행 ({time.perf_counter() - started:.1f}s)")
+
+                started = time.perf_counter()
+                for index in indexes:
+                    index.create(conn)
+                print(f"  인덱스 {len(indexes)}개 생성 ({time.perf_counter() - started:.1f}s)")
+        finally:
+            if sqlite:
+                conn.rollback()
+                conn.exec_driver_sql("PRAGMA synchronous=FULL")
+                conn.exec_driver_sql(f"PRAGMA journal_mode={journal_mode}")
+                conn.commit()
+
+    print(f"  DB 적재 완료 ({time.perf_counter() - total_started:.1f}s)")
+    # 지도 클러스터와 공모 요약 집계는 스냅샷에 없으므로 적재한 데이터로 다시 계산
+    # (추천 이웃은 비워 두면 다음 갱신 때 전체를 다시 계산)
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        fill_geo_cells(db)
+        cells = sum(rebuild_clusters(db).values())
+        summaries = rebuild_contest_summaries(db)
+        reset_neighbors(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"  지도 클러스터 {cells}칸, 공모 요약 {summaries}개 재계산 ({time.perf_counter() - started:.1f}s)")
+    # 실행 중인 서버 워커들의 메모리 색인을 다시 만들도록 알림
+    coordinator.invalidate("suggest")
+    coordinator.invalidate(USERS_CACHE)
+    coordinator.invalidate(KEYWORDS_CACHE)
+    if restore_files and os.path.exists(os.path.join(in_dir, FILES_MANIFEST)):
+        restored, skipped = _restore_files(in_dir, uploads_root)
+        print(f"  파일: {restored}개 복원, {skipped}개는 이미 동일")
+
+
+def _restore_files(in_dir: str, uploads_root: str):
+    restored = skipped = 0
+    with open(os.path.join(in_dir, FILES_MANIFEST), encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            target = os.path.join(uploads_root, record["path"])
+            if os.path.isfile(target) and os.path.getsize(target) == record["size"] \
+                    and _sha256(target) == record["sha256"]:
+                skipped += 1
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(os.path.join(in_dir, FILES_DIR, record["path"]), target)
+            restored += 1
+    return restored, skipped
+
+
+# ---------------------------------------------------------------------------
+# 검증
+# ---------------------------------------------------------------------------
+
+def verify_files(snapshot_dir: Optional[str] = None, uploads_root: str = ".", check_hash: bool = True) -> int:
+    """DB가 참조하는 파일이 uploads/ 아래에 있는지(스냅샷이 있으면 해시까지) 확인합니다."""
+    expected = {}
+    if snapshot_dir and os.path.exists(os.path.join(snapshot_dir, FILES_MANIFEST)):
+        with open(os.path.join(snapshot_dir, FILES_MANIFEST), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                expected[record["path"]] = record
+
+    checked = missing = mismatched = 0
+    with engine.connect() as conn:
+        for table_name, column in FILE_COLUMNS.items():
+            cursor = conn.connection.cursor()
+            cursor.execute(f"SELECT id, {column} FROM {table_name} ORDER BY id")
+            for row_id, image_path in iter(cursor.fetchone, None):
+                checked += 1
+                path = os.path.join(uploads_root, image_path)
+                if not os.path.isfile(path):
+                    if _is_packed(conn, image_path):
+                        continue  # 팩 파일에 보관됨
+                    missing += 1
+                    if missing + mismatched <= MAX_REPORTED:
+                        print(f"  누락: {table_name}#{row_id} {image_path}")
+                    continue
+                record = expected.get(image_path)
+                if record and check_hash and (os.path.getsize(path) != record["size"] or _sha256(path) != record["sha256"]):
+                    mismatched += 1
+                    if missing + mismatched <= MAX_REPORTED:
+                        print(f"  불일치: {table_name}#{row_id} {image_path}")
+            cursor.close()
+
+    print(f"  확인 {checked}개, 누락 {missing}개, 해시 불일치 {mismatched}개")
+    return missing + mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LOCA 대용량 데이터 가져오기/내보내기")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="DB와 이미지 파일을 스냅샷 디렉토리로 내보냅니다")
+    p_export.add_argument("directory")
+    p_export.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    p_export.add_argument("--no-files", action="store_true", help="이미지 파일은 복사하지 않음")
+    p_export.add_argument("--uploads-root", default=".", help="image_path의 기준 디렉토리")
+
+    p_import = sub.add_parser("import", help="스냅샷 디렉토리를 DB로 적재합니다")
+    p_import.add_argument("directory")
+    p_import.add_argument("--truncate", action="store_true", help="기존 행을 지우고 적재")
+    p_import.add_argument("--no-files", action="store_true", help="이미지 파일은 복원하지 않음")
+    p_import.add_argument("--uploads-root", default=".")
+
+    p_verify = sub.add_parser("verify", help="DB가 참조하는 이미지 파일을 검증합니다")
+    p_verify.add_argument("directory", nargs="?", help="해시 비교에 사용할 스냅샷 디렉토리")
+    p_verify.add_argument("--uploads-root", default=".")
+    p_verify.add_argument("--no-hash", action="store_true")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        print(f"내보내기: {args.directory} ({args.format})")
+        export_snapshot(args.directory, args.format, not args.no_files, args.uploads_root)
+    elif args.command == "import":
+        print(f"가져오기: {args.directory}")
+        import_snapshot(args.directory, args.truncate, not args.no_files, args.uploads_root)
+    else:
+        print("파일 검증 중...")
+        sys.exit(1 if verify_files(args.directory, args.uploads_root, not args.no_hash) else 0)
+
+
+if __name__ == "__main__":
+    main()
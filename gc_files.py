@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+고아 파일 정리 도구
+
+업로드 저장소(uploads/ 또는 S3)와 이미지 변형 캐시(image_cache/)의 파일을 배치 단위로 DB와 대조해
+어떤 사진/공모 사진/참조 수(stored_objects)도 가리키지 않는 파일을 찾습니다.
+기본은 보고만 하는 dry-run이며, --delete를 주면 지웁니다.
+업로드 중(커밋 전)인 파일을 지우지 않도록 --min-age-hours보다 최근 파일은 건너뜁니다.
+
+사용법:
+    python gc_files.py                      # 보고만
+    python gc_files.py --delete [--min-age-hours 24] [--batch 400]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.coordination import named_lock
+from app.services.file_gc import FILE_GC_BATCH, FILE_GC_MIN_AGE_SECONDS, collect_orphans
+
+
+def gc_files(delete: bool, min_age_hours: float, batch_size: int, show_samples: bool):
+    # 리더 워커의 주기 정리(LOCA_FILE_GC_INTERVAL_S)와 동시에 실행되지 않도록 잠금을 잡습니다.
+    lock = named_lock("file_gc")
+    if not lock.try_acquire():
+        print("다른 고아 파일 정리 작업이 실행 중입니다.")
+        return
+    try:
+        started = time.perf_counter()
+        reports = collect_orphans(dry_run=not delete, min_age_seconds=min_age_hours * 3600, batch_size=batch_size)
+        print(f"{'삭제' if delete else 'dry-run'} 완료 ({time.perf_counter() - started:.1f}s)")
+        for report in reports:
+            print(f"  {report.summary()}")
+            if show_samples:
+                for name in report.samples:
+                    print(f"    - {name}")
+        if not delete and any(report.orphans for report in reports):
+            print("실제로 지우려면 --delete 옵션을 주세요.")
+    finally:
+        lock.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="고아 파일 정리")
+    parser.add_argument("--delete", action="store_true", help="고아 파일을 실제로 삭제 (기본은 보고만)")
+    parser.add_argument("--min-age-hours", type=float, default=FILE_GC_MIN_AGE_SECONDS / 3600,
+                        help="이보다 최근에 만들어진 파일은 건너뜀")
+    parser.add_argument("--batch", type=int, default=FILE_GC_BATCH, help="한 번에 DB와 대조할 파일 수")
+    parser.add_argument("--quiet", action="store_true", help="고아 파일 예시 목록을 출력하지 않음")
+    args = parser.parse_args()
+
+    gc_files(args.delete, args.min_age_hours, args.batch, not args.quiet)
+
+
+if __name__ == "__main__":
+    main()
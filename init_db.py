@@ -1,5 +1,5 @@
 from app.database import engine, Base
-from app.models import user, keyword, photo, like, contest, contest_photo
+from app.models import user, keyword, photo, photo_cluster_cell, photo_neighbors, photo_tag, like, like_change, contest, contest_photo, contest_summary, stored_object, packed_object, cache_stamp
 import os
 
 def init_database():
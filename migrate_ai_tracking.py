@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Photo 테이블에 AI 분석 추적 컬럼(ai_model, prompt_version, analyzed_at)을 추가하는 마이그레이션 스크립트
+
+기존 사진은 추적 정보가 비어 있으므로 backfill_ai.py 실행 시 재분석 대상이 됩니다.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, inspect, text
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SQLALCHEMY_DATABASE_URL
+
+NEW_COLUMNS = [
+    ("ai_model", "VARCHAR(100)"),
+    ("prompt_version", "INTEGER"),
+    ("analyzed_at", "DATETIME"),
+]
+
+def migrate_ai_tracking_columns():
+    """photos 테이블에 AI 분석 추적 컬럼을 추가합니다."""
+    
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    try:
+        existing = {column["name"] for column in inspect(engine).get_columns("photos")}
+        with engine.connect() as connection:
+            for name, column_type in NEW_COLUMNS:
+                if name in existing:
+                    print(f"{name} 컬럼이 이미 존재합니다.")
+                    continue
+                connection.execute(text(f"ALTER TABLE photos ADD COLUMN {name} {column_type}"))
+                print(f"{name} 컬럼이 성공적으로 추가되었습니다.")
+            connection.commit()
+            
+    except Exception as e:
+        print(f"마이그레이션 중 오류 발생: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("Photo 테이블에 AI 분석 추적 컬럼 추가 중...")
+    migrate_ai_tracking_columns()
+    print("마이그레이션 완료!")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+보관 계층(팩 파일)을 위한 마이그레이션 스크립트
+
+stored_objects에 마지막 조회 시각(last_accessed_at) 컬럼을, 팩 파일 색인 테이블(packed_objects)을 추가합니다.
+기존 파일은 조회 기록이 비어 있으므로 올린 시각을 기준으로 오래 조회되지 않은 파일을 고릅니다.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, inspect, text
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import PackedObject
+
+def migrate_archive_tiering():
+    """stored_objects.last_accessed_at 컬럼과 packed_objects 테이블을 추가합니다."""
+    
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    try:
+        existing = {column["name"] for column in inspect(engine).get_columns("stored_objects")}
+        with engine.connect() as connection:
+            if "last_accessed_at" in existing:
+                print("last_accessed_at 컬럼이 이미 존재합니다.")
+            else:
+                connection.execute(text("ALTER TABLE stored_objects ADD COLUMN last_accessed_at DATETIME"))
+                print("last_accessed_at 컬럼이 성공적으로 추가되었습니다.")
+            PackedObject.__table__.create(connection, checkfirst=True)
+            print("packed_objects 테이블을 확인했습니다.")
+            connection.commit()
+            
+    except Exception as e:
+        print(f"마이그레이션 중 오류 발생: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("보관 계층 테이블 추가 중...")
+    migrate_archive_tiering()
+    print("마이그레이션 완료!")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+ContestPhoto 테이블에 AI 사전 심사 컬럼(ai_description, relevance_score, screened_at)과 인덱스를 추가하는 마이그레이션 스크립트
+
+기존 참여 사진은 심사 대기(screened_at 비어 있음)로 남고, 서버의 리더 워커가 차례로 심사합니다.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, inspect, text
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import ContestPhoto
+
+COLUMNS = {
+    "ai_description": "TEXT",
+    "relevance_score": "FLOAT",
+    "screened_at": "DATETIME",
+}
+INDEX_NAMES = ("ix_contest_photos_contest_relevance", "ix_contest_photos_screened")
+
+def migrate_screening_columns():
+    """contest_photos 테이블에 심사 컬럼과 인덱스를 추가합니다."""
+    
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    try:
+        inspector = inspect(engine)
+        existing = {column["name"] for column in inspector.get_columns("contest_photos")}
+        indexes = {index["name"] for index in inspector.get_indexes("contest_photos")}
+        with engine.connect() as connection:
+            for name, column_type in COLUMNS.items():
+                if name in existing:
+                    print(f"{name} 컬럼이 이미 존재합니다.")
+                else:
+                    connection.execute(text(f"ALTER TABLE contest_photos ADD COLUMN {name} {column_type}"))
+                    print(f"{name} 컬럼이 성공적으로 추가되었습니다.")
+            for index in ContestPhoto.__table__.indexes:
+                if index.name not in INDEX_NAMES:
+                    continue
+                if index.name in indexes:
+                    print(f"{index.name} 인덱스가 이미 존재합니다.")
+                else:
+                    index.create(connection)
+                    print(f"{index.name} 인덱스가 성공적으로 추가되었습니다.")
+            connection.commit()
+            
+    except Exception as e:
+        print(f"마이그레이션 중 오류 발생: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("ContestPhoto 테이블에 AI 사전 심사 컬럼 추가 중...")
+    migrate_screening_columns()
+    print("마이그레이션 완료!")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+공모 카드 집계 테이블(contest_summaries)을 추가하는 마이그레이션 스크립트
+
+기존 공모의 참여 사진 수, 참여자 수, 마지막 참여 시각, 미리보기/선정 사진을 참여 사진 테이블에서 계산해 채웁니다.
+여러 번 실행해도 안전하며, 집계가 어긋났다고 의심될 때 다시 실행하면 새로 계산합니다.
+"""
+
+import os
+import sys
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import ContestSummary
+from app.services.contest_summaries import rebuild_contest_summaries
+
+def migrate_contest_summaries():
+    """contest_summaries 테이블을 만들고 모든 공모의 요약을 다시 계산합니다."""
+    
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    try:
+        with engine.connect() as connection:
+            ContestSummary.__table__.create(connection, checkfirst=True)
+            connection.commit()
+        
+        db = sessionmaker(bind=engine)()
+        try:
+            started = time.perf_counter()
+            count = rebuild_contest_summaries(db)
+            db.commit()
+            print(f"공모 {count}개의 요약을 계산했습니다. ({time.perf_counter() - started:.1f}s)")
+        finally:
+            db.close()
+            
+    except Exception as e:
+        print(f"마이그레이션 중 오류 발생: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("공모 요약 테이블 추가 중...")
+    migrate_contest_summaries()
+    print("마이그레이션 완료!")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+모델에 선언된 인덱스 중 기존 DB에 없는 것을 만드는 마이그레이션 스크립트
+
+피드/검색/공모 목록이 사용하는 인덱스(photos.uploaded_at, (keyword_id, uploaded_at),
+likes.photo_id, contest_photos.contest_id 등)는 create_all로 새로 만든 DB에만 생기므로,
+이전에 만들어진 DB는 이 스크립트로 추가합니다. 여러 번 실행해도 안전합니다.
+SQLite는 끝난 뒤 ANALYZE로 플래너 통계를 갱신합니다.
+"""
+
+import os
+import sys
+import time
+from sqlalchemy import create_engine, inspect
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SQLALCHEMY_DATABASE_URL, Base
+from app import models  # noqa: F401  (모든 테이블을 메타데이터에 등록)
+
+def migrate_indexes():
+    """선언되었지만 DB에 없는 인덱스를 생성합니다."""
+
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+    try:
+        inspector = inspect(engine)
+        tables = set(inspector.get_table_names())
+        created = 0
+        with engine.connect() as connection:
+            for table in Base.metadata.sorted_tables:
+                if table.name not in tables:
+                    print(f"{table.name} 테이블이 없어 건너뜁니다. (init_db.py로 생성)")
+                    continue
+                existing = {index["name"] for index in inspector.get_indexes(table.name)}
+                for index in sorted(table.indexes, key=lambda index: index.name):
+                    if index.name in existing:
+                        continue
+                    started = time.perf_counter()
+                    index.create(connection)
+                    connection.commit()
+                    created += 1
+                    print(f"{index.name} 인덱스 생성 ({table.name}, {time.perf_counter() - started:.1f}s)")
+            if engine.dialect.name == "sqlite" and created:
+                connection.exec_driver_sql("ANALYZE")
+                connection.commit()
+        if not created:
+            print("추가할 인덱스가 없습니다.")
+
+    except Exception as e:
+        print(f"마이그레이션 중 오류 발생: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("누락된 인덱스 추가 중...")
+    migrate_indexes()
+    print("마이그레이션 완료!")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+좋아요 변경 기록 테이블(like_changes)을 추가하는 마이그레이션 스크립트
+
+추천 이웃 증분 갱신은 이 기록에 남은 좋아요 추가/취소만 반영합니다.
+likes의 사진별 인덱스는 (photo_id, user_id)로 바꿔 사진별 좋아요 유저를 테이블 조회 없이 읽게 합니다.
+테이블을 만든 뒤 첫 갱신은 전체를 다시 계산하도록 build_recommendations.py --full을 한 번 실행하세요.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, inspect
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import Like, LikeChange
+
+OLD_INDEX = "ix_likes_photo_id"
+
+def migrate_like_changes():
+    """like_changes 테이블을 만들고 likes의 사진별 인덱스를 (photo_id, user_id)로 바꿉니다."""
+    
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    try:
+        existing = {index["name"] for index in inspect(engine).get_indexes("likes")}
+        with engine.connect() as connection:
+            LikeChange.__table__.create(connection, checkfirst=True)
+            print("like_changes 테이블을 확인했습니다.")
+            for index in Like.__table__.indexes:
+                if index.name not in existing:
+                    index.create(connection)
+                    print(f"{index.name} 인덱스를 만들었습니다.")
+            if OLD_INDEX in existing:
+                connection.exec_driver_sql(f"DROP INDEX {OLD_INDEX}")
+                print(f"{OLD_INDEX} 인덱스를 지웠습니다.")
+            connection.commit()
+            
+    except Exception as e:
+        print(f"마이그레이션 중 오류 발생: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("좋아요 변경 기록 테이블 추가 중...")
+    migrate_like_changes()
+    print("마이그레이션 완료!")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+지도 클러스터용 컬럼(photos.geo_cell)과 집계 테이블(photo_cluster_cells)을 추가하는 마이그레이션 스크립트
+
+좌표가 있는 기존 사진의 geo_cell을 채운 뒤 줌별 클러스터 집계를 다시 계산합니다.
+여러 번 실행해도 안전하며, 집계가 사진 테이블과 어긋났다고 의심될 때 다시 실행하면 새로 계산합니다.
+"""
+
+import os
+import sys
+import time
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import Photo, PhotoClusterCell
+from app.services.clusters import fill_geo_cells, rebuild_clusters
+
+INDEX_NAME = "ix_photos_geo_cell"
+
+def migrate_photo_clusters():
+    """geo_cell 컬럼/인덱스와 photo_cluster_cells 테이블을 추가하고 집계를 다시 계산합니다."""
+    
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    try:
+        inspector = inspect(engine)
+        existing = {column["name"] for column in inspector.get_columns("photos")}
+        indexes = {index["name"] for index in inspector.get_indexes("photos")}
+        with engine.connect() as connection:
+            if "geo_cell" in existing:
+                print("geo_cell 컬럼이 이미 존재합니다.")
+            else:
+                connection.execute(text("ALTER TABLE photos ADD COLUMN geo_cell INTEGER"))
+                print("geo_cell 컬럼이 성공적으로 추가되었습니다.")
+            if INDEX_NAME not in indexes:
+                next(index for index in Photo.__table__.indexes if index.name == INDEX_NAME).create(connection)
+                print(f"{INDEX_NAME} 인덱스가 성공적으로 추가되었습니다.")
+            PhotoClusterCell.__table__.create(connection, checkfirst=True)
+            connection.commit()
+        
+        db = sessionmaker(bind=engine)()
+        try:
+            started = time.perf_counter()
+            filled = fill_geo_cells(db)
+            print(f"사진 {filled}장의 geo_cell을 채웠습니다. ({time.perf_counter() - started:.1f}s)")
+            started = time.perf_counter()
+            sizes = rebuild_clusters(db)
+            db.commit()
+            print(f"줌 {min(sizes)}~{max(sizes)} 클러스터 {sum(sizes.values())}칸 재계산 ({time.perf_counter() - started:.1f}s)")
+        finally:
+            db.close()
+            
+    except Exception as e:
+        print(f"마이그레이션 중 오류 발생: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("지도 클러스터 집계 추가 중...")
+    migrate_photo_clusters()
+    print("마이그레이션 완료!")
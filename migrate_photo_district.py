@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Photo 테이블에 행정구역 컬럼(district_id)과 인덱스(ix_photos_district_uploaded)를 추가하는 마이그레이션 스크립트
+
+추가 후 backfill_districts.py로 기존 사진의 행정구역을 채웁니다.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, inspect, text
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import Photo
+
+INDEX_NAME = "ix_photos_district_uploaded"
+
+def migrate_district_column():
+    """photos 테이블에 district_id 컬럼과 인덱스를 추가합니다."""
+    
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    try:
+        inspector = inspect(engine)
+        existing = {column["name"] for column in inspector.get_columns("photos")}
+        indexes = {index["name"] for index in inspector.get_indexes("photos")}
+        with engine.connect() as connection:
+            if "district_id" in existing:
+                print("district_id 컬럼이 이미 존재합니다.")
+            else:
+                connection.execute(text("ALTER TABLE photos ADD COLUMN district_id INTEGER"))
+                print("district_id 컬럼이 성공적으로 추가되었습니다.")
+            if INDEX_NAME in indexes:
+                print(f"{INDEX_NAME} 인덱스가 이미 존재합니다.")
+            else:
+                next(index for index in Photo.__table__.indexes if index.name == INDEX_NAME).create(connection)
+                print(f"{INDEX_NAME} 인덱스가 성공적으로 추가되었습니다.")
+            connection.commit()
+            
+    except Exception as e:
+        print(f"마이그레이션 중 오류 발생: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("Photo 테이블에 행정구역 컬럼 추가 중...")
+    migrate_district_column()
+    print("마이그레이션 완료!")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Photo 테이블에 EXIF 촬영 시각 컬럼(captured_at)을 추가하는 마이그레이션 스크립트
+
+새 업로드부터 EXIF에서 읽은 촬영 시각이 채워지며, 기존 사진은 비어 있습니다.
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, inspect, text
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SQLALCHEMY_DATABASE_URL
+
+def migrate_captured_at_column():
+    """photos 테이블에 captured_at 컬럼을 추가합니다."""
+    
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    try:
+        existing = {column["name"] for column in inspect(engine).get_columns("photos")}
+        if "captured_at" in existing:
+            print("captured_at 컬럼이 이미 존재합니다.")
+            return
+        with engine.connect() as connection:
+            connection.execute(text("ALTER TABLE photos ADD COLUMN captured_at DATETIME"))
+            connection.commit()
+            print("captured_at 컬럼이 성공적으로 추가되었습니다.")
+            
+    except Exception as e:
+        print(f"마이그레이션 중 오류 발생: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("Photo 테이블에 촬영 시각 컬럼 추가 중...")
+    migrate_captured_at_column()
+    print("마이그레이션 완료!")
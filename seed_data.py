@@ -1,5 +1,9 @@
+from sqlalchemy import insert
+
 from app.database import SessionLocal
 from app.models import User, Keyword
+from app.services.coordination import coordinator
+from app.services.entity_cache import KEYWORDS_CACHE, USERS_CACHE
 
 def seed_initial_data():
     """시연용 초기 데이터를 생성합니다."""
@@ -15,9 +19,7 @@ def seed_initial_data():
             {"nickname": "김철수", "points": 10000},
         ]
         
-        for user_data in users_data:
-            user = User(**user_data)
-            db.add(user)
+        db.execute(insert(User), users_data)
         
         # 키워드 데이터 생성
         keywords_data = [
@@ -33,11 +35,12 @@ def seed_initial_data():
             {"keyword": "평화로운 호수", "category": "자연"},
         ]
         
-        for keyword_data in keywords_data:
-            keyword = Keyword(**keyword_data)
-            db.add(keyword)
+        db.execute(insert(Keyword), keywords_data)
         
         db.commit()
+        # 실행 중인 서버 워커들의 유저/키워드 캐시 비움
+        coordinator.invalidate(USERS_CACHE)
+        coordinator.invalidate(KEYWORDS_CACHE)
         print("✅ 시연용 초기 데이터가 성공적으로 생성되었습니다!")
         print(f"   - 유저: {len(users_data)}명")
         print(f"   - 키워드: {len(keywords_data)}개")
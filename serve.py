@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+운영용 멀티 워커 실행기
+
+uvicorn 워커 프로세스를 여러 개 띄워 CPU 코어 수만큼 요청을 병렬로 처리합니다.
+워커들은 같은 잠금 디렉토리(LOCA_COORDINATION_DIR)를 공유하며, 그중 리더 하나만
+시작 시 마이그레이션과 주기 작업을 실행하고 캐시 무효화는 cache_stamps 테이블로 전파됩니다.
+(app/services/coordination.py 참고)
+
+사용법:
+    python serve.py --workers 4 --port 8000
+    LOCA_WORKERS=8 python serve.py
+
+gunicorn을 쓰는 경우에도 조율 방식은 같습니다:
+    gunicorn app.main:app -k uvicorn.workers.UvicornWorker -w 4 -b 0.0.0.0:8000
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LOCA 멀티 워커 서버")
+    parser.add_argument("--host", default=os.getenv("LOCA_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("LOCA_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("LOCA_WORKERS", os.cpu_count() or 1)),
+                        help="워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--log-level", default=os.getenv("LOCA_LOG_LEVEL", "warning").lower())
+    args = parser.parse_args()
+
+    # 워커들이 작업 디렉토리와 관계없이 같은 잠금 파일을 보도록 절대 경로로 고정
+    os.environ["LOCA_COORDINATION_DIR"] = os.path.abspath(os.getenv("LOCA_COORDINATION_DIR", ".loca"))
+
+    import uvicorn
+
+    print(f"LOCA 서버 시작: http://{args.host}:{args.port} (워커 {args.workers}개)")
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()